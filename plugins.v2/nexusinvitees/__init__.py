@@ -8,17 +8,20 @@ import json
 import time
 import threading
 import base64
+import hashlib
 from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 import traceback
 
 import requests
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse, quote
+from fastapi.responses import StreamingResponse
 from bs4 import BeautifulSoup
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.core.config import settings
+from app.core.event import eventmanager, Event
 from app.plugins import _PluginBase
 from app.log import logger
 from app.schemas import Response
@@ -29,6 +32,20 @@ from app.helper.sites import SitesHelper
 from plugins.nexusinvitees.data import DataManager
 from plugins.nexusinvitees.utils import NotificationHelper, SiteHelper
 from plugins.nexusinvitees.module_loader import ModuleLoader
+from plugins.nexusinvitees.engine import RefreshEngine, RefreshQueue, SiteLocks
+from plugins.nexusinvitees.session import RefreshSession, get_fact
+from plugins.nexusinvitees.summary import get_site_payload, build_site_summary
+from plugins.nexusinvitees.scheduler import AdaptiveScheduler
+from plugins.nexusinvitees.http_client import HttpClient
+from plugins.nexusinvitees.breaker import CircuitBreaker
+from plugins.nexusinvitees.query import QueryError
+from plugins.nexusinvitees.export import EXPORT_FORMATS, parse_columns, iter_export
+from plugins.nexusinvitees.aio import AsyncRefreshDriver, httpx_available
+from plugins.nexusinvitees.parse_pool import ParsePool
+from plugins.nexusinvitees.records import to_plain
+from plugins.nexusinvitees.telemetry import DEFAULT_KEEP_RUNS, PHASE_NAMES, build_site_record, summarize_runs
+from plugins.nexusinvitees.page_cache import SitePageCache, normalize_ttl, DEFAULT_TTL_HOURS, \
+    PAGE_BONUS_SHOP, PAGE_SEND_INVITE
 
 class Prescription():
     def __init__(self):
@@ -67,6 +84,10 @@ class Prescription():
     def setDeadCount(self, site_name, value):
         self._tag(site_name, "dead", value)
 
+    def setSummary(self, site_name, row):
+        for key, value in (row or {}).items():
+            self._tag(site_name, key, value)
+
     def _export(self):
         med_list = []
         failed_list = []
@@ -426,7 +447,7 @@ class nexusinvitees(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/madrays/MoviePilot-Plugins/main/icons/nexusinvitee.png"
     # 插件版本
-    plugin_version = "1.3.0"
+    plugin_version = "1.3.18"
     # 插件作者
     plugin_author = "madrays,bfjy"
     # 作者主页
@@ -444,6 +465,18 @@ class nexusinvitees(_PluginBase):
     _cron = "0 9 * * *"  # 默认每天早上9点检查一次
     _onlyonce = False
     _nexus_sites = []  # 支持多选的站点列表
+    _max_workers = RefreshEngine.DEFAULT_WORKERS  # 并发刷新站点数
+    _parser_backend = "html.parser"  # HTML解析后端
+    _adaptive_refresh = False  # 按数据变化频率自适应刷新
+    _async_refresh = False  # 使用异步事件循环刷新
+    _min_interval = AdaptiveScheduler.DEFAULT_MIN_HOURS  # 自适应刷新最小间隔（小时）
+    _max_interval = AdaptiveScheduler.DEFAULT_MAX_HOURS  # 自适应刷新最大间隔（小时）
+    _bonus_cache_hours = DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP]  # 魔力值商店缓存时间（小时）
+    _send_page_cache_hours = DEFAULT_TTL_HOURS[PAGE_SEND_INVITE]  # 发送邀请页面缓存时间（小时）
+    _http_retries = HttpClient.DEFAULT_RETRIES  # 请求失败重试次数
+    _http_backoff = HttpClient.DEFAULT_BACKOFF  # 重试退避系数（秒）
+    _breaker_cooldown = CircuitBreaker.DEFAULT_COOLDOWN_MINUTES  # 站点熔断冷却时间（分钟）
+    _parse_workers = 0  # HTML解析子进程数，0为在抓取线程中解析
 
     # 站点助手
     sites: SitesHelper = None
@@ -455,12 +488,28 @@ class nexusinvitees(_PluginBase):
     # 通知助手
     notify_helper: NotificationHelper = None
     
-    # 站点处理器列表
-    _site_handlers = []
+    # 站点处理器注册表
+    _handler_registry: ModuleLoader = None
 
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
 
+    # 站点级刷新锁与按需刷新队列
+    _site_locks: SiteLocks = None
+    _refresh_queue: RefreshQueue = None
+    # 自适应刷新调度
+    _refresh_scheduler: AdaptiveScheduler = None
+    # 共享HTTP客户端（连接池跨刷新复用）
+    _http_client: HttpClient = None
+    # 站点熔断器，及不重试的探测用客户端
+    _breaker: CircuitBreaker = None
+    _probe_client: HttpClient = None
+    # HTML解析进程池
+    _parse_pool: ParsePool = None
+    # 详情页面渲染缓存：(数据版本键, 页面组件)，及按站点缓存的卡片 站点 -> (站点版本键, 卡片)
+    _page_render_cache: Optional[Tuple[tuple, List[dict]]] = None
+    _site_card_cache: Dict[str, Tuple[tuple, dict]] = {}
+
     presc : Prescription = None
 
     def init_plugin(self, config=None):
@@ -484,25 +533,53 @@ class nexusinvitees(_PluginBase):
             except Exception as e:
                 logger.error(f"创建数据目录失败: {str(e)}")
         
-        # 初始化数据管理器（仅保留数据存储，移除配置存储）
+        # 初始化数据管理器（仅保留数据存储，移除配置存储），重新初始化时先关闭旧的数据库连接
+        if self.data_manager:
+            self.data_manager.close()
         self.data_manager = DataManager(data_path)
+        self._page_render_cache = None
+        self._site_card_cache = {}
         
         # 初始化通知助手
         self.notify_helper = NotificationHelper(self)
         
-        # 加载站点处理器
-        self._site_handlers = ModuleLoader.load_site_handlers()
-        logger.info(f"加载了 {len(self._site_handlers)} 个站点处理器")
+        # 建立站点处理器索引，处理器模块在首次使用时导入
+        self._handler_registry = ModuleLoader()
+        self._handler_registry.load()
+        logger.info(f"索引了 {self._handler_registry.handler_count} 个站点处理器")
 
         # 停止现有服务
         self.stop_service()
 
+        # 站点级刷新锁，单站点刷新可与其他站点的刷新并行
+        self._site_locks = SiteLocks()
+        self._refresh_queue = RefreshQueue(self._refresh_queued_sites)
+
         # 处理传入的配置参数
         if config:
             self._enabled = config.get("enabled", False)
             self._notify = config.get("notify", False)
             self._cron = config.get("cron", "0 9 * * *")
             self._onlyonce = config.get("onlyonce", False)
+            self._max_workers = RefreshEngine.normalize_workers(
+                config.get("max_workers", RefreshEngine.DEFAULT_WORKERS))
+            self._parser_backend = config.get("parser_backend") or "html.parser"
+            self._adaptive_refresh = config.get("adaptive_refresh", False)
+            self._async_refresh = config.get("async_refresh", False)
+            self._min_interval, self._max_interval = AdaptiveScheduler.normalize_hours(
+                config.get("min_interval", AdaptiveScheduler.DEFAULT_MIN_HOURS),
+                config.get("max_interval", AdaptiveScheduler.DEFAULT_MAX_HOURS))
+            self._bonus_cache_hours = normalize_ttl(
+                config.get("bonus_cache_hours", DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP]), DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP])
+            self._send_page_cache_hours = normalize_ttl(
+                config.get("send_page_cache_hours", DEFAULT_TTL_HOURS[PAGE_SEND_INVITE]),
+                DEFAULT_TTL_HOURS[PAGE_SEND_INVITE])
+            self._http_retries, self._http_backoff = HttpClient.normalize_retry(
+                config.get("http_retries", HttpClient.DEFAULT_RETRIES),
+                config.get("http_backoff", HttpClient.DEFAULT_BACKOFF))
+            self._breaker_cooldown = CircuitBreaker.normalize_cooldown(
+                config.get("breaker_cooldown", CircuitBreaker.DEFAULT_COOLDOWN_MINUTES))
+            self._parse_workers = ParsePool.normalize_workers(config.get("parse_workers", 0))
             
             # 处理站点ID
             self._nexus_sites = []
@@ -518,6 +595,17 @@ class nexusinvitees(_PluginBase):
                         pass           
             # 保存配置
             self.__update_config()
+
+        # 自适应刷新调度
+        self._refresh_scheduler = AdaptiveScheduler(self.data_manager, self._min_interval, self._max_interval)
+        # 共享HTTP客户端（stop_service已关闭旧客户端，重新创建）
+        self._http_client = None
+        self._ensure_http_client()
+        # 站点熔断
+        self._breaker = CircuitBreaker(self.data_manager, self._breaker_cooldown)
+        self._probe_client = HttpClient(retries=0)
+        # HTML解析进程池，首次解析时才启动子进程
+        self._parse_pool = ParsePool(self._parse_workers) if self._parse_workers else None
         
         # 如果启用了插件
         if self._enabled:
@@ -571,17 +659,52 @@ class nexusinvitees(_PluginBase):
             
             # 2. 重新导入核心模块
             logger.debug("重新导入核心模块...")
+            importlib.import_module('plugins.nexusinvitees.records')
             importlib.import_module('plugins.nexusinvitees.data')
             importlib.import_module('plugins.nexusinvitees.utils')
             importlib.import_module('plugins.nexusinvitees.module_loader')
+            importlib.import_module('plugins.nexusinvitees.http_client')
+            importlib.import_module('plugins.nexusinvitees.engine')
+            importlib.import_module('plugins.nexusinvitees.session')
+            importlib.import_module('plugins.nexusinvitees.summary')
+            importlib.import_module('plugins.nexusinvitees.history')
+            importlib.import_module('plugins.nexusinvitees.page_cache')
+            importlib.import_module('plugins.nexusinvitees.breaker')
+            importlib.import_module('plugins.nexusinvitees.query')
+            importlib.import_module('plugins.nexusinvitees.export')
+            importlib.import_module('plugins.nexusinvitees.telemetry')
+            importlib.import_module('plugins.nexusinvitees.aio')
+            importlib.import_module('plugins.nexusinvitees.parse_pool')
+            importlib.import_module('plugins.nexusinvitees.scheduler')
             
             # 3. 更新全局引用以确保使用的是最新版本
             logger.debug("更新全局模块引用...")
-            global DataManager, NotificationHelper, ModuleLoader
+            global DataManager, NotificationHelper, ModuleLoader, RefreshEngine, RefreshQueue, SiteLocks, \
+                RefreshSession, get_fact, \
+                get_site_payload, build_site_summary, AdaptiveScheduler, \
+                SitePageCache, normalize_ttl, DEFAULT_TTL_HOURS, PAGE_BONUS_SHOP, PAGE_SEND_INVITE, HttpClient, \
+                CircuitBreaker, QueryError, EXPORT_FORMATS, parse_columns, iter_export, \
+                AsyncRefreshDriver, httpx_available, DEFAULT_KEEP_RUNS, PHASE_NAMES, build_site_record, summarize_runs, \
+                ParsePool, to_plain
             try:
                 from plugins.nexusinvitees.data import DataManager
                 from plugins.nexusinvitees.utils import NotificationHelper
                 from plugins.nexusinvitees.module_loader import ModuleLoader
+                from plugins.nexusinvitees.engine import RefreshEngine, RefreshQueue, SiteLocks
+                from plugins.nexusinvitees.session import RefreshSession, get_fact
+                from plugins.nexusinvitees.summary import get_site_payload, build_site_summary
+                from plugins.nexusinvitees.scheduler import AdaptiveScheduler
+                from plugins.nexusinvitees.http_client import HttpClient
+                from plugins.nexusinvitees.breaker import CircuitBreaker
+                from plugins.nexusinvitees.query import QueryError
+                from plugins.nexusinvitees.export import EXPORT_FORMATS, parse_columns, iter_export
+                from plugins.nexusinvitees.telemetry import DEFAULT_KEEP_RUNS, PHASE_NAMES, build_site_record, \
+                    summarize_runs
+                from plugins.nexusinvitees.aio import AsyncRefreshDriver, httpx_available
+                from plugins.nexusinvitees.parse_pool import ParsePool
+                from plugins.nexusinvitees.records import to_plain
+                from plugins.nexusinvitees.page_cache import SitePageCache, normalize_ttl, DEFAULT_TTL_HOURS, \
+                    PAGE_BONUS_SHOP, PAGE_SEND_INVITE
                 logger.debug("核心模块引用更新成功")
             except Exception as e:
                 logger.error(f"更新核心模块引用失败: {str(e)}")
@@ -604,6 +727,18 @@ class nexusinvitees(_PluginBase):
             "cron": self._cron,
             "onlyonce": self._onlyonce,
             "site_ids": self._nexus_sites,
+            "max_workers": self._max_workers,
+            "parser_backend": self._parser_backend,
+            "adaptive_refresh": self._adaptive_refresh,
+            "async_refresh": self._async_refresh,
+            "parse_workers": self._parse_workers,
+            "min_interval": self._min_interval,
+            "max_interval": self._max_interval,
+            "bonus_cache_hours": self._bonus_cache_hours,
+            "send_page_cache_hours": self._send_page_cache_hours,
+            "http_retries": self._http_retries,
+            "http_backoff": self._http_backoff,
+            "breaker_cooldown": self._breaker_cooldown,
         }
         # 使用父类的update_config方法而不是自己的方法，避免递归
         super().update_config(config)
@@ -618,7 +753,15 @@ class nexusinvitees(_PluginBase):
         """
         注册插件命令
         """
-        return []
+        return [{
+            "cmd": "/nexusinvitees_refresh",
+            "event": EventType.PluginAction,
+            "desc": "刷新后宫站点",
+            "category": "站点",
+            "data": {
+                "action": "nexusinvitees_refresh"
+            }
+        }]
 
     def get_api(self) -> List[Dict[str, Any]]:
         """
@@ -642,12 +785,49 @@ class nexusinvitees(_PluginBase):
             "methods": ["GET"],
             "summary": "获取被邀请人列表",
             "description": "获取所有站点的被邀请人列表及状态",
+        }, {
+            "path": "/query_invitees",
+            "endpoint": self.query_invitees,
+            "methods": ["GET"],
+            "summary": "查询被邀请人",
+            "description": "按站点、健康度、启用状态、分享率、最后活动时间筛选被邀请人，"
+                           "支持按数值列排序（sort、order）和游标分页（limit、cursor）",
+        }, {
+            "path": "/export_invitees",
+            "endpoint": self.export_invitees,
+            "methods": ["GET"],
+            "summary": "导出被邀请人",
+            "description": "以NDJSON或CSV（format）流式导出全部站点或指定站点的被邀请人，columns指定导出的列（逗号分隔）",
         }, {
             "path": "/refresh_data",
             "endpoint": self.refresh_data,
             "methods": ["GET"],
             "summary": "刷新数据",
             "description": "强制刷新所有站点数据",
+        }, {
+            "path": "/refresh_sites",
+            "endpoint": self.refresh_sites,
+            "methods": ["GET"],
+            "summary": "刷新指定站点",
+            "description": "按站点名称或ID（逗号分隔）将站点加入刷新队列，failed=true时加入上次刷新失败的站点",
+        }, {
+            "path": "/member_history",
+            "endpoint": self.get_member_history,
+            "methods": ["GET"],
+            "summary": "获取成员历史",
+            "description": "按站点名称和成员（个人主页链接、UID或用户名）获取分享率、上传下载、状态的历史变化",
+        }, {
+            "path": "/site_changes",
+            "endpoint": self.get_site_changes,
+            "methods": ["GET"],
+            "summary": "获取成员变化",
+            "description": "获取站点最近一次刷新相对上一次刷新的成员变化，不指定站点时返回全部站点",
+        }, {
+            "path": "/refresh_stats",
+            "endpoint": self.get_refresh_stats,
+            "methods": ["GET"],
+            "summary": "获取刷新耗时统计",
+            "description": f"获取最近{DEFAULT_KEEP_RUNS}次刷新中各站点的网络耗时、解析耗时、页面数、下载量及分阶段统计",
         }]
 
     def get_dashboard_meta(self) -> Optional[List[Dict[str, str]]]:
@@ -667,78 +847,22 @@ class nexusinvitees(_PluginBase):
             return None
             
         try:
-            # 从data_manager获取站点数据
-            cached_data = {}
-            site_data = self.data_manager.get_site_data()
-            for site_name, site_info in site_data.items():
-                cached_data[site_name] = site_info
-                
-            last_update = "未知"
-            if cached_data:
-                # 找出最新更新时间
-                update_times = [cache.get("last_update", 0)
-                                for cache in cached_data.values() if cache]
-                if update_times:
-                    last_update = time.strftime(
-                        "%Y-%m-%d %H:%M:%S", time.localtime(max(update_times)))
-
-            # 计算所有站点统计信息
-            total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0  # 添加无数据计数器
-
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 尝试不同的数据结构路径获取邀请列表
-                possible_paths = [
-                    ["invitees"],
-                    ["data", "invitees"],
-                    ["data", "data", "invitees"]
-                ]
-                
-                for path in possible_paths:
-                    result = get_nested_value(site_cache_data, path, [])
-                    if result:
-                        invitees = result
-                        break
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 获取邀请状态
-                invite_status = {}
-                status_paths = [
-                    ["invite_status"],
-                    ["data", "invite_status"],
-                    ["data", "data", "invite_status"]
-                ]
-                
-                for path in status_paths:
-                    result = get_nested_value(site_cache_data, path, {})
-                    if result and isinstance(result, dict):
-                        invite_status = result
-                        break
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
-
-                # 统计用户状态 - 使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
+            # 读取刷新时预先计算的统计摘要
+            summary = self.data_manager.get_global_summary()
 
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
+            last_update = "未知"
+            if summary.get("last_update"):
+                last_update = time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(summary["last_update"]))
 
+            # 所有站点统计信息
+            total_sites = summary.get("sites", 0)
+            total_invitees = summary.get("invitees", 0)
+            total_low_ratio = summary.get("low_ratio", 0)
+            total_banned = summary.get("banned", 0)
+            total_perm_invites = summary.get("permanent_count", 0)
+            total_temp_invites = summary.get("temporary_count", 0)
+            total_no_data = summary.get("no_data", 0)
 
             # 列配置
             col_config = {
@@ -1000,7 +1124,7 @@ class nexusinvitees(_PluginBase):
             })
             
             # 如果没有数据，显示提示信息
-            if not cached_data:
+            if not total_sites:
                 elements = [{
                     "component": "VAlert",
                     "props": {
@@ -1132,7 +1256,8 @@ class nexusinvitees(_PluginBase):
                             {
                                 'component': 'VCol',
                                 'props': {
-                                    'cols': 12
+                                    'cols': 12,
+                                    'md': 8
                                 },
                                 'content': [
                                     {
@@ -1143,6 +1268,269 @@ class nexusinvitees(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'max_workers',
+                                            'label': '并发刷新数',
+                                            'type': 'number',
+                                            'placeholder': str(RefreshEngine.DEFAULT_WORKERS),
+                                            'persistent-hint': True,
+                                            'hint': f'同时刷新的站点数(1-{RefreshEngine.MAX_WORKERS})，同一站点始终串行'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSelect',
+                                        'props': {
+                                            'model': 'parser_backend',
+                                            'label': 'HTML解析器',
+                                            'items': [
+                                                {'title': 'html.parser（兼容）', 'value': 'html.parser'},
+                                                {'title': 'lxml（更快）', 'value': 'lxml'}
+                                            ],
+                                            'persistent-hint': True,
+                                            'hint': '解析邀请页面使用的解析器，lxml不可用时自动回退'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'adaptive_refresh',
+                                            'label': '自适应刷新',
+                                            'persistent-hint': True,
+                                            'hint': '按站点数据变化频率安排刷新，执行周期仍会全量刷新'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'min_interval',
+                                            'label': '最小刷新间隔(小时)',
+                                            'type': 'number',
+                                            'placeholder': str(AdaptiveScheduler.DEFAULT_MIN_HOURS),
+                                            'persistent-hint': True,
+                                            'hint': '数据经常变化的站点按此间隔刷新'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'max_interval',
+                                            'label': '最大刷新间隔(小时)',
+                                            'type': 'number',
+                                            'placeholder': str(AdaptiveScheduler.DEFAULT_MAX_HOURS),
+                                            'persistent-hint': True,
+                                            'hint': '数据长期不变的站点最长间隔'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'bonus_cache_hours',
+                                            'label': '魔力值商店缓存(小时)',
+                                            'type': 'number',
+                                            'placeholder': str(DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP]),
+                                            'persistent-hint': True,
+                                            'hint': '缓存期内不重复获取魔力值与邀请价格，0为不缓存'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'send_page_cache_hours',
+                                            'label': '发送邀请页面缓存(小时)',
+                                            'type': 'number',
+                                            'placeholder': str(DEFAULT_TTL_HOURS[PAGE_SEND_INVITE]),
+                                            'persistent-hint': True,
+                                            'hint': '邀请数量或魔力值变化时立即重新获取，0为不缓存'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'http_retries',
+                                            'label': '请求重试次数',
+                                            'type': 'number',
+                                            'placeholder': str(HttpClient.DEFAULT_RETRIES),
+                                            'persistent-hint': True,
+                                            'hint': f'连接失败、超时或5xx时重试，最多{HttpClient.MAX_RETRIES}次'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'http_backoff',
+                                            'label': '重试退避系数(秒)',
+                                            'type': 'number',
+                                            'placeholder': str(HttpClient.DEFAULT_BACKOFF),
+                                            'persistent-hint': True,
+                                            'hint': '每次重试前的等待时间按此系数成倍增加'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'breaker_cooldown',
+                                            'label': '失败站点冷却(分钟)',
+                                            'type': 'number',
+                                            'placeholder': str(CircuitBreaker.DEFAULT_COOLDOWN_MINUTES),
+                                            'persistent-hint': True,
+                                            'hint': 'Cookie失效或无法连接的站点在冷却期内跳过，0为不跳过'
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'async_refresh',
+                                            'label': '异步刷新',
+                                            'persistent-hint': True,
+                                            'hint': '单线程事件循环同时刷新多个站点，M-Team与通用NexusPHP站点使用异步请求，其他专用站点仍在线程池中执行（需安装httpx）'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'parse_workers',
+                                            'label': '解析进程数',
+                                            'type': 'number',
+                                            'placeholder': '0',
+                                            'persistent-hint': True,
+                                            'hint': f'后宫翻页等页面交给子进程解析，可利用多核，0为不启用，最大{ParsePool.MAX_WORKERS}'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -1174,6 +1562,18 @@ class nexusinvitees(_PluginBase):
             "cron": "0 9 * * *",
             "onlyonce": False,
             "site_ids": self._nexus_sites,
+            "max_workers": self._max_workers,
+            "parser_backend": self._parser_backend,
+            "adaptive_refresh": self._adaptive_refresh,
+            "async_refresh": self._async_refresh,
+            "parse_workers": self._parse_workers,
+            "min_interval": self._min_interval,
+            "max_interval": self._max_interval,
+            "bonus_cache_hours": self._bonus_cache_hours,
+            "send_page_cache_hours": self._send_page_cache_hours,
+            "http_retries": self._http_retries,
+            "http_backoff": self._http_backoff,
+            "breaker_cooldown": self._breaker_cooldown,
         }
 
     def _is_nexusphp(self, site_url: str) -> bool:
@@ -1191,68 +1591,40 @@ class nexusinvitees(_PluginBase):
         
         
         try:
+            start = time.perf_counter()
+            indexers = self.sites.get_indexers()
+            # 数据版本及站点配置均未变化时直接返回上次生成的页面
+            page_key = (self.data_manager.get_data_version(),
+                        tuple((site.get("name"), site.get("url")) for site in indexers))
+            if self._page_render_cache and self._page_render_cache[0] == page_key:
+                logger.debug(f"详情页面使用缓存，耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+                return self._page_render_cache[1]
+            render_stats = {"built": 0, "reused": 0}
+
             self.presc = Prescription()
 
             # 从data_manager获取站点数据
-            cached_data = {}
-            site_data = self.data_manager.get_site_data()
-            for site_name, site_info in site_data.items():
-                cached_data[site_name] = site_info
-                
+            cached_data = self.data_manager.get_site_data()
+            # 刷新时预先计算的统计摘要
+            site_summaries = self.data_manager.get_site_summaries()
+            summary = self.data_manager.get_global_summary()
+
             last_update = "未知"
-            if cached_data:
-                # 找出最新更新时间
-                update_times = [cache.get("last_update", 0)
-                                for cache in cached_data.values() if cache]
-                if update_times:
-                    last_update = time.strftime(
-                        "%Y-%m-%d %H:%M:%S", time.localtime(max(update_times)))
+            if summary.get("last_update"):
+                last_update = time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(summary["last_update"]))
 
             # 准备页面内容
             page_content = []
             
             # 添加全局统计信息
-            total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0
-
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 获取邀请用户列表
-                if "data" in site_cache_data:
-                    invitees = site_cache_data.get("data", {}).get("invitees", [])
-                else:
-                    invitees = site_cache_data.get("invitees", [])
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 统计用户状态
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
-
-                # 获取邀请状态
-                invite_status = {}
-                if "data" in site_cache_data:
-                    invite_status = site_cache_data.get("data", {}).get("invite_status", {})
-                else:
-                    invite_status = site_cache_data.get("invite_status", {})
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
+            total_sites = summary.get("sites", 0)
+            total_invitees = summary.get("invitees", 0)
+            total_low_ratio = summary.get("low_ratio", 0)
+            total_banned = summary.get("banned", 0)
+            total_perm_invites = summary.get("permanent_count", 0)
+            total_temp_invites = summary.get("temporary_count", 0)
+            total_no_data = summary.get("no_data", 0)
 
             # 添加统计卡片
             page_content.extend([
@@ -1503,66 +1875,17 @@ class nexusinvitees(_PluginBase):
             # 准备站点卡片
             cards = []
             
-            # 计算所有站点统计信息
-            total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0
             site_url_map = {
                 site.get("name", ""): site.get("url", "")
-                for site in self.sites.get_indexers()
+                for site in indexers
             }
+            site_info_map = {site.get("name"): site for site in indexers}
 
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 获取邀请用户列表
-                if "data" in site_cache_data:
-                    invitees = site_cache_data.get("data", {}).get("invitees", [])
-                else:
-                    invitees = site_cache_data.get("invitees", [])
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 统计用户状态 - 直接使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
-
-                # 获取邀请状态
-                invite_status = {}
-                if "data" in site_cache_data:
-                    invite_status = site_cache_data.get("data", {}).get("invite_status", {})
-                else:
-                    invite_status = site_cache_data.get("invite_status", {})
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
+            # 药单直接使用摘要中的数据
+            for site_name, site_summary in site_summaries.items():
                 # 保存站点 URL 以便后续渲染超链接
                 self.presc.setSiteUrl(site_name, site_url_map.get(site_name, ""))
-                # 保存用户ID以便后续生成邀请链接
-                user_id = site_cache_data.get("user_id", "") or (site_cache_data.get("data", {}).get("user_id", "") if "data" in site_cache_data else "")
-                self.presc.setUserId(site_name, user_id)
-                self.presc.setInviteeCount(site_name, len(invitees))
-                self.presc.setDeadCount(site_name, banned_count)
-                # 向药单打标临药永药
-                site_error = get_site_error(cache)
-                if site_error:
-                    self.presc.setFailed(site_name, site_error)
-                else:
-                    self.presc.setP(site_name,invite_status.get("permanent_count", 0))
-                    self.presc.setT(site_name,invite_status.get("temporary_count", 0))
+                self.presc.setSummary(site_name, site_summary.get("prescription", {}))
 
 
             # 添加全局统计信息
@@ -1808,421 +2131,864 @@ class nexusinvitees(_PluginBase):
             })
 
             for site_name, cache in cached_data.items():
-                invite_data = cache.get("data", {})
-
                 # 获取站点信息
-                site_info = None
-                for site in self.sites.get_indexers():
-                    if site.get("name") == site_name:
-                        site_info = site
-                        break
-                
+                site_info = site_info_map.get(site_name)
                 if site_info:
-                    # 获取站点数据
-                    site_cache_data = cache.get("data", {})
-                    
-                    # 尝试不同的数据结构路径获取邀请列表
-                    invitees = []
-                    possible_paths = [
-                        ["invitees"],
-                        ["data", "invitees"],
-                        ["data", "data", "invitees"]
+                    cards.append(self._get_site_card(site_name, cache, site_info, site_summaries, render_stats))
+                                # 添加药单组件到总览下方
+            drug_component = self.presc.getComponent()
+            if drug_component:
+                page_content.append(drug_component)
+            
+            # 将站点卡片添加到页面
+            page_content.extend(cards)
+
+            # 刷新耗时统计
+            telemetry_panel = self._build_telemetry_panel()
+            if telemetry_panel:
+                page_content.append(telemetry_panel)
+
+            # 添加说明提示
+            if not cards:
+                page_content.append({
+                    "component": "VAlert",
+                    "props": {
+                        "type": "warning",
+                        "text": "暂无数据，请先在配置中选择要管理的站点，并打开\"立即运行一次\"开关获取数据",
+                        "variant": "tonal",
+                        "class": "mt-4"
+                    }
+                })
+            # 删除这行，因为我们已经在后宫总览下方添加了药单
+            # page_content.insert(0,self.presc.getComponent())
+
+            # 丢弃已移除站点的卡片缓存
+            for site_name in list(self._site_card_cache):
+                if site_name not in cached_data or site_name not in site_info_map:
+                    self._site_card_cache.pop(site_name, None)
+            self._page_render_cache = (page_key, page_content)
+            logger.debug(f"详情页面重新生成，耗时 {(time.perf_counter() - start) * 1000:.1f}ms，"
+                         f"站点卡片重新生成 {render_stats['built']} 个，复用 {render_stats['reused']} 个")
+            return page_content
+            
+        except Exception as e:
+            logger.error(f"生成详情页面失败: {str(e)}")
+            return [{
+                "component": "VAlert",
+                "props": {
+                    "type": "error",
+                    "text": f"生成详情页面失败: {str(e)}"
+                }
+            }]
+
+    def _get_site_card(self, site_name: str, cache: Dict[str, Any], site_info: Dict[str, Any],
+                       site_summaries: Dict[str, Dict[str, Any]], render_stats: Dict[str, int]) -> dict:
+        """
+        获取站点卡片：站点数据版本及站点配置未变化时复用上次生成的卡片
+        :param render_stats: 卡片生成/复用计数
+        """
+        card_key = (self.data_manager.get_site_version(site_name), site_info.get("name"), site_info.get("url"))
+        cached = self._site_card_cache.get(site_name)
+        if cached and cached[0] == card_key:
+            render_stats["reused"] += 1
+            return cached[1]
+        site_card = self._build_site_card(site_name, cache, site_info, site_summaries)
+        self._site_card_cache[site_name] = (card_key, site_card)
+        render_stats["built"] += 1
+        return site_card
+
+    def _build_site_card(self, site_name: str, cache: Dict[str, Any], site_info: Dict[str, Any],
+                         site_summaries: Dict[str, Dict[str, Any]]) -> dict:
+        """
+        生成单个站点的卡片：站点信息、邀请状态及后宫成员表格
+        :param site_name: 站点名称
+        :param cache: 站点缓存数据（data、last_update）
+        :param site_info: 站点配置
+        :param site_summaries: 站点统计摘要
+        :return: 站点卡片组件
+        """
+        # 获取站点数据
+        site_cache_data = cache.get("data", {})
+        invitees, invite_status = get_site_payload(site_cache_data)
+
+        # 此站点的统计信息来自刷新时计算的摘要
+        site_summary = site_summaries.get(site_name) or build_site_summary(
+            site_cache_data, cache.get("last_update", 0))
+        banned_count = site_summary.get("banned", 0)
+        low_ratio_count = site_summary.get("card_low_ratio", 0)
+        no_data_count = site_summary.get("no_data", 0)
+
+        # 合并站点信息和数据到一张卡片
+        site_card = {
+            "component": "VCard",
+            "props": {
+                "class": "mb-4",
+                "variant": "flat"  # 修改为flat，去掉内边框
+            },
+            "content": [
+                # 站点信息头部
+                {
+                    "component": "VCardItem",
+                    "props": {
+                        "class": "py-2"
+                    },
+                    "content": [
+                        {
+                            "component": "VCardTitle",
+                            "content": [
+                                {
+                                    "component": "div",
+                                    "props": {
+                                        "class": "d-flex align-center"
+                                    },
+                                    "content": [
+                                        {
+                                            "component": "VIcon",
+                                            "props": {
+                                                "color": "primary",
+                                                "size": "24",
+                                                "class": "mr-2"
+                                            },
+                                            "text": "mdi-crown"
+                                        },
+                                        {
+                                            "component": "span",
+                                            "props": {
+                                                "class": "text-h6"
+                                            },
+                                            "text": site_info.get("name")
+                                        },
+                                        {
+                                            "component": "VSpacer"
+                                        },
+                                        {
+                                            "component": "div",
+                                            "props": {
+                                                "style": "display: flex; align-items: center; white-space: nowrap;"
+                                            },
+                                            "content": [
+                                                {
+                                                    "component": "VIcon",
+                                                    "props": {
+                                                        "size": "small",
+                                                        "color": "error",
+                                                        "class": "mr-1"
+                                                    },
+                                                    "text": "mdi-alert-circle" if low_ratio_count > 0 else ""
+                                                },
+                                                {
+                                                    "component": "span",
+                                                    "props": {"class": "text-caption mr-2"},
+                                                    "text": f"{low_ratio_count}人低分享" if low_ratio_count > 0 else ""
+                                                },
+                                                {
+                                                    "component": "VIcon",
+                                                    "props": {
+                                                        "size": "small",
+                                                        "color": "error",
+                                                        "class": "mr-1"
+                                                    },
+                                                    "text": "mdi-block-helper" if banned_count > 0 else ""
+                                                },
+                                                {
+                                                    "component": "span",
+                                                    "props": {"class": "text-caption mr-2"},
+                                                    "text": f"{banned_count}人禁用" if banned_count > 0 else ""
+                                                },
+                                                {
+                                                    "component": "VIcon",
+                                                    "props": {
+                                                        "size": "small",
+                                                        "color": "#9E9E9E",
+                                                        "class": "mr-1"
+                                                    },
+                                                    "text": "mdi-database-off" if no_data_count > 0 else ""
+                                                },
+                                                {
+                                                    "component": "span",
+                                                    "props": {"class": "text-caption"},
+                                                    "text": f"{no_data_count}人无数据" if no_data_count > 0 else ""
+                                                }
+                                            ]
+                                        }
+                                    ]
+                                }
+                            ]
+                        }
                     ]
-                    
-                    for path in possible_paths:
-                        result = get_nested_value(site_cache_data, path, [])
-                        if result:
-                            invitees = result
-                            break
-                    
-                    # 同样处理邀请状态
-                    invite_status = {}
-                    status_paths = [
-                        ["invite_status"],
-                        ["data", "invite_status"],
-                        ["data", "data", "invite_status"]
+                },
+                # 邀请状态统计
+                {
+                    "component": "VCardText",
+                    "props": {
+                        "class": "pt-2 pb-0"
+                    },
+                    "content": [
+                        {
+                            "component": "VRow",
+                            "props": {
+                                "dense": True
+                            },
+                            "content": [
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center"
+                                        },
+                                        "content": [
+                                            {
+                                                "component": "VIcon",
+                                        "props": {
+                                                    "size": "24",
+                                                    "color": "#9C27B0",
+                                                    "class": "mr-2"
+                                        },
+                                                "text": "mdi-ticket-confirmation"
+                                            },
+                                            {
+                                                "component": "div",
+                                        "content": [
+                                            {
+                                                "component": "div",
+                                                        "props": {"class": "text-body-1 font-weight-medium purple--text"},
+                                                        "text": str(invite_status.get("permanent_count", 0))
+                                            },
+                                            {
+                                                "component": "div",
+                                                "props": {"class": "text-caption"},
+                                                "text": "永久邀请"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
+                                },
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center"
+                                        },
+                                        "content": [
+                                            {
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "size": "24",
+                                                    "color": "#E91E63",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-ticket"
+                                            },
+                                            {
+                                                "component": "div",
+                                                "content": [
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-body-1 font-weight-medium", "style": "color: #E91E63"},
+                                                        "text": str(invite_status.get("temporary_count", 0))
+                                            },
+                                            {
+                                                "component": "div",
+                                                "props": {"class": "text-caption"},
+                                                "text": "临时邀请"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
+                                },
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center"
+                                        },
+                                        "content": [
+                                            {
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "size": "24",
+                                                    "color": "#4CAF50",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-account-group"
+                                            },
+                                            {
+                                                "component": "div",
+                                                "content": [
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-body-1 font-weight-medium success--text"},
+                                                        "text": str(len(invitees))
+                                            },
+                                            {
+                                                "component": "div",
+                                                "props": {"class": "text-caption"},
+                                                        "text": "邀请人数"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
+                                },
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center"
+                                        },
+                                        "content": [
+                                            {
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "size": "24",
+                                                    "color": "#4CAF50" if invite_status.get("can_invite") else "#F44336",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-check-circle" if invite_status.get("can_invite") else "mdi-close-circle"
+                                            },
+                                            {
+                                                "component": "div",
+                                                "content": [
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-body-1 font-weight-medium " + 
+                                                                ("success--text" if invite_status.get("can_invite") else "error--text")},
+                                                        "text": "可邀请" if invite_status.get("can_invite") else "不可邀请"
+                                            },
+                                            {
+                                                "component": "div",
+                                                "props": {"class": "text-caption"},
+                                                "text": "邀请权限"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
+                                }
+                            ]
+                        }
                     ]
-                    
-                    for path in status_paths:
-                        result = get_nested_value(site_cache_data, path, {})
-                        if result and isinstance(result, dict):
-                            invite_status = result
-
-                    # 计算此站点的统计信息
-                    banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                    low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') == 'warning' or i.get('ratio_health') == 'danger')
-                    no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                    # 更新总计数
-                    total_banned += banned_count
-                    total_low_ratio += low_ratio_count
-                    total_no_data += no_data_count
-
-                    for invitee in invitees:
-                        # 检查是否是无数据情况（上传下载都是0）
-                        uploaded = invitee.get('uploaded', '0')
-                        downloaded = invitee.get('downloaded', '0')
-                        is_no_data = False
-                        
-                        # 简化判断逻辑，只关注字符串为"0"、"0.0"、"0B"或空字符串，或者数值为0的情况
-                        if isinstance(uploaded, str) and isinstance(downloaded, str):
-                            uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                            downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                            is_no_data = uploaded_zero and downloaded_zero
-                        elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                            is_no_data = uploaded == 0 and downloaded == 0
-                        
-                        username = invitee.get('username', '未知')
-                        # 强制输出日志，确保无数据用户被记录
-                        if is_no_data:
-                            logger.info(f"【总览】检测到无数据用户: {username}, 上传={uploaded}, 下载={downloaded}, 当前无数据总计={total_no_data+1}")
-                            total_no_data += 1
-                            continue
-                        
-                        # 处理分享率
-                        ratio_str = invitee.get('ratio', '')
-                        # 处理无限分享率情况 - 增强识别能力
-                        if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                            continue  # 无限分享率不计入低分享率
-                        
-                        try:
-                            # 标准化字符串 - 正确处理千分位逗号
-                            # 使用更好的方法完全移除千分位逗号
-                            normalized_ratio = ratio_str
-                            # 循环处理，直到没有千分位逗号
-                            while ',' in normalized_ratio:
-                                # 检查每个逗号是否是千分位分隔符
-                                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                for pos in comma_positions:
-                                    # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                    if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                        break
-                                else:
-                                    # 如果没有找到千分位逗号，退出循环
-                                    break
-                            
-                            # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                            normalized_ratio = normalized_ratio.replace(',', '.')
-                            ratio_val = float(normalized_ratio) if normalized_ratio else 0
-                            if ratio_val < 1 and ratio_val > 0:  # 确保分享率大于0且小于1才算低分享率
-                                low_ratio_count += 1
-                                logger.info(f"【总览】检测到低分享率用户: {invitee.get('username', '未知')}, 分享率={ratio_str}({ratio_val})")
-                        except (ValueError, TypeError) as e:
-                            # 转换错误时记录警告
-                            logger.warning(f"分享率转换失败: {ratio_str}, 错误: {str(e)}")
-
-                    # 合并站点信息和数据到一张卡片
-                    site_card = {
-                        "component": "VCard",
+                }
+            ]
+        }
+
+        # 添加错误信息或不可邀请原因的显示部分
+        # 获取错误信息和不可邀请原因
+        error_message = get_site_error(cache)
+
+        # 使用辅助函数检查不同路径的invite_status
+        invite_status_for_check = invite_status  # 使用上面已获取的invite_status
+
+        can_invite = invite_status_for_check.get("can_invite", False)
+        reason = invite_status_for_check.get("reason", "")
+
+        # 确保能正确显示不可邀请原因
+        if not can_invite:
+            logger.debug(f"站点 {site_name} 不可邀请原因: {reason}")
+
+        # 检查是否为M-Team站点
+        is_mteam_site = False
+        site_url_lower = site_info.get("url", "").lower()
+        mteam_features = ["m-team", "api.m-team.cc", "api.m-team.io"]
+        for feature in mteam_features:
+            if feature in site_url_lower:
+                is_mteam_site = True
+                break
+
+        # 获取站点魔力值和邀请价格信息
+        bonus = invite_status.get("bonus", 0)
+        permanent_invite_price = invite_status.get("permanent_invite_price", 0)
+        temporary_invite_price = invite_status.get("temporary_invite_price", 0)
+
+        # 添加不可邀请原因的显示
+        if not can_invite and reason and not is_mteam_site:  # 对于M-Team站点，我们会在后面特殊处理
+            site_card["content"].append({
+                "component": "VCardText",
+                "props": {
+                    "class": "py-1"
+                },
+                "content": [
+                    {
+                        "component": "VAlert",
                         "props": {
-                            "class": "mb-4",
-                            "variant": "flat"  # 修改为flat，去掉内边框
+                            "type": "error",
+                            "variant": "tonal",
+                            "density": "compact",
+                            "class": "my-1 d-flex align-center"
                         },
                         "content": [
-                            # 站点信息头部
                             {
-                                "component": "VCardItem",
+                                "component": "VIcon",
                                 "props": {
-                                    "class": "py-2"
+                                    "start": True,
+                                    "size": "small"
+                                },
+                                "text": "mdi-alert-circle"
+                            },
+                            {
+                                "component": "span",
+                                "text": f"不可邀请原因: {reason}"
+                            }
+                        ]
+                    }
+                ]
+            })
+
+        # M-Team站点特殊处理
+        if is_mteam_site:
+            # 尝试从reason中提取用户等级和魔力值信息
+            import re
+
+
+            # 提取用户等级
+            user_role = ""
+            level_match = re.search(r'用户等级\(([^)]+)\)', reason)
+            if level_match:
+                user_role = level_match.group(1)
+
+
+            # 提取魔力值
+            user_bonus = ""
+            bonus_match = re.search(r'魔力值\(([0-9.]+)\)', reason)
+            if bonus_match:
+                user_bonus = bonus_match.group(1)                       
+            # 提取可购买邀请数
+            buyable_invites = 0
+            buy_match = re.search(r'可购买(\d+)个', reason)
+            if buy_match:
+                buyable_invites = int(buy_match.group(1))                           
+            # 计算MT可买药数量
+            mt_buyable = 0
+            if user_bonus and user_role:
+                try:
+                    user_bonus_float = float(user_bonus)
+                    # 每80000魔力可买一个
+                    mt_buyable = int(user_bonus_float / 80000)
+                except (ValueError, TypeError):
+                    user_bonus_float = 0                               
+            # 如果魔力值和用户等级有效
+            if user_bonus and user_role:                          
+                # 计算还需多少魔力
+                try:
+                    user_bonus_float = float(user_bonus)
+                    needed_bonus = 80000 - (user_bonus_float % 80000)
+                    needed_bonus_text = f"(还需{needed_bonus:.1f}魔力)" if mt_buyable == 0 and user_bonus_float > 0 else ""
+                except (ValueError, TypeError):
+                    user_bonus_float = 0
+
+                # 添加用户等级卡片
+                site_card["content"].append({
+                    "component": "VCardText",
+                    "props": {
+                        "class": "py-0"
+                    },
+                    "content": [
+                        {
+                            "component": "VRow",
+                            "props": {
+                                "dense": True
+                            },
+                            "content": [
+                                # 用户等级
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center py-2"
+                                        },
+                                        "content": [
+                                            {
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "color": "deep-purple",
+                                                    "size": "small",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-crown"
+                                            },
+                                            {
+                                                "component": "div",
+                                                "content": [
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                        "text": user_role
+                                                    },
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-caption"},
+                                                        "text": "用户等级"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
                                 },
-                                "content": [
-                                    {
-                                        "component": "VCardTitle",
+                                # 魔力值
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 3},
+                                    "content": [{
+                                        "component": "div",
+                                        "props": {
+                                            "class": "d-flex align-center py-2"
+                                        },
                                         "content": [
                                             {
-                                                "component": "div",
+                                                "component": "VIcon",
                                                 "props": {
-                                                    "class": "d-flex align-center"
+                                                    "color": "orange",
+                                                    "size": "small",
+                                                    "class": "mr-2"
                                                 },
+                                                "text": "mdi-diamond"
+                                            },
+                                            {
+                                                "component": "div",
                                                 "content": [
                                                     {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "color": "primary",
-                                                            "size": "24",
-                                                            "class": "mr-2"
-                                                        },
-                                                        "text": "mdi-crown"
-                                                    },
-                                                    {
-                                                        "component": "span",
-                                                        "props": {
-                                                            "class": "text-h6"
-                                                        },
-                                                        "text": site_info.get("name")
-                                                    },
-                                                    {
-                                                        "component": "VSpacer"
+                                                        "component": "div",
+                                                        "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                        "text": user_bonus
                                                     },
                                                     {
                                                         "component": "div",
-                                                        "props": {
-                                                            "style": "display: flex; align-items: center; white-space: nowrap;"
-                                                        },
-                                                        "content": [
-                                                            {
-                                                                "component": "VIcon",
-                                                                "props": {
-                                                                    "size": "small",
-                                                                    "color": "error",
-                                                                    "class": "mr-1"
-                                                                },
-                                                                "text": "mdi-alert-circle" if low_ratio_count > 0 else ""
-                                                            },
-                                                            {
-                                                                "component": "span",
-                                                                "props": {"class": "text-caption mr-2"},
-                                                                "text": f"{low_ratio_count}人低分享" if low_ratio_count > 0 else ""
-                                                            },
-                                                            {
-                                                                "component": "VIcon",
-                                                                "props": {
-                                                                    "size": "small",
-                                                                    "color": "error",
-                                                                    "class": "mr-1"
-                                                                },
-                                                                "text": "mdi-block-helper" if banned_count > 0 else ""
-                                                            },
-                                                            {
-                                                                "component": "span",
-                                                                "props": {"class": "text-caption mr-2"},
-                                                                "text": f"{banned_count}人禁用" if banned_count > 0 else ""
-                                                            },
-                                                            {
-                                                                "component": "VIcon",
-                                                                "props": {
-                                                                    "size": "small",
-                                                                    "color": "#9E9E9E",
-                                                                    "class": "mr-1"
-                                                                },
-                                                                "text": "mdi-database-off" if no_data_count > 0 else ""
-                                                            },
-                                                            {
-                                                                "component": "span",
-                                                                "props": {"class": "text-caption"},
-                                                                "text": f"{no_data_count}人无数据" if no_data_count > 0 else ""
-                                                            }
-                                                        ]
+                                                        "props": {"class": "text-caption"},
+                                                        "text": "魔力值"
                                                     }
                                                 ]
                                             }
                                         ]
-                                    }
-                                ]
-                            },
-                            # 邀请状态统计
-                            {
-                                "component": "VCardText",
-                                "props": {
-                                    "class": "pt-2 pb-0"
+                                    }]
                                 },
-                                "content": [
-                                    {
-                                        "component": "VRow",
+                                # 可购买邀请
+                                {
+                                    "component": "VCol",
+                                    "props": {"cols": 6},
+                                    "content": [{
+                                        "component": "div",
                                         "props": {
-                                            "dense": True
+                                            "class": "d-flex align-center py-2"
                                         },
                                         "content": [
                                             {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                    "props": {
-                                                                "size": "24",
-                                                                "color": "#9C27B0",
-                                                                "class": "mr-2"
-                                                    },
-                                                            "text": "mdi-ticket-confirmation"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                    "content": [
-                                                        {
-                                                            "component": "div",
-                                                                    "props": {"class": "text-body-1 font-weight-medium purple--text"},
-                                                                    "text": str(invite_status.get("permanent_count", 0))
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "props": {"class": "text-caption"},
-                                                            "text": "永久邀请"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "color": "cyan",
+                                                    "size": "small",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-cart"
                                             },
                                             {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center"
+                                                "component": "div",
+                                                "content": [
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                        "text": str(buyable_invites) + " " + needed_bonus_text
                                                     },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "size": "24",
-                                                                "color": "#E91E63",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-ticket"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-body-1 font-weight-medium", "style": "color: #E91E63"},
-                                                                    "text": str(invite_status.get("temporary_count", 0))
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "props": {"class": "text-caption"},
-                                                            "text": "临时邀请"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
+                                                    {
+                                                        "component": "div",
+                                                        "props": {"class": "text-caption"},
+                                                        "text": "可购买邀请"
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    }]
+                                }
+                            ]
+                        }
+                    ]
+                })
+
+                # 添加提示信息
+                site_card["content"].append({
+                    "component": "VCardText",
+                    "props": {
+                        "class": "py-1"
+                    },
+                    "content": [
+                        {
+                            "component": "VAlert",
+                            "props": {
+                                "type": "info",
+                                "variant": "tonal",
+                                "density": "compact",
+                                "class": "my-1 d-flex align-center"
+                            },
+                            "content": [
+                                {
+                                    "component": "VIcon",
+                                    "props": {
+                                        "start": True,
+                                        "size": "small"
+                                    },
+                                    "text": "mdi-information"
+                                },
+                                {
+                                    "component": "span",
+                                    "props": {"class": "flex-grow-1"},
+                                    "text": "M-Team每80000魔力可购买一个临时邀请"
+                                },
+                                {
+                                    "component": "VBtn",
+                                    "props": {
+                                        "variant": "text",
+                                        "density": "compact",
+                                        "color": "primary",
+                                        "href": site_url_lower + "mybonus",
+                                        "target": "_blank",
+                                        "size": "small"
+                                    },
+                                    "content": [
+                                        {
+                                            "component": "VIcon",
+                                            "props": {
+                                                "start": True,
+                                                "size": "small"
                                             },
-                                            {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
+                                            "text": "mdi-store"
+                                        },
+                                        {
+                                            "component": "span",
+                                            "text": "前往商店购买"
+                                        }
+                                    ]
+                                }
+                            ]
+                        }
+                    ]
+                })
+
+                # M-Team特殊显示时跳过原来的警告提示
+                error_message = ""
+                reason = ""
+
+        # 通用NexusPHP和蝶粉站点处理
+        elif bonus > 0 and (permanent_invite_price > 0 or temporary_invite_price > 0):
+
+            # 计算可购买邀请数量
+            can_buy_permanent = 0
+            can_buy_temporary = 0
+
+            if permanent_invite_price > 0:
+                can_buy_permanent = int(bonus / permanent_invite_price)
+
+            if temporary_invite_price > 0:
+                can_buy_temporary = int(bonus / temporary_invite_price)
+            # 计算购买邀请后剩余魔力
+            remaining_bonus = bonus
+            if can_buy_permanent > 0 and permanent_invite_price > 0:
+                remaining_bonus = bonus % permanent_invite_price
+            elif can_buy_temporary > 0 and temporary_invite_price > 0:
+                remaining_bonus = bonus % temporary_invite_price
+
+            # 添加魔力值信息卡片
+            site_card["content"].append({
+                "component": "VCardText",
+                "props": {
+                    "class": "py-0"
+                },
+                "content": [
+                    {
+                        "component": "VRow",
+                        "props": {
+                            "dense": True
+                        },
+                        "content": [
+                            # 魔力值
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 3},
+                                "content": [{
+                                    "component": "div",
+                                    "props": {
+                                        "class": "d-flex align-center py-2"
+                                    },
+                                    "content": [
+                                        {
+                                            "component": "VIcon",
+                                            "props": {
+                                                "color": "orange",
+                                                "size": "small",
+                                                "class": "mr-2"
+                                            },
+                                            "text": "mdi-diamond"
+                                        },
+                                        {
+                                            "component": "div",
+                                            "content": [
+                                                {
                                                     "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "size": "24",
-                                                                "color": "#4CAF50",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-account-group"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-body-1 font-weight-medium success--text"},
-                                                                    "text": str(len(invitees))
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "props": {"class": "text-caption"},
-                                                                    "text": "邀请人数"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
+                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                    "text": str(bonus)
+                                                },
+                                                {
+                                                    "component": "div",
+                                                    "props": {"class": "text-caption"},
+                                                    "text": "魔力值"
+                                                }
+                                            ]
+                                        }
+                                    ]
+                                }]
+                            },
+                            # 可购买永久邀请
+                            {
+                                "component": "VCol",
+                                "props": {"cols": {
+                                    "cols": 4,
+                                    "md": 3
+                                }},
+                                "content": [] if permanent_invite_price <= 0 else [{
+                                    "component": "div",
+                                    "props": {
+                                        "class": "d-flex align-center py-2"
+                                    },
+                                    "content": [
+                                        {
+                                            "component": "VIcon",
+                                            "props": {
+                                                "color": "purple",
+                                                "size": "small",
+                                                "class": "mr-2"
                                             },
-                                            {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
+                                            "text": "mdi-ticket-confirmation"
+                                        },
+                                        {
+                                            "component": "div",
+                                            "content": [
+                                                {
                                                     "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "size": "24",
-                                                                "color": "#4CAF50" if invite_status.get("can_invite") else "#F44336",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-check-circle" if invite_status.get("can_invite") else "mdi-close-circle"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-body-1 font-weight-medium " + 
-                                                                            ("success--text" if invite_status.get("can_invite") else "error--text")},
-                                                                    "text": "可邀请" if invite_status.get("can_invite") else "不可邀请"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "props": {"class": "text-caption"},
-                                                            "text": "邀请权限"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
-                                            }
-                                        ]
-                                    }
-                                ]
+                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                    "text": f"{can_buy_permanent}个 ({permanent_invite_price}魔力/个)" if can_buy_permanent > 0 else f"0个 (需{permanent_invite_price}魔力)"
+                                                },
+                                                {
+                                                    "component": "div",
+                                                    "props": {"class": "text-caption"},
+                                                    "text": "可购买永久邀请"
+                                                }
+                                            ]
+                                        }
+                                    ]
+                                }]
+                            },
+                            # 可购买临时邀请
+                            {
+                                "component": "VCol",
+                                "props": {"cols": {
+                                    "cols": 4,
+                                    "md": 3
+                                }},
+                                "content": [] if temporary_invite_price <= 0 else [{
+                                    "component": "div",
+                                    "props": {
+                                        "class": "d-flex align-center py-2"
+                                    },
+                                    "content": [
+                                        {
+                                            "component": "VIcon",
+                                            "props": {
+                                                "color": "pink",
+                                                "size": "small",
+                                                "class": "mr-2"
+                                            },
+                                            "text": "mdi-ticket"
+                                        },
+                                        {
+                                            "component": "div",
+                                            "content": [
+                                                {
+                                                    "component": "div",
+                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
+                                                    "text": f"{can_buy_temporary}个 ({temporary_invite_price}魔力/个)" if can_buy_temporary > 0 else f"0个 (需{temporary_invite_price}魔力)"
+                                                },
+                                                {
+                                                    "component": "div",
+                                                    "props": {"class": "text-caption"},
+                                                    "text": "可购买临时邀请"
+                                                }
+                                            ]
+                                        }
+                                    ]
+                                }]
+                            },
+                            # 按钮占位
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 3},
+                                "content": []
                             }
                         ]
                     }
+                ]
+            })
 
-                    # 添加错误信息或不可邀请原因的显示部分
-                    # 获取错误信息和不可邀请原因
-                    error_message = get_site_error(cache)
-                    
-                    # 使用辅助函数检查不同路径的invite_status
-                    invite_status_for_check = invite_status  # 使用上面已获取的invite_status
-                    
-                    can_invite = invite_status_for_check.get("can_invite", False)
-                    # 向药单打标发药权限
-                    self.presc.setCanInvite(site_name,can_invite)
-                    reason = invite_status_for_check.get("reason", "")
-                    self.presc.setInviteReason(site_name, reason)
-
-                    # 确保能正确显示不可邀请原因
-                    if not can_invite:
-                        logger.debug(f"站点 {site_name} 不可邀请原因: {reason}")
-                    
-                    # 检查是否为M-Team站点
-                    is_mteam_site = False
-                    site_url_lower = site_info.get("url", "").lower()
-                    mteam_features = ["m-team", "api.m-team.cc", "api.m-team.io"]
-                    for feature in mteam_features:
-                        if feature in site_url_lower:
-                            is_mteam_site = True
-                            break
-                    
-                    # 获取站点魔力值和邀请价格信息
-                    bonus = invite_status.get("bonus", 0)
-                    permanent_invite_price = invite_status.get("permanent_invite_price", 0)
-                    temporary_invite_price = invite_status.get("temporary_invite_price", 0)
-                    
-                    # 添加不可邀请原因的显示
-                    if not can_invite and reason and not is_mteam_site:  # 对于M-Team站点，我们会在后面特殊处理
-                        site_card["content"].append({
-                            "component": "VCardText",
+            # 添加提示信息和购买按钮
+            if permanent_invite_price > 0 or temporary_invite_price > 0:
+                # 构造价格文本，确保类型转换
+                price_text = "站点商店邀请价格: "
+                parts = []
+
+                if permanent_invite_price > 0:
+                    parts.append(f"永久邀请 {permanent_invite_price} 魔力")
+
+                if temporary_invite_price > 0:
+                    parts.append(f"临时邀请 {temporary_invite_price} 魔力")
+
+                price_text += "，".join(parts)
+
+                site_card["content"].append({
+                    "component": "VCardText",
+                    "props": {
+                        "class": "py-1"
+                    },
+                    "content": [
+                        {
+                            "component": "VAlert",
                             "props": {
-                                "class": "py-1"
+                                "type": "info",
+                                "variant": "tonal",
+                                "density": "compact",
+                                "class": "my-1 d-flex align-center"
                             },
                             "content": [
                                 {
-                                    "component": "VAlert",
+                                    "component": "VIcon",
+                                    "props": {
+                                        "start": True,
+                                        "size": "small"
+                                    },
+                                    "text": "mdi-information"
+                                },
+                                {
+                                    "component": "span",
+                                    "props": {"class": "flex-grow-1"},
+                                    "text": price_text
+                                },
+                                {
+                                    "component": "VBtn",
                                     "props": {
-                                        "type": "error",
-                                        "variant": "tonal",
+                                        "variant": "text",
                                         "density": "compact",
-                                        "class": "my-1 d-flex align-center"
+                                        "color": "primary",
+                                        "href": site_url_lower + "mybonus.php",
+                                        "target": "_blank",
+                                        "size": "small"
                                     },
                                     "content": [
                                         {
@@ -2231,1117 +2997,704 @@ class nexusinvitees(_PluginBase):
                                                 "start": True,
                                                 "size": "small"
                                             },
-                                            "text": "mdi-alert-circle"
+                                            "text": "mdi-store"
                                         },
                                         {
                                             "component": "span",
-                                            "text": f"不可邀请原因: {reason}"
+                                            "text": "前往商店购买"
                                         }
                                     ]
                                 }
                             ]
-                        })
-                    
-                    # M-Team站点特殊处理
-                    if is_mteam_site:
-                        # 尝试从reason中提取用户等级和魔力值信息
-                        import re
+                        }
+                    ]
+                })
 
-                        
-                        # 提取用户等级
-                        user_role = ""
-                        level_match = re.search(r'用户等级\(([^)]+)\)', reason)
-                        if level_match:
-                            user_role = level_match.group(1)
 
-                        
-                        # 提取魔力值
-                        user_bonus = ""
-                        bonus_match = re.search(r'魔力值\(([0-9.]+)\)', reason)
-                        if bonus_match:
-                            user_bonus = bonus_match.group(1)                       
-                        # 提取可购买邀请数
-                        buyable_invites = 0
-                        buy_match = re.search(r'可购买(\d+)个', reason)
-                        if buy_match:
-                            buyable_invites = int(buy_match.group(1))                           
-                        # 计算MT可买药数量
-                        mt_buyable = 0
-                        if user_bonus and user_role:
-                            try:
-                                user_bonus_float = float(user_bonus)
-                                # 每80000魔力可买一个
-                                mt_buyable = int(user_bonus_float / 80000)
-                                # 向药单打标MT可买药数量
-                                self.presc.setMTBuyable(site_name, mt_buyable)
-                            except (ValueError, TypeError):
-                                user_bonus_float = 0                               
-                        # 如果魔力值和用户等级有效
-                        if user_bonus and user_role:                          
-                            # 计算还需多少魔力
-                            try:
-                                user_bonus_float = float(user_bonus)
-                                needed_bonus = 80000 - (user_bonus_float % 80000)
-                                needed_bonus_text = f"(还需{needed_bonus:.1f}魔力)" if mt_buyable == 0 and user_bonus_float > 0 else ""
-                            except (ValueError, TypeError):
-                                user_bonus_float = 0
-                            
-                            # 添加用户等级卡片
-                            site_card["content"].append({
-                                "component": "VCardText",
+        # 只有在有邀请列表时才添加表格
+        if invitees:
+            table_rows = []
+            for invitee in invitees:
+                # 判断用户是否被ban或分享率较低
+                is_banned = invitee.get('enabled', '').lower() == 'no'
+
+                # 使用ratio_health和ratio_label字段
+                ratio_health = invitee.get('ratio_health', '')
+                ratio_label = invitee.get('ratio_label', ['', ''])
+
+                # 根据ratio_health设置行样式
+                row_class = ""
+                if is_banned:
+                    row_class = "error"  # 被ban用户使用红色背景
+                elif ratio_health == "neutral":
+                    row_class = "grey-lighten-3"  # 无数据使用灰色背景
+                elif ratio_health == "warning":
+                    row_class = "warning-lighten-4"  # 警告使用橙色背景
+                elif ratio_health == "danger":
+                    row_class = "error-lighten-4"  # 危险使用红色背景
+
+                # 设置分享率样式
+                ratio_class = ""
+                if ratio_health == "excellent":
+                    ratio_class = "text-success font-weight-bold"
+                elif ratio_health == "good":
+                    ratio_class = "text-success"
+                elif ratio_health == "warning":
+                    ratio_class = "text-warning font-weight-bold"
+                elif ratio_health == "danger":
+                    ratio_class = "text-error font-weight-bold"
+                elif ratio_health == "neutral":
+                    ratio_class = "text-grey"
+
+                # 创建行
+                table_rows.append({
+                    "component": "tr",
+                    "props": {
+                        "class": row_class
+                    },
+                    "content": [
+                        {
+                            "component": "td",
+                            "content": [{
+                                "component": "VBtn",
                                 "props": {
-                                    "class": "py-0"
+                                    "variant": "text",
+                                    "href": invitee.get("profile_url", ""),
+                                    "target": "_blank",
+                                    "density": "compact"
                                 },
+                                "text": invitee.get("username", "")
+                            }]
+                        },
+                        {"component": "td",
+                            "text": invitee.get("email", "")},
+                        {"component": "td", "text": invitee.get(
+                            "uploaded", "")},
+                        {"component": "td", "text": invitee.get(
+                            "downloaded", "")},
+                        {
+                            "component": "td",
+                            "props": {
+                                "class": ratio_class
+                            },
+                            "text": invitee.get("ratio", "")
+                        },
+                        {"component": "td", "text": invitee.get(
+                            "seeding", "")},
+                        {"component": "td", "text": invitee.get(
+                            "seeding_size", "")},
+                        {"component": "td", "text": invitee.get(
+                            "seed_magic", "") or invitee.get("magic", "") or invitee.get("seed_time", "")},
+                        {"component": "td", "text": invitee.get(
+                            "seed_bonus", "") or invitee.get("invitee_bonus", "") or invitee.get("bonus", "")},
+                        {"component": "td", "text": invitee.get(
+                            "last_seed_report", "") or invitee.get("last_seen", "")},
+                        {
+                            "component": "td",
+                            "props": {
+                                "class": ("text-success" if invitee.get('status') == '已确认' else "") +
+                                         (" text-error font-weight-bold" if invitee.get('enabled', '').lower() == 'no' else "")
+                            },
+                            "text": invitee.get("status", "") + (" (已禁用)" if invitee.get('enabled', '').lower() == 'no' else "")
+                        }
+                    ]
+                })
+
+            site_card["content"].append({
+                "component": "VCardText",
+                "props": {
+                    "class": "pt-0 px-2"
+                },
+                "content": [{
+                    "component": "VExpansionPanels",
+                    "props": {
+                        "variant": "accordion"
+                    },
+                    "content": [{
+                        "component": "VExpansionPanel",
+                        "content": [
+                            {
+                                "component": "VExpansionPanelTitle",
                                 "content": [
                                     {
-                                        "component": "VRow",
+                                        "component": "div",
                                         "props": {
-                                            "dense": True
+                                            "class": "d-flex align-center"
                                         },
                                         "content": [
-                                            # 用户等级
                                             {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center py-2"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "color": "deep-purple",
-                                                                "size": "small",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-crown"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                    "text": user_role
-                                                                },
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-caption"},
-                                                                    "text": "用户等级"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
+                                                "component": "VIcon",
+                                                "props": {
+                                                    "color": "primary",
+                                                    "size": "small",
+                                                    "class": "mr-2"
+                                                },
+                                                "text": "mdi-account-group"
                                             },
-                                            # 魔力值
                                             {
-                                                "component": "VCol",
-                                                "props": {"cols": 3},
-                                                "content": [{
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center py-2"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "color": "orange",
-                                                                "size": "small",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-diamond"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                    "text": user_bonus
-                                                                },
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-caption"},
-                                                                    "text": "魔力值"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
+                                                "component": "span",
+                                                "text": f"后宫成员列表 ({len(invitees)}人)"
                                             },
-                                            # 可购买邀请
                                             {
-                                                "component": "VCol",
-                                                "props": {"cols": 6},
-                                                "content": [{
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center py-2"
-                                                    },
-                                                    "content": [
-                                                        {
-                                                            "component": "VIcon",
-                                                            "props": {
-                                                                "color": "cyan",
-                                                                "size": "small",
-                                                                "class": "mr-2"
-                                                            },
-                                                            "text": "mdi-cart"
-                                                        },
-                                                        {
-                                                            "component": "div",
-                                                            "content": [
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                    "text": str(buyable_invites) + " " + needed_bonus_text
-                                                                },
-                                                                {
-                                                                    "component": "div",
-                                                                    "props": {"class": "text-caption"},
-                                                                    "text": "可购买邀请"
-                                                                }
-                                                            ]
-                                                        }
-                                                    ]
-                                                }]
-                                            }
-                                        ]
-                                    }
-                                ]
-                            })
-                            
-                            # 添加提示信息
-                            site_card["content"].append({
-                                "component": "VCardText",
-                                "props": {
-                                    "class": "py-1"
-                                },
-                                "content": [
-                                    {
-                                        "component": "VAlert",
-                                        "props": {
-                                            "type": "info",
-                                            "variant": "tonal",
-                                            "density": "compact",
-                                            "class": "my-1 d-flex align-center"
-                                        },
-                                        "content": [
+                                                "component": "VSpacer"
+                                            },
                                             {
                                                 "component": "VIcon",
                                                 "props": {
-                                                    "start": True,
-                                                    "size": "small"
+                                                    "size": "small",
+                                                    "color": "error",
+                                                    "class": "mr-1"
                                                 },
-                                                "text": "mdi-information"
+                                                "text": "mdi-alert-circle" if low_ratio_count > 0 else ""
                                             },
                                             {
                                                 "component": "span",
-                                                "props": {"class": "flex-grow-1"},
-                                                "text": "M-Team每80000魔力可购买一个临时邀请"
+                                                "props": {"class": "text-caption mr-3"},
+                                                "text": f"{low_ratio_count}人低分享" if low_ratio_count > 0 else ""
                                             },
-                                            {
-                                                "component": "VBtn",
-                                                "props": {
-                                                    "variant": "text",
-                                                    "density": "compact",
-                                                    "color": "primary",
-                                                    "href": site_url_lower + "mybonus",
-                                                    "target": "_blank",
-                                                    "size": "small"
-                                                },
-                                                "content": [
-                                                    {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "start": True,
-                                                            "size": "small"
-                                                        },
-                                                        "text": "mdi-store"
-                                                    },
-                                                    {
-                                                        "component": "span",
-                                                        "text": "前往商店购买"
-                                                    }
-                                                ]
-                                            }
-                                        ]
-                                    }
-                                ]
-                            })
-                            
-                            # M-Team特殊显示时跳过原来的警告提示
-                            error_message = ""
-                            reason = ""
-                    
-                    # 通用NexusPHP和蝶粉站点处理
-                    elif bonus > 0 and (permanent_invite_price > 0 or temporary_invite_price > 0):
-                        
-                        # 计算可购买邀请数量
-                        can_buy_permanent = 0
-                        can_buy_temporary = 0
-                        
-                        if permanent_invite_price > 0:
-                            can_buy_permanent = int(bonus / permanent_invite_price)
-                        
-                        if temporary_invite_price > 0:
-                            can_buy_temporary = int(bonus / temporary_invite_price)
-                        # 向药单打标可购买临药永药数量
-                        self.presc.setCBP(site_name,can_buy_permanent)
-                        self.presc.setCBT(site_name,can_buy_temporary)
-                        # 计算购买邀请后剩余魔力
-                        remaining_bonus = bonus
-                        if can_buy_permanent > 0 and permanent_invite_price > 0:
-                            remaining_bonus = bonus % permanent_invite_price
-                        elif can_buy_temporary > 0 and temporary_invite_price > 0:
-                            remaining_bonus = bonus % temporary_invite_price
-                        
-                        # 添加魔力值信息卡片
-                        site_card["content"].append({
-                            "component": "VCardText",
-                            "props": {
-                                "class": "py-0"
-                            },
-                            "content": [
-                                {
-                                    "component": "VRow",
-                                    "props": {
-                                        "dense": True
-                                    },
-                                    "content": [
-                                        # 魔力值
-                                        {
-                                            "component": "VCol",
-                                            "props": {"cols": 3},
-                                            "content": [{
-                                                "component": "div",
-                                                "props": {
-                                                    "class": "d-flex align-center py-2"
-                                                },
-                                                "content": [
-                                                    {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "color": "orange",
-                                                            "size": "small",
-                                                            "class": "mr-2"
-                                                        },
-                                                        "text": "mdi-diamond"
-                                                    },
-                                                    {
-                                                        "component": "div",
-                                                        "content": [
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                "text": str(bonus)
-                                                            },
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-caption"},
-                                                                "text": "魔力值"
-                                                            }
-                                                        ]
-                                                    }
-                                                ]
-                                            }]
-                                        },
-                                        # 可购买永久邀请
-                                        {
-                                            "component": "VCol",
-                                            "props": {"cols": {
-                                                "cols": 4,
-                                                "md": 3
-                                            }},
-                                            "content": [] if permanent_invite_price <= 0 else [{
-                                                "component": "div",
-                                                "props": {
-                                                    "class": "d-flex align-center py-2"
-                                                },
-                                                "content": [
-                                                    {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "color": "purple",
-                                                            "size": "small",
-                                                            "class": "mr-2"
-                                                        },
-                                                        "text": "mdi-ticket-confirmation"
-                                                    },
-                                                    {
-                                                        "component": "div",
-                                                        "content": [
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                "text": f"{can_buy_permanent}个 ({permanent_invite_price}魔力/个)" if can_buy_permanent > 0 else f"0个 (需{permanent_invite_price}魔力)"
-                                                            },
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-caption"},
-                                                                "text": "可购买永久邀请"
-                                                            }
-                                                        ]
-                                                    }
-                                                ]
-                                            }]
-                                        },
-                                        # 可购买临时邀请
-                                        {
-                                            "component": "VCol",
-                                            "props": {"cols": {
-                                                "cols": 4,
-                                                "md": 3
-                                            }},
-                                            "content": [] if temporary_invite_price <= 0 else [{
-                                                "component": "div",
-                                                "props": {
-                                                    "class": "d-flex align-center py-2"
-                                                },
-                                                "content": [
-                                                    {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "color": "pink",
-                                                            "size": "small",
-                                                            "class": "mr-2"
-                                                        },
-                                                        "text": "mdi-ticket"
-                                                    },
-                                                    {
-                                                        "component": "div",
-                                                        "content": [
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-subtitle-2 font-weight-medium"},
-                                                                "text": f"{can_buy_temporary}个 ({temporary_invite_price}魔力/个)" if can_buy_temporary > 0 else f"0个 (需{temporary_invite_price}魔力)"
-                                                            },
-                                                            {
-                                                                "component": "div",
-                                                                "props": {"class": "text-caption"},
-                                                                "text": "可购买临时邀请"
-                                                            }
-                                                        ]
-                                                    }
-                                                ]
-                                            }]
-                                        },
-                                        # 按钮占位
-                                        {
-                                            "component": "VCol",
-                                            "props": {"cols": 3},
-                                            "content": []
-                                        }
-                                    ]
-                                }
-                            ]
-                        })
-                        
-                        # 添加提示信息和购买按钮
-                        if permanent_invite_price > 0 or temporary_invite_price > 0:
-                            # 构造价格文本，确保类型转换
-                            price_text = "站点商店邀请价格: "
-                            parts = []
-                            
-                            if permanent_invite_price > 0:
-                                parts.append(f"永久邀请 {permanent_invite_price} 魔力")
-                            
-                            if temporary_invite_price > 0:
-                                parts.append(f"临时邀请 {temporary_invite_price} 魔力")
-                            
-                            price_text += "，".join(parts)
-                            
-                            site_card["content"].append({
-                                "component": "VCardText",
-                                "props": {
-                                    "class": "py-1"
-                                },
-                                "content": [
-                                    {
-                                        "component": "VAlert",
-                                        "props": {
-                                            "type": "info",
-                                            "variant": "tonal",
-                                            "density": "compact",
-                                            "class": "my-1 d-flex align-center"
-                                        },
-                                        "content": [
                                             {
                                                 "component": "VIcon",
                                                 "props": {
-                                                    "start": True,
-                                                    "size": "small"
+                                                    "size": "small",
+                                                    "color": "error",
+                                                    "class": "mr-1"
                                                 },
-                                                "text": "mdi-information"
+                                                "text": "mdi-account-cancel" if banned_count > 0 else ""
                                             },
                                             {
                                                 "component": "span",
-                                                "props": {"class": "flex-grow-1"},
-                                                "text": price_text
+                                                "props": {"class": "text-caption mr-3"},
+                                                "text": f"{banned_count}人禁用" if banned_count > 0 else ""
                                             },
                                             {
-                                                "component": "VBtn",
+                                                "component": "VIcon",
                                                 "props": {
-                                                    "variant": "text",
-                                                    "density": "compact",
-                                                    "color": "primary",
-                                                    "href": site_url_lower + "mybonus.php",
-                                                    "target": "_blank",
-                                                    "size": "small"
+                                                    "size": "small",
+                                                    "color": "#9E9E9E",
+                                                    "class": "mr-1"
                                                 },
-                                                "content": [
-                                                    {
-                                                        "component": "VIcon",
-                                                        "props": {
-                                                            "start": True,
-                                                            "size": "small"
-                                                        },
-                                                        "text": "mdi-store"
-                                                    },
-                                                    {
-                                                        "component": "span",
-                                                        "text": "前往商店购买"
-                                                    }
-                                                ]
+                                                "text": "mdi-database-off" if no_data_count > 0 else ""
+                                            },
+                                            {
+                                                "component": "span",
+                                                "props": {"class": "text-caption"},
+                                                "text": f"{no_data_count}人无数据" if no_data_count > 0 else ""
                                             }
                                         ]
                                     }
                                 ]
-                            })
-                        
-
-                    # 只有在有邀请列表时才添加表格
-                    if invitees:
-                        table_rows = []
-                        for invitee in invitees:
-                            # 判断用户是否被ban或分享率较低
-                            is_banned = invitee.get('enabled', '').lower() == 'no'
-                            
-                            # 使用ratio_health和ratio_label字段
-                            ratio_health = invitee.get('ratio_health', '')
-                            ratio_label = invitee.get('ratio_label', ['', ''])
-
-                            # 根据ratio_health设置行样式
-                            row_class = ""
-                            if is_banned:
-                                row_class = "error"  # 被ban用户使用红色背景
-                            elif ratio_health == "neutral":
-                                row_class = "grey-lighten-3"  # 无数据使用灰色背景
-                            elif ratio_health == "warning":
-                                row_class = "warning-lighten-4"  # 警告使用橙色背景
-                            elif ratio_health == "danger":
-                                row_class = "error-lighten-4"  # 危险使用红色背景
-
-                            # 设置分享率样式
-                            ratio_class = ""
-                            if ratio_health == "excellent":
-                                ratio_class = "text-success font-weight-bold"
-                            elif ratio_health == "good":
-                                ratio_class = "text-success"
-                            elif ratio_health == "warning":
-                                ratio_class = "text-warning font-weight-bold"
-                            elif ratio_health == "danger":
-                                ratio_class = "text-error font-weight-bold"
-                            elif ratio_health == "neutral":
-                                ratio_class = "text-grey"
-
-                            # 创建行
-                            table_rows.append({
-                                "component": "tr",
-                                "props": {
-                                    "class": row_class
-                                },
-                                "content": [
-                                    {
-                                        "component": "td",
+                            },
+                            {
+                                "component": "VExpansionPanelText",
+                                "content": [{
+                                    "component": "VTable",
+                                    "props": {
+                                        "hover": True,
+                                        "density": "compact",
+                                        "fixed-header": False,
+                                        "class": "site-invitees-table text-caption",
+                                    },
+                                    "content": [{
+                                        "component": "thead",
                                         "content": [{
-                                            "component": "VBtn",
+                                            "component": "tr",
                                             "props": {
-                                                "variant": "text",
-                                                "href": invitee.get("profile_url", ""),
-                                                "target": "_blank",
-                                                "density": "compact"
+                                                "class": "bg-primary-lighten-5"
                                             },
-                                            "text": invitee.get("username", "")
-                                        }]
-                                    },
-                                    {"component": "td",
-                                        "text": invitee.get("email", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "uploaded", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "downloaded", "")},
-                                    {
-                                        "component": "td",
-                                        "props": {
-                                            "class": ratio_class
-                                        },
-                                        "text": invitee.get("ratio", "")
-                                    },
-                                    {"component": "td", "text": invitee.get(
-                                        "seeding", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "seeding_size", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "seed_magic", "") or invitee.get("magic", "") or invitee.get("seed_time", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "seed_bonus", "") or invitee.get("invitee_bonus", "") or invitee.get("bonus", "")},
-                                    {"component": "td", "text": invitee.get(
-                                        "last_seed_report", "") or invitee.get("last_seen", "")},
-                                    {
-                                        "component": "td",
-                                        "props": {
-                                            "class": ("text-success" if invitee.get('status') == '已确认' else "") +
-                                                     (" text-error font-weight-bold" if invitee.get('enabled', '').lower() == 'no' else "")
-                                        },
-                                        "text": invitee.get("status", "") + (" (已禁用)" if invitee.get('enabled', '').lower() == 'no' else "")
-                                    }
-                                ]
-                            })
-
-                        site_card["content"].append({
-                            "component": "VCardText",
-                            "props": {
-                                "class": "pt-0 px-2"
-                            },
-                            "content": [{
-                                "component": "VExpansionPanels",
-                                "props": {
-                                    "variant": "accordion"
-                                },
-                                "content": [{
-                                    "component": "VExpansionPanel",
-                                    "content": [
-                                        {
-                                            "component": "VExpansionPanelTitle",
                                             "content": [
                                                 {
-                                                    "component": "div",
-                                                    "props": {
-                                                        "class": "d-flex align-center"
-                                                    },
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
+                                                        {
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#2196F3"
+                                                                    },
+                                                                    "text": "mdi-account"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "用户名"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
+                                                        {
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#4CAF50"
+                                                                    },
+                                                                    "text": "mdi-email"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "邮箱"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
                                                     "content": [
                                                         {
-                                                            "component": "VIcon",
+                                                            "component": "div",
                                                             "props": {
-                                                                "color": "primary",
-                                                                "size": "small",
-                                                                "class": "mr-2"
+                                                                "class": "d-flex align-center"
                                                             },
-                                                            "text": "mdi-account-group"
-                                                        },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#F44336"
+                                                                    },
+                                                                    "text": "mdi-arrow-up-thick"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "上传量"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "span",
-                                                            "text": f"后宫成员列表 ({len(invitees)}人)"
-                                                        },
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#FF9800"
+                                                                    },
+                                                                    "text": "mdi-arrow-down-thick"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "下载量"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "VSpacer"
-                                                        },
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#2196F3"
+                                                                    },
+                                                                    "text": "mdi-poll"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "分享率"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "VIcon",
+                                                            "component": "div",
                                                             "props": {
-                                                                "size": "small",
-                                                                "color": "error",
-                                                                "class": "mr-1"
+                                                                "class": "d-flex align-center"
                                                             },
-                                                            "text": "mdi-alert-circle" if low_ratio_count > 0 else ""
-                                                        },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#2196F3"
+                                                                    },
+                                                                    "text": "mdi-database"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "做种数"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "span",
-                                                            "props": {"class": "text-caption mr-3"},
-                                                            "text": f"{low_ratio_count}人低分享" if low_ratio_count > 0 else ""
-                                                        },
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#1976D2"
+                                                                    },
+                                                                    "text": "mdi-harddisk"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "做种体积"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "VIcon",
+                                                            "component": "div",
                                                             "props": {
-                                                                "size": "small",
-                                                                "color": "error",
-                                                                "class": "mr-1"
+                                                                "class": "d-flex align-center"
                                                             },
-                                                            "text": "mdi-account-cancel" if banned_count > 0 else ""
-                                                        },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#673AB7"
+                                                                    },
+                                                                    "text": "mdi-magic"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "魔力值"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "span",
-                                                            "props": {"class": "text-caption mr-3"},
-                                                            "text": f"{banned_count}人禁用" if banned_count > 0 else ""
-                                                        },
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#009688"
+                                                                    },
+                                                                    "text": "mdi-star"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "加成"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "VIcon",
+                                                            "component": "div",
                                                             "props": {
-                                                                "size": "small",
-                                                                "color": "#9E9E9E",
-                                                                "class": "mr-1"
+                                                                "class": "d-flex align-center"
                                                             },
-                                                            "text": "mdi-database-off" if no_data_count > 0 else ""
-                                                        },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#607D8B"
+                                                                    },
+                                                                    "text": "mdi-clock"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "最后报告"
+                                                                }
+                                                            ]
+                                                        }
+                                                    ]
+                                                },
+                                                {
+                                                    "component": "th", 
+                                                    "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
+                                                    "content": [
                                                         {
-                                                            "component": "span",
-                                                            "props": {"class": "text-caption"},
-                                                            "text": f"{no_data_count}人无数据" if no_data_count > 0 else ""
+                                                            "component": "div",
+                                                            "props": {
+                                                                "class": "d-flex align-center"
+                                                            },
+                                                            "content": [
+                                                                {
+                                                                    "component": "VIcon",
+                                                                    "props": {
+                                                                        "size": "14",
+                                                                        "class": "mr-1",
+                                                                        "color": "#00BCD4"
+                                                                    },
+                                                                    "text": "mdi-information"
+                                                                },
+                                                                {
+                                                                    "component": "span",
+                                                                    "text": "状态"
+                                                                }
+                                                            ]
                                                         }
                                                     ]
                                                 }
                                             ]
-                                        },
-                                        {
-                                            "component": "VExpansionPanelText",
-                                            "content": [{
-                                                "component": "VTable",
-                                                "props": {
-                                                    "hover": True,
-                                                    "density": "compact",
-                                                    "fixed-header": False,
-                                                    "class": "site-invitees-table text-caption",
-                                                },
-                                                "content": [{
-                                                    "component": "thead",
-                                                    "content": [{
-                                                        "component": "tr",
-                                                        "props": {
-                                                            "class": "bg-primary-lighten-5"
-                                                        },
-                                                        "content": [
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#2196F3"
-                                                                                },
-                                                                                "text": "mdi-account"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "用户名"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#4CAF50"
-                                                                                },
-                                                                                "text": "mdi-email"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "邮箱"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#F44336"
-                                                                                },
-                                                                                "text": "mdi-arrow-up-thick"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "上传量"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#FF9800"
-                                                                                },
-                                                                                "text": "mdi-arrow-down-thick"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "下载量"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#2196F3"
-                                                                                },
-                                                                                "text": "mdi-poll"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "分享率"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#2196F3"
-                                                                                },
-                                                                                "text": "mdi-database"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "做种数"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#1976D2"
-                                                                                },
-                                                                                "text": "mdi-harddisk"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "做种体积"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#673AB7"
-                                                                                },
-                                                                                "text": "mdi-magic"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "魔力值"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#009688"
-                                                                                },
-                                                                                "text": "mdi-star"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "加成"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#607D8B"
-                                                                                },
-                                                                                "text": "mdi-clock"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "最后报告"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            },
-                                                            {
-                                                                "component": "th", 
-                                                                "props": {"class": "text-caption", "style": "white-space: nowrap; padding: 4px 8px;"},
-                                                                "content": [
-                                                                    {
-                                                                        "component": "div",
-                                                                        "props": {
-                                                                            "class": "d-flex align-center"
-                                                                        },
-                                                                        "content": [
-                                                                            {
-                                                                                "component": "VIcon",
-                                                                                "props": {
-                                                                                    "size": "14",
-                                                                                    "class": "mr-1",
-                                                                                    "color": "#00BCD4"
-                                                                                },
-                                                                                "text": "mdi-information"
-                                                                            },
-                                                                            {
-                                                                                "component": "span",
-                                                                                "text": "状态"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            }
-                                                        ]
-                                                    }]
-                                                }, {
-                                                    "component": "tbody",
-                                                    "content": table_rows
-                                                }]
-                                            }]
-                                        }
-                                    ]
+                                        }]
+                                    }, {
+                                        "component": "tbody",
+                                        "content": table_rows
+                                    }]
                                 }]
-                            }]
-                        })
-                    
-                    cards.append(site_card)
-                                # 添加药单组件到总览下方
-            drug_component = self.presc.getComponent()
-            if drug_component:
-                page_content.append(drug_component)
-            
-            # 将站点卡片添加到页面
-            page_content.extend(cards)
+                            }
+                        ]
+                    }]
+                }]
+            })
 
-            # 添加说明提示
-            if not cards:
-                page_content.append({
-                    "component": "VAlert",
-                    "props": {
-                        "type": "warning",
-                        "text": "暂无数据，请先在配置中选择要管理的站点，并打开\"立即运行一次\"开关获取数据",
-                        "variant": "tonal",
-                        "class": "mt-4"
+        return site_card
+
+    def _build_telemetry_panel(self) -> Optional[dict]:
+        """
+        生成刷新耗时统计表格：每个站点最近一次刷新的分项耗时，以及最近几次的平均/最长耗时
+        """
+        runs = self.data_manager.get_refresh_telemetry()
+        if not runs:
+            return None
+        summary = summarize_runs(runs)
+
+        headers = ["站点", "最近耗时", "网络", "解析", "页面数", "下载量", "成员数", "最慢阶段",
+                   f"近{len(runs)}次平均", "最长"]
+        rows = []
+        # 按最近一次耗时从高到低排列，慢站点排在前面
+        for site_name, item in sorted(summary.items(), key=lambda entry: -entry[1]["last"].get("elapsed", 0)):
+            last = item["last"]
+            phases = last.get("phases") or {}
+            slowest = max(phases.items(), key=lambda entry: entry[1].get("time", 0), default=None)
+            slowest_text = (f"{PHASE_NAMES.get(slowest[0], slowest[0])} {slowest[1].get('time', 0):.2f}s"
+                            if slowest else "-")
+            cells = [
+                site_name,
+                f"{last.get('elapsed', 0):.2f}s",
+                f"{last.get('network', 0):.2f}s",
+                f"{last.get('parse', 0):.2f}s",
+                str(last.get("pages", 0)),
+                SiteHelper.format_size(last.get("bytes", 0)),
+                str(last.get("invitees", 0)),
+                slowest_text,
+                f"{item['avg_elapsed']:.2f}s",
+                f"{item['max_elapsed']:.2f}s"
+            ]
+            rows.append({
+                "component": "tr",
+                "props": {"class": "" if last.get("success", True) else "text-error"},
+                "content": [{"component": "td", "text": cell} for cell in cells]
+            })
+
+        return {
+            "component": "VExpansionPanels",
+            "props": {"class": "mt-4"},
+            "content": [{
+                "component": "VExpansionPanel",
+                "content": [
+                    {
+                        "component": "VExpansionPanelTitle",
+                        "text": f"刷新耗时统计（最近{len(runs)}次刷新）"
+                    },
+                    {
+                        "component": "VExpansionPanelText",
+                        "content": [{
+                            "component": "VTable",
+                            "props": {
+                                "hover": True,
+                                "density": "compact",
+                                "class": "site-invitees-table text-caption"
+                            },
+                            "content": [
+                                {
+                                    "component": "thead",
+                                    "content": [{
+                                        "component": "tr",
+                                        "content": [{"component": "th", "text": header} for header in headers]
+                                    }]
+                                },
+                                {
+                                    "component": "tbody",
+                                    "content": rows
+                                }
+                            ]
+                        }]
                     }
-                })
-            # 删除这行，因为我们已经在后宫总览下方添加了药单
-            # page_content.insert(0,self.presc.getComponent())
-            return page_content
-            
-        except Exception as e:
-            logger.error(f"生成详情页面失败: {str(e)}")
-            return [{
-                "component": "VAlert",
-                "props": {
-                    "type": "error",
-                    "text": f"生成详情页面失败: {str(e)}"
-                }
+                ]
             }]
+        }
+
+    def _ensure_http_client(self):
+        """
+        按重试配置和选中站点数创建共享HTTP客户端，配置未变化时保留已有连接池
+        连接池按站点数保留主机，全部站点刷新一轮后各主机的长连接仍可复用
+        """
+        site_count = len(self._nexus_sites) or len(self.sites.get_indexers() or [])
+        pool_hosts = HttpClient.pool_hosts_for(site_count)
+        if self._http_client and (self._http_retries, self._http_backoff, pool_hosts) == (
+                self._http_client.retries, self._http_client.backoff, self._http_client.pool_hosts):
+            return
+        if self._http_client:
+            self._http_client.close()
+        self._http_client = HttpClient(self._http_retries, self._http_backoff, pool_hosts)
+        logger.debug(f"共享HTTP客户端已创建，保持 {pool_hosts} 个主机的连接池")
 
     def stop_service(self):
         """
         停止现有服务
         """
         try:
-            if hasattr(self, '_scheduler') and self._scheduler:
-                self._scheduler.remove_all_jobs()
-                if self._scheduler.running:
-                    self._scheduler.shutdown()
-                self._scheduler = None
+            if self._refresh_queue:
+                self._refresh_queue.stop()
+            if self._http_client:
+                self._http_client.close()
+            if self._probe_client:
+                self._probe_client.close()
+            if self._parse_pool:
+                self._parse_pool.shutdown()
+                self._parse_pool = None
+            if self._stop_scheduler():
                 logger.info("后宫管理系统服务已停止")
         except Exception as e:
             logger.error(f"停止后宫管理系统服务失败: {str(e)}")
 
-    def _get_site_invite_data(self, site_name):
+    def _stop_scheduler(self) -> bool:
         """
-        获取站点邀请页面数据
+        只停止定时任务，刷新队列、HTTP客户端等仍可继续使用
+        :return: 是否停止了定时任务
         """
-        try:
-            # 获取站点信息
-            site_info = None
-            for indexer in self.sites.get_indexers():
-                if indexer.get("name") == site_name:
-                    site_info = indexer
-                    break
-                    
-            if not site_info:
-                logger.error(f"站点 {site_name} 信息不存在")
-                return {
-                    "error": "站点信息不存在",
-                    "invite_status": {
-                        "can_invite": False,
-                        "permanent_count": 0,
-                        "temporary_count": 0,
-                        "reason": "站点信息不存在"
-                    }
+        if not self._scheduler:
+            return False
+        self._scheduler.remove_all_jobs()
+        if self._scheduler.running:
+            self._scheduler.shutdown()
+        self._scheduler = None
+        return True
+
+    def _resolve_refresh_site(self, site_name: str) -> Tuple[Optional[Dict[str, Any]], bool, Optional[Dict[str, Any]]]:
+        """
+        查找站点配置并检查刷新所需的认证信息
+        :param site_name: 站点名称
+        :return: (站点信息, 是否M-Team站点, 不可刷新时的错误结果)
+        """
+        # 获取站点信息
+        site_info = None
+        for indexer in self.sites.get_indexers():
+            if indexer.get("name") == site_name:
+                site_info = indexer
+                break
+
+        if not site_info:
+            logger.error(f"站点 {site_name} 信息不存在")
+            return None, False, {
+                "error": "站点信息不存在",
+                "invite_status": {
+                    "can_invite": False,
+                    "permanent_count": 0,
+                    "temporary_count": 0,
+                    "reason": "站点信息不存在"
                 }
-                
-            site_url = site_info.get("url", "").strip()
-            site_cookie = site_info.get("cookie", "").strip()
-            ua = site_info.get("ua", "").strip()
-            site_id = site_info.get("id", "")
-            
-            # 检查是否是M-Team站点
-            is_mteam = False
-            site_url_lower = site_url.lower()
-            mteam_features = ["m-team", "api.m-team.cc", "api.m-team.io"]
-            for feature in mteam_features:
-                if feature in site_url_lower:
-                    is_mteam = True
-                    logger.info(f"站点 {site_name} 匹配到M-Team特征: {feature}")
-                    break
-            
-            # 如果是M-Team站点，检查API认证信息
-            if is_mteam:
-                api_key = site_info.get("apikey", "").strip()
-                token = site_info.get("token", "").strip()
-                
-                if not all([site_url, api_key, token, ua]):
-                    missing_fields = []
-                    if not site_url:
-                        missing_fields.append("站点URL")
-                    if not api_key:
-                        missing_fields.append("API Key")
-                    if not token:
-                        missing_fields.append("Authorization Token")
-                    if not ua:
-                        missing_fields.append("User-Agent")
-                        
-                    error_msg = f"M-Team API认证信息不完整: {', '.join(missing_fields)}"
-                    logger.error(f"站点 {site_name} {error_msg}")
-                    return {
-                        "error": error_msg,
-                        "invite_status": {
-                            "can_invite": False,
-                            "permanent_count": 0,
-                            "temporary_count": 0,
-                            "reason": error_msg
-                        }
-                    }
-            # 对于非M-Team站点，检查Cookie
-            elif not all([site_url, site_cookie, ua]):
+            }
+
+        site_url = site_info.get("url", "").strip()
+        site_cookie = site_info.get("cookie", "").strip()
+        ua = site_info.get("ua", "").strip()
+        site_id = site_info.get("id", "")
+
+        # 检查是否是M-Team站点
+        is_mteam = False
+        site_url_lower = site_url.lower()
+        mteam_features = ["m-team", "api.m-team.cc", "api.m-team.io"]
+        for feature in mteam_features:
+            if feature in site_url_lower:
+                is_mteam = True
+                logger.info(f"站点 {site_name} 匹配到M-Team特征: {feature}")
+                break
+
+        # 如果是M-Team站点，检查API认证信息
+        if is_mteam:
+            api_key = site_info.get("apikey", "").strip()
+            token = site_info.get("token", "").strip()
+
+            if not all([site_url, api_key, token, ua]):
                 missing_fields = []
                 if not site_url:
                     missing_fields.append("站点URL")
-                if not site_cookie:
-                    missing_fields.append("Cookie")
+                if not api_key:
+                    missing_fields.append("API Key")
+                if not token:
+                    missing_fields.append("Authorization Token")
                 if not ua:
                     missing_fields.append("User-Agent")
-                    
-                error_msg = f"站点信息不完整: {', '.join(missing_fields)}"
+
+                error_msg = f"M-Team API认证信息不完整: {', '.join(missing_fields)}"
                 logger.error(f"站点 {site_name} {error_msg}")
-                return {
+                return None, False, {
                     "error": error_msg,
                     "invite_status": {
                         "can_invite": False,
@@ -3350,129 +3703,122 @@ class nexusinvitees(_PluginBase):
                         "reason": error_msg
                     }
                 }
+        # 对于非M-Team站点，检查Cookie
+        elif not all([site_url, site_cookie, ua]):
+            missing_fields = []
+            if not site_url:
+                missing_fields.append("站点URL")
+            if not site_cookie:
+                missing_fields.append("Cookie")
+            if not ua:
+                missing_fields.append("User-Agent")
+
+            error_msg = f"站点信息不完整: {', '.join(missing_fields)}"
+            logger.error(f"站点 {site_name} {error_msg}")
+            return None, False, {
+                "error": error_msg,
+                "invite_status": {
+                    "can_invite": False,
+                    "permanent_count": 0,
+                    "temporary_count": 0,
+                    "reason": error_msg
+                }
+            }
+
+        # 先验证此站点是否在用户选择的站点列表中
+        if self._nexus_sites and str(site_id) not in [str(x) for x in self._nexus_sites]:
+            logger.warning(f"站点 {site_name} 不在用户选择的站点列表中，跳过处理")
+            return None, False, {
+                "error": "站点未被选择",
+                "invite_status": {
+                    "can_invite": False,
+                    "permanent_count": 0,
+                    "temporary_count": 0,
+                    "reason": "站点未被选择"
+                }
+            }
+        return site_info, is_mteam, None
 
-            # 先验证此站点是否在用户选择的站点列表中
-            if self._nexus_sites and str(site_id) not in [str(x) for x in self._nexus_sites]:
-                logger.warning(f"站点 {site_name} 不在用户选择的站点列表中，跳过处理")
-                return {
-                    "error": "站点未被选择",
-                    "invite_status": {
-                        "can_invite": False,
-                        "permanent_count": 0,
-                        "temporary_count": 0,
-                        "reason": "站点未被选择"
-                    }
-                }
+    def _get_site_invite_data(self, site_name):
+        """
+        获取站点邀请页面数据
+        """
+        try:
+            site_info, is_mteam, error_result = self._resolve_refresh_site(site_name)
+            if error_result:
+                return error_result
+            site_url = site_info.get("url", "").strip()
+            handler, error_result = self._find_site_handler(site_name, site_url)
+            if error_result:
+                return error_result
 
-            # 构建请求Session
-            session = requests.Session()
-            
-            # 根据站点类型设置不同的请求头
-            if is_mteam:
-                # M-Team站点使用API认证方式
-                session.headers.update({
-                    "Content-Type": "application/json",
-                    "User-Agent": ua,
-                    "Accept": "application/json, text/plain, */*",
-                    "Authorization": token,
-                    "API-Key": api_key,
-                    "Referer": site_url
-                })
-                
-                # 测试API认证是否有效
-                test_url = site_url
-                test_response = session.get(test_url, timeout=(10, 30))
-                if test_response.status_code >= 400:
-                    logger.error(f"站点 {site_name} API认证测试失败，状态码: {test_response.status_code}")
-                    return {
-                        "error": f"API认证失败，请检查Token是否有效，状态码: {test_response.status_code}",
-                        "invite_status": {
-                            "can_invite": False,
-                            "permanent_count": 0,
-                            "temporary_count": 0,
-                            "reason": f"API认证失败，请检查Token是否有效，状态码: {test_response.status_code}"
-                        }
-                    }
-            else:
-                # 普通站点使用Cookie认证
-                session.headers.update({
-                    'User-Agent': ua,
-                    'Cookie': site_cookie,
-                    'Referer': site_url,
-                    'Accept': 'application/json, text/plain, */*',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Cache-Control': 'no-cache',
-                    'Pragma': 'no-cache',
-                    'sec-ch-ua': '"Chromium";v="134", "Not:A-Brand";v="24"',
-                    'sec-ch-ua-mobile': '?0',
-                    'sec-ch-ua-platform': '"Windows"',
-                    'sec-fetch-dest': 'empty',
-                    'sec-fetch-mode': 'cors',
-                    'sec-fetch-site': 'same-origin'
-                })
-                
-                # 尝试验证Cookie有效性
-                test_url = site_url
-                test_response = session.get(test_url, timeout=(10, 30))
-                if test_response.status_code >= 400:
-                    logger.error(f"站点 {site_name} Cookie验证失败，状态码: {test_response.status_code}")
-                    return {
-                        "error": f"Cookie验证失败，状态码: {test_response.status_code}",
-                        "invite_status": {
-                            "can_invite": False,
-                            "permanent_count": 0,
-                            "temporary_count": 0,
-                            "reason": f"Cookie验证失败，状态码: {test_response.status_code}"
-                        }
-                    }
+            # 构建请求Session，本次刷新内同一URL只请求一次
+            session = RefreshSession(self._http_client)
+            auth_hash, cached_user_id, page_cache = self._prepare_refresh_session(session, site_info, is_mteam)
+
+            # 测试认证是否有效
+            test_response = session.get(site_url, timeout=(10, 30))
+            # NexusPHP站点根路径即index.php，登记后获取用户ID时无需再次请求首页
+            if not is_mteam and urlparse(site_url).path in ("", "/"):
+                session.cache_alias(urljoin(site_url, "index.php"), test_response)
+            error_result = self._check_auth_response(site_name, test_response.status_code, is_mteam)
+            if error_result:
+                return error_result
 
-            # 使用站点处理器
-            logger.info(f"站点 {site_name} 开始处理邀请数据")
-            
-            # 根据站点类型选择不同的处理器
-            if is_mteam:
-                logger.info(f"站点 {site_name} 使用M-Team处理器")
-                from plugins.nexusinvitees.sites.mteam import MTeamHandler
-                handler = MTeamHandler()
-            elif "hdchina" in site_url.lower():
-                logger.info(f"站点 {site_name} 使用HDChina处理器")
-                from plugins.nexusinvitees.sites.hdchina import HDChinaHandler
-                handler = HDChinaHandler()
-            else:
-                # 查找匹配的处理器
-                handler = ModuleLoader.get_handler_for_site(site_url, self._site_handlers)
-                if not handler:
-                    # 如果找不到合适的处理器，使用通用NexusPHP处理器
-                    logger.info(f"站点 {site_name} 未找到专用处理器，使用默认NexusPHP处理器")
-                    from plugins.nexusinvitees.sites.nexusphp import NexusPhpHandler
-                    handler = NexusPhpHandler()
-            
             # 使用处理器解析邀请页面
-            site_data = handler.parse_invite_page(site_info, session)
+            logger.info(f"站点 {site_name} 开始处理邀请数据")
+            with session.telemetry.measure_parse():
+                site_data = handler.parse_invite_page(site_info, session)
             
-            # 获取用户ID并添加到站点数据中
+            # 获取用户ID并添加到站点数据中（处理器已确认的ID直接复用）
             user_id = self._get_user_id(session, site_info)
-            if user_id:
-                site_data["user_id"] = user_id
-                logger.debug(f"站点 {site_name} 获取到用户ID: {user_id}")
-            else:
-                logger.warning(f"站点 {site_name} 无法获取用户ID")
-            
-            # 检查站点数据结构是否正确
-            if "invite_status" in site_data:
-                # 检查临时邀请数量
-                temp_count = site_data["invite_status"].get("temporary_count", 0)
-                if temp_count > 0:
-                    logger.info(f"站点 {site_name} 有 {temp_count} 个临时邀请")
-                
-                # 确保不可邀请原因也被正确处理和显示
-                if not site_data["invite_status"].get("can_invite", False):
-                    reason = site_data["invite_status"].get("reason", "")
-                    if reason:
-                        logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
-            
-            return site_data
+            return self._finish_site_refresh(site_name, site_data, session, page_cache, auth_hash,
+                                             cached_user_id, user_id)
+
+        except Exception as e:
+            logger.error(f"获取站点 {site_name} 邀请数据失败: {str(e)}")
+            return {
+                "error": f"获取站点邀请数据失败: {str(e)}",
+                "invite_status": {
+                    "can_invite": False,
+                    "permanent_count": 0,
+                    "temporary_count": 0,
+                    "reason": f"获取站点邀请数据失败: {str(e)}"
+                }
+            }
+
+    async def _get_site_invite_data_async(self, site_name: str, driver: AsyncRefreshDriver) -> Dict[str, Any]:
+        """
+        异步获取站点邀请数据，流程与 _get_site_invite_data 相同，请求在事件循环中发送
+        仅用于实现了异步接口的站点处理器
+        """
+        try:
+            site_info, is_mteam, error_result = self._resolve_refresh_site(site_name)
+            if error_result:
+                return error_result
+            site_url = site_info.get("url", "").strip()
+            handler, error_result = self._find_site_handler(site_name, site_url)
+            if error_result:
+                return error_result
 
+            session = driver.session()
+            auth_hash, cached_user_id, page_cache = self._prepare_refresh_session(session, site_info, is_mteam)
+
+            test_response = await session.get(site_url, timeout=(10, 30))
+            # NexusPHP站点根路径即index.php，与同步流程一致登记等价地址
+            if not is_mteam and urlparse(site_url).path in ("", "/"):
+                session.cache_alias(urljoin(site_url, "index.php"), test_response)
+            error_result = self._check_auth_response(site_name, test_response.status_code, is_mteam)
+            if error_result:
+                return error_result
+
+            logger.info(f"站点 {site_name} 开始异步处理邀请数据")
+            site_data = await handler.parse_invite_page_async(site_info, session)
+
+            # 异步处理器需在facts中给出用户ID
+            user_id = get_fact(session, "user_id")
+            return self._finish_site_refresh(site_name, site_data, session, page_cache, auth_hash,
+                                             cached_user_id, str(user_id) if user_id else None)
         except Exception as e:
             logger.error(f"获取站点 {site_name} 邀请数据失败: {str(e)}")
             return {
@@ -3485,6 +3831,183 @@ class nexusinvitees(_PluginBase):
                 }
             }
 
+    def _find_site_handler(self, site_name: str, site_url: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        按域名查找站点处理器
+        :return: (处理器, 没有可用处理器时的错误结果)
+        """
+        handler = self._handler_registry.get_handler_for_site(site_url)
+        if not handler:
+            # 如果找不到合适的处理器，使用通用NexusPHP处理器
+            logger.info(f"站点 {site_name} 未找到专用处理器，使用默认NexusPHP处理器")
+            handler = self._handler_registry.get_fallback_handler()
+        if not handler:
+            return None, {
+                "error": "没有可用的站点处理器",
+                "invite_status": {
+                    "can_invite": False,
+                    "permanent_count": 0,
+                    "temporary_count": 0,
+                    "reason": "没有可用的站点处理器"
+                }
+            }
+        logger.info(f"站点 {site_name} 使用处理器: {type(handler).__name__}")
+        handler.parser_backend = self._parser_backend
+        return handler, None
+
+    def _prepare_refresh_session(self, session: Any, site_info: Dict[str, Any], is_mteam: bool) \
+            -> Tuple[str, Optional[str], SitePageCache]:
+        """
+        为请求会话设置认证请求头、缓存的用户ID及次要页面缓存
+        :param session: RefreshSession 或 AsyncSession
+        :return: (认证信息指纹, 缓存的用户ID, 次要页面缓存)
+        """
+        site_name = site_info.get("name", "")
+        # 用户ID缓存：Cookie(或M-Team令牌)不变时用户ID不变，无需每次抓取
+        auth_hash = self._get_auth_fingerprint(site_info)
+        cached_user_id = self.data_manager.get_cached_user_id(site_name, auth_hash)
+        if cached_user_id:
+            session.facts["user_id"] = cached_user_id
+            logger.debug(f"站点 {site_name} 使用缓存的用户ID: {cached_user_id}")
+
+        # 魔力值商店、发送邀请页面跨刷新缓存，由处理器按需读取
+        page_cache = SitePageCache(self.data_manager, site_name, auth_hash, {
+            PAGE_BONUS_SHOP: self._bonus_cache_hours,
+            PAGE_SEND_INVITE: self._send_page_cache_hours
+        })
+        session.facts["page_cache"] = page_cache
+        # 开启进程池解析时，处理器的翻页、魔力值商店、发送邀请页面解析交给子进程
+        if self._parse_pool:
+            session.facts["parse_pool"] = self._parse_pool
+
+        site_url = site_info.get("url", "").strip()
+        ua = site_info.get("ua", "").strip()
+        # 根据站点类型设置不同的请求头
+        if is_mteam:
+            # M-Team站点使用API认证方式
+            session.headers.update({
+                "Content-Type": "application/json",
+                "User-Agent": ua,
+                "Accept": "application/json, text/plain, */*",
+                "Authorization": site_info.get("token", "").strip(),
+                "API-Key": site_info.get("apikey", "").strip(),
+                "Referer": site_url
+            })
+        else:
+            # 普通站点使用Cookie认证
+            session.headers.update({
+                'User-Agent': ua,
+                'Cookie': site_info.get("cookie", "").strip(),
+                'Referer': site_url,
+                'Accept': 'application/json, text/plain, */*',
+                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+                'Cache-Control': 'no-cache',
+                'Pragma': 'no-cache',
+                'sec-ch-ua': '"Chromium";v="134", "Not:A-Brand";v="24"',
+                'sec-ch-ua-mobile': '?0',
+                'sec-ch-ua-platform': '"Windows"',
+                'sec-fetch-dest': 'empty',
+                'sec-fetch-mode': 'cors',
+                'sec-fetch-site': 'same-origin'
+            })
+        return auth_hash, cached_user_id, page_cache
+
+    @staticmethod
+    def _check_auth_response(site_name: str, status_code: int, is_mteam: bool) -> Optional[Dict[str, Any]]:
+        """
+        检查认证测试请求的状态码
+        :return: 认证失败时的错误结果
+        """
+        if status_code < 400:
+            return None
+        if is_mteam:
+            logger.error(f"站点 {site_name} API认证测试失败，状态码: {status_code}")
+            error_msg = f"API认证失败，请检查Token是否有效，状态码: {status_code}"
+        else:
+            logger.error(f"站点 {site_name} Cookie验证失败，状态码: {status_code}")
+            error_msg = f"Cookie验证失败，状态码: {status_code}"
+        return {
+            "error": error_msg,
+            "invite_status": {
+                "can_invite": False,
+                "permanent_count": 0,
+                "temporary_count": 0,
+                "reason": error_msg
+            }
+        }
+
+    def _finish_site_refresh(self, site_name: str, site_data: Dict[str, Any], session: Any,
+                             page_cache: SitePageCache, auth_hash: str, cached_user_id: Optional[str],
+                             user_id: Optional[str]) -> Dict[str, Any]:
+        """
+        处理器解析完成后：记录用户ID、处理登录失效、汇总请求统计
+        """
+        if user_id:
+            site_data["user_id"] = user_id
+            logger.debug(f"站点 {site_name} 获取到用户ID: {user_id}")
+        else:
+            logger.warning(f"站点 {site_name} 无法获取用户ID")
+        
+        # 登录失效时清除用户ID缓存，否则记录新获取的用户ID
+        if self._is_login_failure(site_data, session):
+            if cached_user_id:
+                logger.info(f"站点 {site_name} 登录状态异常，清除用户ID缓存")
+                self.data_manager.invalidate_user_id(site_name)
+            self.data_manager.clear_page_cache(site_name)
+        elif user_id and str(user_id) != str(cached_user_id or ""):
+            self.data_manager.save_user_id(site_name, auth_hash, user_id)
+        
+        # 记录本次刷新的请求统计，由refresh_all_sites取出汇总
+        site_data["request_stats"] = {**session.get_stats(), **page_cache.get_stats()}
+        logger.info(f"站点 {site_name} 本次刷新共发出 {session.request_count} 个HTTP请求，"
+                    f"复用缓存 {session.cache_hits} 次，页面缓存命中 {page_cache.hits} 次")
+        if page_cache.invitee_page_hits or page_cache.invitee_page_misses:
+            logger.info(f"站点 {site_name} 后宫翻页: 复用上次解析结果 {page_cache.invitee_page_hits} 页"
+                        f"（其中304 {page_cache.invitee_not_modified} 页），重新解析 {page_cache.invitee_page_misses} 页")
+        timings = session.timings
+        logger.info(f"站点 {site_name} 请求耗时: 建连（含DNS解析） {timings['connect']:.2f} 秒"
+                    f"（新建连接 {timings['connections']} 个），首字节 {timings['ttfb']:.2f} 秒，"
+                    f"下载 {timings['download']:.2f} 秒")
+        
+        # 检查站点数据结构是否正确
+        if "invite_status" in site_data:
+            # 检查临时邀请数量
+            temp_count = site_data["invite_status"].get("temporary_count", 0)
+            if temp_count > 0:
+                logger.info(f"站点 {site_name} 有 {temp_count} 个临时邀请")
+            
+            # 确保不可邀请原因也被正确处理和显示
+            if not site_data["invite_status"].get("can_invite", False):
+                reason = site_data["invite_status"].get("reason", "")
+                if reason:
+                    logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
+        
+        return site_data
+
+    @staticmethod
+    def _get_auth_fingerprint(site_info: Dict[str, Any]) -> str:
+        """
+        计算站点认证信息指纹，认证信息变化后用户ID缓存自动失效
+        """
+        auth_text = "|".join([
+            site_info.get("cookie", "") or "",
+            site_info.get("token", "") or "",
+            site_info.get("apikey", "") or "",
+        ])
+        return hashlib.sha256(auth_text.strip().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _is_login_failure(site_data: Dict[str, Any], session: requests.Session) -> bool:
+        """
+        判断本次刷新是否出现登录失效迹象
+        """
+        if get_fact(session, "logged_in") is False:
+            return True
+        reason = ""
+        if isinstance(site_data, dict):
+            reason = site_data.get("error") or site_data.get("invite_status", {}).get("reason", "") or ""
+        return bool(re.search(r"未登录|Cookie已失效|无法获取用户ID|访问邀请页面失败", str(reason)))
+
     def get_invitees(self, apikey: str = None, site_name: str = None) -> dict:
         """
         获取后宫成员API接口
@@ -3509,7 +4032,7 @@ class nexusinvitees(_PluginBase):
                 "code": 0,
                 "message": "获取成功",
                 "data": {
-                    "sites": site_data,
+                    "sites": to_plain(site_data),
                     "last_update": last_update
             }
             }
@@ -3517,6 +4040,59 @@ class nexusinvitees(_PluginBase):
             logger.error(f"获取后宫成员失败: {str(e)}")
             return {"code": 1, "message": f"获取后宫成员失败: {str(e)}"}
 
+    def query_invitees(self, apikey: str = None, site_name: str = None, ratio_health: str = None,
+                       enabled: str = None, ratio_below: str = None, last_seen_before: str = None,
+                       sort: str = None, order: str = None, limit: str = None, cursor: str = None) -> dict:
+        """
+        查询后宫成员API接口，在数据库中完成筛选、排序和分页
+        :param site_name: 站点名称，逗号分隔多个
+        :param ratio_health: 分享率健康度（excellent/good/warning/danger/neutral），逗号分隔多个
+        :param enabled: 是否启用（yes/no）
+        :param ratio_below: 分享率低于该值
+        :param last_seen_before: 最后活动时间早于该日期（YYYY-MM-DD）或时间戳
+        :param sort: 排序列（uploaded/downloaded/ratio/seeding/seeding_size/last_seen/position）
+        :param order: asc/desc
+        :param limit: 每页数量
+        :param cursor: 上一页返回的next_cursor
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            result = self.data_manager.query_invitees(
+                site_name=site_name, ratio_health=ratio_health, enabled=enabled, ratio_below=ratio_below,
+                last_seen_before=last_seen_before, sort=sort, order=order, limit=limit, cursor=cursor)
+            return {"code": 0, "message": "获取成功", "data": result}
+        except QueryError as e:
+            return {"code": 1, "message": str(e)}
+        except Exception as e:
+            logger.error(f"查询后宫成员失败: {str(e)}")
+            return {"code": 1, "message": f"查询后宫成员失败: {str(e)}"}
+
+    def export_invitees(self, apikey: str = None, format: str = "ndjson", columns: str = None,
+                        site_name: str = None):
+        """
+        导出后宫成员API接口，边读取边输出
+        :param format: ndjson/csv
+        :param columns: 导出的列，逗号分隔，NDJSON不指定时导出全部字段
+        :param site_name: 站点名称，为空时导出全部站点
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+        fmt = (format or "ndjson").lower()
+        if fmt not in EXPORT_FORMATS:
+            return {"code": 1, "message": f"不支持的导出格式: {format}，可选: {', '.join(EXPORT_FORMATS)}"}
+
+        try:
+            filename = f"nexusinvitees_{site_name or 'all'}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{fmt}"
+            return StreamingResponse(
+                iter_export(self.data_manager.iter_invitees(site_name), fmt, parse_columns(columns)),
+                media_type=f"{EXPORT_FORMATS[fmt]}; charset=utf-8",
+                headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"})
+        except Exception as e:
+            logger.error(f"导出后宫成员失败: {str(e)}")
+            return {"code": 1, "message": f"导出后宫成员失败: {str(e)}"}
+
     def refresh_data(self, apikey: str = None) -> dict:
         """
         强制刷新所有站点数据API接口
@@ -3525,12 +4101,11 @@ class nexusinvitees(_PluginBase):
             return {"code": 1, "message": "API令牌错误!"}
 
         try:
-            # 重新加载站点处理器以确保使用最新的处理逻辑
-            self._site_handlers = ModuleLoader.load_site_handlers()
-            logger.info(f"已重新加载 {len(self._site_handlers)} 个站点处理器")
+            # 处理器文件有变化时重新加载，确保使用最新的处理逻辑
+            self._handler_registry.reload_if_changed()
             
-            # 调用refresh_all_sites方法刷新数据
-            result = self.refresh_all_sites()
+            # 调用refresh_all_sites方法刷新数据，强制刷新不受站点熔断限制
+            result = self.refresh_all_sites(force=True)
 
             if result and result.get("success", 0) > 0:
                 # 获取最新的更新时间和站点数据
@@ -3544,7 +4119,8 @@ class nexusinvitees(_PluginBase):
                         "last_update": last_update,
                         "site_count": len(site_data),
                         "success": result.get("success", 0),
-                        "error": result.get("error", 0)
+                        "error": result.get("error", 0),
+                        "request_counts": result.get("request_counts", {})
                     }
                 }
             else:
@@ -3554,6 +4130,165 @@ class nexusinvitees(_PluginBase):
             logger.error(f"强制刷新数据失败: {str(e)}")
             return {"code": 1, "message": f"强制刷新数据失败: {str(e)}"}
 
+    def refresh_sites(self, apikey: str = None, sites: str = None, failed: bool = False) -> dict:
+        """
+        将指定站点加入刷新队列API接口
+        :param sites: 站点名称或ID，逗号分隔
+        :param failed: 是否加入上次刷新失败的站点
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            keys = [key for key in re.split(r"[,，\s]+", sites or "") if key]
+            result = self._enqueue_sites(keys, only_failed=str(failed).lower() in ("1", "true", "yes"))
+            if not result["queued"] and not result["duplicated"]:
+                return {"code": 1, "message": "没有匹配的站点", "data": result}
+            return {
+                "code": 0,
+                "message": f"已加入刷新队列: {len(result['queued'])}个站点，已在队列中: {len(result['duplicated'])}个站点",
+                "data": result
+            }
+        except Exception as e:
+            logger.error(f"加入刷新队列失败: {str(e)}")
+            return {"code": 1, "message": f"加入刷新队列失败: {str(e)}"}
+
+    def get_member_history(self, apikey: str = None, site_name: str = None, member: str = None) -> dict:
+        """
+        获取成员历史API接口
+        :param site_name: 站点名称
+        :param member: 成员个人主页链接、UID或用户名
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+        if not site_name or not member:
+            return {"code": 1, "message": "请指定站点名称和成员"}
+
+        try:
+            history = self.data_manager.get_member_history(site_name, member)
+            if not history:
+                return {"code": 1, "message": f"站点 {site_name} 没有成员 {member} 的历史记录"}
+            return {"code": 0, "message": "获取成功", "data": history}
+        except Exception as e:
+            logger.error(f"获取成员历史失败: {str(e)}")
+            return {"code": 1, "message": f"获取成员历史失败: {str(e)}"}
+
+    def get_site_changes(self, apikey: str = None, site_name: str = None) -> dict:
+        """
+        获取成员变化API接口
+        :param site_name: 站点名称，为空时返回全部站点
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            site_names = [site_name] if site_name else list(self.data_manager.get_site_summaries().keys())
+            changes = {}
+            for name in site_names:
+                site_changes = self.data_manager.get_latest_changes(name)
+                if site_changes:
+                    changes[name] = site_changes
+            if not changes:
+                return {"code": 1, "message": f"站点 {site_name} 暂无变化记录" if site_name else "暂无变化记录"}
+            return {"code": 0, "message": "获取成功", "data": changes}
+        except Exception as e:
+            logger.error(f"获取成员变化失败: {str(e)}")
+            return {"code": 1, "message": f"获取成员变化失败: {str(e)}"}
+
+    def get_refresh_stats(self, apikey: str = None, site_name: str = None, limit: str = None) -> dict:
+        """
+        获取刷新耗时统计API接口
+        :param site_name: 站点名称，为空时返回全部站点
+        :param limit: 返回最近几次刷新
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            runs = self.data_manager.get_refresh_telemetry(int(limit) if limit else None)
+            if site_name:
+                runs = [dict(run, sites={site_name: run["sites"][site_name]})
+                        for run in runs if site_name in (run.get("sites") or {})]
+            if not runs:
+                return {"code": 1, "message": "暂无刷新耗时统计"}
+            return {"code": 0, "message": "获取成功", "data": {"runs": runs, "summary": summarize_runs(runs)}}
+        except Exception as e:
+            logger.error(f"获取刷新耗时统计失败: {str(e)}")
+            return {"code": 1, "message": f"获取刷新耗时统计失败: {str(e)}"}
+
+    def _enqueue_sites(self, keys: List[str], only_failed: bool = False) -> Dict[str, List[str]]:
+        """
+        按站点名称/ID或上次失败状态筛选站点并加入刷新队列
+        :param keys: 站点名称或ID
+        :param only_failed: 是否加入上次刷新失败的站点
+        :return: 加入/重复/未匹配的站点
+        """
+        all_sites = self.sites.get_indexers()
+        names = []
+        unknown = []
+        for key in keys:
+            site = next((site for site in all_sites
+                         if str(site.get("id")) == key or site.get("name") == key), None)
+            if site:
+                names.append(site.get("name"))
+            else:
+                unknown.append(key)
+
+        if only_failed:
+            known_names = {site.get("name") for site in all_sites}
+            for site_name, site_summary in self.data_manager.get_site_summaries().items():
+                if site_summary.get("error") and site_name in known_names:
+                    names.append(site_name)
+
+        queued, duplicated = self._refresh_queue.submit(dict.fromkeys(names))
+        if queued:
+            logger.info(f"加入刷新队列: {', '.join(queued)}")
+        return {
+            "queued": queued,
+            "duplicated": duplicated,
+            "unknown": unknown,
+            "running": self._site_locks.busy()
+        }
+
+    def _refresh_queued_sites(self, site_names: List[str]):
+        """
+        刷新队列处理函数：刷新一批站点
+        """
+        site_map = {site.get("name"): site for site in self.sites.get_indexers()}
+        sites = [site_map[site_name] for site_name in site_names if site_name in site_map]
+        if not sites:
+            return
+        logger.info(f"开始刷新队列中的 {len(sites)} 个站点")
+        self._refresh_sites(sites)
+
+    @eventmanager.register(EventType.PluginAction)
+    def handle_refresh_command(self, event: Event):
+        """
+        远程命令：/nexusinvitees_refresh [站点名称或ID...|failed]，不带参数时刷新全部选择的站点
+        """
+        if not event:
+            return
+        event_data = event.event_data or {}
+        if event_data.get("action") != "nexusinvitees_refresh":
+            return
+
+        args = [arg for arg in re.split(r"[,，\s]+", event_data.get("arg_str") or "") if arg]
+        only_failed = any(arg.lower() in ("failed", "失败") for arg in args)
+        keys = [arg for arg in args if arg.lower() not in ("failed", "失败")]
+        if not keys and not only_failed:
+            keys = [site.get("name") for site in self._get_selected_sites()]
+        result = self._enqueue_sites(keys, only_failed=only_failed)
+
+        text = f"已加入刷新队列: {', '.join(result['queued']) or '无'}"
+        if result["duplicated"]:
+            text += f"\n已在队列中: {', '.join(result['duplicated'])}"
+        if result["unknown"]:
+            text += f"\n未找到站点: {', '.join(result['unknown'])}"
+        self.post_message(channel=event_data.get("channel"),
+                          title="后宫管理系统 - 刷新站点",
+                          text=text,
+                          userid=event_data.get("user"))
+
     def _safe_base64_decode(self, value: str) -> str:
         """尝试对 Base64 字符串进行解码，失败时返回空字符串。"""
         try:
@@ -3604,6 +4339,11 @@ class nexusinvitees(_PluginBase):
             site_url = site_info.get("url", "").strip()
             site_name = site_info.get("name", "")
             
+            # 站点处理器在本次刷新中已确认的用户ID
+            fact_user_id = get_fact(session, "user_id")
+            if fact_user_id:
+                return str(fact_user_id)
+            
             # 先尝试从 Cookie 中 Base64 解码获取 user_id
             site_cookie = site_info.get("cookie", "").strip()
             if site_cookie:
@@ -3698,75 +4438,129 @@ class nexusinvitees(_PluginBase):
             logger.error(f"获取用户ID失败: {str(e)}")
             return ""
 
-    def refresh_all_sites(self) -> Dict[str, int]:
+    def refresh_all_sites(self, force: bool = False) -> Dict[str, int]:
         """
         刷新所有站点数据
+        :param force: 是否忽略站点熔断状态
+        """
+        # 记录刷新开始 - 说明是增量更新模式
+        logger.info("开始增量刷新站点数据，只更新选择的站点，失败时保留旧数据")
+        selected_sites = self._get_selected_sites()
+        if not selected_sites:
+            return {"success": 0, "error": 0, "message": "没有发现可供刷新的站点"}
+        return self._refresh_sites(selected_sites, force=force)
+
+    def refresh_due_sites(self):
+        """
+        自适应刷新：将到期的站点加入刷新队列
         """
         try:
-            # 设置刷新标志防止重复刷新
-            if hasattr(self, '_refreshing') and self._refreshing:
-                logger.warning("后宫管理系统数据刷新已在进行中，跳过重复刷新")
-                return {"success": 0, "error": 0, "message": "刷新已在进行中"}
-            
-            self._refreshing = True
-            
-            # 记录刷新开始 - 说明是增量更新模式
-            logger.info("开始增量刷新站点数据，只更新选择的站点，失败时保留旧数据")
-            
-            # 重新加载站点处理器
-            self._site_handlers = ModuleLoader.load_site_handlers()
-            logger.info(f"加载了 {len(self._site_handlers)} 个站点处理器")
-            
-            # 获取所有站点配置
-            all_sites = self.sites.get_indexers()
-            
-            # 筛选站点配置 - 如果_nexus_sites为空，则选择所有站点
-            selected_sites = []
-            if not self._nexus_sites:
-                logger.info("未选择任何站点，将使用所有站点")
-                selected_sites = all_sites
-            else:
-                for site in all_sites:
-                    site_id = site.get("id")
-                    # 转换为字符串进行比较
-                    site_id_str = str(site_id)
-                    nexus_sites_str = [str(x) for x in self._nexus_sites]
-                    
-                    # 调试输出当前站点ID
-                    logger.debug(f"检查站点ID: {site_id}，类型: {type(site_id)}")
-                    
-                    if site_id_str in nexus_sites_str:
-                        selected_sites.append(site)
-                        logger.debug(f"匹配到站点: {site.get('name')} (ID: {site_id})")
-            
-            if selected_sites:
-                logger.debug(f"将刷新 {len(selected_sites)} 个站点的数据: {', '.join([site.get('name', '') for site in selected_sites])}")
-            else:
-                logger.warning("没有发现可供刷新的站点，请检查站点选择配置")
-                logger.debug(f"所有站点ID: {[site.get('id') for site in all_sites]}")
-                logger.debug(f"选择的站点ID: {self._nexus_sites}")
-                return {"success": 0, "error": 0, "message": "没有发现可供刷新的站点"}
-            
+            site_names = [site.get("name") for site in self._get_selected_sites()]
+            due_sites = self._refresh_scheduler.due_sites(site_names)
+            if not due_sites:
+                logger.debug("自适应刷新：暂无到期站点")
+                return
+            added, duplicated = self._refresh_queue.submit(due_sites)
+            logger.info(f"自适应刷新：{len(added)} 个站点到期加入刷新队列: {', '.join(added) or '无'}"
+                        + (f"，已在队列中: {', '.join(duplicated)}" if duplicated else ""))
+        except Exception as e:
+            logger.error(f"自适应刷新失败: {str(e)}")
+
+    def _get_selected_sites(self) -> List[Dict[str, Any]]:
+        """
+        获取插件配置中选择的站点
+        """
+        # 获取所有站点配置
+        all_sites = self.sites.get_indexers()
+        # 筛选站点配置 - 如果_nexus_sites为空，则选择所有站点
+        selected_sites = []
+        if not self._nexus_sites:
+            logger.info("未选择任何站点，将使用所有站点")
+            selected_sites = all_sites
+        else:
+            for site in all_sites:
+                site_id = site.get("id")
+                # 转换为字符串进行比较
+                site_id_str = str(site_id)
+                nexus_sites_str = [str(x) for x in self._nexus_sites]
+                
+                # 调试输出当前站点ID
+                logger.debug(f"检查站点ID: {site_id}，类型: {type(site_id)}")
+                
+                if site_id_str in nexus_sites_str:
+                    selected_sites.append(site)
+                    logger.debug(f"匹配到站点: {site.get('name')} (ID: {site_id})")
+        
+        if selected_sites:
+            logger.debug(f"将刷新 {len(selected_sites)} 个站点的数据: {', '.join([site.get('name', '') for site in selected_sites])}")
+        else:
+            logger.warning("没有发现可供刷新的站点，请检查站点选择配置")
+            logger.debug(f"所有站点ID: {[site.get('id') for site in all_sites]}")
+            logger.debug(f"选择的站点ID: {self._nexus_sites}")
+        return selected_sites
+
+    def _refresh_sites(self, selected_sites: List[Dict[str, Any]], force: bool = False) -> Dict[str, Any]:
+        """
+        刷新指定站点，正在刷新中或熔断冷却中的站点会被跳过
+        :param selected_sites: 站点配置列表
+        :param force: 是否忽略站点熔断状态
+        :return: 刷新结果
+        """
+        # 本次刷新持有的站点锁
+        owned_locks = set()
+        try:
+            # 处理器文件有变化时重新加载
+            self._handler_registry.reload_if_changed()
+
             # 统计成功/失败站点数
             success_count = 0
             error_count = 0
             error_details = []
+            skipped_sites = []
+            cooldown_details = []
             
             # 获取现有数据
             existing_data = self.data_manager.get_site_data()
             
-            # 逐个刷新站点数据
-            for site in selected_sites:
+            # 并发刷新站点数据，同一主机串行，按完成顺序处理结果
+            refresh_start = time.time()
+            total_site_time = 0.0
+            request_counts = {}
+            # 本次刷新各站点的耗时统计
+            run_sites = {}
+            if self._async_refresh:
+                # 异步刷新：单线程事件循环，同步处理器通过线程池适配
+                engine = AsyncRefreshDriver(self._http_client, per_host_limit=1, sync_workers=self._max_workers)
+
+                async def worker(site):
+                    return await self._fetch_site_async(site, owned_locks, force, engine)
+            else:
+                engine = RefreshEngine(max_workers=self._max_workers, per_host_limit=1)
+
+                def worker(site):
+                    return self._fetch_site_for_refresh(site, owned_locks, force)
+            for site, site_data, elapsed in engine.run(selected_sites, worker):
                 site_name = site.get("name", "")
-                
-                logger.debug(f"开始获取站点 {site_name} 的后宫数据...")
-                
-                site_data = self._get_site_invite_data(site_name)
-                
+                if isinstance(site_data, dict) and site_data.get("skipped"):
+                    logger.info(f"站点 {site_name} 正在刷新中，跳过本次刷新")
+                    skipped_sites.append(site_name)
+                    continue
+                if isinstance(site_data, dict) and site_data.get("cooldown"):
+                    logger.info(f"站点 {site_name} 跳过本次刷新: {site_data.get('reason', '')}")
+                    cooldown_details.append({"site_name": site_name, "msg": site_data.get("reason", "")})
+                    self._site_locks.release(site_name)
+                    owned_locks.discard(site_name)
+                    continue
+                total_site_time += elapsed
+                request_stats = site_data.pop("request_stats", None) if isinstance(site_data, dict) else None
+                if request_stats:
+                    request_counts[site_name] = request_stats.get("requests", 0)
+                logger.debug(f"站点 {site_name} 数据获取完成，耗时 {elapsed:.1f} 秒")
+            
                 # --- 修改开始: 增强失败判断逻辑 ---
                 is_successful = True
                 error_msg = ""
-                
+            
                 if "error" in site_data:
                     # 情况1: _get_site_invite_data 内部捕获到异常
                     is_successful = False
@@ -3775,7 +4569,7 @@ class nexusinvitees(_PluginBase):
                     # 情况2: 检查 parse_invite_page 返回的 reason 是否表明失败
                     invite_status = site_data.get("invite_status", {})
                     reason = invite_status.get("reason", "")
-                    
+                
                     # 定义表明失败的关键字或模式 (即使没有异常)
                     # 使用 r 前缀确保是原始字符串，避免反斜杠转义问题
                     failure_indicators = [
@@ -3788,136 +4582,235 @@ class nexusinvitees(_PluginBase):
                         r"解析站点.*时发生意外错误",
                         r"站点信息不完整", # 加入对站点信息不完整的检查
                     ]
-                    
+                
                     # 使用正则表达式匹配，因为 "解析站点..." 包含变量
                     if reason and any(re.search(indicator, reason, re.IGNORECASE) for indicator in failure_indicators):
                         is_successful = False
                         error_msg = reason # 使用 handler 返回的具体原因作为错误消息
-                        
+                    
                 # --- 修改结束 ---
-                        
-                if not is_successful:
-                    if not error_msg: # 确保总有一个错误消息
-                        error_msg = "未知原因导致刷新失败"
-                    logger.error(f"站点 {site_name} 数据刷新失败: {error_msg}")
-                    error_count += 1
-                    error_details.append({"site_name": site_name, "msg": error_msg})
                     
-                    # 保留旧数据逻辑 (保持不变)
-                    old_data = existing_data.get(site_name, {}).get("data", {})
-                    if old_data:
-                        old_invitees = old_data.get("invitees", [])
-                        old_status = old_data.get("invite_status", {})
-                        logger.info(f"站点 {site_name} 保留旧数据: {len(old_invitees)}人, "
-                                   f"永久邀请:{old_status.get('permanent_count', 0)}个, "
-                                   f"临时邀请:{old_status.get('temporary_count', 0)}个")
-                    else:
-                        logger.info(f"站点 {site_name} 无旧数据可保留")
+                # 单个站点的数据、调度与熔断状态在同一事务中写入，处理完该站点即提交
+                with self.data_manager.batch():
+                    if not is_successful:
+                        if not error_msg: # 确保总有一个错误消息
+                            error_msg = "未知原因导致刷新失败"
+                        logger.error(f"站点 {site_name} 数据刷新失败: {error_msg}")
+                        error_count += 1
+                        error_details.append({"site_name": site_name, "msg": error_msg})
+                    
+                        # 保留旧数据逻辑 (保持不变)
+                        old_data = existing_data.get(site_name, {}).get("data", {})
+                        if old_data:
+                            old_invitees = old_data.get("invitees", [])
+                            old_status = old_data.get("invite_status", {})
+                            logger.info(f"站点 {site_name} 保留旧数据: {len(old_invitees)}人, "
+                                       f"永久邀请:{old_status.get('permanent_count', 0)}个, "
+                                       f"临时邀请:{old_status.get('temporary_count', 0)}个")
+                        else:
+                            logger.info(f"站点 {site_name} 无旧数据可保留")
 
-                    failed_site_data = dict(old_data) if isinstance(old_data, dict) else {}
-                    failed_status = failed_site_data.get("invite_status", {})
-                    failed_status = dict(failed_status) if isinstance(failed_status, dict) else {}
-                    failed_status.update({
-                        "can_invite": False,
-                        "reason": error_msg
-                    })
-                    failed_site_data["invite_status"] = failed_status
-                    failed_site_data.setdefault("invitees", old_data.get("invitees", []) if isinstance(old_data, dict) else [])
-                    failed_site_data["error"] = error_msg
-                    failed_site_data["fetch_failed"] = True
-                    self.data_manager.update_site_data(site_name, failed_site_data)
-                else:
-                    # 成功逻辑 (保持不变)
-                    invite_status = site_data.get("invite_status", {})
-                    invitees = site_data.get("invitees", [])
-                    perm_count = invite_status.get("permanent_count", 0)
-                    temp_count = invite_status.get("temporary_count", 0)
-                    can_invite = invite_status.get("can_invite", False)
-                    reason = invite_status.get("reason", "")
+                        failed_site_data = dict(old_data) if isinstance(old_data, dict) else {}
+                        failed_status = failed_site_data.get("invite_status", {})
+                        failed_status = dict(failed_status) if isinstance(failed_status, dict) else {}
+                        failed_status.update({
+                            "can_invite": False,
+                            "reason": error_msg
+                        })
+                        failed_site_data["invite_status"] = failed_status
+                        failed_site_data.setdefault("invitees", old_data.get("invitees", []) if isinstance(old_data, dict) else [])
+                        failed_site_data["error"] = error_msg
+                        failed_site_data["fetch_failed"] = True
+                        self.data_manager.update_site_data(site_name, failed_site_data)
+                    else:
+                        # 成功逻辑 (保持不变)
+                        invite_status = site_data.get("invite_status", {})
+                        invitees = site_data.get("invitees", [])
+                        perm_count = invite_status.get("permanent_count", 0)
+                        temp_count = invite_status.get("temporary_count", 0)
+                        can_invite = invite_status.get("can_invite", False)
+                        reason = invite_status.get("reason", "")
                     
-                    logger.info(f"站点 {site_name} 数据刷新成功，已邀请 {len(invitees)} 人，永久邀请 {perm_count} 个，临时邀请 {temp_count} 个")
+                        logger.info(f"站点 {site_name} 数据刷新成功，已邀请 {len(invitees)} 人，永久邀请 {perm_count} 个，临时邀请 {temp_count} 个")
                     
-                    # 在成功时也记录一下原因（例如 可购买邀请、具体原因）
-                    if reason:
-                        if can_invite:
-                            logger.info(f"站点 {site_name} 可邀请原因: {reason}")
+                        # 在成功时也记录一下原因（例如 可购买邀请、具体原因）
+                        if reason:
+                            if can_invite:
+                                logger.info(f"站点 {site_name} 可邀请原因: {reason}")
+                            else:
+                                logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
+
+                        # 保存站点数据，并记录相对上次刷新的成员变化
+                        self.data_manager.update_site_data(site_name, site_data, record_history=True)
+                        success_count += 1
+
+                    run_sites[site_name] = build_site_record(
+                        request_stats, elapsed, len(site_data.get("invitees") or []), is_successful)
+
+                    # 记录刷新结果，用于自适应刷新调度和站点熔断
+                    try:
+                        self._refresh_scheduler.record(site_name, site_data, is_successful)
+                    except Exception as e:
+                        logger.warning(f"记录站点 {site_name} 刷新调度失败: {str(e)}")
+                    try:
+                        if is_successful:
+                            self._breaker.record_success(site_name)
                         else:
-                            logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
+                            self._breaker.record_failure(site_name, error_msg, self._get_auth_fingerprint(site))
+                    except Exception as e:
+                        logger.warning(f"记录站点 {site_name} 熔断状态失败: {str(e)}")
+
+                # 数据已写入，释放站点锁
+                self._site_locks.release(site_name)
+                owned_locks.discard(site_name)
+            
+            if skipped_sites and not success_count and not error_count and not cooldown_details:
+                return {"success": 0, "error": 0, "skipped": skipped_sites, "message": "刷新已在进行中"}
 
-                    # 保存站点数据 (保持不变)
-                    self.data_manager.update_site_data(site_name, site_data)
-                    success_count += 1
+            wall_time = time.time() - refresh_start
+            timing = {"wall_time": wall_time, "total_site_time": total_site_time}
+            invitee_pages = {
+                "hits": sum(record.get("invitee_page_hits", 0) for record in run_sites.values()),
+                "misses": sum(record.get("invitee_page_misses", 0) for record in run_sites.values())
+            }
+            if invitee_pages["hits"] or invitee_pages["misses"]:
+                logger.info(f"本次刷新后宫翻页: 复用上次解析结果 {invitee_pages['hits']} 页，"
+                            f"重新解析 {invitee_pages['misses']} 页")
+            if run_sites:
+                self.data_manager.save_refresh_telemetry({
+                    "time": int(time.time()),
+                    "wall_time": round(wall_time, 2),
+                    "sites": run_sites
+                }, DEFAULT_KEEP_RUNS)
             
             # 发送通知
             if self._notify:
-                self._send_refresh_notification(success_count, error_count, error_details)
+                self._send_refresh_notification(success_count, error_count, error_details, timing,
+                                                cooldown_details)
             
-            logger.info(f"增量刷新完成: 成功 {success_count} 个站点, 失败 {error_count} 个站点")
-            return {"success": success_count, "error": error_count}
+            logger.info(f"增量刷新完成: 成功 {success_count} 个站点, 失败 {error_count} 个站点, "
+                        f"总耗时 {wall_time:.1f} 秒, 站点累计耗时 {total_site_time:.1f} 秒")
+            return {"success": success_count, "error": error_count, "skipped": skipped_sites,
+                    "cooldown": [item["site_name"] for item in cooldown_details],
+                    "wall_time": round(wall_time, 2), "total_site_time": round(total_site_time, 2),
+                    "request_counts": request_counts, "invitee_pages": invitee_pages}
             
         finally:
-            # 清除刷新标志
-            self._refreshing = False
+            # 释放本次刷新持有的站点锁（数据写入后才释放，避免与单站点刷新交错写入）
+            for site_name in list(owned_locks):
+                self._site_locks.release(site_name)
     
-    def _send_refresh_notification(self, success_count, error_count,error_details:List=None):
+    def _fetch_site_for_refresh(self, site: Dict[str, Any], owned_locks: set, force: bool = False) -> Dict[str, Any]:
         """
-        发送刷新结果通知
+        刷新线程中获取单个站点数据
+        :param site: 站点配置
+        :param owned_locks: 本次刷新持有的站点锁，获取成功后加入
+        :param force: 是否忽略站点熔断状态
         """
-        try:
-            # 从data_manager获取站点数据
-            cached_data = {}
-            site_data = self.data_manager.get_site_data()
-            for site_name, site_info in site_data.items():
-                cached_data[site_name] = site_info
-                
-            # 计算所有站点统计信息
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_no_data = 0
+        blocked = self._admit_site_for_refresh(site, owned_locks, force)
+        if blocked:
+            return blocked
+        logger.debug(f"开始获取站点 {site.get('name', '')} 的后宫数据...")
+        return self._get_site_invite_data(site.get("name", ""))
 
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 尝试不同的数据结构路径获取邀请列表
-                possible_paths = [
-                    ["invitees"],
-                    ["data", "invitees"],
-                    ["data", "data", "invitees"]
-                ]
-                
-                for path in possible_paths:
-                    result = get_nested_value(site_cache_data, path, [])
-                    if result:
-                        invitees = result
-                        break
+    async def _fetch_site_async(self, site: Dict[str, Any], owned_locks: set, force: bool,
+                                driver: AsyncRefreshDriver) -> Dict[str, Any]:
+        """
+        异步刷新中获取单个站点数据：支持异步接口的处理器在事件循环中执行，其他处理器通过线程池适配
+        """
+        handler = self._handler_registry.get_handler_for_site((site.get("url", "") or "").strip())
+        if not handler or not handler.supports_async or not httpx_available():
+            return await driver.run_sync(self._fetch_site_for_refresh, site, owned_locks, force)
+        # 熔断探测为同步请求，放到线程池中执行
+        blocked = await driver.run_sync(self._admit_site_for_refresh, site, owned_locks, force)
+        if blocked:
+            return blocked
+        logger.debug(f"开始异步获取站点 {site.get('name', '')} 的后宫数据...")
+        return await self._get_site_invite_data_async(site.get("name", ""), driver)
 
-                # 统计各项数据
-                total_invitees += len(invitees)
+    def _admit_site_for_refresh(self, site: Dict[str, Any], owned_locks: set, force: bool = False) \
+            -> Optional[Dict[str, Any]]:
+        """
+        获取站点锁并检查熔断状态
+        :param site: 站点配置
+        :param owned_locks: 本次刷新持有的站点锁，获取成功后加入
+        :param force: 是否忽略站点熔断状态
+        :return: 跳过本站点时的结果，可以刷新时返回None
+        """
+        site_name = site.get("name", "")
+        if not self._site_locks.try_acquire(site_name):
+            return {"skipped": True}
+        owned_locks.add(site_name)
 
-                # 统计用户状态 - 使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
+        if not force:
+            auth_hash = self._get_auth_fingerprint(site)
+            action, state = self._breaker.check(site_name, auth_hash)
+            if action == CircuitBreaker.ACTION_SKIP:
+                return {"cooldown": True, "reason": CircuitBreaker.describe(state)}
+            if action == CircuitBreaker.ACTION_PROBE:
+                probe_ok, probe_reason = self._probe_site(site)
+                if not probe_ok and self._breaker.record_failure(site_name, probe_reason, auth_hash):
+                    return {"cooldown": True, "reason": f"探测失败，继续熔断: {probe_reason}"}
+                logger.info(f"站点 {site_name} 冷却结束，探测通过，恢复刷新")
+        return None
 
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
+    def _probe_site(self, site: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        熔断冷却结束后用单个请求探测站点：能连接且认证有效才恢复完整刷新
+        :param site: 站点配置
+        :return: (是否通过, 失败原因)
+        """
+        site_name = site.get("name", "")
+        site_url = (site.get("url", "") or "").strip()
+        handler, error = self._find_site_handler(site_name, site_url)
+        if not handler:
+            return False, error.get("error", "没有可用的站点处理器")
+        handler.parser_backend = self._parser_backend
+        session = RefreshSession(self._probe_client)
+        session.headers.update({"User-Agent": site.get("ua", "") or "", "Referer": site_url})
+        session.headers["Cookie"] = site.get("cookie", "") or ""
+        try:
+            # 由处理器请求需要登录才能访问的最小页面/接口，确认认证仍然有效
+            return handler.probe(site, session)
+        except Exception as e:
+            logger.warning(f"站点 {site_name} 探测失败: {str(e)}")
+            return False, f"探测时网络错误: {str(e)}"
 
-                logger.info(f"站点 {site_name} 统计结果: 总人数={len(invitees)}, 低分享率={low_ratio_count}, 已禁用={banned_count}, 无数据={no_data_count}")
+    def _send_refresh_notification(self, success_count, error_count, error_details: List = None,
+                                   timing: Dict[str, float] = None, cooldown_details: List = None):
+        """
+        发送刷新结果通知
+        """
+        try:
+            # 统计信息来自刷新时计算的摘要
+            for site_name, site_summary in self.data_manager.get_site_summaries().items():
+                logger.info(f"站点 {site_name} 统计结果: 总人数={site_summary.get('invitee_count', 0)}, "
+                            f"低分享率={site_summary.get('low_ratio', 0)}, 已禁用={site_summary.get('banned', 0)}, "
+                            f"无数据={site_summary.get('no_data', 0)}")
+            summary = self.data_manager.get_global_summary()
+            total_invitees = summary.get("invitees", 0)
+            total_low_ratio = summary.get("low_ratio", 0)
+            total_banned = summary.get("banned", 0)
+            total_no_data = summary.get("no_data", 0)
             
             title = "后宫管理系统 - 增量刷新结果"
-            if success_count > 0 or error_count > 0:
+            if success_count > 0 or error_count > 0 or cooldown_details:
                 # --- 修改开始: 添加图标美化通知文本 ---
-                text = f"刷新完成: ✅ 成功 {success_count} 个，❌ 失败 {error_count} 个站点\n"
+                text = f"刷新完成: ✅ 成功 {success_count} 个，❌ 失败 {error_count} 个站点"
+                if cooldown_details:
+                    text += f"，⏸️ 跳过 {len(cooldown_details)} 个站点"
+                text += "\n"
                 if error_details is not None and len(error_details) > 0:
                     text += "\n🔻失败详情🔻:\n"
                     for item in error_details:
                         # 使用 🔻 标记失败项
                         text += f"🔻 [{item['site_name']}]: {item['msg']}\n"
                     text += "\n"
+                if cooldown_details:
+                    text += "\n⏸️熔断跳过⏸️:\n"
+                    for item in cooldown_details:
+                        text += f"⏸️ [{item['site_name']}]: {item['msg']}\n"
+                    text += "\n"
                 # 保持原有统计信息的图标
                 text += f"👨‍👩‍👧‍👦 总邀请人数: {total_invitees}人\n"
                 text += f"⚠️ 分享率低于1.0: {total_low_ratio}人\n"
@@ -3925,6 +4818,11 @@ class nexusinvitees(_PluginBase):
                 text += f"🔄 无数据用户: {total_no_data}人\n\n"
                 # --- 修改结束 ---
                 
+                # 添加耗时统计：总耗时 vs 各站点耗时之和
+                if timing:
+                    text += (f"⏱️ 刷新耗时: {timing.get('wall_time', 0):.1f}秒"
+                             f"（站点累计 {timing.get('total_site_time', 0):.1f}秒）\n")
+                
                 # 添加刷新时间
                 text += f"🕙 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time()))}"
                 
@@ -3946,13 +4844,23 @@ class nexusinvitees(_PluginBase):
             try:
                 # 检查是否为5位cron表达式
                 if str(self._cron).strip().count(" ") == 4:
-                    return [{
+                    services = [{
                         "id": "nexusinvitees",
                         "name": "后宫管理系统",
                         "trigger": CronTrigger.from_crontab(self._cron),
                         "func": self.refresh_all_sites,
                         "kwargs": {}
                     }]
+                    if self._adaptive_refresh:
+                        # 定期检查到期站点，执行周期仍为全量刷新
+                        services.append({
+                            "id": "nexusinvitees_adaptive",
+                            "name": "后宫管理系统自适应刷新",
+                            "trigger": "interval",
+                            "func": self.refresh_due_sites,
+                            "kwargs": {"minutes": AdaptiveScheduler.CHECK_MINUTES}
+                        })
+                    return services
                 else:
                     logger.error("cron表达式格式错误")
                     return []
@@ -3981,6 +4889,31 @@ class nexusinvitees(_PluginBase):
             self._notify = request.get("notify", False)
             self._cron = request.get("cron", "0 9 * * *")
             self._onlyonce = request.get("onlyonce", False)
+            self._max_workers = RefreshEngine.normalize_workers(
+                request.get("max_workers", RefreshEngine.DEFAULT_WORKERS))
+            self._parser_backend = request.get("parser_backend") or "html.parser"
+            self._adaptive_refresh = request.get("adaptive_refresh", False)
+            self._async_refresh = request.get("async_refresh", False)
+            self._min_interval, self._max_interval = AdaptiveScheduler.normalize_hours(
+                request.get("min_interval", AdaptiveScheduler.DEFAULT_MIN_HOURS),
+                request.get("max_interval", AdaptiveScheduler.DEFAULT_MAX_HOURS))
+            self._bonus_cache_hours = normalize_ttl(
+                request.get("bonus_cache_hours", DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP]), DEFAULT_TTL_HOURS[PAGE_BONUS_SHOP])
+            self._send_page_cache_hours = normalize_ttl(
+                request.get("send_page_cache_hours", DEFAULT_TTL_HOURS[PAGE_SEND_INVITE]),
+                DEFAULT_TTL_HOURS[PAGE_SEND_INVITE])
+            self._http_retries, self._http_backoff = HttpClient.normalize_retry(
+                request.get("http_retries", HttpClient.DEFAULT_RETRIES),
+                request.get("http_backoff", HttpClient.DEFAULT_BACKOFF))
+            self._breaker_cooldown = CircuitBreaker.normalize_cooldown(
+                request.get("breaker_cooldown", CircuitBreaker.DEFAULT_COOLDOWN_MINUTES))
+            self._parse_workers = ParsePool.normalize_workers(request.get("parse_workers", 0))
+            self._refresh_scheduler = AdaptiveScheduler(self.data_manager, self._min_interval, self._max_interval)
+            self._breaker = CircuitBreaker(self.data_manager, self._breaker_cooldown)
+            if (self._parse_pool.workers if self._parse_pool else 0) != self._parse_workers:
+                if self._parse_pool:
+                    self._parse_pool.shutdown()
+                self._parse_pool = ParsePool(self._parse_workers) if self._parse_workers else None
             
             # 获取选中站点列表
             self._nexus_sites = []
@@ -3997,6 +4930,8 @@ class nexusinvitees(_PluginBase):
             
             # 记录站点ID，用于调试
             logger.info(f"已选择站点ID: {self._nexus_sites}")
+            # 重试配置或站点数变化时重建共享HTTP客户端
+            self._ensure_http_client()
             
             # 保存配置
             self.__update_config()
@@ -4004,9 +4939,8 @@ class nexusinvitees(_PluginBase):
             # 如果开启了立即运行一次
             if self._onlyonce:
                 try:
-                    # 定时服务
-                    if hasattr(self, '_scheduler') and self._scheduler:
-                        self.stop_service()  # 先停止已有服务
+                    # 定时服务：只停止已有的一次性任务，刷新队列、连接池和解析进程池继续使用
+                    self._stop_scheduler()
                     
                     self._scheduler = BackgroundScheduler(timezone=settings.TZ)
                     logger.debug("立即运行一次开关被打开，将在3秒后执行刷新")
@@ -4064,6 +4998,18 @@ class nexusinvitees(_PluginBase):
                 "cron": self._cron,
                 "onlyonce": self._onlyonce,
                 "site_ids": self._nexus_sites,
+                "max_workers": self._max_workers,
+                "parser_backend": self._parser_backend,
+                "adaptive_refresh": self._adaptive_refresh,
+                "async_refresh": self._async_refresh,
+                "parse_workers": self._parse_workers,
+                "min_interval": self._min_interval,
+                "max_interval": self._max_interval,
+                "bonus_cache_hours": self._bonus_cache_hours,
+                "send_page_cache_hours": self._send_page_cache_hours,
+                "http_retries": self._http_retries,
+                "http_backoff": self._http_backoff,
+                "breaker_cooldown": self._breaker_cooldown,
             }
             return Response(success=True, message="获取成功", data=config)
         except Exception as e:
@@ -0,0 +1,282 @@
+"""
+异步刷新模块：单线程事件循环驱动站点刷新
+
+- 实现了异步接口的站点处理器通过 AsyncSession 发送请求（基于可选依赖httpx），
+  解析函数交给小线程池执行，不阻塞事件循环，单个线程即可同时刷新几十个站点
+- 同步处理器通过适配器在线程池中执行，行为与 RefreshEngine 一致
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.log import logger
+from plugins.nexusinvitees.engine import RefreshEngine
+from plugins.nexusinvitees.http_client import HttpClient
+from plugins.nexusinvitees.session import RefreshSession
+from plugins.nexusinvitees.telemetry import SiteTelemetry, response_size
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 结果队列结束标记
+_DONE = object()
+
+
+def httpx_available() -> bool:
+    """
+    是否可以使用异步请求（已安装httpx）
+    """
+    return httpx is not None
+
+
+def _to_timeout(timeout: Any) -> Any:
+    """
+    将requests风格的超时参数 (连接, 读取) 转换为httpx超时
+    """
+    if isinstance(timeout, (tuple, list)) and len(timeout) == 2:
+        return httpx.Timeout(timeout[1], connect=timeout[0])
+    return timeout if timeout is not None else httpx.Timeout(30, connect=10)
+
+
+class AsyncSession:
+    """
+    单个站点单次刷新的异步请求会话，对应同步流程中的 RefreshSession
+    - headers 为默认请求头，isolated=True 的请求不携带
+    - GET响应按URL缓存，同一URL在一次刷新中最多请求一次
+    - facts 保存插件与站点处理器之间共享的结论
+    - GET/HEAD及标记 idempotent 的请求，连接错误和5xx响应按插件的重试配置重试
+    """
+
+    def __init__(self, driver: "AsyncRefreshDriver"):
+        self._driver = driver
+        self.headers: Dict[str, str] = {}
+        self.facts: Dict[str, Any] = {}
+        self.request_count = 0
+        self.cache_hits = 0
+        # 异步请求无法区分建连与下载，整体计入首字节耗时
+        self.timings = {"connect": 0.0, "ttfb": 0.0, "download": 0.0, "connections": 0}
+        self.telemetry = SiteTelemetry()
+        # 事件循环单线程访问，无需加锁
+        self._response_cache: Dict[str, Any] = {}
+
+    async def request(self, method: str, url: str, params: Any = None, headers: Optional[Dict[str, str]] = None,
+                      data: Any = None, json: Any = None, timeout: Any = None, isolated: bool = False,
+                      idempotent: bool = False):
+        """
+        发送请求
+        :param isolated: 是否不携带会话默认请求头
+        :param idempotent: 非GET/HEAD请求是否可重复执行，为True时才按重试配置重试
+        :return: httpx.Response
+        """
+        key = RefreshSession._cache_key(url, params, headers) if method.upper() == "GET" and not isolated else None
+        if key and key in self._response_cache:
+            self.cache_hits += 1
+            logger.debug(f"复用本次刷新已获取的页面: {url}")
+            return self._response_cache[key]
+        merged = {} if isolated else dict(self.headers)
+        merged.update(headers or {})
+        backoff = self._driver.backoff
+        retries = self._driver.retries if idempotent or method.upper() in HttpClient.RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self._driver.client.request(method, url, params=params, headers=merged,
+                                                             data=data, json=json, timeout=_to_timeout(timeout))
+            except httpx.TransportError:
+                if attempt >= retries:
+                    raise
+            else:
+                elapsed = time.perf_counter() - start
+                self.request_count += 1
+                self.timings["ttfb"] += elapsed
+                self.telemetry.add_request(str(response.url), elapsed, response_size(response))
+                if response.status_code not in HttpClient.RETRY_STATUS or attempt >= retries:
+                    # 仅缓存成功的响应，跟随重定向后的最终地址同样可以命中
+                    if key and response.status_code < 400:
+                        self._response_cache[key] = response
+                        if str(response.url) != url and not headers:
+                            self._response_cache.setdefault(str(response.url), response)
+                    return response
+            await asyncio.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+    def cache_alias(self, url: str, response: Any):
+        """
+        将已获取的响应登记到另一个等价URL下
+        :param url: 等价URL
+        :param response: 已获取的响应
+        """
+        if response is not None and response.status_code < 400:
+            self._response_cache.setdefault(url, response)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def parse(self, func: Callable, *args) -> Any:
+        """
+        在解析线程池中执行同步解析函数，CPU耗时计入解析耗时
+        """
+        def measured():
+            with self.telemetry.measure_parse():
+                return func(*args)
+
+        return await self._driver.run_parse(measured)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取请求统计，结构与 RefreshSession.get_stats 一致
+        """
+        return {
+            "requests": self.request_count,
+            "cache_hits": self.cache_hits,
+            "timings": {key: round(value, 3) if isinstance(value, float) else value
+                        for key, value in self.timings.items()},
+            "telemetry": self.telemetry.to_dict()
+        }
+
+
+class AsyncRefreshDriver:
+    """
+    异步刷新驱动：在独立线程中运行事件循环，按完成顺序返回站点结果
+    - 全局并发上限 + 单站点(主机)串行，与 RefreshEngine 相同
+    - worker 为协程函数时在事件循环中执行，普通函数通过适配器在线程池中执行
+    """
+
+    # 事件循环中同时进行的站点数
+    DEFAULT_CONCURRENCY = 32
+    # 解析线程数
+    PARSE_WORKERS = 2
+
+    def __init__(self, http_client: Optional[HttpClient] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host_limit: int = 1, sync_workers: int = RefreshEngine.DEFAULT_WORKERS):
+        """
+        :param http_client: 插件共享的HTTP客户端，提供重试配置
+        :param concurrency: 同时进行的站点数
+        :param per_host_limit: 同一主机最大并发数
+        :param sync_workers: 同步处理器适配线程数
+        """
+        self.retries = http_client.retries if http_client else HttpClient.DEFAULT_RETRIES
+        self.backoff = http_client.backoff if http_client else HttpClient.DEFAULT_BACKOFF
+        self.concurrency = max(1, int(concurrency or self.DEFAULT_CONCURRENCY))
+        self.per_host_limit = max(1, int(per_host_limit or 1))
+        self.sync_workers = RefreshEngine.normalize_workers(sync_workers)
+        self.client = None
+        self._sync_executor: Optional[ThreadPoolExecutor] = None
+        self._parse_executor: Optional[ThreadPoolExecutor] = None
+
+    def session(self) -> AsyncSession:
+        """
+        创建异步请求会话，仅在 run 执行期间可用
+        """
+        return AsyncSession(self)
+
+    async def run_sync(self, func: Callable, *args) -> Any:
+        """
+        同步函数适配器：在线程池中执行，等待期间不阻塞事件循环
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._sync_executor, func, *args)
+
+    async def run_parse(self, func: Callable, *args) -> Any:
+        """
+        在解析线程池中执行同步解析函数
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._parse_executor, func, *args)
+
+    async def _run_one(self, site: Dict[str, Any], worker: Callable, limit: asyncio.Semaphore,
+                       host_locks: Dict[str, asyncio.Semaphore]) -> Tuple[Dict[str, Any], Dict[str, Any], float]:
+        """
+        在并发上限及主机信号量保护下执行单个站点任务
+        """
+        host = RefreshEngine.get_host(site)
+        host_lock = host_locks.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with limit, host_lock:
+            start = time.time()
+            try:
+                if asyncio.iscoroutinefunction(worker):
+                    result = await worker(site)
+                else:
+                    result = await self.run_sync(worker, site)
+            except Exception as e:
+                logger.error(f"站点 {site.get('name', '')} 刷新任务异常: {str(e)}")
+                result = {"error": f"刷新任务异常: {str(e)}"}
+            return site, result, time.time() - start
+
+    async def _main(self, sites: List[Dict[str, Any]], worker: Callable, results: queue.Queue):
+        """
+        事件循环主协程
+        """
+        self._sync_executor = ThreadPoolExecutor(max_workers=self.sync_workers,
+                                                 thread_name_prefix="nexusinvitees-sync")
+        self._parse_executor = ThreadPoolExecutor(max_workers=self.PARSE_WORKERS,
+                                                  thread_name_prefix="nexusinvitees-parse")
+        try:
+            if httpx_available():
+                self.client = httpx.AsyncClient(
+                    follow_redirects=True,
+                    headers={"Accept-Encoding": "gzip, deflate"},
+                    limits=httpx.Limits(max_connections=self.concurrency * 2,
+                                        max_keepalive_connections=self.concurrency))
+            limit = asyncio.Semaphore(self.concurrency)
+            host_locks: Dict[str, asyncio.Semaphore] = {}
+            tasks = [self._run_one(site, worker, limit, host_locks) for site in sites]
+            for task in asyncio.as_completed(tasks):
+                results.put(await task)
+        finally:
+            if self.client:
+                await self.client.aclose()
+                self.client = None
+            self._sync_executor.shutdown(wait=False)
+            self._parse_executor.shutdown(wait=False)
+
+    def _thread_main(self, sites: List[Dict[str, Any]], worker: Callable, results: queue.Queue):
+        """
+        事件循环线程，结束时放入结束标记及异常信息（正常结束为None）
+        """
+        error = None
+        try:
+            asyncio.run(self._main(sites, worker, results))
+        except Exception as e:
+            logger.error(f"异步刷新失败: {str(e)}")
+            error = str(e)
+        finally:
+            results.put((_DONE, error))
+
+    def run(self, sites: List[Dict[str, Any]], worker: Callable) \
+            -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        并发执行站点任务，按完成顺序返回结果，接口与 RefreshEngine.run 一致
+        事件循环异常退出时，尚未返回结果的站点以错误结果返回，不会被遗漏
+        :param sites: 站点配置列表
+        :param worker: 单站点处理函数（协程函数或普通函数），接收站点配置，返回站点数据
+        :return: (站点配置, 站点数据, 耗时秒数) 迭代器
+        """
+        if not sites:
+            return
+        logger.info(f"异步刷新 {len(sites)} 个站点，并发数 {min(self.concurrency, len(sites))}"
+                    f"{'' if httpx_available() else '（未安装httpx，全部站点使用同步处理器）'}")
+        results: queue.Queue = queue.Queue()
+        thread = threading.Thread(target=self._thread_main, args=(sites, worker, results),
+                                  name="nexusinvitees-async", daemon=True)
+        thread.start()
+        # 站点配置不可哈希，按对象id记录尚未返回结果的站点
+        pending = {id(site): site for site in sites}
+        while True:
+            item = results.get()
+            if item[0] is _DONE:
+                error = item[1]
+                break
+            pending.pop(id(item[0]), None)
+            yield item
+        thread.join()
+        for site in pending.values():
+            reason = f"异步刷新中断: {error}" if error else "异步刷新中断，未获取到结果"
+            yield site, {"error": reason}, 0.0
@@ -0,0 +1,458 @@
+"""
+性能基准测试脚本
+
+需要在MoviePilot运行环境中执行（能够导入app与plugins包），例如：
+    python -m plugins.nexusinvitees.benchmark parser /path/to/html_fixtures --rounds 5
+
+parser: 使用保存的邀请页HTML样本（*.html），对比各解析后端的速度、峰值内存以及解析结果是否一致
+converters: 分享率/体积转换微基准，对比旧的逐字符处理与converters模块（单值缓存与按列批量）
+scaling: 模拟多站点并发刷新翻页，对比在抓取线程中解析与不同子进程数的解析进程池的吞吐，例如：
+    python -m plugins.nexusinvitees.benchmark scaling --workers 0,1,2,4 --sites 8 --pages 10
+memory: 对比内存快照中成员以字典保存与以紧凑记录（InviteeRecord）保存的内存占用及读取速度，例如：
+    python -m plugins.nexusinvitees.benchmark memory --count 5000
+"""
+import argparse
+import glob
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import random
+import re
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _load_fixtures(path: str) -> List[Tuple[str, str]]:
+    """
+    读取HTML样本
+    :param path: 样本目录或单个文件
+    :return: (文件名, HTML内容) 列表
+    """
+    files = [path] if os.path.isfile(path) else sorted(glob.glob(os.path.join(path, "*.html")))
+    fixtures = []
+    for file in files:
+        with open(file, "r", encoding="utf-8", errors="ignore") as f:
+            fixtures.append((os.path.basename(file), f.read()))
+    return fixtures
+
+
+def _measure(func: Callable[[str, str], Any], fixtures: List[Tuple[str, str]], rounds: int) -> Dict[str, float]:
+    """
+    测量吞吐与峰值内存
+    :param func: 处理函数 (名称, HTML) -> 结果
+    :param fixtures: 样本列表
+    :param rounds: 轮数
+    :return: 每秒处理页数、峰值内存(MB)
+    """
+    # 峰值内存单独跑一轮，避免tracemalloc影响计时
+    tracemalloc.start()
+    for name, html in fixtures:
+        func(name, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name, html in fixtures:
+            func(name, html)
+    elapsed = time.perf_counter() - start
+    pages = rounds * len(fixtures)
+    return {
+        "pages_per_sec": pages / elapsed if elapsed else 0,
+        "peak_mb": peak / 1024 / 1024
+    }
+
+
+def _dump(result: Any) -> str:
+    """
+    结果序列化，用于逐字节比较
+    """
+    return json.dumps(result, ensure_ascii=False, sort_keys=True)
+
+
+def bench_parser(args: argparse.Namespace):
+    """
+    邀请页解析基准：html.parser(解析两次，旧流程) / html.parser / lxml
+    """
+    from plugins.nexusinvitees.sites import resolve_parser_backend
+    from plugins.nexusinvitees.sites.nexusphp import NexusPhpHandler
+
+    fixtures = _load_fixtures(args.path)
+    if not fixtures:
+        print(f"未找到HTML样本: {args.path}")
+        return
+
+    def pipeline(backend: str, shared_tree: bool) -> Callable[[str, str], Any]:
+        handler = NexusPhpHandler()
+        handler.parser_backend = backend
+
+        def run(name: str, html: str):
+            soup = handler._make_soup(html)
+            handler._is_login_page(soup, html)
+            if shared_tree:
+                return handler._parse_nexusphp_invite_page(name, html, soup=soup)
+            return handler._parse_nexusphp_invite_page(name, html)
+        return run
+
+    cases = [("html.parser 两次解析(旧)", "html.parser", False),
+             ("html.parser 共享文档树", "html.parser", True)]
+    if resolve_parser_backend("lxml") == "lxml":
+        cases.append(("lxml 共享文档树", "lxml", True))
+    else:
+        print("未安装lxml，跳过lxml后端")
+
+    baseline = {name: _dump(pipeline("html.parser", True)(name, html)) for name, html in fixtures}
+
+    print(f"样本数: {len(fixtures)}，轮数: {args.rounds}")
+    print(f"{'后端':<28}{'页/秒':>10}{'峰值内存MB':>14}{'结果一致':>10}")
+    for label, backend, shared_tree in cases:
+        func = pipeline(backend, shared_tree)
+        stats = _measure(func, fixtures, args.rounds)
+        mismatched = [name for name, html in fixtures if _dump(func(name, html)) != baseline[name]]
+        print(f"{label:<28}{stats['pages_per_sec']:>10.1f}{stats['peak_mb']:>14.2f}"
+              f"{'是' if not mismatched else '否':>10}")
+        for name in mismatched:
+            print(f"    结果不一致: {name}")
+
+
+def _legacy_ratio(ratio_text: str) -> float:
+    """
+    旧的分享率解析：逐个查找千分位逗号
+    """
+    if ratio_text == '∞' or ratio_text.lower() in ['inf.', 'inf', 'infinite', '无限']:
+        return 1e20
+    normalized_ratio = ratio_text
+    while ',' in normalized_ratio:
+        comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
+        for pos in comma_positions:
+            if (pos > 0 and pos < len(normalized_ratio) - 1 and
+                    normalized_ratio[pos - 1].isdigit() and normalized_ratio[pos + 1].isdigit()):
+                normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos + 1:]
+                break
+        else:
+            break
+    return float(normalized_ratio.replace(',', '.'))
+
+
+def _legacy_size(size_str: str) -> float:
+    """
+    旧的体积解析：每次调用都重新匹配正则、重建单位表
+    """
+    size_str = size_str.replace(',', '.')
+    matches = re.match(r'([\d.]+)\s*([KMGTPEZY]?i?B)', size_str, re.IGNORECASE)
+    if not matches:
+        try:
+            return float(size_str)
+        except ValueError:
+            return 0
+    size_num, unit = matches.groups()
+    try:
+        size_value = float(size_num)
+    except ValueError:
+        return 0
+    units = {'B': 1, 'KB': 1024, 'KIB': 1024, 'MB': 1024 ** 2, 'MIB': 1024 ** 2, 'GB': 1024 ** 3,
+             'GIB': 1024 ** 3, 'TB': 1024 ** 4, 'TIB': 1024 ** 4, 'PB': 1024 ** 5, 'PIB': 1024 ** 5}
+    unit = unit.upper()
+    if unit in ['K', 'M', 'G', 'T', 'P']:
+        unit = unit + 'B'
+    return size_value * units.get(unit, 1)
+
+
+def _format_number(value: float, digits: int, style: str) -> str:
+    """
+    按站点常见写法格式化数字：plain "1234.56"、thousands "1,234.56"、decimal_comma "1234,56"
+    """
+    if style == "thousands":
+        return f"{value:,.{digits}f}"
+    text = f"{value:.{digits}f}"
+    return text.replace(".", ",") if style == "decimal_comma" else text
+
+
+def _sample_invitees(count: int) -> Tuple[List[Dict[str, str]], List[Tuple[float, float, float]]]:
+    """
+    生成模拟的后宫成员列（分享率与体积的常见写法，含千分位逗号、小数逗号及大量重复值）
+    :return: (成员列表, 每个成员的期望值 (分享率, 上传字节, 下载字节))
+    """
+    from plugins.nexusinvitees.converters import SIZE_UNITS
+
+    rng = random.Random(20240601)
+    # 固定写法 -> 期望分享率
+    ratios = {"0.000": 0.0, "---": 0.0, "∞": 1e20, "Inf.": 1e20, "1.234": 1.234, "0,85": 0.85,
+              "12,345.678": 12345.678, "2.50": 2.5}
+    units = ["B", "KB", "MB", "GB", "TB", "GiB", "TiB"]
+    styles = ["plain", "plain", "thousands", "decimal_comma"]
+
+    def sample_size() -> Tuple[str, float]:
+        if rng.random() < 0.3:
+            return "0.00 KB", 0.0
+        value = round(rng.uniform(0, 2000), 2)
+        unit = rng.choice(units)
+        return f"{_format_number(value, 2, rng.choice(styles))} {unit}", value * SIZE_UNITS[unit.upper()]
+
+    invitees = []
+    expected = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            ratio = rng.choice(list(ratios))
+            ratio_value = ratios[ratio]
+        else:
+            # 小数逗号后恰好三位数字会被视为千分位（"1,234"），小数逗号写法只生成两位小数
+            style = rng.choice(styles)
+            digits = 2 if style == "decimal_comma" else 3
+            ratio_value = round(rng.uniform(0, 50), digits)
+            ratio = _format_number(ratio_value, digits, style)
+        uploaded, uploaded_bytes = sample_size()
+        downloaded, downloaded_bytes = sample_size()
+        invitees.append({"ratio": ratio, "uploaded": uploaded, "downloaded": downloaded})
+        expected.append((ratio_value, uploaded_bytes, downloaded_bytes))
+    return invitees, expected
+
+
+def bench_converters(args: argparse.Namespace):
+    """
+    数值转换微基准：旧实现 / 单值调用 / 按列批量
+    """
+    from plugins.nexusinvitees import converters
+
+    invitees, expected = _sample_invitees(args.count)
+
+    def safe_ratio(parse: Callable[[str], float], text: str) -> float:
+        if not text or text == '---':
+            return 0
+        try:
+            return parse(text)
+        except (ValueError, TypeError):
+            return 0
+
+    def legacy():
+        return [(safe_ratio(_legacy_ratio, i["ratio"]),
+                 _legacy_size(i["uploaded"]), _legacy_size(i["downloaded"])) for i in invitees]
+
+    def scalar():
+        return [(safe_ratio(converters.parse_ratio, i["ratio"]),
+                 converters.size_to_bytes(i["uploaded"]), converters.size_to_bytes(i["downloaded"]))
+                for i in invitees]
+
+    def batch():
+        columns = converters.convert_invitee_columns(invitees, size_fields=("uploaded", "downloaded"))
+        return list(zip(columns["ratio"], columns["uploaded"], columns["downloaded"]))
+
+    def matches(result: List[Tuple[float, float, float]]) -> bool:
+        return all(abs(got - want) <= 1e-9 * max(abs(want), 1)
+                   for row, want_row in zip(result, expected) for got, want in zip(row, want_row))
+
+    print(f"成员数: {len(invitees)}，轮数: {args.rounds}")
+    # 结果一致：与按生成数值计算的期望值比较（旧实现无法正确处理千分位/小数逗号的写法）
+    print(f"{'实现':<16}{'微秒/成员':>12}{'结果一致':>10}")
+    for label, func in (("旧实现", legacy), ("单值缓存", scalar), ("按列批量", batch)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            result = func()
+        elapsed = time.perf_counter() - start
+        per_member = elapsed / (args.rounds * len(invitees)) * 1e6 if invitees else 0
+        print(f"{label:<16}{per_member:>12.3f}{'是' if matches(result) else '否':>10}")
+    print(f"缓存统计: {converters.cache_info()}")
+
+
+def _sample_invitee_page(page: int, rows: int = 50) -> str:
+    """
+    生成模拟的NexusPHP后宫翻页页面
+    """
+    rng = random.Random(page)
+    lines = ['<html><body><table class="mainouter"><tr><td id="outer">',
+             '<table class="main"><tr><td><table border="1" cellspacing="0" cellpadding="5">',
+             '<tr><td class="colhead">用户名</td><td class="colhead">邮箱</td><td class="colhead">启用</td>'
+             '<td class="colhead">上传量</td><td class="colhead">下载量</td><td class="colhead">分享率</td>'
+             '<td class="colhead">当前做种</td><td class="colhead">做种体积</td><td class="colhead">做种时魔</td>'
+             '<td class="colhead">最后做种汇报时间</td></tr>']
+    for index in range(rows):
+        uid = page * rows + index + 1
+        lines.append(
+            f'<tr><td class="rowfollow"><a href="userdetails.php?id={uid}"><b>user{uid}</b></a></td>'
+            f'<td class="rowfollow">user{uid}@example.com</td><td class="rowfollow">{rng.choice(["是", "否"])}</td>'
+            f'<td class="rowfollow">{rng.uniform(0, 2000):.2f} GB</td><td class="rowfollow">{rng.uniform(0, 500):.2f} GB</td>'
+            f'<td class="rowfollow">{rng.uniform(0, 20):.3f}</td><td class="rowfollow">{rng.randint(0, 300)}</td>'
+            f'<td class="rowfollow">{rng.uniform(0, 5):.2f} TB</td><td class="rowfollow">{rng.uniform(0, 50):.1f}</td>'
+            f'<td class="rowfollow">2024-05-{rng.randint(1, 28):02d} 12:00:00</td></tr>')
+    lines.append('</table></td></tr></table></td></tr></table><div id="footer">Page created in 0.01s</div></body></html>')
+    return "\n".join(lines)
+
+
+def bench_scaling(args: argparse.Namespace):
+    """
+    进程池解析扩展性基准：多个站点并发"刷新"，每个站点逐页获取（sleep模拟网络延迟）并解析后宫翻页页面
+    子进程数为0时在抓取线程中解析（受GIL限制），其余使用对应子进程数的解析进程池
+    """
+    from plugins.nexusinvitees.parse_pool import ParseCall, ParsePool, run_parse
+    from plugins.nexusinvitees.sites.nexusphp import NexusPhpHandler
+    from plugins.nexusinvitees.telemetry import SiteTelemetry
+
+    if args.path:
+        pages = [html for _, html in _load_fixtures(args.path)]
+        if not pages:
+            print(f"未找到HTML样本: {args.path}")
+            return
+    else:
+        pages = [_sample_invitee_page(page) for page in range(args.pages)]
+
+    handler = NexusPhpHandler()
+    call = ParseCall(handler._parse_nexusphp_invite_page, "benchmark", is_next_page=True, key="invitees")
+    baseline = _dump([call(html) for html in pages])
+
+    class Session:
+        def __init__(self, pool):
+            self.facts = {"parse_pool": pool} if pool else {}
+            self.telemetry = SiteTelemetry()
+
+    def refresh_site(pool) -> Tuple[List[Any], float]:
+        session = Session(pool)
+        results = []
+        for html in pages:
+            if args.latency:
+                time.sleep(args.latency)
+            results.append(run_parse(session, call, html))
+        return results, session.telemetry.parse_time
+
+    worker_counts = [int(value) for value in str(args.workers).split(",") if value.strip()]
+    total_pages = args.sites * len(pages)
+    print(f"站点数: {args.sites}，每站页数: {len(pages)}，模拟延迟: {args.latency * 1000:.0f}ms/页，"
+          f"CPU核数: {os.cpu_count()}")
+    print(f"{'解析子进程数':<14}{'页/秒':>10}{'加速比':>10}{'解析CPU秒':>12}{'结果一致':>10}")
+    base_rate = None
+    for workers in worker_counts:
+        pool = ParsePool(workers) if workers else None
+        try:
+            if pool:
+                # 预热：启动子进程并完成模块导入，不计入耗时
+                with ThreadPoolExecutor(max_workers=workers) as warmup:
+                    list(warmup.map(lambda html: pool.parse(call, html), pages[:workers]))
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.sites) as executor:
+                outcomes = list(executor.map(lambda _: refresh_site(pool), range(args.sites)))
+            elapsed = time.perf_counter() - start
+        finally:
+            if pool:
+                pool.shutdown()
+        rate = total_pages / elapsed if elapsed else 0
+        base_rate = base_rate or rate
+        consistent = all(_dump(results) == baseline for results, _ in outcomes)
+        parse_cpu = sum(cpu for _, cpu in outcomes)
+        label = f"{workers}" if workers else "0(线程内解析)"
+        print(f"{label:<14}{rate:>10.1f}{rate / base_rate:>10.2f}{parse_cpu:>12.2f}"
+              f"{'是' if consistent else '否':>10}")
+
+
+def _sample_invitee_rows(count: int) -> List[str]:
+    """
+    生成模拟的成员数据库行（JSON），字段与站点处理器输出一致
+    """
+    rng = random.Random(20240601)
+    units = ["KB", "MB", "GB", "TB"]
+    healths = [("good", "正常"), ("warning", "较低"), ("danger", "危险"), ("neutral", "无数据")]
+    rows = []
+    for index in range(count):
+        health, label = rng.choice(healths)
+        ratio = rng.uniform(0, 20)
+        rows.append(json.dumps({
+            "username": f"member{index}",
+            "uid": str(100000 + index),
+            "email": f"member{index}@example.com",
+            "uploaded": f"{rng.uniform(0, 2000):.2f} {rng.choice(units)}",
+            "downloaded": f"{rng.uniform(0, 2000):.2f} {rng.choice(units)}",
+            "ratio": f"{ratio:.3f}",
+            "ratio_value": round(ratio, 3),
+            "ratio_health": health,
+            "ratio_label": label,
+            "seeding": str(rng.randint(0, 500)),
+            "seeding_size": f"{rng.uniform(0, 20):.2f} TB",
+            "seed_bonus": f"{rng.uniform(0, 1e6):.1f}",
+            "last_seed_report": "2024-06-01 12:00:00",
+            "enabled": rng.choice(["Yes", "Yes", "Yes", "No"]),
+            "status": rng.choice(["已启用", "已启用", "已禁用"]),
+            "profile_url": f"https://example.com/userdetails.php?id={100000 + index}"
+        }, ensure_ascii=False))
+    return rows
+
+
+def bench_memory(args: argparse.Namespace):
+    """
+    成员内存表示基准：与数据管理器加载快照相同，从JSON行构造字典或紧凑记录，
+    对比常驻内存、构造耗时，以及页面渲染式逐字段读取的耗时
+    """
+    from plugins.nexusinvitees.records import InviteeRecord, to_plain
+
+    rows = _sample_invitee_rows(args.count)
+    fields = ("username", "uploaded", "downloaded", "ratio", "ratio_health", "ratio_label", "seeding",
+              "seeding_size", "enabled", "status", "profile_url")
+
+    def load_dicts():
+        return [json.loads(row) for row in rows]
+
+    def load_records():
+        return [InviteeRecord(json.loads(row)) for row in rows]
+
+    print(f"成员数: {args.count}，轮数: {args.rounds}")
+    print(f"{'表示':<12}{'内存(MB)':>10}{'字节/成员':>12}{'构造(ms)':>10}{'读取(ms)':>10}")
+    baseline = load_dicts()
+    for label, load in (("字典", load_dicts), ("紧凑记录", load_records)):
+        # 常驻内存：加载完成后仍被引用的对象大小
+        tracemalloc.start()
+        invitees = load()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            load()
+        build_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for invitee in invitees:
+                for field in fields:
+                    invitee.get(field, "")
+        read_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        per_member = current / args.count if args.count else 0
+        print(f"{label:<12}{current / 1024 / 1024:>10.2f}{per_member:>12.0f}{build_ms:>10.1f}{read_ms:>10.1f}")
+        if to_plain(invitees) != baseline:
+            print(f"{label}: 转换回字典后与原数据不一致")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后宫管理系统性能基准测试")
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_cmd = subparsers.add_parser("parser", help="邀请页解析后端对比")
+    parser_cmd.add_argument("path", help="HTML样本目录或文件")
+    parser_cmd.add_argument("--rounds", type=int, default=5, help="测试轮数")
+    parser_cmd.set_defaults(func=bench_parser)
+
+    converters_cmd = subparsers.add_parser("converters", help="分享率/体积转换微基准")
+    converters_cmd.add_argument("--count", type=int, default=5000, help="模拟后宫成员数")
+    converters_cmd.add_argument("--rounds", type=int, default=20, help="测试轮数")
+    converters_cmd.set_defaults(func=bench_converters)
+
+    scaling_cmd = subparsers.add_parser("scaling", help="解析进程池扩展性")
+    scaling_cmd.add_argument("path", nargs="?", help="后宫翻页HTML样本目录或文件，不指定时使用生成的页面")
+    scaling_cmd.add_argument("--workers", default="0,1,2,4", help="逗号分隔的解析子进程数，0为在抓取线程中解析")
+    scaling_cmd.add_argument("--sites", type=int, default=8, help="并发刷新的站点数")
+    scaling_cmd.add_argument("--pages", type=int, default=10, help="生成的每站页数（未指定样本时）")
+    scaling_cmd.add_argument("--latency", type=float, default=0.05, help="模拟每页网络延迟（秒）")
+    scaling_cmd.set_defaults(func=bench_scaling)
+
+    memory_cmd = subparsers.add_parser("memory", help="成员内存表示对比")
+    memory_cmd.add_argument("--count", type=int, default=5000, help="模拟后宫成员数")
+    memory_cmd.add_argument("--rounds", type=int, default=5, help="测试轮数")
+    memory_cmd.set_defaults(func=bench_memory)
+
+    args = parser.parse_args()
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
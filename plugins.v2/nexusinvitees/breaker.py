@@ -0,0 +1,167 @@
+"""
+站点熔断模块：认证失效或连接失败的站点在冷却期内跳过，冷却结束后先探测再恢复刷新
+"""
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.log import logger
+
+# 失败类型
+FAILURE_AUTH = "auth"
+FAILURE_CONNECTION = "connection"
+
+# 认证失效：Cookie过期、令牌错误、401/403
+_AUTH_RE = re.compile(r"未登录|Cookie已失效|Cookie验证失败|API认证失败|状态码: ?40[13]|失败: ?40[13]\b")
+# 连接失败：超时、连接被拒、DNS解析失败、5xx
+_CONNECTION_RE = re.compile(
+    r"网络错误|timed out|timeout|Max retries exceeded|ConnectionError|Connection (?:refused|reset|aborted)"
+    r"|Name or service not known|Temporary failure in name resolution|状态码: ?5\d\d|失败: ?5\d\d\b",
+    re.IGNORECASE)
+
+
+def classify_failure(reason: str) -> str:
+    """
+    判断失败是否需要熔断
+    :param reason: 失败原因
+    :return: 失败类型，不需要熔断的失败（如解析错误）返回空字符串
+    """
+    reason = str(reason or "")
+    if _AUTH_RE.search(reason):
+        return FAILURE_AUTH
+    if _CONNECTION_RE.search(reason):
+        return FAILURE_CONNECTION
+    return ""
+
+
+class CircuitBreaker:
+    """
+    站点熔断器，每个站点一个状态机，状态保存在插件数据中
+    - closed: 正常刷新
+    - open: 认证或连接失败后进入，冷却期内跳过该站点
+    - half_open: 冷却结束，先发一个探测请求，通过后完整刷新；完整刷新成功则恢复closed
+    探测或恢复后的刷新再次失败时重新进入open，冷却时间加倍（不超过上限）。
+    站点认证信息变化（如更新了Cookie）时直接恢复closed。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # 默认冷却时间与上限（分钟），0表示不熔断
+    DEFAULT_COOLDOWN_MINUTES = 60
+    MAX_COOLDOWN_MINUTES = 24 * 60
+
+    # 检查结果
+    ACTION_RUN = "run"
+    ACTION_PROBE = "probe"
+    ACTION_SKIP = "skip"
+
+    def __init__(self, data_manager, cooldown_minutes: Any = DEFAULT_COOLDOWN_MINUTES):
+        """
+        :param data_manager: 数据管理器，用于持久化熔断状态
+        :param cooldown_minutes: 冷却时间（分钟）
+        """
+        self.data_manager = data_manager
+        self.cooldown_minutes = self.normalize_cooldown(cooldown_minutes)
+
+    @classmethod
+    def normalize_cooldown(cls, value: Any) -> float:
+        """
+        规范化冷却时间配置
+        """
+        try:
+            return min(max(float(value), 0.0), float(cls.MAX_COOLDOWN_MINUTES))
+        except (TypeError, ValueError):
+            return float(cls.DEFAULT_COOLDOWN_MINUTES)
+
+    @property
+    def enabled(self) -> bool:
+        """
+        是否启用熔断
+        """
+        return self.cooldown_minutes > 0
+
+    def check(self, site_name: str, auth_hash: str = "", now: Optional[float] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        刷新前检查站点状态
+        :param site_name: 站点名称
+        :param auth_hash: 当前认证信息指纹
+        :param now: 当前时间戳
+        :return: (run/probe/skip, 熔断状态)
+        """
+        if not self.enabled:
+            return self.ACTION_RUN, {}
+        state = self.data_manager.get_site_breaker(site_name) or {}
+        if state.get("state", self.CLOSED) == self.CLOSED:
+            return self.ACTION_RUN, state
+        if auth_hash and state.get("auth_hash") and state.get("auth_hash") != auth_hash:
+            logger.info(f"站点 {site_name} 认证信息已更新，解除熔断")
+            self.record_success(site_name)
+            return self.ACTION_RUN, {}
+
+        now = time.time() if now is None else now
+        if now < state.get("opened_at", 0) + state.get("cooldown", 0):
+            return self.ACTION_SKIP, state
+        state["state"] = self.HALF_OPEN
+        self.data_manager.save_site_breaker(site_name, state)
+        return self.ACTION_PROBE, state
+
+    def record_success(self, site_name: str):
+        """
+        刷新成功，恢复closed
+        """
+        if not self.enabled:
+            return
+        state = self.data_manager.get_site_breaker(site_name)
+        if state and state.get("state") != self.CLOSED:
+            logger.info(f"站点 {site_name} 刷新恢复正常，解除熔断")
+            self.data_manager.save_site_breaker(site_name, {"state": self.CLOSED})
+
+    def record_failure(self, site_name: str, reason: str, auth_hash: str = "",
+                       now: Optional[float] = None) -> bool:
+        """
+        记录刷新或探测失败，认证/连接失败时进入open
+        :param site_name: 站点名称
+        :param reason: 失败原因
+        :param auth_hash: 认证信息指纹
+        :param now: 当前时间戳
+        :return: 是否熔断
+        """
+        if not self.enabled:
+            return False
+        kind = classify_failure(reason)
+        if not kind:
+            # 站点可访问但解析失败，不影响下次刷新
+            self.record_success(site_name)
+            return False
+
+        state = self.data_manager.get_site_breaker(site_name) or {}
+        base = self.cooldown_minutes * 60
+        if state.get("state") == self.HALF_OPEN:
+            cooldown = min(max(state.get("cooldown", base), base) * 2, self.MAX_COOLDOWN_MINUTES * 60)
+        else:
+            cooldown = base
+        new_state = {
+            "state": self.OPEN,
+            "kind": kind,
+            "reason": str(reason)[:200],
+            "opened_at": time.time() if now is None else now,
+            "cooldown": cooldown,
+            "failures": state.get("failures", 0) + 1,
+            "auth_hash": auth_hash
+        }
+        self.data_manager.save_site_breaker(site_name, new_state)
+        logger.warning(f"站点 {site_name} {'认证失效' if kind == FAILURE_AUTH else '连接失败'}，"
+                       f"熔断 {cooldown / 60:.0f} 分钟: {new_state['reason']}")
+        return True
+
+    @staticmethod
+    def describe(state: Dict[str, Any], now: Optional[float] = None) -> str:
+        """
+        熔断状态说明
+        """
+        now = time.time() if now is None else now
+        remaining = max(state.get("opened_at", 0) + state.get("cooldown", 0) - now, 0)
+        kind = "认证失效" if state.get("kind") == FAILURE_AUTH else "连接失败"
+        return f"{kind}熔断中，{remaining / 60:.0f}分钟后重试（{state.get('reason', '')}）"
@@ -0,0 +1,255 @@
+"""
+数值转换模块：分享率、体积、健康度的统一解析
+
+所有站点处理器共用，正则预编译、单值结果带缓存（后宫列表中大量重复的"0.00 KB"、"---"等只解析一次），
+并提供按列批量转换的接口。
+"""
+import re
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+
+from app.log import logger
+
+# 无限分享率使用的数值
+RATIO_INFINITY = 1e20
+
+# 表示无限分享率的文本（小写）
+INFINITE_RATIO_TEXTS = frozenset(['inf.', 'inf', 'infinite', '无限', '∞'])
+
+# 千分位逗号：前面是数字，后面恰好跟三位数字（如 "1,234.5"、"12,345"），其余逗号视为小数点（如 "1,5 GB"）
+_THOUSANDS_COMMA_RE = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+
+# 数字 + 单位
+_SIZE_RE = re.compile(r'([\d.]+)\s*([KMGTPEZY]?i?B)', re.IGNORECASE)
+
+# 体积单位
+SIZE_UNITS = {
+    'B': 1,
+    'KB': 1024,
+    'KIB': 1024,
+    'MB': 1024 ** 2,
+    'MIB': 1024 ** 2,
+    'GB': 1024 ** 3,
+    'GIB': 1024 ** 3,
+    'TB': 1024 ** 4,
+    'TIB': 1024 ** 4,
+    'PB': 1024 ** 5,
+    'PIB': 1024 ** 5,
+    'EB': 1024 ** 6,
+    'EIB': 1024 ** 6,
+    'ZB': 1024 ** 7,
+    'ZIB': 1024 ** 7,
+    'YB': 1024 ** 8,
+    'YIB': 1024 ** 8
+}
+
+# 表示零流量的文本（小写）
+_ZERO_TRAFFIC_TEXTS = frozenset(['0', '', '0.0', '0b'])
+
+# 单值缓存大小
+_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def normalize_number(text: str) -> str:
+    """
+    标准化数字文本：去掉千分位逗号，剩余逗号视为小数点
+    :param text: 数字文本，如 "1,234.5"、"0,85"、"1,5 GB"
+    :return: 可直接float()的文本
+    """
+    return _THOUSANDS_COMMA_RE.sub('', text).replace(',', '.')
+
+
+def is_infinite_ratio(text: str) -> bool:
+    """
+    是否为无限分享率文本
+    """
+    return bool(text) and text.lower() in INFINITE_RATIO_TEXTS
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def parse_ratio(text: str) -> float:
+    """
+    解析分享率文本
+    :param text: 分享率文本
+    :return: 分享率数值，无限分享率返回RATIO_INFINITY
+    :raises ValueError: 无法解析时抛出，与float()保持一致
+    """
+    if is_infinite_ratio(text):
+        return RATIO_INFINITY
+    return float(normalize_number(text))
+
+
+def ratio_to_value(text: Any, default: Optional[float] = None) -> Optional[float]:
+    """
+    解析分享率，失败时返回默认值
+    :param text: 分享率文本或数值
+    :param default: 默认值
+    :return: 分享率数值
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    if not text:
+        return default
+    try:
+        return parse_ratio(text)
+    except (ValueError, TypeError):
+        return default
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def size_to_bytes(size_str: str) -> float:
+    """
+    将大小字符串转换为字节数
+    :param size_str: 大小字符串，如 "1.5 TB"、"1,024.00 GiB"
+    :return: 字节数，无法解析返回0
+    """
+    if not size_str or not size_str.strip():
+        return 0
+
+    # 处理特殊情况
+    if size_str.lower() in ('inf.', 'inf') or size_str == '∞':
+        return RATIO_INFINITY
+
+    size_str = normalize_number(size_str)
+    matches = _SIZE_RE.match(size_str)
+    if not matches:
+        # 尝试匹配仅有数字的情况
+        try:
+            return float(size_str)
+        except ValueError:
+            logger.warning(f"无法解析大小字符串: {size_str}")
+            return 0
+
+    size_num, unit = matches.groups()
+    try:
+        size_value = float(size_num)
+    except ValueError:
+        logger.warning(f"无法转换大小值为浮点数: {size_num}")
+        return 0
+
+    unit = unit.upper()
+    # 处理简写单位
+    if len(unit) == 1 and unit != 'B':
+        unit = unit + 'B'
+    return size_value * SIZE_UNITS.get(unit, 1)
+
+
+def is_zero_traffic(uploaded: Any, downloaded: Any) -> bool:
+    """
+    上传下载是否都为0（无数据用户）
+    """
+    if isinstance(uploaded, str) and isinstance(downloaded, str):
+        return uploaded.lower() in _ZERO_TRAFFIC_TEXTS and downloaded.lower() in _ZERO_TRAFFIC_TEXTS
+    if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
+        return uploaded == 0 and downloaded == 0
+    return False
+
+
+def health_from_ratio_value(ratio: float) -> Tuple[str, List[str]]:
+    """
+    根据分享率数值获取健康状态和标签
+    :param ratio: 分享率数值
+    :return: (健康状态, [标签文本, 颜色])
+    """
+    if ratio >= 4.0:
+        return "excellent", ["极好", "text-success"]
+    elif ratio >= 2.0:
+        return "good", ["良好", "text-success"]
+    elif ratio >= 1.0:
+        return "good", ["正常", "text-success"]
+    elif ratio > 0:
+        if ratio >= 0.4:
+            return "warning", ["较低", "text-warning"]
+        return "danger", ["危险", "text-error"]
+    return "neutral", ["无数据", "text-grey"]
+
+
+def calculate_ratio_health(ratio_str: Any, uploaded: Any, downloaded: Any) -> Tuple[str, List[str]]:
+    """
+    计算分享率健康度
+    :param ratio_str: 分享率文本
+    :param uploaded: 上传量（文本或字节数）
+    :param downloaded: 下载量（文本或字节数）
+    :return: (健康状态, [标签文本, 颜色])
+    """
+    # 优先使用上传下载直接计算分享率（如果都是数值类型）
+    if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)) and downloaded > 0:
+        return health_from_ratio_value(uploaded / downloaded)
+
+    if is_zero_traffic(uploaded, downloaded):
+        return "neutral", ["无数据", "text-grey"]
+
+    if not ratio_str:
+        return "neutral", ["无效", "text-grey"]
+
+    if is_infinite_ratio(str(ratio_str)):
+        return "excellent", ["分享率无限", "text-success"]
+
+    try:
+        return health_from_ratio_value(parse_ratio(str(ratio_str)))
+    except (ValueError, TypeError) as e:
+        logger.error(f"分享率转换错误: {ratio_str}, 错误: {str(e)}")
+        return "neutral", ["无效", "text-grey"]
+
+
+def ratios_to_values(values: Iterable[Any], default: Optional[float] = 0.0) -> List[Optional[float]]:
+    """
+    批量解析一列分享率
+    :param values: 分享率文本列
+    :param default: 无法解析时的默认值
+    :return: 数值列表
+    """
+    return [ratio_to_value(value, default) for value in values]
+
+
+def sizes_to_bytes(values: Iterable[Any]) -> List[float]:
+    """
+    批量转换一列体积（上传量、下载量、做种体积等）
+    :param values: 体积文本列（数值原样返回）
+    :return: 字节数列表
+    """
+    return [float(value) if isinstance(value, (int, float)) else size_to_bytes(value or "")
+            for value in values]
+
+
+def convert_invitee_columns(invitees: List[dict],
+                            size_fields: Iterable[str] = ("uploaded", "downloaded", "seeding_size"),
+                            ratio_field: str = "ratio", ratio_default: Optional[float] = 0.0) -> dict:
+    """
+    按列批量转换后宫成员的数值字段
+    :param invitees: 后宫成员列表
+    :param size_fields: 体积字段
+    :param ratio_field: 分享率字段
+    :param ratio_default: 分享率无法解析时的默认值
+    :return: {字段名: 数值列表}，与invitees顺序一致
+    """
+    columns = {field: sizes_to_bytes([invitee.get(field) for invitee in invitees]) for field in size_fields}
+    columns[ratio_field] = ratios_to_values([invitee.get(ratio_field) for invitee in invitees], ratio_default)
+    return columns
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def bytes_to_size(size_bytes: float) -> str:
+    """
+    将字节数格式化为体积文本（保留两位小数，B~PB）
+    :param size_bytes: 字节数
+    :return: 体积文本
+    """
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.2f} PB"
+
+
+def cache_info() -> dict:
+    """
+    单值缓存命中情况
+    """
+    return {
+        "normalize_number": normalize_number.cache_info()._asdict(),
+        "parse_ratio": parse_ratio.cache_info()._asdict(),
+        "size_to_bytes": size_to_bytes.cache_info()._asdict(),
+        "bytes_to_size": bytes_to_size.cache_info()._asdict()
+    }
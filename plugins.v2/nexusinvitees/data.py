@@ -4,109 +4,1023 @@
 import os
 import json
 import time
-from typing import Dict, Any, List, Optional
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
 
 from app.log import logger
+from plugins.nexusinvitees.records import InviteeRecord, is_invitee, to_record
+from plugins.nexusinvitees.summary import build_site_summary, build_global_summary
+from plugins.nexusinvitees.history import compact_record, diff_records, replay, describe_changes, decode, \
+    encode_values, fold, EVENT_BASELINE, EVENT_CHANGED, EVENT_NAMES, HISTORY_KEEP_RUNS
+from plugins.nexusinvitees.query import INDEX_COLUMN_NAMES, index_values, migration_statements, \
+    backfill_index_columns, build_query, encode_cursor
 
 
 class DataManager:
     """
-    数据管理类
+    数据管理类，基于SQLite存储站点数据
     """
-    
+
+    # 数据库结构版本，按顺序执行 _MIGRATIONS 中的语句
+    _MIGRATIONS = [
+        # v1: 站点表 + 被邀请人表
+        [
+            """
+            CREATE TABLE IF NOT EXISTS sites (
+                site_name TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                last_update INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS invitees (
+                site_name TEXT NOT NULL,
+                member_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (site_name, member_key)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_invitees_site_pos ON invitees (site_name, position)",
+        ],
+        # v2: 用户ID缓存，按Cookie指纹失效
+        [
+            """
+            CREATE TABLE IF NOT EXISTS user_ids (
+                site_name TEXT PRIMARY KEY,
+                cookie_hash TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                updated_at INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+        ],
+        # v3: 站点统计摘要，写入站点数据时同步更新
+        [
+            """
+            CREATE TABLE IF NOT EXISTS site_summaries (
+                site_name TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            )
+            """,
+        ],
+        # v4: 自适应刷新调度状态
+        [
+            """
+            CREATE TABLE IF NOT EXISTS refresh_schedule (
+                site_name TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            )
+            """,
+        ],
+        # v5: 后宫成员变化历史，每次成功刷新记录一轮，只保存变化的字段
+        [
+            """
+            CREATE TABLE IF NOT EXISTS history_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site_name TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                baseline INTEGER NOT NULL DEFAULT 0,
+                added INTEGER NOT NULL DEFAULT 0,
+                removed INTEGER NOT NULL DEFAULT 0,
+                changed INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_history_runs_site ON history_runs (site_name, run_id)",
+            """
+            CREATE TABLE IF NOT EXISTS invitee_history (
+                run_id INTEGER NOT NULL,
+                site_name TEXT NOT NULL,
+                member_key TEXT NOT NULL,
+                event INTEGER NOT NULL,
+                mask INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_history_member ON invitee_history (site_name, member_key, run_id)",
+            "CREATE INDEX IF NOT EXISTS idx_history_run ON invitee_history (run_id)",
+        ],
+        # v6: 次要页面（魔力值商店、发送邀请页面）解析结果缓存
+        [
+            """
+            CREATE TABLE IF NOT EXISTS page_cache (
+                site_name TEXT NOT NULL,
+                page TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (site_name, page)
+            )
+            """,
+        ],
+        # v7: 站点熔断状态
+        [
+            """
+            CREATE TABLE IF NOT EXISTS site_breakers (
+                site_name TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            )
+            """,
+        ],
+        # v8: 被邀请人表增加类型化索引列，用于服务端筛选排序分页；已有数据在迁移时补算
+        [
+            *migration_statements(),
+            backfill_index_columns,
+        ],
+        # v9: 最近几次刷新的按站点、按阶段耗时统计
+        [
+            """
+            CREATE TABLE IF NOT EXISTS refresh_telemetry (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+            """,
+        ],
+    ]
+
     def __init__(self, data_path: str):
         """
         初始化数据管理
         :param data_path: 数据目录路径
         """
         self.data_path = data_path
+        self.db_file = os.path.join(data_path, "site_data.db")
+        # 旧版JSON数据文件，仅用于一次性迁移
         self.data_file = os.path.join(data_path, "site_data.json")
-    
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        # 内存快照：数据库文件签名变化或自身写入时失效/增量更新
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_sig = None
+        self._last_update = 0
+        # 统计摘要，随快照一起加载
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._global_summary: Optional[Dict[str, Any]] = None
+        # 数据版本号：站点数据、统计摘要或刷新统计写入时递增，详情页据此复用已生成的组件
+        self._data_version = 0
+        # 站点 -> 最后一次写入该站点时的版本号；快照整体重新加载后所有站点按重新加载时的版本计
+        self._site_versions: Dict[str, int] = {}
+        self._reload_version = 0
+        self._conn = self._connect()
+        self._migrate_schema()
+        self._migrate_from_json()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        打开数据库连接
+        WAL模式下读事务看到开始时的快照，且不阻塞刷新写入
+        """
+        os.makedirs(self.data_path, exist_ok=True)
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate_schema(self):
+        """
+        按版本升级数据库结构
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for index in range(version, len(self._MIGRATIONS)):
+                with self._conn:
+                    for statement in self._MIGRATIONS[index]:
+                        if callable(statement):
+                            statement(self._conn)
+                        else:
+                            self._conn.execute(statement)
+                    self._conn.execute(f"PRAGMA user_version={index + 1}")
+                logger.info(f"站点数据库结构升级到 v{index + 1}")
+
+    def _migrate_from_json(self):
+        """
+        从旧版site_data.json一次性迁移数据，迁移后重命名旧文件
+        """
+        if not os.path.exists(self.data_file):
+            return
+        try:
+            with self._lock:
+                count = self._conn.execute("SELECT COUNT(*) FROM sites").fetchone()[0]
+                if count:
+                    logger.info("数据库已有站点数据，跳过旧版JSON数据迁移")
+                else:
+                    with open(self.data_file, 'r', encoding='utf-8') as f:
+                        old_data = json.load(f) or {}
+                    with self.batch():
+                        for site_name, cache in old_data.items():
+                            if not isinstance(cache, dict):
+                                continue
+                            self._write_site(site_name, cache.get("data", {}) or {},
+                                             int(cache.get("last_update", 0) or 0))
+                    logger.info(f"已从旧版JSON迁移 {len(old_data)} 个站点数据")
+            os.replace(self.data_file, self.data_file + ".migrated")
+        except Exception as e:
+            logger.error(f"迁移旧版站点数据失败: {str(e)}")
+
+    @contextmanager
+    def batch(self) -> Iterator["DataManager"]:
+        """
+        批量写入，退出时统一提交事务，异常时回滚
+        批次期间持有锁，其他线程的写入等到批次结束后再执行，不会并入本事务；
+        因此批次只应包含少量写入（如单个站点的刷新结果），不要跨越网络请求
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except Exception:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.rollback()
+                    # 快照中可能包含已回滚的增量，直接丢弃
+                    self._snapshot = None
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.commit()
+                    self._snapshot_sig = self._file_signature()
+
+    def _commit(self):
+        """
+        非批量模式下立即提交
+        """
+        if self._batch_depth == 0:
+            self._conn.commit()
+            self._snapshot_sig = self._file_signature()
+
+    def _file_signature(self) -> Optional[tuple]:
+        """
+        数据库文件签名(修改时间, 大小)，用于判断快照是否过期
+        WAL模式下提交先写入 -wal 文件，签名同时包含该文件
+        """
+        try:
+            stat = os.stat(self.db_file)
+        except OSError:
+            return None
+        try:
+            wal = os.stat(f"{self.db_file}-wal")
+            wal_sig = (wal.st_mtime_ns, wal.st_size)
+        except OSError:
+            wal_sig = None
+        return stat.st_mtime_ns, stat.st_size, wal_sig
+
+    def _get_snapshot(self) -> Dict[str, Any]:
+        """
+        获取内存快照，文件被外部修改时重新加载
+        """
+        with self._lock:
+            # 批量写入期间以连接内的增量为准，不按文件签名失效
+            if self._snapshot is None or (self._batch_depth == 0
+                                          and self._file_signature() != self._snapshot_sig):
+                self._snapshot = self._read_sites()
+                self._snapshot_sig = self._file_signature()
+                self._last_update = max((cache.get("last_update", 0) for cache in self._snapshot.values()),
+                                        default=0)
+                self._summaries = self._read_summaries(self._snapshot)
+                self._global_summary = None
+                # 数据可能被外部修改或回滚，所有站点视为已变化
+                self._bump_version()
+                self._site_versions.clear()
+                self._reload_version = self._data_version
+            return self._snapshot
+
+    def _bump_version(self, site_name: Optional[str] = None):
+        """
+        递增数据版本号
+        :param site_name: 写入的站点，为None时只递增全局版本
+        """
+        with self._lock:
+            self._data_version += 1
+            if site_name:
+                self._site_versions[site_name] = self._data_version
+
+    def get_data_version(self) -> int:
+        """
+        获取数据版本号，数据（含刷新统计）有任何变化时递增
+        """
+        with self._lock:
+            self._get_snapshot()
+            return self._data_version
+
+    def get_site_version(self, site_name: str) -> int:
+        """
+        获取站点数据版本号，只有该站点数据变化时递增
+        """
+        with self._lock:
+            self._get_snapshot()
+            return max(self._site_versions.get(site_name, 0), self._reload_version)
+
+    def _read_summaries(self, snapshot: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        读取统计摘要，缺失的（如升级前写入的站点）按快照补算并保存
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT site_name, data FROM site_summaries").fetchall()
+            stored = {name: json.loads(data) for name, data in rows}
+
+            summaries = {}
+            missing = []
+            for site_name, cache in snapshot.items():
+                summary = stored.get(site_name)
+                if summary is None:
+                    summary = build_site_summary(cache.get("data", {}), cache.get("last_update", 0))
+                    missing.append((site_name, json.dumps(summary, ensure_ascii=False)))
+                summaries[site_name] = summary
+            if missing:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO site_summaries (site_name, data) VALUES (?, ?)", missing)
+                self._commit()
+                logger.info(f"已补算 {len(missing)} 个站点的统计摘要")
+            return summaries
+
+    @staticmethod
+    def _member_key(invitee: Dict[str, Any], position: int) -> str:
+        """
+        生成被邀请人主键，优先使用个人主页链接
+        多个成员主键相同时由调用方为这些成员都追加用户名区分（不使用列表位置，成员顺序变化时主键保持不变）
+        """
+        profile_url = invitee.get("profile_url")
+        if profile_url:
+            return str(profile_url)
+        uid = invitee.get("uid")
+        if uid:
+            return f"uid:{uid}"
+        username = invitee.get("username")
+        if username:
+            return f"user:{username}"
+        return f"pos:{position}"
+
+    def _write_site(self, site_name: str, site_data: Dict[str, Any], last_update: int,
+                    record_history: bool = False):
+        """
+        写入单个站点数据（不提交）
+        :param record_history: 是否与上次数据比较并记录成员变化
+        """
+        site_data = site_data if isinstance(site_data, dict) else {}
+        invitees = site_data.get("invitees", []) or []
+        site_row = {k: v for k, v in site_data.items() if k != "invitees"}
+        old_rows = self._conn.execute(
+            "SELECT member_key, data FROM invitees WHERE site_name = ?", (site_name,)).fetchall() \
+            if record_history else []
+
+        self._conn.execute(
+            "INSERT INTO sites (site_name, data, last_update) VALUES (?, ?, ?) "
+            "ON CONFLICT(site_name) DO UPDATE SET data = excluded.data, last_update = excluded.last_update",
+            (site_name, json.dumps(site_row, ensure_ascii=False), last_update))
+        self._conn.execute("DELETE FROM invitees WHERE site_name = ?", (site_name,))
+
+        rows = []
+        members = {}
+        keyed = [(position, invitee, self._member_key(invitee, position))
+                 for position, invitee in enumerate(invitees) if is_invitee(invitee)]
+        key_counts = Counter(member_key for _, _, member_key in keyed)
+        for position, invitee, member_key in keyed:
+            if key_counts[member_key] > 1:
+                member_key = base_key = f"{member_key}#{invitee.get('username') or ''}"
+                suffix = 2
+                while member_key in members:
+                    member_key = f"{base_key}#{suffix}"
+                    suffix += 1
+            members[member_key] = invitee
+            plain = invitee.to_dict() if isinstance(invitee, InviteeRecord) else invitee
+            rows.append((site_name, member_key, position, json.dumps(plain, ensure_ascii=False),
+                         *index_values(invitee)))
+        if rows:
+            self._conn.executemany(
+                f"INSERT INTO invitees (site_name, member_key, position, data, {', '.join(INDEX_COLUMN_NAMES)}) "
+                f"VALUES ({', '.join('?' * (4 + len(INDEX_COLUMN_NAMES)))})", rows)
+
+        if record_history:
+            self._write_history(site_name, old_rows, members, last_update)
+
+        # 同步更新该站点的统计摘要
+        summary = build_site_summary(site_data, last_update)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO site_summaries (site_name, data) VALUES (?, ?)",
+            (site_name, json.dumps(summary, ensure_ascii=False)))
+
+        # 增量更新内存快照，成员以紧凑记录保存
+        if self._snapshot is not None:
+            snapshot_data = dict(site_row)
+            snapshot_data["invitees"] = [to_record(invitee) for invitee in invitees if is_invitee(invitee)]
+            self._snapshot[site_name] = {
+                "data": snapshot_data,
+                "last_update": last_update
+            }
+            self._last_update = max(self._last_update, last_update)
+            self._summaries[site_name] = summary
+            self._global_summary = None
+        self._bump_version(site_name)
+
+    def _write_history(self, site_name: str, old_rows: List[tuple], members: Dict[str, Dict[str, Any]],
+                       ts: int):
+        """
+        比较上次与本次的成员数据，追加一轮变化记录（不提交）
+        站点首次记录时保存全部成员的完整数据作为基线
+        """
+        baseline = self._conn.execute(
+            "SELECT 1 FROM history_runs WHERE site_name = ? LIMIT 1", (site_name,)).fetchone() is None
+        old = {} if baseline else {member_key: compact_record(json.loads(data)) for member_key, data in old_rows}
+        new = {member_key: compact_record(invitee) for member_key, invitee in members.items()}
+        changes = diff_records(old, new, baseline=baseline)
+
+        counts = {"added": 0, "removed": 0, "changed": 0}
+        for _, event, _, _ in changes:
+            name = EVENT_NAMES.get(event)
+            if name in counts:
+                counts[name] += 1
+        cursor = self._conn.execute(
+            "INSERT INTO history_runs (site_name, ts, baseline, added, removed, changed) VALUES (?, ?, ?, ?, ?, ?)",
+            (site_name, ts, int(baseline), counts["added"], counts["removed"], counts["changed"]))
+        if changes:
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO invitee_history (run_id, site_name, member_key, event, mask, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, site_name, member_key, event, mask, data) for member_key, event, mask, data in changes])
+        if not baseline and changes:
+            logger.debug(f"站点 {site_name} 成员变化: 新增 {counts['added']}，移除 {counts['removed']}，"
+                         f"变化 {counts['changed']}")
+        self._prune_history(site_name, HISTORY_KEEP_RUNS)
+
+    def _prune_history(self, site_name: str, keep: int):
+        """
+        只保留站点最近 keep 轮变化记录（不提交）
+        更早的记录按成员合并为最终状态，写入保留范围内第一轮作为该成员的基线，回放结果不受影响
+        """
+        boundary = self._conn.execute(
+            "SELECT run_id FROM history_runs WHERE site_name = ? ORDER BY run_id DESC LIMIT 1 OFFSET ?",
+            (site_name, max(keep, 1) - 1)).fetchone()
+        if not boundary:
+            return
+        boundary_run = boundary[0]
+        states = fold(self._conn.execute(
+            "SELECT member_key, event, mask, data FROM invitee_history WHERE site_name = ? AND run_id < ? "
+            "ORDER BY run_id", (site_name, boundary_run)))
+        if not states and not self._conn.execute(
+                "SELECT 1 FROM history_runs WHERE site_name = ? AND run_id < ? LIMIT 1",
+                (site_name, boundary_run)).fetchone():
+            return
+
+        boundary_rows = {member_key: (event, mask, data) for member_key, event, mask, data in self._conn.execute(
+            "SELECT member_key, event, mask, data FROM invitee_history WHERE run_id = ?", (boundary_run,))}
+        for member_key, state in states.items():
+            if state is None:
+                continue
+            row = boundary_rows.get(member_key)
+            if row is None:
+                mask, data = encode_values(state)
+                self._conn.execute(
+                    "INSERT INTO invitee_history (run_id, site_name, member_key, event, mask, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (boundary_run, site_name, member_key, EVENT_BASELINE, mask, data))
+            elif row[0] == EVENT_CHANGED:
+                # 变化记录与之前的状态合并为完整基线；新增/移除记录本身即为该轮的完整状态
+                state.update(decode(row[1], row[2]))
+                mask, data = encode_values(state)
+                self._conn.execute(
+                    "UPDATE invitee_history SET event = ?, mask = ?, data = ? WHERE run_id = ? AND member_key = ?",
+                    (EVENT_BASELINE, mask, data, boundary_run, member_key))
+        self._conn.execute("DELETE FROM invitee_history WHERE site_name = ? AND run_id < ?",
+                           (site_name, boundary_run))
+        self._conn.execute("DELETE FROM history_runs WHERE site_name = ? AND run_id < ?",
+                           (site_name, boundary_run))
+
+    def _read_sites(self, site_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        读取站点数据并组装为旧版结构，成员为紧凑记录
+        """
+        with self._lock:
+            if site_name:
+                site_rows = self._conn.execute(
+                    "SELECT site_name, data, last_update FROM sites WHERE site_name = ?", (site_name,)).fetchall()
+                invitee_rows = self._conn.execute(
+                    "SELECT site_name, data FROM invitees WHERE site_name = ? ORDER BY position",
+                    (site_name,)).fetchall()
+            else:
+                site_rows = self._conn.execute(
+                    "SELECT site_name, data, last_update FROM sites ORDER BY rowid").fetchall()
+                invitee_rows = self._conn.execute(
+                    "SELECT site_name, data FROM invitees ORDER BY site_name, position").fetchall()
+
+        invitees_map: Dict[str, List[InviteeRecord]] = {}
+        for name, data in invitee_rows:
+            invitees_map.setdefault(name, []).append(InviteeRecord(json.loads(data)))
+
+        result = {}
+        for name, data, last_update in site_rows:
+            site_data = json.loads(data)
+            site_data["invitees"] = invitees_map.get(name, [])
+            result[name] = {
+                "data": site_data,
+                "last_update": last_update
+            }
+        return result
+
     def load_data(self) -> Dict[str, Any]:
         """
-        从文件加载数据
+        加载全部数据（来自内存快照，调用方不应修改内部对象）
         :return: 数据字典
         """
-        if not os.path.exists(self.data_file):
-            return {}
-        
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return dict(self._get_snapshot())
         except Exception as e:
-            logger.error(f"读取站点数据文件失败: {str(e)}")
+            logger.error(f"读取站点数据失败: {str(e)}")
             return {}
-    
+
     def save_data(self, data: Dict[str, Any]) -> bool:
         """
-        保存数据到文件
+        整体覆盖保存数据
         :param data: 数据字典
         :return: 是否成功
         """
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self.batch():
+                self._conn.execute("DELETE FROM sites")
+                self._conn.execute("DELETE FROM invitees")
+                self._conn.execute("DELETE FROM site_summaries")
+                self._conn.execute("DELETE FROM history_runs")
+                self._conn.execute("DELETE FROM invitee_history")
+                self._snapshot = None
+                for site_name, cache in (data or {}).items():
+                    if not isinstance(cache, dict):
+                        continue
+                    self._write_site(site_name, cache.get("data", {}) or {},
+                                     int(cache.get("last_update", 0) or 0))
             return True
         except Exception as e:
-            logger.error(f"保存站点数据到文件失败: {str(e)}")
+            logger.error(f"保存站点数据失败: {str(e)}")
             return False
-    
-    def update_site_data(self, site_name: str, site_data: Dict[str, Any]) -> bool:
+
+    def update_site_data(self, site_name: str, site_data: Dict[str, Any], record_history: bool = False) -> bool:
         """
-        更新指定站点的数据
+        更新指定站点的数据，批量模式下延迟到批次结束再提交
         :param site_name: 站点名称
         :param site_data: 站点数据
+        :param record_history: 是否记录成员变化历史（仅成功刷新时记录）
         :return: 是否成功
         """
-        all_data = self.load_data()
-        
-        # 更新站点数据并添加时间戳
-        all_data[site_name] = {
-            "data": site_data,
-            "last_update": int(time.time())
-        }
-        
-        return self.save_data(all_data)
-    
+        try:
+            with self._lock:
+                self._write_site(site_name, site_data, int(time.time()), record_history=record_history)
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 数据失败: {str(e)}")
+            return False
+
     def get_site_data(self, site_name: Optional[str] = None) -> Dict[str, Any]:
         """
-        获取站点数据
+        获取站点数据（来自内存快照，调用方不应修改内部对象）
+        成员为只读的 InviteeRecord，需要序列化时先经 to_plain 转换
         :param site_name: 站点名称，如果为None则返回所有站点数据
         :return: 站点数据
         """
-        all_data = self.load_data()
-        
+        try:
+            all_data = self._get_snapshot()
+        except Exception as e:
+            logger.error(f"读取站点数据失败: {str(e)}")
+            all_data = {}
+
         if site_name:
             return all_data.get(site_name, {})
-        return all_data
-    
+        return dict(all_data)
+
     def get_last_update_time(self) -> int:
         """
         获取最后更新时间
         :return: 时间戳
         """
-        all_data = self.load_data()
-        
-        update_times = []
-        for site_data in all_data.values():
-            if "last_update" in site_data:
-                update_times.append(site_data["last_update"])
-        
-        return max(update_times) if update_times else 0
-        
+        try:
+            with self._lock:
+                self._get_snapshot()
+                return self._last_update
+        except Exception as e:
+            logger.error(f"读取最后更新时间失败: {str(e)}")
+            return 0
+
+    def get_site_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各站点统计摘要（与站点数据顺序一致）
+        :return: 站点名称 -> 摘要
+        """
+        try:
+            with self._lock:
+                snapshot = self._get_snapshot()
+                return {site_name: self._summaries[site_name]
+                        for site_name in snapshot if site_name in self._summaries}
+        except Exception as e:
+            logger.error(f"读取站点统计摘要失败: {str(e)}")
+            return {}
+
+    def get_global_summary(self) -> Dict[str, Any]:
+        """
+        获取全局统计摘要，由站点摘要汇总，数据变化前复用
+        :return: 全局摘要
+        """
+        try:
+            with self._lock:
+                self._get_snapshot()
+                if self._global_summary is None:
+                    self._global_summary = build_global_summary(self._summaries)
+                return dict(self._global_summary)
+        except Exception as e:
+            logger.error(f"读取全局统计摘要失败: {str(e)}")
+            return build_global_summary({})
+
     def clear_all_site_data(self) -> bool:
         """
         清空所有站点数据
         :return: 是否成功
         """
+        return self.save_data({})
+
+    def get_cached_user_id(self, site_name: str, cookie_hash: str) -> Optional[str]:
+        """
+        获取缓存的用户ID，Cookie指纹不一致时视为失效
+        :param site_name: 站点名称
+        :param cookie_hash: Cookie指纹
+        :return: 用户ID
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT cookie_hash, user_id FROM user_ids WHERE site_name = ?", (site_name,)).fetchone()
+            if row and row[0] == cookie_hash:
+                return row[1]
+            return None
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 用户ID缓存失败: {str(e)}")
+            return None
+
+    def save_user_id(self, site_name: str, cookie_hash: str, user_id: str) -> bool:
+        """
+        保存用户ID缓存
+        :param site_name: 站点名称
+        :param cookie_hash: Cookie指纹
+        :param user_id: 用户ID
+        :return: 是否成功
+        """
         try:
-            if os.path.exists(self.data_file):
-                # 直接清空为空字典
-                return self.save_data({})
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_ids (site_name, cookie_hash, user_id, updated_at) "
+                    "VALUES (?, ?, ?, ?)", (site_name, cookie_hash, str(user_id), int(time.time())))
+                self._commit()
             return True
         except Exception as e:
-            logger.error(f"清空站点数据失败: {str(e)}")
-            return False 
\ No newline at end of file
+            logger.error(f"保存站点 {site_name} 用户ID缓存失败: {str(e)}")
+            return False
+
+    def invalidate_user_id(self, site_name: str) -> bool:
+        """
+        清除站点的用户ID缓存
+        :param site_name: 站点名称
+        :return: 是否成功
+        """
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM user_ids WHERE site_name = ?", (site_name,))
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"清除站点 {site_name} 用户ID缓存失败: {str(e)}")
+            return False
+
+    def get_refresh_schedules(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取全部站点的刷新调度状态
+        :return: 站点名称 -> 调度状态
+        """
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT site_name, data FROM refresh_schedule").fetchall()
+            return {site_name: json.loads(data) for site_name, data in rows}
+        except Exception as e:
+            logger.error(f"读取刷新调度状态失败: {str(e)}")
+            return {}
+
+    def get_refresh_schedule(self, site_name: str) -> Optional[Dict[str, Any]]:
+        """
+        获取站点的刷新调度状态
+        :param site_name: 站点名称
+        :return: 调度状态
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM refresh_schedule WHERE site_name = ?", (site_name,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 刷新调度状态失败: {str(e)}")
+            return None
+
+    def save_refresh_schedule(self, site_name: str, state: Dict[str, Any]) -> bool:
+        """
+        保存站点的刷新调度状态
+        :param site_name: 站点名称
+        :param state: 调度状态
+        :return: 是否成功
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO refresh_schedule (site_name, data) VALUES (?, ?)",
+                    (site_name, json.dumps(state, ensure_ascii=False)))
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 刷新调度状态失败: {str(e)}")
+            return False
+
+    def get_site_breakers(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取全部站点的熔断状态
+        :return: 站点名称 -> 熔断状态
+        """
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT site_name, data FROM site_breakers").fetchall()
+            return {site_name: json.loads(data) for site_name, data in rows}
+        except Exception as e:
+            logger.error(f"读取站点熔断状态失败: {str(e)}")
+            return {}
+
+    def get_site_breaker(self, site_name: str) -> Optional[Dict[str, Any]]:
+        """
+        获取站点的熔断状态
+        :param site_name: 站点名称
+        :return: 熔断状态
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM site_breakers WHERE site_name = ?", (site_name,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 熔断状态失败: {str(e)}")
+            return None
+
+    def save_site_breaker(self, site_name: str, state: Dict[str, Any]) -> bool:
+        """
+        保存站点的熔断状态
+        :param site_name: 站点名称
+        :param state: 熔断状态
+        :return: 是否成功
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO site_breakers (site_name, data) VALUES (?, ?)",
+                    (site_name, json.dumps(state, ensure_ascii=False)))
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 熔断状态失败: {str(e)}")
+            return False
+
+    def get_page_cache(self, site_name: str, page: str) -> Optional[Dict[str, Any]]:
+        """
+        获取站点页面缓存
+        :param site_name: 站点名称
+        :param page: 页面
+        :return: {"fingerprint": 指纹, "data": 解析结果, "updated_at": 时间}
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fingerprint, data, updated_at FROM page_cache WHERE site_name = ? AND page = ?",
+                    (site_name, page)).fetchone()
+            if not row:
+                return None
+            return {"fingerprint": row[0], "data": json.loads(row[1]), "updated_at": row[2]}
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 页面缓存失败: {str(e)}")
+            return None
+
+    def save_page_cache(self, site_name: str, page: str, fingerprint: str, data: Dict[str, Any]) -> bool:
+        """
+        保存站点页面缓存
+        :param site_name: 站点名称
+        :param page: 页面
+        :param fingerprint: 指纹
+        :param data: 解析结果
+        :return: 是否成功
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO page_cache (site_name, page, fingerprint, data, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (site_name, page, fingerprint, json.dumps(data, ensure_ascii=False), int(time.time())))
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 页面缓存失败: {str(e)}")
+            return False
+
+    def clear_page_cache(self, site_name: Optional[str] = None) -> bool:
+        """
+        清除页面缓存
+        :param site_name: 站点名称，为None时清除全部
+        :return: 是否成功
+        """
+        try:
+            with self._lock:
+                if site_name:
+                    self._conn.execute("DELETE FROM page_cache WHERE site_name = ?", (site_name,))
+                else:
+                    self._conn.execute("DELETE FROM page_cache")
+                self._commit()
+            return True
+        except Exception as e:
+            logger.error(f"清除页面缓存失败: {str(e)}")
+            return False
+
+    def query_invitees(self, **filters) -> Dict[str, Any]:
+        """
+        按条件筛选、排序并分页查询被邀请人
+        :param filters: 查询参数，见 query.build_query
+        :return: {"items": 当前页成员, "total": 符合条件的总数, "next_cursor": 下一页游标}
+        :raises QueryError: 查询参数错误
+        """
+        query = build_query(**filters)
+        limit = query["limit"]
+        key_size = len(query["key"])
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM invitees{query['where']}", query["params"]).fetchone()[0]
+            rows = self._conn.execute(query["page_sql"], query["page_params"]).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            invitee = json.loads(row[-1])
+            invitee["site_name"] = row[-2]
+            items.append(invitee)
+        return {
+            "items": items,
+            "total": total,
+            "next_cursor": encode_cursor(rows[limit - 1][:key_size]) if len(rows) > limit else None
+        }
+
+    def save_refresh_telemetry(self, run: Dict[str, Any], keep: int) -> bool:
+        """
+        保存一次刷新的耗时统计，只保留最近几次
+        :param run: 统计数据（含time）
+        :param keep: 保留次数
+        """
+        try:
+            with self._lock:
+                self._conn.execute("INSERT INTO refresh_telemetry (ts, data) VALUES (?, ?)",
+                                   (int(run.get("time") or time.time()), json.dumps(run, ensure_ascii=False)))
+                self._conn.execute(
+                    "DELETE FROM refresh_telemetry WHERE run_id NOT IN "
+                    "(SELECT run_id FROM refresh_telemetry ORDER BY run_id DESC LIMIT ?)", (max(int(keep), 1),))
+                self._commit()
+                self._bump_version()
+            return True
+        except Exception as e:
+            logger.error(f"保存刷新耗时统计失败: {str(e)}")
+            return False
+
+    def get_refresh_telemetry(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取最近几次刷新的耗时统计
+        :param limit: 数量，为空时返回全部保留的记录
+        :return: 统计数据，按时间倒序
+        """
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT data FROM refresh_telemetry ORDER BY run_id DESC LIMIT ?",
+                    (int(limit) if limit else -1,)).fetchall()
+            return [json.loads(data) for data, in rows]
+        except Exception as e:
+            logger.error(f"读取刷新耗时统计失败: {str(e)}")
+            return []
+
+    def iter_invitees(self, site_name: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        按站点及站点内顺序逐条读取被邀请人，每次只从数据库读取一批，内存占用与总数无关
+        整个导出在独立连接的同一个读事务中完成：导出期间的刷新写入不影响本次结果，也不被本次导出阻塞
+        :param site_name: 站点名称，为空时读取全部站点
+        :param batch_size: 每批读取数量
+        :return: 成员数据（含site_name）迭代器
+        """
+        # 导出可能由其他线程逐批消费，使用独立连接，不占用共享连接的锁
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            if site_name:
+                cursor = conn.execute("SELECT site_name, data FROM invitees WHERE site_name = ? "
+                                      "ORDER BY position", (site_name,))
+            else:
+                cursor = conn.execute("SELECT site_name, data FROM invitees ORDER BY site_name, position")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                for name, data in rows:
+                    invitee = json.loads(data)
+                    invitee["site_name"] = name
+                    yield invitee
+                if len(rows) < batch_size:
+                    return
+        finally:
+            conn.close()
+
+    def _resolve_member_key(self, site_name: str, member: str) -> Optional[str]:
+        """
+        按成员主键（个人主页链接）、UID或用户名查找成员主键
+        """
+        candidates = [member, f"uid:{member}", f"user:{member}"]
+        row = self._conn.execute(
+            f"SELECT member_key FROM invitee_history WHERE site_name = ? AND member_key IN "
+            f"({', '.join('?' * len(candidates))}) LIMIT 1", (site_name, *candidates)).fetchone()
+        if row:
+            return row[0]
+        # 按当前数据中的UID/用户名匹配（个人主页链接作为主键的站点）
+        for member_key, data in self._conn.execute(
+                "SELECT member_key, data FROM invitees WHERE site_name = ?", (site_name,)):
+            invitee = json.loads(data)
+            if member in (str(invitee.get("uid") or ""), str(invitee.get("username") or "")):
+                return member_key
+        return None
+
+    def get_member_history(self, site_name: str, member: str) -> Optional[Dict[str, Any]]:
+        """
+        获取成员的历史时间序列
+        :param site_name: 站点名称
+        :param member: 成员主键（个人主页链接）、UID或用户名
+        :return: {"member_key": 主键, "series": 时间序列}，成员不存在时返回None
+        """
+        try:
+            with self._lock:
+                member_key = self._resolve_member_key(site_name, member)
+                if not member_key:
+                    return None
+                rows = self._conn.execute(
+                    "SELECT r.ts, h.event, h.mask, h.data FROM invitee_history h "
+                    "JOIN history_runs r ON r.run_id = h.run_id "
+                    "WHERE h.site_name = ? AND h.member_key = ? ORDER BY h.run_id",
+                    (site_name, member_key)).fetchall()
+            return {"member_key": member_key, "series": replay(rows)}
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 成员 {member} 历史失败: {str(e)}")
+            return None
+
+    def get_latest_changes(self, site_name: str) -> Optional[Dict[str, Any]]:
+        """
+        获取站点最近一次刷新相对上一次刷新的成员变化
+        :param site_name: 站点名称
+        :return: 变化描述，站点尚无历史时返回None
+        """
+        try:
+            with self._lock:
+                run = self._conn.execute(
+                    "SELECT run_id, ts, baseline, added, removed, changed FROM history_runs "
+                    "WHERE site_name = ? ORDER BY run_id DESC LIMIT 1", (site_name,)).fetchone()
+                if not run:
+                    return None
+                run_id, ts, baseline, added, removed, changed = run
+                previous_run = self._conn.execute(
+                    "SELECT ts FROM history_runs WHERE site_name = ? AND run_id < ? ORDER BY run_id DESC LIMIT 1",
+                    (site_name, run_id)).fetchone()
+                rows = self._conn.execute(
+                    "SELECT member_key, event, mask, data FROM invitee_history WHERE run_id = ?",
+                    (run_id,)).fetchall()
+
+                # 回放发生变化的成员之前的记录，得到变化前的值
+                previous: Dict[str, Dict[int, float]] = {}
+                changed_keys = [row[0] for row in rows if row[1] == EVENT_CHANGED]
+                for start in range(0, len(changed_keys), 500):
+                    chunk = changed_keys[start:start + 500]
+                    for member_key, mask, data in self._conn.execute(
+                            f"SELECT member_key, mask, data FROM invitee_history WHERE site_name = ? "
+                            f"AND run_id < ? AND member_key IN ({', '.join('?' * len(chunk))}) ORDER BY run_id",
+                            (site_name, run_id, *chunk)):
+                        previous.setdefault(member_key, {}).update(decode(mask, data))
+
+            return {
+                "time": ts,
+                "previous_time": previous_run[0] if previous_run else None,
+                "baseline": bool(baseline),
+                "added": added,
+                "removed": removed,
+                "changed": changed,
+                "members": {} if baseline else describe_changes(rows, previous)
+            }
+        except Exception as e:
+            logger.error(f"读取站点 {site_name} 成员变化失败: {str(e)}")
+            return None
+
+    def close(self):
+        """
+        关闭数据库连接
+        """
+        try:
+            with self._lock:
+                self._conn.close()
+        except Exception as e:
+            logger.error(f"关闭站点数据库失败: {str(e)}")
@@ -0,0 +1,224 @@
+"""
+刷新调度模块
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import urlparse
+
+from app.log import logger
+
+
+class RefreshEngine:
+    """
+    并发刷新引擎：全局并发上限 + 单站点(主机)串行
+    同一主机的站点在提交端排队，前一个完成后才提交下一个，不会占用线程池中的线程等待
+    """
+
+    # 默认并发数
+    DEFAULT_WORKERS = 4
+    # 并发数上限，避免配置过大拖垮MP
+    MAX_WORKERS = 16
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, per_host_limit: int = 1):
+        """
+        初始化刷新引擎
+        :param max_workers: 全局最大并发数
+        :param per_host_limit: 同一主机最大并发数
+        """
+        self.max_workers = self.normalize_workers(max_workers)
+        self.per_host_limit = max(1, int(per_host_limit or 1))
+
+    @classmethod
+    def normalize_workers(cls, value: Any) -> int:
+        """
+        规范化并发数配置
+        :param value: 配置值
+        :return: 合法的并发数
+        """
+        try:
+            workers = int(value)
+        except (TypeError, ValueError):
+            return cls.DEFAULT_WORKERS
+        return min(max(workers, 1), cls.MAX_WORKERS)
+
+    @staticmethod
+    def get_host(site: Dict[str, Any]) -> str:
+        """
+        获取站点主机名，作为单主机限流的键
+        :param site: 站点配置
+        :return: 主机名
+        """
+        site_url = site.get("url", "") or ""
+        host = urlparse(site_url).netloc.lower()
+        return host or site.get("name", "") or site_url
+
+    @staticmethod
+    def _run_one(site: Dict[str, Any], worker: Callable[[Dict[str, Any]], Dict[str, Any]]) \
+            -> Tuple[Dict[str, Any], Dict[str, Any], float]:
+        """
+        执行单个站点任务
+        """
+        start = time.time()
+        try:
+            result = worker(site)
+        except Exception as e:
+            logger.error(f"站点 {site.get('name', '')} 刷新任务异常: {str(e)}")
+            result = {"error": f"刷新任务异常: {str(e)}"}
+        return site, result, time.time() - start
+
+    def run(self, sites: List[Dict[str, Any]], worker: Callable[[Dict[str, Any]], Dict[str, Any]]) \
+            -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], float]]:
+        """
+        并发执行站点任务，按完成顺序返回结果
+        :param sites: 站点配置列表
+        :param worker: 单站点处理函数，接收站点配置，返回站点数据
+        :return: (站点配置, 站点数据, 耗时秒数) 迭代器
+        """
+        if not sites:
+            return
+        workers = min(self.max_workers, len(sites))
+        logger.info(f"并发刷新 {len(sites)} 个站点，并发数 {workers}")
+        # 按主机分组排队，每个主机同时只提交 per_host_limit 个站点
+        host_queues: Dict[str, deque] = {}
+        for site in sites:
+            host_queues.setdefault(self.get_host(site), deque()).append(site)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexusinvitees") as executor:
+            running = {}
+
+            def submit_next(host: str):
+                queue = host_queues[host]
+                if queue:
+                    running[executor.submit(self._run_one, queue.popleft(), worker)] = host
+
+            for host in host_queues:
+                for _ in range(self.per_host_limit):
+                    submit_next(host)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    submit_next(running.pop(future))
+                    yield future.result()
+
+
+class SiteLocks:
+    """
+    站点级刷新锁：同一站点同时只有一个刷新任务，不同站点互不阻塞
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def try_acquire(self, site_name: str) -> bool:
+        """
+        尝试获取站点锁，不等待
+        :param site_name: 站点名称
+        :return: 是否获取成功
+        """
+        with self._guard:
+            lock = self._locks.get(site_name)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[site_name] = lock
+        return lock.acquire(blocking=False)
+
+    def release(self, site_name: str):
+        """
+        释放站点锁
+        :param site_name: 站点名称
+        """
+        with self._guard:
+            lock = self._locks.get(site_name)
+        if lock is not None and lock.locked():
+            lock.release()
+
+    def busy(self) -> List[str]:
+        """
+        正在刷新的站点
+        """
+        with self._guard:
+            return [site_name for site_name, lock in self._locks.items() if lock.locked()]
+
+
+class RefreshQueue:
+    """
+    去重的站点刷新队列
+    - 已在队列中的站点不会重复加入
+    - 后台线程每次取出当前全部待刷新站点，作为一批交给处理函数，队列清空后线程退出
+    """
+
+    def __init__(self, handler: Callable[[List[str]], Any], name: str = "nexusinvitees-queue"):
+        """
+        :param handler: 批处理函数，接收站点名称列表
+        :param name: 后台线程名称
+        """
+        self._handler = handler
+        self._name = name
+        # 使用dict保持加入顺序
+        self._pending: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._worker: threading.Thread = None
+        self._stopped = False
+
+    def submit(self, site_names: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        加入待刷新站点
+        :param site_names: 站点名称
+        :return: (新加入的站点, 已在队列中的站点)
+        """
+        added, duplicated = [], []
+        with self._lock:
+            if self._stopped:
+                return added, duplicated
+            for site_name in site_names:
+                if site_name in self._pending:
+                    duplicated.append(site_name)
+                else:
+                    self._pending[site_name] = None
+                    added.append(site_name)
+            if added and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._worker.start()
+        return added, duplicated
+
+    def pending(self) -> List[str]:
+        """
+        等待刷新的站点
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def _take(self) -> List[str]:
+        """
+        取出当前全部待刷新站点
+        """
+        with self._lock:
+            site_names = list(self._pending)
+            self._pending.clear()
+            if not site_names:
+                self._worker = None
+            return site_names
+
+    def _run(self):
+        """
+        后台线程：逐批处理直到队列为空
+        """
+        while True:
+            site_names = self._take()
+            if not site_names:
+                return
+            try:
+                self._handler(site_names)
+            except Exception as e:
+                logger.error(f"处理刷新队列失败: {str(e)}")
+
+    def stop(self):
+        """
+        停止接收新任务并清空队列（正在执行的批次会执行完）
+        """
+        with self._lock:
+            self._stopped = True
+            self._pending.clear()
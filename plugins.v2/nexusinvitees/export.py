@@ -0,0 +1,69 @@
+"""
+后宫成员导出模块：按批次从数据库读取被邀请人，逐行生成NDJSON或CSV
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+# 导出格式 -> 媒体类型
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# CSV未指定列时导出的列
+DEFAULT_CSV_COLUMNS = (
+    "site_name", "username", "uid", "email", "uploaded", "downloaded", "ratio", "ratio_health",
+    "seeding", "seeding_size", "seed_bonus", "enabled", "status", "last_seed_report", "profile_url"
+)
+
+
+def parse_columns(columns: Any) -> List[str]:
+    """
+    解析列投影参数
+    :param columns: 逗号分隔的列名
+    :return: 列名列表，未指定时为空
+    """
+    if isinstance(columns, (list, tuple)):
+        names = [str(column).strip() for column in columns]
+    else:
+        names = str(columns or "").split(",")
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def _cell(value: Any) -> Any:
+    """
+    CSV单元格值，嵌套结构序列化为JSON
+    """
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return "" if value is None else value
+
+
+def iter_export(records: Iterator[Dict[str, Any]], fmt: str = "ndjson",
+                columns: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    将成员记录逐行转换为导出文本
+    :param records: 成员记录（含site_name）迭代器
+    :param fmt: ndjson/csv
+    :param columns: 导出的列，NDJSON未指定时导出全部字段
+    :return: 文本块迭代器
+    """
+    if fmt == "csv":
+        columns = columns or list(DEFAULT_CSV_COLUMNS)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # 带BOM便于Excel识别UTF-8
+        writer.writerow(columns)
+        yield "\ufeff" + buffer.getvalue()
+        for record in records:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([_cell(record.get(column)) for column in columns])
+            yield buffer.getvalue()
+    else:
+        for record in records:
+            if columns:
+                record = {column: record.get(column) for column in columns}
+            yield json.dumps(record, ensure_ascii=False) + "\n"
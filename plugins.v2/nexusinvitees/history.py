@@ -0,0 +1,234 @@
+"""
+后宫成员历史模块：比较两次刷新的成员快照，只记录发生变化的字段
+
+每个成员的状态压缩为固定顺序的数值列，变化记录为(字段位掩码, 变化字段的定长float64打包数据)，
+按(站点, 成员主键)追加保存，查询时按顺序回放得到时间序列。
+"""
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from plugins.nexusinvitees.converters import normalize_number, ratio_to_value, size_to_bytes
+
+# 记录的字段（顺序即位掩码中的位序，只能在末尾追加）
+HISTORY_FIELDS = ("uploaded", "downloaded", "ratio", "seeding", "seeding_size", "enabled", "ratio_health")
+
+# 分享率健康度编码（0表示未知）
+HEALTH_CODES = ("", "neutral", "danger", "warning", "good", "excellent")
+
+# 变化类型
+EVENT_CHANGED = 0
+EVENT_ADDED = 1
+EVENT_REMOVED = 2
+EVENT_BASELINE = 3
+EVENT_NAMES = {
+    EVENT_CHANGED: "changed",
+    EVENT_ADDED: "added",
+    EVENT_REMOVED: "removed",
+    EVENT_BASELINE: "baseline"
+}
+
+# 全部字段的位掩码
+FULL_MASK = (1 << len(HISTORY_FIELDS)) - 1
+
+# 每个站点保留的刷新轮数，更早的记录折叠为保留范围内第一轮的基线
+HISTORY_KEEP_RUNS = 180
+
+# 单个字段的打包格式
+_VALUE_STRUCT = struct.Struct("<d")
+
+Record = Tuple[float, ...]
+
+
+def _to_bytes(value: Any) -> float:
+    """
+    体积字段转换为字节数
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(size_to_bytes(str(value or "")))
+
+
+def _to_count(value: Any) -> float:
+    """
+    数量字段转换为数值
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(normalize_number(str(value or "0").strip() or "0"))
+    except ValueError:
+        return 0.0
+
+
+def compact_record(invitee: Dict[str, Any]) -> Record:
+    """
+    将成员数据压缩为固定顺序的数值列
+    :param invitee: 成员数据
+    :return: 与HISTORY_FIELDS顺序一致的数值元组
+    """
+    ratio = invitee.get("ratio_value")
+    if not isinstance(ratio, (int, float)):
+        ratio = ratio_to_value(invitee.get("ratio"), 0.0)
+    health = invitee.get("ratio_health") or ""
+    return (
+        _to_bytes(invitee.get("uploaded")),
+        _to_bytes(invitee.get("downloaded")),
+        float(ratio or 0.0),
+        _to_count(invitee.get("seeding")),
+        _to_bytes(invitee.get("seeding_size")),
+        0.0 if str(invitee.get("enabled", "")).lower() == "no" else 1.0,
+        float(HEALTH_CODES.index(health)) if health in HEALTH_CODES else 0.0
+    )
+
+
+def encode(record: Record, mask: int = FULL_MASK) -> bytes:
+    """
+    按位掩码打包字段值
+    :param record: 数值列
+    :param mask: 需要打包的字段位掩码
+    :return: 定长打包数据
+    """
+    return b"".join(_VALUE_STRUCT.pack(record[index])
+                    for index in range(len(HISTORY_FIELDS)) if mask & (1 << index))
+
+
+def decode(mask: int, data: bytes) -> Dict[int, float]:
+    """
+    解包字段值
+    :param mask: 字段位掩码
+    :param data: 打包数据
+    :return: 字段序号 -> 数值
+    """
+    values = {}
+    offset = 0
+    for index in range(len(HISTORY_FIELDS)):
+        if mask & (1 << index):
+            values[index] = _VALUE_STRUCT.unpack_from(data, offset)[0]
+            offset += _VALUE_STRUCT.size
+    return values
+
+
+def encode_values(values: Dict[int, float]) -> Tuple[int, bytes]:
+    """
+    打包部分字段值
+    :param values: 字段序号 -> 数值
+    :return: (位掩码, 打包数据)
+    """
+    mask = 0
+    for index in values:
+        mask |= 1 << index
+    return mask, b"".join(_VALUE_STRUCT.pack(values[index]) for index in sorted(values))
+
+
+def fold(rows: Iterable[Tuple[str, int, int, bytes]]) -> Dict[str, Optional[Dict[int, float]]]:
+    """
+    按顺序合并多轮变化记录，得到每个成员最后的状态
+    :param rows: [(成员主键, 变化类型, 位掩码, 打包数据)]，按记录顺序排列
+    :return: 成员主键 -> 字段序号 -> 数值，最后一次为移除的成员为None
+    """
+    states: Dict[str, Optional[Dict[int, float]]] = {}
+    for member_key, event, mask, data in rows:
+        if event == EVENT_REMOVED:
+            states[member_key] = None
+            continue
+        state = {} if event in (EVENT_ADDED, EVENT_BASELINE) else (states.get(member_key) or {})
+        state.update(decode(mask, data))
+        states[member_key] = state
+    return states
+
+
+def changed_mask(old: Record, new: Record) -> int:
+    """
+    比较两条记录，返回变化字段的位掩码
+    """
+    mask = 0
+    for index, (old_value, new_value) in enumerate(zip(old, new)):
+        if old_value != new_value:
+            mask |= 1 << index
+    return mask
+
+
+def diff_records(old: Dict[str, Record], new: Dict[str, Record],
+                 baseline: bool = False) -> List[Tuple[str, int, int, bytes]]:
+    """
+    比较两次快照（均按成员主键建立哈希索引）
+    :param old: 上次快照，成员主键 -> 数值列
+    :param new: 本次快照，成员主键 -> 数值列
+    :param baseline: 是否为首次记录，首次记录保存全部成员的完整数据
+    :return: [(成员主键, 变化类型, 位掩码, 打包数据)]
+    """
+    changes = []
+    for member_key, record in new.items():
+        previous = None if baseline else old.get(member_key)
+        if previous is None:
+            event = EVENT_BASELINE if baseline else EVENT_ADDED
+            changes.append((member_key, event, FULL_MASK, encode(record)))
+            continue
+        mask = changed_mask(previous, record)
+        if mask:
+            changes.append((member_key, EVENT_CHANGED, mask, encode(record, mask)))
+    if not baseline:
+        for member_key in old.keys() - new.keys():
+            changes.append((member_key, EVENT_REMOVED, 0, b""))
+    return changes
+
+
+def format_values(values: Dict[int, float]) -> Dict[str, Any]:
+    """
+    将字段序号与数值转换为可读字段
+    """
+    result = {}
+    for index, value in values.items():
+        field = HISTORY_FIELDS[index]
+        if field == "enabled":
+            result[field] = "Yes" if value else "No"
+        elif field == "ratio_health":
+            code = int(value)
+            result[field] = HEALTH_CODES[code] if 0 <= code < len(HEALTH_CODES) else ""
+        elif field == "seeding":
+            result[field] = int(value)
+        else:
+            result[field] = value
+    return result
+
+
+def replay(rows: Iterable[Tuple[int, int, int, bytes]]) -> List[Dict[str, Any]]:
+    """
+    按顺序回放成员的变化记录，得到时间序列
+    :param rows: [(时间, 变化类型, 位掩码, 打包数据)]，按记录顺序排列
+    :return: 每次变化后的完整状态
+    """
+    series = []
+    state: Dict[int, float] = {}
+    for ts, event, mask, data in rows:
+        if event in (EVENT_ADDED, EVENT_BASELINE):
+            state = {}
+        state.update(decode(mask, data))
+        point = {"time": ts, "event": EVENT_NAMES.get(event, "changed")}
+        if event != EVENT_REMOVED:
+            point.update(format_values(state))
+        series.append(point)
+    return series
+
+
+def describe_changes(rows: Iterable[Tuple[str, int, int, bytes]],
+                     previous: Optional[Dict[str, Dict[int, float]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    将一次刷新的变化记录整理为 成员 -> {字段: [旧值, 新值]}
+    :param rows: [(成员主键, 变化类型, 位掩码, 打包数据)]
+    :param previous: 成员主键 -> 变化前的字段值
+    :return: 成员主键 -> 变化描述
+    """
+    previous = previous or {}
+    result = {}
+    for member_key, event, mask, data in rows:
+        new_values = format_values(decode(mask, data))
+        item = {"event": EVENT_NAMES.get(event, "changed")}
+        if event == EVENT_CHANGED:
+            old_values = format_values({index: value for index, value in previous.get(member_key, {}).items()
+                                        if mask & (1 << index)})
+            item["fields"] = {field: [old_values.get(field), value] for field, value in new_values.items()}
+        elif event != EVENT_REMOVED:
+            item["fields"] = {field: [None, value] for field, value in new_values.items()}
+        result[member_key] = item
+    return result
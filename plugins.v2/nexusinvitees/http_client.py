@@ -0,0 +1,205 @@
+"""
+HTTP客户端模块：跨刷新共享的连接池、重试策略与请求耗时统计
+"""
+import threading
+import time
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from app.log import logger
+
+# 当前线程正在发送的请求的建连统计
+_connect_state = threading.local()
+
+
+def _record_connect(elapsed: float):
+    """
+    记录一次新建连接的耗时（DNS解析 + TCP连接 + TLS握手）
+    """
+    _connect_state.connect_time = getattr(_connect_state, "connect_time", 0.0) + elapsed
+    _connect_state.connections = getattr(_connect_state, "connections", 0) + 1
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """
+    记录建连耗时的HTTP连接
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """
+    记录建连耗时的HTTPS连接
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+_TIMED_POOL_CLASSES = {
+    "http": _TimedHTTPConnectionPool,
+    "https": _TimedHTTPSConnectionPool
+}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    记录请求耗时的适配器，结果写入 response.timings：
+    - connect: 新建连接耗时，含DNS解析、TCP连接与TLS握手（复用长连接时为0）；
+      urllib3在 create_connection 内部完成解析与连接，DNS解析不单独计时
+    - connections: 新建连接数（含重试）
+    - ttfb: 从发出请求到收到响应头的耗时（含重试等待）
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _TIMED_POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # SOCKS代理使用自己的连接类，不做替换
+        if not str(proxy).lower().startswith("socks"):
+            manager.pool_classes_by_scheme = _TIMED_POOL_CLASSES
+        return manager
+
+    def send(self, request, *args, **kwargs):
+        _connect_state.connect_time = 0.0
+        _connect_state.connections = 0
+        start = time.perf_counter()
+        response = super().send(request, *args, **kwargs)
+        response.timings = {
+            "connect": _connect_state.connect_time,
+            "connections": _connect_state.connections,
+            "ttfb": time.perf_counter() - start
+        }
+        return response
+
+
+class HttpClient:
+    """
+    插件共享的HTTP客户端
+    - 所有站点的请求会话挂载同一个适配器，按主机保持连接池，刷新之间复用长连接
+    - 连接错误、读取超时和5xx响应按配置重试，重试间隔指数退避
+    - 统一声明gzip压缩
+    """
+
+    # 默认重试次数与退避系数（秒）
+    DEFAULT_RETRIES = 2
+    DEFAULT_BACKOFF = 0.5
+    # 重试次数上限
+    MAX_RETRIES = 5
+    # 保持连接池的主机数下限、每个站点预留的主机数（站点域名 + API/CDN等），单主机最大连接数
+    POOL_HOSTS = 32
+    HOSTS_PER_SITE = 2
+    POOL_SIZE = 8
+    # 需要重试的响应状态码
+    RETRY_STATUS = (500, 502, 503, 504)
+    # 共享重试只用于幂等方法；M-Team使用POST的只读查询接口通过 session.send_idempotent 单独重试
+    RETRY_METHODS = frozenset(["GET", "HEAD"])
+
+    def __init__(self, retries: Any = DEFAULT_RETRIES, backoff: Any = DEFAULT_BACKOFF,
+                 pool_hosts: int = POOL_HOSTS):
+        """
+        :param retries: 重试次数
+        :param backoff: 退避系数（秒），第n次重试前等待 backoff * 2^(n-1) 秒
+        :param pool_hosts: 保持连接池的主机数，超出时最久未使用的主机连接池被关闭
+        """
+        self.retries, self.backoff = self.normalize_retry(retries, backoff)
+        self.pool_hosts = max(int(pool_hosts or 0), self.POOL_HOSTS)
+        self._adapter = TimedHTTPAdapter(pool_connections=self.pool_hosts,
+                                         pool_maxsize=self.POOL_SIZE,
+                                         max_retries=self._build_retry())
+
+    @classmethod
+    def pool_hosts_for(cls, site_count: int) -> int:
+        """
+        按刷新的站点数计算需要保持的主机连接池数，保证全部站点刷新一轮后连接池仍然保留
+        :param site_count: 站点数
+        :return: 主机连接池数
+        """
+        return max(int(site_count or 0) * cls.HOSTS_PER_SITE, cls.POOL_HOSTS)
+
+    @classmethod
+    def normalize_retry(cls, retries: Any, backoff: Any) -> tuple:
+        """
+        规范化重试配置
+        :return: (重试次数, 退避系数)
+        """
+        try:
+            retries = min(max(int(retries), 0), cls.MAX_RETRIES)
+        except (TypeError, ValueError):
+            retries = cls.DEFAULT_RETRIES
+        try:
+            backoff = max(float(backoff), 0.0)
+        except (TypeError, ValueError):
+            backoff = cls.DEFAULT_BACKOFF
+        return retries, backoff
+
+    def _build_retry(self) -> Retry:
+        """
+        构建重试策略，最后一次仍失败时返回原响应，由调用方按状态码处理
+        """
+        kwargs = {
+            "total": self.retries,
+            "connect": self.retries,
+            "read": self.retries,
+            "status": self.retries,
+            "backoff_factor": self.backoff,
+            "status_forcelist": self.RETRY_STATUS,
+            "raise_on_status": False
+        }
+        try:
+            return Retry(allowed_methods=self.RETRY_METHODS, **kwargs)
+        except TypeError:
+            # urllib3 < 1.26
+            return Retry(method_whitelist=self.RETRY_METHODS, **kwargs)
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """
+        为会话挂载共享适配器
+        :param session: 请求会话
+        :return: 同一会话
+        """
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        return session
+
+    def close(self):
+        """
+        关闭连接池
+        """
+        try:
+            self._adapter.close()
+        except Exception as e:
+            logger.error(f"关闭HTTP连接池失败: {str(e)}")
+
+
+def get_timings(response: requests.Response) -> Dict[str, float]:
+    """
+    读取响应的耗时统计，未经过TimedHTTPAdapter的响应只有总耗时
+    """
+    timings = getattr(response, "timings", None)
+    if isinstance(timings, dict):
+        return timings
+    elapsed = getattr(response, "elapsed", None)
+    return {"connect": 0.0, "connections": 0, "ttfb": elapsed.total_seconds() if elapsed else 0.0}
@@ -1,68 +1,218 @@
 """
 模块加载器模块
 """
-import os
+import ast
 import importlib
-import inspect
-from typing import List, Type, Dict, Any
+import os
+import sys
+import threading
+from typing import List, Type, Dict, Optional, Tuple
+from urllib.parse import urlparse
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+
+# 站点处理器包名
+SITES_PACKAGE = "plugins.nexusinvitees.sites"
+
+
+class _HandlerEntry:
+    """
+    站点处理器索引项（仅记录位置，类在首次使用时才导入）
+    """
+
+    def __init__(self, module_name: str, class_name: str, features: Tuple[str, ...], is_fallback: bool):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.features = features
+        self.is_fallback = is_fallback
+        self.handler_class: Optional[Type[_ISiteHandler]] = None
 
 
 class ModuleLoader:
     """
-    模块加载器类
+    站点处理器注册表
+    - 启动时通过语法树扫描sites目录，按域名特征建立索引，不导入模块
+    - 处理器模块在首次命中时才导入
+    - 已解析的域名缓存处理器类，同一域名后续查找为O(1)
+    - 仅在处理器文件发生变化时重建索引并重新导入
     """
-    
+
+    def __init__(self, sites_dir: str = None):
+        self._sites_dir = sites_dir or os.path.join(os.path.dirname(__file__), "sites")
+        self._lock = threading.RLock()
+        self._signature: Tuple = ()
+        # 专用处理器在前，通用处理器在后
+        self._entries: List[_HandlerEntry] = []
+        # 特征 -> 索引项
+        self._feature_index: Dict[str, List[_HandlerEntry]] = {}
+        # 域名 -> 处理器类（None表示没有匹配的处理器）
+        self._host_cache: Dict[str, Optional[Type[_ISiteHandler]]] = {}
+
+    @property
+    def handler_count(self) -> int:
+        """
+        已索引的处理器数量
+        """
+        return len(self._entries)
+
+    def _get_signature(self) -> Tuple:
+        """
+        处理器文件签名（文件名与修改时间）
+        """
+        try:
+            return tuple(sorted(
+                (filename, os.stat(os.path.join(self._sites_dir, filename)).st_mtime_ns)
+                for filename in os.listdir(self._sites_dir) if filename.endswith(".py")
+            ))
+        except OSError:
+            return ()
+
     @staticmethod
-    def load_site_handlers() -> List[Type[_ISiteHandler]]:
-        """
-        加载所有站点处理器类
-        :return: 站点处理器类列表
-        """
-        handlers = []
-        sites_dir = os.path.join(os.path.dirname(__file__), "sites")
-        
-        if not os.path.exists(sites_dir):
-            logger.error("站点处理器目录不存在")
-            return []
-        
-        # 遍历sites目录下的所有py文件
-        for filename in os.listdir(sites_dir):
-            if not filename.endswith(".py") or filename == "__init__.py":
+    def _scan_module(path: str) -> List[Tuple[str, Tuple[str, ...], bool]]:
+        """
+        读取模块语法树，找出站点处理器类及其声明的域名特征
+        :param path: 模块文件路径
+        :return: (类名, 特征, 是否通用处理器) 列表
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        classes = []
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            base_names = {base.id for base in node.bases if isinstance(base, ast.Name)}
+            if "_ISiteHandler" not in base_names:
                 continue
-            
-            module_name = filename[:-3]  # 去掉.py后缀
-            
+            features: Tuple[str, ...] = ()
+            is_fallback = False
+            for stmt in node.body:
+                if not isinstance(stmt, ast.Assign):
+                    continue
+                for target in stmt.targets:
+                    if not isinstance(target, ast.Name):
+                        continue
+                    if target.id == "site_features":
+                        features = tuple(str(item).lower() for item in ast.literal_eval(stmt.value))
+                    elif target.id == "is_fallback":
+                        is_fallback = bool(ast.literal_eval(stmt.value))
+            classes.append((node.name, features, is_fallback))
+        return classes
+
+    def load(self):
+        """
+        扫描sites目录并建立索引
+        """
+        with self._lock:
+            if not os.path.exists(self._sites_dir):
+                logger.error("站点处理器目录不存在")
+                self._entries, self._feature_index, self._signature = [], {}, ()
+                self._host_cache.clear()
+                return
+
+            entries = []
+            for filename in sorted(os.listdir(self._sites_dir)):
+                if not filename.endswith(".py") or filename == "__init__.py":
+                    continue
+                module_name = filename[:-3]
+                try:
+                    for class_name, features, is_fallback in self._scan_module(
+                            os.path.join(self._sites_dir, filename)):
+                        entries.append(_HandlerEntry(module_name, class_name, features, is_fallback))
+                        logger.debug(f"索引站点处理器: {class_name}")
+                except Exception as e:
+                    logger.error(f"加载站点处理器模块 {module_name} 失败: {str(e)}")
+
+            entries.sort(key=lambda entry: entry.is_fallback)
+            feature_index: Dict[str, List[_HandlerEntry]] = {}
+            for entry in entries:
+                for feature in entry.features:
+                    feature_index.setdefault(feature, []).append(entry)
+
+            self._entries = entries
+            self._feature_index = feature_index
+            self._signature = self._get_signature()
+            self._host_cache.clear()
+
+    def reload_if_changed(self) -> bool:
+        """
+        处理器文件有变化时重建索引，并让已导入的处理器模块在下次使用时重新导入
+        :return: 是否重新加载
+        """
+        with self._lock:
+            signature = self._get_signature()
+            if signature == self._signature:
+                return False
+            for name in [name for name in sys.modules
+                         if name == SITES_PACKAGE or name.startswith(f"{SITES_PACKAGE}.")]:
+                del sys.modules[name]
+            self.load()
+            logger.info(f"站点处理器文件已变化，重新加载了 {self.handler_count} 个站点处理器")
+            return True
+
+    def _import_handler(self, entry: _HandlerEntry) -> Optional[Type[_ISiteHandler]]:
+        """
+        首次使用时导入处理器类
+        """
+        if entry.handler_class is None:
             try:
-                # 动态导入模块
-                module = importlib.import_module(f"plugins.nexusinvitee.sites.{module_name}")
-                
-                # 查找模块中继承了_ISiteHandler的类
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and 
-                        issubclass(obj, _ISiteHandler) and 
-                        obj != _ISiteHandler):
-                        handlers.append(obj)
-                        logger.info(f"加载站点处理器: {obj.__name__}")
-            
+                module = importlib.import_module(f"{SITES_PACKAGE}.{entry.module_name}")
+                entry.handler_class = getattr(module, entry.class_name)
+                logger.info(f"加载站点处理器: {entry.class_name}")
             except Exception as e:
-                logger.error(f"加载站点处理器模块 {module_name} 失败: {str(e)}")
-        
-        return handlers
-    
-    @staticmethod
-    def get_handler_for_site(site_url: str, handlers: List[Type[_ISiteHandler]]) -> _ISiteHandler:
+                logger.error(f"加载站点处理器模块 {entry.module_name} 失败: {str(e)}")
+                return None
+        return entry.handler_class
+
+    def _candidates(self, site_url: str) -> List[_HandlerEntry]:
+        """
+        按域名特征筛选候选处理器，通用处理器始终排在最后
+        """
+        url_lower = site_url.lower()
+        matched = {id(entry) for feature, entries in self._feature_index.items()
+                   if feature in url_lower for entry in entries}
+        specific = [entry for entry in self._entries if not entry.is_fallback and id(entry) in matched]
+        fallback = [entry for entry in self._entries if entry.is_fallback]
+        return specific + fallback
+
+    def resolve(self, site_url: str) -> Optional[Type[_ISiteHandler]]:
+        """
+        获取匹配站点的处理器类
+        :param site_url: 站点URL
+        :return: 处理器类
+        """
+        host = urlparse(site_url).netloc.lower() or site_url.lower()
+        with self._lock:
+            if host in self._host_cache:
+                return self._host_cache[host]
+
+            handler_class = None
+            for entry in self._candidates(site_url):
+                candidate = self._import_handler(entry)
+                if candidate and candidate.match(site_url):
+                    handler_class = candidate
+                    break
+            self._host_cache[host] = handler_class
+            return handler_class
+
+    def get_handler_for_site(self, site_url: str) -> Optional[_ISiteHandler]:
         """
         获取匹配站点的处理器实例
         :param site_url: 站点URL
-        :param handlers: 处理器类列表
         :return: 处理器实例
         """
-        for handler_class in handlers:
-            if handler_class.match(site_url):
-                return handler_class()
-        
-        # 如果没有找到匹配的处理器，返回None
-        return None 
\ No newline at end of file
+        handler_class = self.resolve(site_url)
+        return handler_class() if handler_class else None
+
+    def get_fallback_handler(self) -> Optional[_ISiteHandler]:
+        """
+        获取通用处理器实例
+        """
+        with self._lock:
+            for entry in self._entries:
+                if entry.is_fallback:
+                    handler_class = self._import_handler(entry)
+                    if handler_class:
+                        return handler_class()
+        return None
@@ -0,0 +1,157 @@
+"""
+站点次要页面缓存模块：魔力值商店、发送邀请页面的解析结果跨刷新缓存，
+以及后宫翻页页面按内容摘要复用的解析结果
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.log import logger
+
+# 缓存的页面
+PAGE_BONUS_SHOP = "bonus_shop"
+PAGE_SEND_INVITE = "send_invite"
+
+# 后宫翻页页面缓存键前缀，按页码区分
+PAGE_INVITEE_PREFIX = "invitee_page:"
+
+# 默认缓存时间（小时），0表示不缓存
+DEFAULT_TTL_HOURS = {
+    PAGE_BONUS_SHOP: 24,
+    PAGE_SEND_INVITE: 72
+}
+
+
+def normalize_ttl(value: Any, default: float) -> float:
+    """
+    规范化缓存时间配置
+    :param value: 配置值（小时）
+    :param default: 默认值
+    :return: 缓存时间（小时），不小于0
+    """
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class SitePageCache:
+    """
+    单个站点的次要页面缓存
+    - 按页面保存解析结果，超过缓存时间后重新获取
+    - 写入时附带指纹（认证信息 + 调用方给出的状态，如邀请数量），指纹不一致视为失效
+    - 只缓存成功获取的结果
+    - 后宫翻页页面不按时间失效，页面内容摘要（或ETag/Last-Modified）与上次一致时复用上次解析出的成员
+    """
+
+    def __init__(self, data_manager, site_name: str, auth_hash: str = "",
+                 ttl_hours: Optional[Dict[str, float]] = None):
+        """
+        :param data_manager: 数据管理器
+        :param site_name: 站点名称
+        :param auth_hash: 认证信息指纹，Cookie变化时缓存失效
+        :param ttl_hours: 页面 -> 缓存时间（小时）
+        """
+        self.data_manager = data_manager
+        self.site_name = site_name
+        self.auth_hash = auth_hash or ""
+        self.ttl_hours = dict(DEFAULT_TTL_HOURS)
+        self.ttl_hours.update(ttl_hours or {})
+        self.hits = 0
+        self.misses = 0
+        # 后宫翻页页面：复用解析结果次数 / 重新解析次数 / 其中服务器返回304的次数（翻页为并发抓取，计数加锁）
+        self.invitee_page_hits = 0
+        self.invitee_page_misses = 0
+        self.invitee_not_modified = 0
+        self._count_lock = threading.Lock()
+
+    def _fingerprint(self, fingerprint: str) -> str:
+        return f"{self.auth_hash}:{fingerprint}"
+
+    def get(self, page: str, fingerprint: str = "") -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+        :param page: 页面
+        :param fingerprint: 状态指纹
+        :return: 解析结果，未命中返回None
+        """
+        ttl = self.ttl_hours.get(page, 0)
+        if ttl <= 0:
+            return None
+        entry = self.data_manager.get_page_cache(self.site_name, page)
+        if (entry and entry["fingerprint"] == self._fingerprint(fingerprint)
+                and time.time() - entry["updated_at"] < ttl * 3600):
+            self.hits += 1
+            logger.debug(f"站点 {self.site_name} 使用缓存的{page}页面结果")
+            return entry["data"]
+        self.misses += 1
+        return None
+
+    def put(self, page: str, data: Dict[str, Any], fingerprint: str = ""):
+        """
+        写入缓存
+        :param page: 页面
+        :param data: 解析结果
+        :param fingerprint: 状态指纹
+        """
+        if self.ttl_hours.get(page, 0) <= 0:
+            return
+        self.data_manager.save_page_cache(self.site_name, page, self._fingerprint(fingerprint), data)
+
+    def get_invitee_page(self, page: int) -> Optional[Dict[str, Any]]:
+        """
+        读取后宫翻页页面上次的解析结果
+        :param page: 页码
+        :return: {"digest": 内容摘要, "invitees": 成员列表, "etag": ETag, "last_modified": Last-Modified,
+                  "has_next": 是否存在下一页}，认证信息变化或无记录时返回None
+        """
+        entry = self.data_manager.get_page_cache(self.site_name, f"{PAGE_INVITEE_PREFIX}{page}")
+        if not entry or not str(entry["fingerprint"]).startswith(f"{self.auth_hash}:"):
+            return None
+        return entry["data"]
+
+    def put_invitee_page(self, page: int, digest: str, invitees: List[Dict[str, Any]],
+                         etag: str = "", last_modified: str = "", has_next: Optional[bool] = None):
+        """
+        保存后宫翻页页面的解析结果
+        :param page: 页码
+        :param digest: 成员表格区域的内容摘要
+        :param invitees: 解析出的成员
+        :param etag: 响应的ETag
+        :param last_modified: 响应的Last-Modified
+        :param has_next: 是否存在下一页（逐页获取时使用）
+        """
+        self.data_manager.save_page_cache(self.site_name, f"{PAGE_INVITEE_PREFIX}{page}",
+                                          self._fingerprint(digest), {
+                                              "digest": digest,
+                                              "invitees": invitees,
+                                              "etag": etag or "",
+                                              "last_modified": last_modified or "",
+                                              "has_next": has_next
+                                          })
+
+    def count_invitee_page(self, hit: bool, not_modified: bool = False):
+        """
+        记录一次后宫翻页页面的复用/解析
+        :param hit: 是否复用了上次的解析结果
+        :param not_modified: 是否因服务器返回304而复用
+        """
+        with self._count_lock:
+            if hit:
+                self.invitee_page_hits += 1
+                if not_modified:
+                    self.invitee_not_modified += 1
+            else:
+                self.invitee_page_misses += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取命中统计
+        """
+        return {
+            "page_cache_hits": self.hits,
+            "page_cache_misses": self.misses,
+            "invitee_page_hits": self.invitee_page_hits,
+            "invitee_page_misses": self.invitee_page_misses,
+            "invitee_not_modified": self.invitee_not_modified
+        }
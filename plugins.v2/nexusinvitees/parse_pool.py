@@ -0,0 +1,154 @@
+"""
+进程池解析模块：CPU密集的HTML解析交给子进程执行，不受GIL限制，多核并行解析
+
+站点处理器把解析写成 ParseCall（HTML -> 结果的纯函数调用），抓取线程通过 run_parse 提交：
+插件开启进程池解析时在子进程中执行并把结果传回，否则在当前线程直接执行。
+"""
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from app.log import logger
+from plugins.nexusinvitees.session import get_fact
+from plugins.nexusinvitees.telemetry import SiteTelemetry, measure_parse
+
+# 子进程预先导入的模块（站点处理器及其依赖），避免每个子进程首次解析时再导入
+_PRELOAD_MODULES = ["plugins.nexusinvitees.sites"]
+
+
+class ParseCall:
+    """
+    可传给子进程的解析调用：func(*args, html, **kwargs)，key不为空时只返回结果中的该字段
+    func 须为站点处理器的方法或模块级函数，lambda无法传给子进程
+    """
+
+    def __init__(self, func: Callable, *args, key: Optional[str] = None, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+
+    def __call__(self, html: str) -> Any:
+        result = self.func(*self.args, html, **self.kwargs)
+        return result[self.key] if self.key else result
+
+
+def _execute(call: ParseCall, html: str) -> Tuple[Any, float]:
+    """
+    子进程中执行解析
+    :return: (解析结果, CPU耗时)
+    """
+    start = time.process_time()
+    result = call(html)
+    return result, time.process_time() - start
+
+
+class ParsePool:
+    """
+    HTML解析进程池
+    - 首次使用时创建，子进程由forkserver派生（不支持时使用spawn），不会复制刷新线程的锁状态
+    - 子进程异常退出时重建进程池，本次解析改为在当前线程执行
+    """
+
+    MAX_WORKERS = 8
+
+    def __init__(self, workers: int):
+        """
+        :param workers: 子进程数
+        """
+        self.workers = self.normalize_workers(workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize_workers(cls, value: Any) -> int:
+        """
+        规范化子进程数配置
+        :param value: 配置值
+        :return: 0~MAX_WORKERS，0表示不使用进程池
+        """
+        try:
+            return min(max(int(value), 0), cls.MAX_WORKERS)
+        except (TypeError, ValueError):
+            return 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload(_PRELOAD_MODULES)
+                else:
+                    context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                logger.info(f"HTML解析进程池已启动，子进程数 {self.workers}")
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    @staticmethod
+    def _picklable(call: ParseCall) -> bool:
+        """
+        解析调用能否传给子进程（序列化失败时pickle可能抛出PicklingError、TypeError或AttributeError）
+        """
+        try:
+            pickle.dumps(call)
+            return True
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f"解析调用无法传给子进程，改为在当前线程解析: {str(e)}")
+            return False
+
+    def parse(self, call: ParseCall, html: str) -> Tuple[Any, float]:
+        """
+        在子进程中解析，解析本身的异常照常抛出
+        :param call: 解析调用
+        :param html: 页面HTML
+        :return: (解析结果, 子进程CPU耗时)
+        """
+        # 提交前先检查能否序列化，子进程中抛出的异常不会与序列化失败混淆
+        if not self._picklable(call):
+            return call(html), 0.0
+        executor = self._get_executor()
+        try:
+            return executor.submit(_execute, call, html).result()
+        except BrokenProcessPool as e:
+            logger.warning(f"解析进程池异常，重建后继续: {str(e)}")
+            self._reset(executor)
+        return call(html), 0.0
+
+    def shutdown(self):
+        """
+        关闭进程池
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_parse(session: Any, call: Callable[[str], Any], html: str) -> Any:
+    """
+    执行解析：会话带有进程池且解析调用可传给子进程时交给进程池，否则在当前线程执行
+    解析耗时计入会话所属站点的耗时统计
+    :param session: 请求会话（插件在facts中提供parse_pool）
+    :param call: 解析调用
+    :param html: 页面HTML
+    :return: 解析结果
+    """
+    pool = get_fact(session, "parse_pool")
+    if not isinstance(pool, ParsePool) or not isinstance(call, ParseCall):
+        with measure_parse(session):
+            return call(html)
+    result, cpu_time = pool.parse(call, html)
+    telemetry = getattr(session, "telemetry", None)
+    if isinstance(telemetry, SiteTelemetry):
+        telemetry.add_parse(cpu_time)
+    return result
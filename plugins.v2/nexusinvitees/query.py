@@ -0,0 +1,219 @@
+"""
+后宫成员查询模块：被邀请人表的类型化索引列、筛选条件与游标分页
+
+写入成员数据时同时提取可排序/筛选的数值列保存在 invitees 表中，各列建有索引，
+查询在数据库中完成筛选、排序和分页，只返回当前页的成员。
+"""
+import base64
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from plugins.nexusinvitees.history import compact_record
+
+# 类型化列（列名 -> SQLite类型），写入顺序与 index_values 返回值一致
+INDEX_COLUMNS = (
+    ("uploaded", "REAL"),
+    ("downloaded", "REAL"),
+    ("ratio", "REAL"),
+    ("seeding", "INTEGER"),
+    ("seeding_size", "REAL"),
+    ("enabled", "INTEGER"),
+    ("ratio_health", "TEXT"),
+    ("last_seen", "INTEGER"),
+)
+INDEX_COLUMN_NAMES = tuple(name for name, _ in INDEX_COLUMNS)
+
+# 可排序的列，position 为站点内原始顺序
+SORT_COLUMNS = ("uploaded", "downloaded", "ratio", "seeding", "seeding_size", "last_seen", "position")
+
+# 每页数量
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# 最后活动时间的文本格式
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d")
+
+
+class QueryError(ValueError):
+    """
+    查询参数错误
+    """
+
+
+def parse_time(value: Any) -> int:
+    """
+    解析时间为时间戳
+    :param value: 时间戳或日期文本
+    :return: 时间戳（秒），无法解析时返回0
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value or "").strip()
+    if not text:
+        return 0
+    if text.isdigit():
+        return int(text)
+    for fmt in _TIME_FORMATS:
+        try:
+            return int(time.mktime(datetime.strptime(text, fmt).timetuple()))
+        except ValueError:
+            continue
+    return 0
+
+
+def index_values(invitee: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    提取成员的类型化列值
+    :param invitee: 成员数据
+    :return: 与INDEX_COLUMNS顺序一致的列值
+    """
+    uploaded, downloaded, ratio, seeding, seeding_size, enabled, _ = compact_record(invitee)
+    return (
+        uploaded,
+        downloaded,
+        ratio,
+        int(seeding),
+        seeding_size,
+        int(enabled),
+        invitee.get("ratio_health") or "",
+        parse_time(invitee.get("last_seen") or invitee.get("last_seed_report")),
+    )
+
+
+def migration_statements() -> List[str]:
+    """
+    生成添加类型化列及索引的建表语句
+    """
+    statements = [f"ALTER TABLE invitees ADD COLUMN {name} {column_type}" for name, column_type in INDEX_COLUMNS]
+    for name in SORT_COLUMNS:
+        if name != "position":
+            statements.append(f"CREATE INDEX IF NOT EXISTS idx_invitees_{name} ON invitees ({name}, site_name, position)")
+    statements.append("CREATE INDEX IF NOT EXISTS idx_invitees_health ON invitees (ratio_health, site_name, position)")
+    statements.append("CREATE INDEX IF NOT EXISTS idx_invitees_enabled ON invitees (enabled, site_name, position)")
+    return statements
+
+
+def backfill_index_columns(conn: sqlite3.Connection):
+    """
+    为已有的成员数据补算类型化列
+    """
+    rows = conn.execute("SELECT rowid, data FROM invitees").fetchall()
+    assignments = ", ".join(f"{name} = ?" for name in INDEX_COLUMN_NAMES)
+    conn.executemany(f"UPDATE invitees SET {assignments} WHERE rowid = ?",
+                     [(*index_values(json.loads(data)), rowid) for rowid, data in rows])
+
+
+def encode_cursor(values: Tuple[Any, ...]) -> str:
+    """
+    将最后一条记录的排序键编码为游标
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """
+    解码游标
+    :param cursor: 游标
+    :param size: 排序键长度
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise QueryError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise QueryError("无效的分页游标")
+    return tuple(values)
+
+
+def _split(value: Any) -> List[str]:
+    """
+    拆分逗号分隔的参数
+    """
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").split(",") if item.strip()]
+
+
+def build_query(site_name: Any = None, ratio_health: Any = None, enabled: Any = None,
+                ratio_below: Any = None, last_seen_before: Any = None,
+                sort: Optional[str] = None, order: Optional[str] = None,
+                cursor: Optional[str] = None, limit: Any = None) -> Dict[str, Any]:
+    """
+    根据查询参数生成SQL
+    :param site_name: 站点名称，逗号分隔多个
+    :param ratio_health: 分享率健康度，逗号分隔多个
+    :param enabled: 是否启用（yes/no）
+    :param ratio_below: 分享率低于该值
+    :param last_seen_before: 最后活动时间早于该时间（日期或时间戳），无活动时间的成员不参与筛选
+    :param sort: 排序列，默认按站点及站点内原始顺序
+    :param order: asc/desc
+    :param cursor: 上一页返回的游标
+    :param limit: 每页数量
+    :return: {"where": 筛选条件, "params": 参数, "page_sql": 分页语句, "page_params": 分页参数, "limit": 数量, "key": 排序键列}
+    """
+    conditions = []
+    params: List[Any] = []
+
+    sites = _split(site_name)
+    if sites:
+        conditions.append(f"site_name IN ({', '.join('?' * len(sites))})")
+        params.extend(sites)
+    healths = _split(ratio_health)
+    if healths:
+        conditions.append(f"ratio_health IN ({', '.join('?' * len(healths))})")
+        params.extend(healths)
+    if enabled not in (None, ""):
+        enabled_text = str(enabled).strip().lower()
+        if enabled_text not in ("yes", "no", "true", "false", "1", "0"):
+            raise QueryError("enabled 参数应为 yes 或 no")
+        conditions.append("enabled = ?")
+        params.append(1 if enabled_text in ("yes", "true", "1") else 0)
+    if ratio_below not in (None, ""):
+        try:
+            conditions.append("ratio < ?")
+            params.append(float(ratio_below))
+        except (TypeError, ValueError):
+            raise QueryError("ratio_below 参数应为数值")
+    if last_seen_before not in (None, ""):
+        before = parse_time(last_seen_before)
+        if not before:
+            raise QueryError("last_seen_before 参数应为日期或时间戳")
+        conditions.append("last_seen > 0 AND last_seen < ?")
+        params.append(before)
+
+    sort = sort or "position"
+    if sort not in SORT_COLUMNS:
+        raise QueryError(f"不支持的排序列: {sort}，可选: {', '.join(SORT_COLUMNS)}")
+    descending = str(order or "asc").lower() == "desc"
+    key = ("site_name", "position") if sort == "position" else (sort, "site_name", "position")
+
+    try:
+        limit = min(max(int(limit or DEFAULT_LIMIT), 1), MAX_LIMIT)
+    except (TypeError, ValueError):
+        raise QueryError("limit 参数应为整数")
+
+    # 游标分页：从上一页最后一条记录的排序键之后继续，利用 (列, site_name, position) 索引
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor:
+        page_conditions.append(f"({', '.join(key)}) {'<' if descending else '>'} "
+                               f"({', '.join('?' * len(key))})")
+        page_params.extend(decode_cursor(cursor, len(key)))
+    direction = " DESC" if descending else ""
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    page_where = f" WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+    page_sql = (f"SELECT {', '.join(key)}, site_name, data FROM invitees{page_where} "
+                f"ORDER BY {', '.join(column + direction for column in key)} LIMIT ?")
+    page_params.append(limit + 1)
+    return {
+        "where": where,
+        "params": params,
+        "page_sql": page_sql,
+        "page_params": page_params,
+        "limit": limit,
+        "key": key
+    }
@@ -0,0 +1,116 @@
+"""
+后宫成员紧凑记录模块：内存快照中的成员以固定槽位保存，替代每人一个字典
+
+站点处理器输出的成员字典在写入数据管理器时转换为 InviteeRecord，
+记录实现只读映射接口（get、[]、in、遍历），页面渲染、统计摘要等读取方无需改动；
+API返回前通过 to_plain 转换回字典。
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+# 常见成员字段，以槽位保存，其余字段保存在额外字典中
+INVITEE_FIELDS = (
+    "username", "uid", "email", "uploaded", "downloaded", "ratio", "ratio_value", "ratio_health",
+    "ratio_label", "seeding", "seeding_size", "seed_magic", "seed_bonus", "seed_time", "last_seed_report",
+    "last_seen", "enabled", "status", "data_status", "profile_url"
+)
+_FIELD_SET = frozenset(INVITEE_FIELDS)
+
+# 取值种类很少的文本字段，驻留后相同取值的成员共享同一字符串对象
+_INTERNED_FIELDS = frozenset(("ratio_health", "ratio_label", "enabled", "status", "data_status"))
+
+
+class InviteeRecord(Mapping):
+    """
+    单个被邀请人的只读记录
+    - 常见字段保存在槽位中，未出现的字段不占用额外内存，行为与字典中不存在该键一致
+    - 与同内容的字典比较相等，遍历顺序为 INVITEE_FIELDS 顺序，其后为额外字段
+    """
+
+    __slots__ = INVITEE_FIELDS + ("_extra",)
+
+    def __init__(self, data: Optional[Mapping] = None):
+        """
+        :param data: 成员数据
+        """
+        extra = None
+        for key, value in (data or {}).items():
+            if key in _FIELD_SET:
+                if key in _INTERNED_FIELDS and isinstance(value, str):
+                    value = sys.intern(value)
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra: Optional[Dict[str, Any]] = extra
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __contains__(self, key: Any) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in INVITEE_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for field in INVITEE_FIELDS if hasattr(self, field)) + len(self._extra or ())
+
+    def __repr__(self) -> str:
+        return f"InviteeRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典
+        """
+        result = {field: getattr(self, field) for field in INVITEE_FIELDS if hasattr(self, field)}
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+
+def is_invitee(value: Any) -> bool:
+    """
+    是否为成员数据（字典或紧凑记录）
+    """
+    return isinstance(value, (dict, InviteeRecord))
+
+
+def to_record(invitee: Mapping) -> InviteeRecord:
+    """
+    将成员数据转换为紧凑记录，已是记录时原样返回
+    """
+    return invitee if isinstance(invitee, InviteeRecord) else InviteeRecord(invitee)
+
+
+def to_plain(value: Any) -> Any:
+    """
+    将数据中的紧凑记录递归转换为字典，用于API返回等需要序列化的场景
+    """
+    if isinstance(value, InviteeRecord):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    return value
@@ -0,0 +1,140 @@
+"""
+自适应刷新调度模块：按站点数据的实际变化频率安排下次刷新
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from app.log import logger
+from plugins.nexusinvitees.records import is_invitee
+
+
+class AdaptiveScheduler:
+    """
+    自适应刷新调度
+    - 每次刷新后比较站点数据指纹，数据有变化则缩短刷新间隔，无变化则逐步拉长
+    - 间隔限制在[最小间隔, 最大间隔]之间
+    - 刷新失败时按最小间隔重试
+    """
+
+    # 默认最小/最大刷新间隔（小时）
+    DEFAULT_MIN_HOURS = 6
+    DEFAULT_MAX_HOURS = 72
+    # 数据无变化时间隔放大倍数，有变化时缩小倍数
+    GROWTH_FACTOR = 1.5
+    SHRINK_FACTOR = 0.5
+    # 定时检查到期站点的周期（分钟）
+    CHECK_MINUTES = 10
+
+    def __init__(self, data_manager, min_hours: Any = DEFAULT_MIN_HOURS, max_hours: Any = DEFAULT_MAX_HOURS):
+        """
+        :param data_manager: 数据管理器，用于持久化调度状态
+        :param min_hours: 最小刷新间隔（小时）
+        :param max_hours: 最大刷新间隔（小时）
+        """
+        self.data_manager = data_manager
+        self.min_hours, self.max_hours = self.normalize_hours(min_hours, max_hours)
+
+    @classmethod
+    def normalize_hours(cls, min_hours: Any, max_hours: Any) -> tuple:
+        """
+        规范化最小/最大间隔配置
+        :return: (最小间隔, 最大间隔)
+        """
+        try:
+            min_value = float(min_hours)
+        except (TypeError, ValueError):
+            min_value = cls.DEFAULT_MIN_HOURS
+        try:
+            max_value = float(max_hours)
+        except (TypeError, ValueError):
+            max_value = cls.DEFAULT_MAX_HOURS
+        min_value = max(min_value, 0.5)
+        return min_value, max(max_value, min_value)
+
+    @staticmethod
+    def fingerprint(site_data: Dict[str, Any]) -> str:
+        """
+        站点数据指纹，只取邀请数量与成员状态，忽略流量、魔力等持续变化的字段
+        :param site_data: 站点数据
+        :return: 指纹
+        """
+        invite_status = site_data.get("invite_status", {}) or {}
+        members = sorted(
+            (str(invitee.get("uid") or invitee.get("username") or ""),
+             str(invitee.get("enabled", "")),
+             str(invitee.get("ratio_health", "")))
+            for invitee in site_data.get("invitees", []) or [] if is_invitee(invitee)
+        )
+        payload = {
+            "permanent_count": invite_status.get("permanent_count", 0),
+            "temporary_count": invite_status.get("temporary_count", 0),
+            "can_invite": invite_status.get("can_invite", False),
+            "members": members
+        }
+        return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def record(self, site_name: str, site_data: Optional[Dict[str, Any]], success: bool,
+               now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        记录一次刷新结果并计算下次刷新时间
+        :param site_name: 站点名称
+        :param site_data: 刷新得到的站点数据
+        :param success: 是否刷新成功
+        :param now: 当前时间戳
+        :return: 新的调度状态
+        """
+        now = now or time.time()
+        state = dict(self.data_manager.get_refresh_schedule(site_name) or {})
+        interval = state.get("interval_hours") or self.min_hours
+
+        if not success:
+            # 失败时保留指纹和间隔，尽快重试
+            state["failures"] = state.get("failures", 0) + 1
+            next_hours = self.min_hours
+        else:
+            digest = self.fingerprint(site_data or {})
+            changed = state.get("fingerprint") != digest
+            if changed:
+                interval = interval * self.SHRINK_FACTOR
+                state["changes"] = state.get("changes", 0) + 1
+            else:
+                interval = interval * self.GROWTH_FACTOR
+            interval = min(max(interval, self.min_hours), self.max_hours)
+            state.update({
+                "fingerprint": digest,
+                "interval_hours": round(interval, 2),
+                "refreshes": state.get("refreshes", 0) + 1,
+                "last_changed": now if changed else state.get("last_changed", 0),
+                "failures": 0
+            })
+            next_hours = interval
+            logger.debug(f"站点 {site_name} 数据{'有' if changed else '无'}变化，下次刷新间隔 {interval:.1f} 小时")
+
+        state["last_refresh"] = now
+        state["next_refresh"] = now + next_hours * 3600
+        self.data_manager.save_refresh_schedule(site_name, state)
+        return state
+
+    def due_sites(self, site_names: List[str], now: Optional[float] = None) -> List[str]:
+        """
+        筛选到期需要刷新的站点，从未刷新过的站点视为到期
+        :param site_names: 候选站点名称
+        :param now: 当前时间戳
+        :return: 到期站点名称
+        """
+        now = now or time.time()
+        schedules = self.data_manager.get_refresh_schedules()
+        due = []
+        for site_name in site_names:
+            state = schedules.get(site_name)
+            if not state:
+                due.append(site_name)
+                continue
+            # 间隔配置调小后，按新的最大间隔截断
+            next_refresh = min(state.get("next_refresh", 0),
+                               state.get("last_refresh", 0) + self.max_hours * 3600)
+            if next_refresh <= now:
+                due.append(site_name)
+        return due
@@ -0,0 +1,180 @@
+"""
+单次刷新请求上下文模块
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.models import PreparedRequest
+
+from app.log import logger
+from plugins.nexusinvitees.http_client import HttpClient, get_timings
+from plugins.nexusinvitees.telemetry import SiteTelemetry, response_size
+
+
+class RefreshSession(requests.Session):
+    """
+    单个站点单次刷新内共享的请求会话
+    - GET响应按URL缓存，同一URL在一次刷新中最多请求一次
+    - facts 保存插件与站点处理器之间共享的结论（用户ID、登录状态等）
+    - 统计实际发出的HTTP请求数及各阶段耗时，telemetry 按页面阶段统计耗时与下载量
+    - 挂载插件共享的HTTP客户端时，复用其连接池与重试策略
+    """
+
+    def __init__(self, http_client: Optional[HttpClient] = None):
+        super().__init__()
+        if http_client:
+            http_client.mount(self)
+        # 重试配置，供 send_idempotent 重试只读的POST请求
+        self.retries = http_client.retries if http_client else 0
+        self.backoff = http_client.backoff if http_client else 0.0
+        self.facts: Dict[str, Any] = {}
+        self.request_count = 0
+        self.cache_hits = 0
+        # 各阶段累计耗时（秒）与新建连接数
+        self.timings = {"connect": 0.0, "ttfb": 0.0, "download": 0.0, "connections": 0}
+        self.telemetry = SiteTelemetry()
+        self._response_cache: Dict[str, requests.Response] = {}
+        self._cache_lock = threading.RLock()
+
+    @staticmethod
+    def _cache_key(url: str, params: Any = None, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        生成缓存键：完整URL + 单次请求附加的请求头
+        """
+        if params:
+            prepared = PreparedRequest()
+            prepared.prepare_url(url, params)
+            url = prepared.url
+        if headers:
+            url += "|" + "&".join(f"{k}={v}" for k, v in sorted(headers.items()))
+        return url
+
+    def request(self, method, url, *args, **kwargs):
+        """
+        发送请求，GET请求优先读取本次刷新的缓存
+        """
+        cacheable = str(method).upper() == "GET" and not args and not kwargs.get("stream")
+        key = self._cache_key(url, kwargs.get("params"), kwargs.get("headers")) if cacheable else None
+        if key:
+            with self._cache_lock:
+                cached = self._response_cache.get(key)
+                if cached is not None:
+                    self.cache_hits += 1
+                    logger.debug(f"复用本次刷新已获取的页面: {url}")
+                    return cached
+
+        start = time.perf_counter()
+        response = super().request(method, url, *args, **kwargs)
+        self.record_response(response, time.perf_counter() - start)
+
+        # 仅缓存成功的响应，失败的请求允许后续重试
+        if key and response.status_code < 400:
+            with self._cache_lock:
+                self._response_cache[key] = response
+                # 跟随重定向后的最终地址同样可以命中
+                if response.url and response.url != url and not kwargs.get("headers"):
+                    self._response_cache.setdefault(response.url, response)
+        return response
+
+    def record_response(self, response: requests.Response, total: float):
+        """
+        记录一次实际发出的请求
+        :param response: 响应
+        :param total: 请求总耗时（含下载响应体）
+        """
+        timings = get_timings(response)
+        with self._cache_lock:
+            self.request_count += 1
+            self.timings["connect"] += timings.get("connect", 0.0)
+            self.timings["connections"] += timings.get("connections", 0)
+            self.timings["ttfb"] += timings.get("ttfb", 0.0)
+            self.timings["download"] += max(total - timings.get("ttfb", 0.0), 0.0)
+        self.telemetry.add_request(response.url, total, response_size(response))
+
+    def cache_alias(self, url: str, response: requests.Response):
+        """
+        将已获取的响应登记到另一个等价URL下
+        :param url: 等价URL
+        :param response: 已获取的响应
+        """
+        if response is not None and response.status_code < 400:
+            with self._cache_lock:
+                self._response_cache.setdefault(url, response)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取请求统计
+        :return: 请求数、缓存命中数、各阶段耗时与按页面阶段的统计
+        """
+        return {
+            "requests": self.request_count,
+            "cache_hits": self.cache_hits,
+            "timings": {key: round(value, 3) if isinstance(value, float) else value
+                        for key, value in self.timings.items()},
+            "telemetry": self.telemetry.to_dict()
+        }
+
+
+def isolated_request(session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    不携带会话默认请求头和Cookie发送请求，复用会话的连接池、代理与统计
+    :param session: 请求会话
+    :param method: 请求方法
+    :param url: 请求地址
+    :return: 响应
+    """
+    bare = requests.Session()
+    for prefix, adapter in session.adapters.items():
+        bare.mount(prefix, adapter)
+    bare.proxies = dict(session.proxies or {})
+    bare.trust_env = session.trust_env
+    start = time.perf_counter()
+    response = bare.request(method, url, **kwargs)
+    if isinstance(session, RefreshSession):
+        session.record_response(response, time.perf_counter() - start)
+    return response
+
+
+def send_idempotent(session: requests.Session, send: Callable[[], requests.Response]) -> requests.Response:
+    """
+    发送只读的非GET请求（如M-Team的POST查询接口）：共享客户端只重试GET/HEAD，
+    调用方确认请求可重复执行时，连接错误和5xx响应按会话的重试配置重试
+    :param session: 请求会话（RefreshSession提供重试配置，其他会话不重试）
+    :param send: 发送请求的函数
+    :return: 响应
+    """
+    retries = getattr(session, "retries", 0)
+    backoff = getattr(session, "backoff", 0.0)
+    attempt = 0
+    while True:
+        try:
+            response = send()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in HttpClient.RETRY_STATUS or attempt >= retries:
+                return response
+        time.sleep(backoff * (2 ** attempt))
+        attempt += 1
+
+
+def get_fact(session: requests.Session, key: str, default: Any = None) -> Any:
+    """
+    读取会话中共享的结论，普通Session返回默认值
+    """
+    facts = getattr(session, "facts", None)
+    if isinstance(facts, dict):
+        return facts.get(key, default)
+    return default
+
+
+def set_fact(session: requests.Session, key: str, value: Any):
+    """
+    写入会话共享结论，普通Session忽略
+    """
+    facts = getattr(session, "facts", None)
+    if isinstance(facts, dict):
+        facts[key] = value
@@ -1,15 +1,44 @@
 """
 NexusPHP站点邀请系统解析器基类
 """
+import asyncio
+import hashlib
 import re
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Any, Awaitable, Callable, List, Tuple
 
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
 from app.log import logger
+from plugins.nexusinvitees.session import get_fact, set_fact
+from plugins.nexusinvitees.converters import convert_invitee_columns, size_to_bytes
+from plugins.nexusinvitees.page_cache import PAGE_BONUS_SHOP, PAGE_SEND_INVITE
+from plugins.nexusinvitees.parse_pool import ParseCall, run_parse
+from plugins.nexusinvitees.telemetry import measure_parse
+
+
+# 可选的HTML解析后端：html.parser为纯Python实现，lxml为C实现（需安装lxml）
+PARSER_BACKENDS = ["html.parser", "lxml"]
+
+
+@lru_cache(maxsize=None)
+def resolve_parser_backend(backend: str) -> str:
+    """
+    获取实际可用的解析后端，lxml不可用时回退到html.parser
+    :param backend: 期望的解析后端
+    :return: BeautifulSoup可用的解析后端名称
+    """
+    if backend == "lxml":
+        try:
+            import lxml  # noqa: F401
+            return "lxml"
+        except ImportError:
+            logger.warning("未安装lxml，HTML解析回退到html.parser")
+    return "html.parser"
 
 
 class _ISiteHandler(metaclass=ABCMeta):
@@ -18,6 +47,24 @@ class _ISiteHandler(metaclass=ABCMeta):
     """
     # 站点类型标识
     site_schema = ""
+    # 域名特征（字面量列表），注册表据此建立索引，无需导入模块
+    site_features: List[str] = []
+    # 是否为通用处理器，专用处理器都不匹配时才尝试
+    is_fallback = False
+    # 后宫列表每页人数，少于此数视为最后一页
+    invitee_page_size = 50
+    # 最大翻页数，防止无限循环
+    invitee_max_pages = 100
+    # 翻页并发抓取数
+    invitee_page_workers = 3
+    # HTML解析后端，由插件配置覆盖
+    parser_backend = "html.parser"
+    # 是否实现了异步接口 parse_invite_page_async，异步刷新时使用
+    supports_async = False
+    # 后宫翻页页面中成员表格所在区域的起止标记，用于计算内容摘要（排除页头的用户信息和页脚的生成时间）
+    invitee_region_markers = ('id="outer"', 'id="footer"')
+    # 翻页解析逻辑版本，解析结果格式变化时递增，使已保存的解析结果失效
+    invitee_parse_version = 1
     
     @classmethod
     @abstractmethod
@@ -39,6 +86,163 @@ class _ISiteHandler(metaclass=ABCMeta):
         """
         pass
 
+    async def parse_invite_page_async(self, site_info: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """
+        异步解析站点邀请页面（可选），supports_async为True的处理器需实现
+        请求通过 session 的异步方法发送，耗时的解析交给 session.parse 在线程池中执行
+        :param site_info: 站点信息
+        :param session: 已配置好的异步请求会话（AsyncSession）
+        :return: 解析结果
+        """
+        raise NotImplementedError
+
+    def probe(self, site_info: Dict[str, Any], session: requests.Session) -> Tuple[bool, str]:
+        """
+        熔断冷却结束后的探测：用一个需要登录的请求确认站点可访问且认证有效
+        默认请求站点首页，跳转到登录页或返回登录表单视为认证失效；使用API认证的处理器应覆盖此方法
+        :param site_info: 站点信息
+        :param session: 已配置好Cookie等请求头的会话（不重试）
+        :return: (是否通过, 失败原因)
+        """
+        response = session.get(site_info.get("url", "").strip(), timeout=(5, 10))
+        if response.status_code >= 400:
+            return False, f"探测请求失败，状态码: {response.status_code}"
+        html_content = response.text or ""
+        if "login" in (response.url or "").lower() or self._is_login_page(self._make_soup(html_content),
+                                                                          html_content):
+            return False, "探测时未登录或Cookie已失效"
+        return True, ""
+
+    def _make_soup(self, html_content: str) -> BeautifulSoup:
+        """
+        按配置的解析后端构建文档树
+        :param html_content: HTML内容
+        :return: BeautifulSoup对象
+        """
+        return BeautifulSoup(html_content, resolve_parser_backend(self.parser_backend))
+
+    @staticmethod
+    def _is_login_page(soup: BeautifulSoup, html_content: str) -> bool:
+        """
+        检查页面是否为登录页（未登录或Cookie失效）
+        :param soup: 已解析的文档树
+        :param html_content: HTML内容
+        :return: 是否需要登录
+        """
+        login_elements = soup.select('form[action*="takelogin.php"], input[name="password"], div.error:-soup-contains("需要登录")')
+        login_text_match = re.search(r'(需要登录|请登录|login required|please log in)', html_content, re.IGNORECASE)
+        return bool(login_elements or login_text_match)
+
+    @staticmethod
+    def _cached_page(session: requests.Session, page: str, fetch: Callable[[], Optional[Dict[str, Any]]],
+                     fingerprint: str = "") -> Optional[Dict[str, Any]]:
+        """
+        读取次要页面的缓存结果，未命中时获取并写入缓存
+        :param session: 请求会话（插件在facts中提供page_cache，普通Session不缓存）
+        :param page: 页面
+        :param fetch: 获取并解析页面，失败时返回None（不缓存）
+        :param fingerprint: 状态指纹，与缓存时不一致则重新获取
+        :return: 解析结果
+        """
+        cache = get_fact(session, "page_cache")
+        if cache is not None:
+            cached = cache.get(page, fingerprint)
+            if cached is not None:
+                return cached
+        data = fetch()
+        if cache is not None and data is not None:
+            cache.put(page, data, fingerprint)
+        return data
+
+    @staticmethod
+    async def _cached_page_async(session: Any, page: str, fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+                                 fingerprint: str = "") -> Optional[Dict[str, Any]]:
+        """
+        异步读取次要页面的缓存结果，未命中时获取并写入缓存，参数同 _cached_page
+        """
+        cache = get_fact(session, "page_cache")
+        if cache is not None:
+            cached = cache.get(page, fingerprint)
+            if cached is not None:
+                return cached
+        data = await fetch()
+        if cache is not None and data is not None:
+            cache.put(page, data, fingerprint)
+        return data
+
+    def _get_bonus_shop(self, session: requests.Session, site_name: str, site_url: str,
+                        parse: Callable[[str, str], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        获取魔力值商店解析结果（魔力值与邀请价格），按缓存时间复用
+        :param session: 请求会话
+        :param site_name: 站点名称
+        :param site_url: 站点URL
+        :param parse: (站点名称, HTML) -> 解析结果
+        :return: 解析结果，页面获取失败返回None
+        """
+        def fetch():
+            response = session.get(urljoin(site_url, "mybonus.php"), timeout=(10, 30))
+            if response.status_code != 200:
+                return None
+            return run_parse(session, ParseCall(parse, site_name), response.text)
+
+        return self._cached_page(session, PAGE_BONUS_SHOP, fetch)
+
+    async def _get_bonus_shop_async(self, session: Any, site_name: str, site_url: str,
+                                    parse: Callable[[str, str], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        异步获取魔力值商店解析结果，参数同 _get_bonus_shop
+        """
+        async def fetch():
+            response = await session.get(urljoin(site_url, "mybonus.php"), timeout=(10, 30))
+            if response.status_code != 200:
+                return None
+            return await session.parse(run_parse, session, ParseCall(parse, site_name), response.text)
+
+        return await self._cached_page_async(session, PAGE_BONUS_SHOP, fetch)
+
+    def _get_send_page_status(self, session: requests.Session, send_invite_url: str,
+                              invite_status: Dict[str, Any],
+                              parse: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        获取发送邀请页面的邀请状态，邀请数量、魔力值不变时复用上次结果
+        :param session: 请求会话
+        :param send_invite_url: 发送邀请页面URL
+        :param invite_status: 邀请页面解析出的邀请状态，用于生成指纹
+        :param parse: HTML -> 解析结果（包含invite_status），ParseCall可交给解析进程池
+        :return: {"reason": 原因, "can_invite": 是否可邀请}
+        """
+        def fetch():
+            response = session.get(send_invite_url, timeout=(10, 30))
+            response.raise_for_status()
+            send_status = run_parse(session, parse, response.text).get("invite_status", {})
+            return {"reason": send_status.get("reason", ""), "can_invite": send_status.get("can_invite", False)}
+
+        return self._cached_page(session, PAGE_SEND_INVITE, fetch, self._send_page_fingerprint(invite_status))
+
+    async def _get_send_page_status_async(self, session: Any, send_invite_url: str,
+                                          invite_status: Dict[str, Any],
+                                          parse: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        异步获取发送邀请页面的邀请状态，参数同 _get_send_page_status
+        """
+        async def fetch():
+            response = await session.get(send_invite_url, timeout=(10, 30))
+            response.raise_for_status()
+            send_status = (await session.parse(run_parse, session, parse, response.text)).get("invite_status", {})
+            return {"reason": send_status.get("reason", ""), "can_invite": send_status.get("can_invite", False)}
+
+        return await self._cached_page_async(session, PAGE_SEND_INVITE, fetch,
+                                             self._send_page_fingerprint(invite_status))
+
+    @staticmethod
+    def _send_page_fingerprint(invite_status: Dict[str, Any]) -> str:
+        """
+        发送邀请页面缓存的状态指纹：邀请数量、魔力值、可邀请状态
+        """
+        return "|".join(str(invite_status.get(key, "")) for key in
+                        ("permanent_count", "temporary_count", "bonus", "can_invite"))
+
     @staticmethod
     def _get_user_id(session: requests.Session, site_url: str) -> Optional[str]:
         """
@@ -47,6 +251,11 @@ class _ISiteHandler(metaclass=ABCMeta):
         :param site_url: 站点URL
         :return: 用户ID
         """
+        # 本次刷新已确认过用户ID时直接复用
+        user_id = get_fact(session, "user_id")
+        if user_id:
+            return user_id
+
         try:
             # 访问个人信息页面
             usercp_url = urljoin(site_url, "usercp.php")
@@ -54,105 +263,349 @@ class _ISiteHandler(metaclass=ABCMeta):
             response.raise_for_status()
             
             # 解析页面获取用户ID
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 方法1: 从个人信息链接获取
-            user_link = soup.select_one('a[href*="userdetails.php"]')
-            if user_link and 'href' in user_link.attrs:
-                user_id_match = re.search(r'id=(\d+)', user_link['href'])
-                if user_id_match:
-                    return user_id_match.group(1)
-            
-            # 方法2: 从其他链接获取
-            invite_link = soup.select_one('a[href*="invite.php"]')
-            if invite_link and 'href' in invite_link.attrs:
-                user_id_match = re.search(r'id=(\d+)', invite_link['href'])
-                if user_id_match:
-                    return user_id_match.group(1)
-            
+            user_id = _ISiteHandler._find_user_id(response.text)
+            if user_id:
+                set_fact(session, "user_id", user_id)
+                return user_id
+            return None
+        except Exception as e:
+            logger.error(f"获取用户ID失败: {str(e)}")
+            return None
+
+    async def _get_user_id_async(self, session: Any, site_url: str) -> Optional[str]:
+        """
+        异步获取用户ID，流程与 _get_user_id 相同
+        :param session: 异步请求会话
+        :param site_url: 站点URL
+        :return: 用户ID
+        """
+        user_id = get_fact(session, "user_id")
+        if user_id:
+            return user_id
+
+        try:
+            response = await session.get(urljoin(site_url, "usercp.php"), timeout=(5, 15))
+            response.raise_for_status()
+            user_id = await session.parse(self._find_user_id, response.text)
+            if user_id:
+                set_fact(session, "user_id", user_id)
+                return user_id
             return None
         except Exception as e:
             logger.error(f"获取用户ID失败: {str(e)}")
             return None
 
     @staticmethod
-    def _convert_size_to_bytes(size_str: str) -> float:
+    def _find_user_id(html_content: str) -> Optional[str]:
         """
-        将大小字符串转换为字节数
-        :param size_str: 大小字符串
-        :return: 字节数
+        从个人信息页面中查找用户ID
+        :param html_content: usercp.php页面HTML
+        :return: 用户ID
         """
-        if not size_str or size_str.strip() == '':
-            logger.warning(f"空的大小字符串")
-            return 0
+        soup = BeautifulSoup(html_content, 'html.parser')
+        user_id = None
+        
+        # 方法1: 从个人信息链接获取
+        user_link = soup.select_one('a[href*="userdetails.php"]')
+        if user_link and 'href' in user_link.attrs:
+            user_id_match = re.search(r'id=(\d+)', user_link['href'])
+            if user_id_match:
+                user_id = user_id_match.group(1)
+        
+        # 方法2: 从其他链接获取
+        if not user_id:
+            invite_link = soup.select_one('a[href*="invite.php"]')
+            if invite_link and 'href' in invite_link.attrs:
+                user_id_match = re.search(r'id=(\d+)', invite_link['href'])
+                if user_id_match:
+                    user_id = user_id_match.group(1)
+        return user_id
 
-        # 处理特殊情况
-        if size_str.lower() == 'inf.' or size_str.lower() == 'inf' or size_str == '∞':
-            logger.info(f"识别到无限大值: {size_str}")
-            return 1e20  # 使用一个非常大的数值代替无穷大
+    def _invitee_page_digest(self, html_content: str) -> str:
+        """
+        计算后宫翻页页面成员表格区域的内容摘要，找不到区域标记时使用整个页面
+        :param html_content: 页面HTML
+        :return: 摘要
+        """
+        html_content = html_content or ""
+        start_marker, end_marker = self.invitee_region_markers
+        start = html_content.find(start_marker)
+        start = 0 if start < 0 else start
+        end = html_content.find(end_marker, start)
+        region = html_content[start:end if end >= 0 else len(html_content)]
+        digest = hashlib.sha1(f"{type(self).__name__}:{self.invitee_parse_version}:".encode("utf-8"))
+        digest.update(region.encode("utf-8", "ignore"))
+        return digest.hexdigest()
 
-        try:
-            # 标准化字符串，替换逗号为点
-            size_str = size_str.replace(',', '.')
+    @staticmethod
+    def _discover_last_page(html_content: str) -> Optional[int]:
+        """
+        从后宫列表分页链接中找出最大页码
+        :param html_content: 首页HTML
+        :return: 最大页码(从0开始)，没有分页链接时返回None
+        """
+        pages = []
+        for href in re.findall(r'href=["\']([^"\']*page=\d+[^"\']*)["\']', html_content or ""):
+            href = href.replace("&amp;", "&")
+            if "menu=invitee" not in href and "invite.php" not in href:
+                continue
+            page_match = re.search(r'[?&]page=(\d+)', href)
+            if page_match:
+                pages.append(int(page_match.group(1)))
+        return max(pages) if pages else None
 
-            # 分离数字和单位
-            # 正则表达式匹配数字部分和单位部分
-            matches = re.match(
-                r'([\d.]+)\s*([KMGTPEZY]?i?B)', size_str, re.IGNORECASE)
+    def _fetch_invitee_pages(self, session: requests.Session, site_name: str, first_page_html: str,
+                             first_page_invitees: List[Dict[str, Any]],
+                             page_url: Callable[[int], str],
+                             parse_page: Callable[[str], List[Dict[str, Any]]],
+                             has_next_page: Callable[[str], bool] = None) -> List[Dict[str, Any]]:
+        """
+        获取后宫列表后续页面
+        首页能找到分页链接时，按页码并发抓取并解析，再按页序合并；否则逐页抓取。
+        合并时保持原有停止条件：空页、与上一页重复、不足一页人数。
+        插件提供页面缓存时，请求携带上次的ETag/Last-Modified，返回304或成员表格区域内容摘要
+        与上次一致时直接复用上次解析出的成员，不再解析页面。
+        :param session: 请求会话
+        :param site_name: 站点名称
+        :param first_page_html: 首页HTML
+        :param first_page_invitees: 首页解析出的后宫成员
+        :param page_url: 页码 -> 页面URL
+        :param parse_page: 页面HTML -> 后宫成员列表，ParseCall可交给解析进程池
+        :param has_next_page: 页面HTML -> 是否存在下一页（逐页模式使用，可选）
+        :return: 后续页面的后宫成员列表
+        """
+        invitees = []
+        if len(first_page_invitees) < self.invitee_page_size:
+            return invitees
+
+        cache = get_fact(session, "page_cache")
 
-            if not matches:
-                # 尝试匹配仅有数字的情况
-                try:
-                    return float(size_str)
-                except ValueError:
-                    logger.warning(f"无法解析大小字符串: {size_str}")
-                    return 0
+        def fetch_page(page: int):
+            """
+            获取并解析一页，返回 (是否存在下一页, 成员列表)，未提供 has_next_page 时是否存在下一页为None
+            """
+            previous = cache.get_invitee_page(page) if cache is not None else None
+            response = session.get(page_url(page), headers=self._invitee_page_headers(previous), timeout=(10, 30))
+            reused, digest = self._reuse_invitee_page(cache, site_name, page, previous, response)
+            if reused is not None:
+                return reused
+            html = response.text
+            # 并发翻页时解析在抓取线程（或解析进程池）中进行，单独计入解析耗时
+            members = run_parse(session, parse_page, html)
+            with measure_parse(session):
+                has_next = has_next_page(html) if has_next_page else None
+            self._store_invitee_page(cache, page, digest, members, response, has_next)
+            return has_next, members
 
-            size_num, unit = matches.groups()
+        accept_page = self._invitee_page_merger(site_name, first_page_invitees, invitees)
 
-            # 尝试转换数字
+        next_page = 1
+        has_next = has_next_page(first_page_html) if has_next_page else None
+        last_page = self._discover_last_page(first_page_html)
+        if last_page and last_page >= 1:
+            last_page = min(last_page, self.invitee_max_pages - 1)
+            logger.info(f"站点 {site_name} 从分页链接识别到 {last_page + 1} 页后宫数据，并发获取后续页面")
+            with ThreadPoolExecutor(max_workers=self.invitee_page_workers) as executor:
+                futures = {page: executor.submit(fetch_page, page) for page in range(1, last_page + 1)}
+                stopped = False
+                for page in range(1, last_page + 1):
+                    try:
+                        has_next, members = futures[page].result()
+                    except Exception as e:
+                        logger.warning(f"站点 {site_name} 获取第 {page + 1} 页数据失败: {str(e)}")
+                        stopped = True
+                    else:
+                        stopped = not accept_page(page, members)
+                    if stopped:
+                        for future in futures.values():
+                            future.cancel()
+                        return invitees
+            # 分页链接可能只显示部分页码，最后一页仍是满页时继续逐页获取
+            next_page = last_page + 1
+
+        while next_page < self.invitee_max_pages:
+            if has_next_page and not has_next:
+                logger.info(f"站点 {site_name} 没有找到下一页链接，停止获取")
+                break
+            logger.debug(f"站点 {site_name} 正在获取第 {next_page + 1} 页后宫成员数据")
             try:
-                size_value = float(size_num)
-            except ValueError:
-                logger.warning(f"无法转换大小值为浮点数: {size_num}")
-                return 0
-
-            # 单位转换
-            unit = unit.upper()
-
-            units = {
-                'B': 1,
-                'KB': 1024,
-                'KIB': 1024,
-                'MB': 1024 ** 2,
-                'MIB': 1024 ** 2,
-                'GB': 1024 ** 3,
-                'GIB': 1024 ** 3,
-                'TB': 1024 ** 4,
-                'TIB': 1024 ** 4,
-                'PB': 1024 ** 5,
-                'PIB': 1024 ** 5,
-                'EB': 1024 ** 6,
-                'EIB': 1024 ** 6,
-                'ZB': 1024 ** 7,
-                'ZIB': 1024 ** 7,
-                'YB': 1024 ** 8,
-                'YIB': 1024 ** 8
-            }
-
-            # 处理简写单位
-            if unit in ['K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y']:
-                unit = unit + 'B'
-
-            if unit not in units:
-                logger.warning(f"未知的大小单位: {unit}")
-                return size_value  # 假设是字节
-
-            return size_value * units[unit]
+                has_next, members = fetch_page(next_page)
+            except Exception as e:
+                logger.warning(f"站点 {site_name} 获取第 {next_page + 1} 页数据失败: {str(e)}")
+                break
+            if not accept_page(next_page, members):
+                break
+            next_page += 1
+        return invitees
 
-        except Exception as e:
-            logger.warning(f"转换大小字符串到字节时出错 '{size_str}': {str(e)}")
+    async def _fetch_invitee_pages_async(self, session: Any, site_name: str, first_page_html: str,
+                                         first_page_invitees: List[Dict[str, Any]],
+                                         page_url: Callable[[int], str],
+                                         parse_page: Callable[[str], List[Dict[str, Any]]],
+                                         has_next_page: Callable[[str], bool] = None) -> List[Dict[str, Any]]:
+        """
+        异步获取后宫列表后续页面，流程、停止条件与页面缓存同 _fetch_invitee_pages，
+        并发翻页时同时进行的请求数不超过 invitee_page_workers，解析通过 session.parse 在线程池中执行
+        """
+        invitees = []
+        if len(first_page_invitees) < self.invitee_page_size:
+            return invitees
+
+        cache = get_fact(session, "page_cache")
+        limit = asyncio.Semaphore(self.invitee_page_workers)
+
+        async def fetch_page(page: int):
+            async with limit:
+                previous = cache.get_invitee_page(page) if cache is not None else None
+                response = await session.get(page_url(page), headers=self._invitee_page_headers(previous),
+                                             timeout=(10, 30))
+                reused, digest = self._reuse_invitee_page(cache, site_name, page, previous, response)
+                if reused is not None:
+                    return reused
+                html = response.text
+                members = await session.parse(run_parse, session, parse_page, html)
+                has_next = await session.parse(has_next_page, html) if has_next_page else None
+                self._store_invitee_page(cache, page, digest, members, response, has_next)
+                return has_next, members
+
+        accept_page = self._invitee_page_merger(site_name, first_page_invitees, invitees)
+
+        next_page = 1
+        has_next = has_next_page(first_page_html) if has_next_page else None
+        last_page = self._discover_last_page(first_page_html)
+        if last_page and last_page >= 1:
+            last_page = min(last_page, self.invitee_max_pages - 1)
+            logger.info(f"站点 {site_name} 从分页链接识别到 {last_page + 1} 页后宫数据，并发获取后续页面")
+            tasks = {page: asyncio.ensure_future(fetch_page(page)) for page in range(1, last_page + 1)}
+            try:
+                for page in range(1, last_page + 1):
+                    try:
+                        has_next, members = await tasks[page]
+                    except Exception as e:
+                        logger.warning(f"站点 {site_name} 获取第 {page + 1} 页数据失败: {str(e)}")
+                        return invitees
+                    if not accept_page(page, members):
+                        return invitees
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+            # 分页链接可能只显示部分页码，最后一页仍是满页时继续逐页获取
+            next_page = last_page + 1
+
+        while next_page < self.invitee_max_pages:
+            if has_next_page and not has_next:
+                logger.info(f"站点 {site_name} 没有找到下一页链接，停止获取")
+                break
+            logger.debug(f"站点 {site_name} 正在获取第 {next_page + 1} 页后宫成员数据")
+            try:
+                has_next, members = await fetch_page(next_page)
+            except Exception as e:
+                logger.warning(f"站点 {site_name} 获取第 {next_page + 1} 页数据失败: {str(e)}")
+                break
+            if not accept_page(next_page, members):
+                break
+            next_page += 1
+        return invitees
+
+    @staticmethod
+    def _invitee_page_headers(previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        后宫翻页的条件请求头：携带上次的ETag/Last-Modified
+        :param previous: 上次保存的页面结果
+        """
+        headers = {}
+        if previous:
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+        return headers or None
+
+    def _reuse_invitee_page(self, cache: Any, site_name: str, page: int, previous: Optional[Dict[str, Any]],
+                            response: Any) -> Tuple[Optional[Tuple[Optional[bool], List[Dict[str, Any]]]], str]:
+        """
+        判断后宫翻页能否复用上次的解析结果：返回304，或成员表格区域内容摘要与上次一致
+        :param cache: 页面缓存
+        :param site_name: 站点名称
+        :param page: 页码
+        :param previous: 上次保存的页面结果
+        :param response: 页面响应（requests或httpx）
+        :return: (可复用时为 (是否存在下一页, 成员列表)，否则为None, 页面摘要)
+        """
+        if response.status_code == 304 and previous:
+            cache.count_invitee_page(hit=True, not_modified=True)
+            logger.debug(f"站点 {site_name} 第 {page + 1} 页未变化(304)，复用上次解析结果")
+            return (previous.get("has_next"), previous.get("invitees") or []), ""
+        response.raise_for_status()
+        digest = self._invitee_page_digest(response.text) if cache is not None else ""
+        if previous and previous.get("digest") == digest:
+            cache.count_invitee_page(hit=True)
+            logger.debug(f"站点 {site_name} 第 {page + 1} 页成员表格未变化，复用上次解析结果")
+            # 站点开始返回验证信息时补记，下次可以直接走304
+            etag = response.headers.get("ETag", "")
+            last_modified = response.headers.get("Last-Modified", "")
+            if (etag, last_modified) != (previous.get("etag", ""), previous.get("last_modified", "")):
+                cache.put_invitee_page(page, digest, previous.get("invitees") or [], etag=etag,
+                                       last_modified=last_modified, has_next=previous.get("has_next"))
+            return (previous.get("has_next"), previous.get("invitees") or []), digest
+        return None, digest
+
+    @staticmethod
+    def _store_invitee_page(cache: Any, page: int, digest: str, members: List[Dict[str, Any]], response: Any,
+                            has_next: Optional[bool]):
+        """
+        保存后宫翻页的解析结果及验证信息，供下次刷新复用
+        """
+        if cache is not None:
+            cache.count_invitee_page(hit=False)
+            cache.put_invitee_page(page, digest, members, etag=response.headers.get("ETag", ""),
+                                   last_modified=response.headers.get("Last-Modified", ""), has_next=has_next)
+
+    def _invitee_page_merger(self, site_name: str, first_page_invitees: List[Dict[str, Any]],
+                             invitees: List[Dict[str, Any]]) -> Callable[[int, List[Dict[str, Any]]], bool]:
+        """
+        创建翻页合并函数：(页码, 成员列表) -> 是否继续翻页，接受的成员追加到invitees
+        停止条件：空页、与上一页重复、不足一页人数
+        """
+        def member_ids(members: List[Dict[str, Any]]) -> set:
+            return {member.get('profile_url') or member.get('username') for member in members}
+
+        previous_ids = member_ids(first_page_invitees)
+
+        def accept_page(page: int, members: List[Dict[str, Any]]) -> bool:
+            """
+            合并一页数据，返回是否继续翻页
+            """
+            nonlocal previous_ids
+            if not members:
+                logger.debug(f"站点 {site_name} 第 {page + 1} 页没有后宫成员数据，停止获取")
+                return False
+            current_ids = member_ids(members)
+            if previous_ids and current_ids == previous_ids:
+                logger.warning(f"站点 {site_name} 检测到第 {page + 1} 页内容与上一页重复，停止翻页")
+                return False
+            invitees.extend(members)
+            logger.debug(f"站点 {site_name} 第 {page + 1} 页解析到 {len(members)} 个后宫成员")
+            previous_ids = current_ids
+            if len(members) < self.invitee_page_size:
+                logger.info(f"站点 {site_name} 第 {page + 1} 页后宫成员数量少于{self.invitee_page_size}人，停止获取")
+                return False
+            return True
+
+        return accept_page
+
+    @staticmethod
+    def _convert_size_to_bytes(size_str: str) -> float:
+        """
+        将大小字符串转换为字节数
+        :param size_str: 大小字符串
+        :return: 字节数
+        """
+        if not size_str or not size_str.strip():
+            logger.warning(f"空的大小字符串")
             return 0
+        return size_to_bytes(size_str)
 
     @staticmethod
     def _calculate_ratio(uploaded: str, downloaded: str) -> str:
@@ -173,4 +626,21 @@ class _ISiteHandler(metaclass=ABCMeta):
             return f"{ratio:.3f}"
         except Exception as e:
             logger.error(f"计算分享率失败: {str(e)}")
-            return "0" 
\ No newline at end of file
+            return "0"
+
+    @staticmethod
+    def _fill_ratio_values(invitees: List[Dict[str, Any]], default: Optional[float] = 0):
+        """
+        按列一次解析一页成员的分享率，写入 ratio_value，没有分享率列的成员不写入
+        :param invitees: 后宫成员列表
+        :param default: 分享率无法解析时写入的值
+        """
+        rated = [invitee for invitee in invitees if "ratio" in invitee]
+        if not rated:
+            return
+        ratio_values = convert_invitee_columns(rated, size_fields=(), ratio_default=None)["ratio"]
+        for invitee, ratio_value in zip(rated, ratio_values):
+            if ratio_value is None:
+                logger.warning(f"无法解析分享率: {invitee['ratio']}")
+                ratio_value = default
+            invitee["ratio_value"] = ratio_value
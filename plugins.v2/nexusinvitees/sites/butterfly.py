@@ -9,7 +9,8 @@ import requests
 from bs4 import BeautifulSoup
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+from plugins.nexusinvitees.parse_pool import ParseCall
 
 
 class ButterflyHandler(_ISiteHandler):
@@ -18,6 +19,12 @@ class ButterflyHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "butterfly"
+    # 蝶粉站点的特征 - 域名中包含butterfly或者站点名称为蝶粉
+    site_features = [
+        "butterfly",  # 域名特征
+        "discfan",    # 蝶粉官方域名
+        "dmhy"        # 蝶粉可能的域名特征
+    ]
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -26,15 +33,8 @@ class ButterflyHandler(_ISiteHandler):
         :param site_url: 站点URL
         :return: 是否匹配
         """
-        # 蝶粉站点的特征 - 域名中包含butterfly或者站点名称为蝶粉
-        butterfly_features = [
-            "butterfly",  # 域名特征
-            "discfan",    # 蝶粉官方域名
-            "dmhy"        # 蝶粉可能的域名特征
-        ]
-        
         site_url_lower = site_url.lower()
-        for feature in butterfly_features:
+        for feature in cls.site_features:
             if feature in site_url_lower:
                 logger.info(f"匹配到蝶粉站点特征: {feature}")
                 return True
@@ -82,11 +82,9 @@ class ButterflyHandler(_ISiteHandler):
             
             # 获取魔力值商店页面，尝试解析邀请价格
             try:
-                bonus_url = urljoin(site_url, "mybonus.php")
-                bonus_response = session.get(bonus_url, timeout=(10, 30))
-                if bonus_response.status_code == 200:
-                    # 解析魔力值和邀请价格
-                    bonus_data = self._parse_bonus_shop(site_name, bonus_response.text)
+                # 解析魔力值和邀请价格（缓存期内复用）
+                bonus_data = self._get_bonus_shop(session, site_name, site_url, self._parse_bonus_shop)
+                if bonus_data:
                     # 更新邀请状态
                     invite_result["invite_status"]["bonus"] = bonus_data["bonus"]
                     invite_result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
@@ -148,77 +146,22 @@ class ButterflyHandler(_ISiteHandler):
                     logger.info(f"站点 {site_name} 共解析到 {len(invite_result['invitees'])} 个后宫成员")
                 # 不要在这里返回结果，继续执行后面的发送邀请页面访问代码
             else:
-                # 尝试获取更多页面的后宫成员
-                current_page = 0  # 已获取了第一页，从第二页开始查找
-                max_pages = 100  # 防止无限循环
-                
-                # 从首页中查找下一页链接
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 继续获取后续页面，直到没有更多数据或达到最大页数
-                while current_page < max_pages:
-                    # 查找下一页链接 - 蝶粉站点特有的繁体翻页标识："下一頁"
-                    next_page_link = None
-                    pagination_links = soup.select('a')
-                    
-                    for link in pagination_links:
-                        link_text = link.get_text().strip()
-                        if "下一頁" in link_text or "下一页" in link_text:
-                            next_page_link = link.get('href')
-                            break
-                    
-                    # 如果找不到下一页链接，结束翻页
-                    if not next_page_link:
-                        logger.info(f"站点 {site_name} 没有找到下一页链接，停止获取")
-                        break
-                    
-                    # 构建下一页URL并请求
-                    # 使用正确的URL模板
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={current_page+1}")
-                    logger.info(f"站点 {site_name} 正在获取第 {current_page+2} 页后宫成员数据: {next_page_url}")
-                    
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        
-                        # 更新soup以便下次查找翻页链接
-                        soup = BeautifulSoup(next_response.text, 'html.parser')
-                        
-                        # 解析下一页数据
-                        next_page_result = self._parse_butterfly_invite_page(site_name, site_url, next_response.text, is_next_page=True)
-                        
-                        # 如果没有找到任何后宫成员，说明已到达最后一页
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页没有后宫成员数据，停止获取")
-                            break
-                        
-                        # 如果当前页面后宫成员少于50人，默认认为没有下一页，避免错误进入下一页
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，默认没有下一页")
-                            # 将当前页数据合并到结果中后退出循环
-                            invite_result["invitees"].extend(next_page_result["invitees"])
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            break
-                        
-                        # 将下一页的后宫成员添加到结果中
-                        invite_result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {current_page+2} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                        
-                        # 继续下一页
-                        current_page += 1
-                        
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {current_page+2} 页数据失败: {str(e)}")
-                        break
+                # 获取后续页面的后宫成员：识别页数后并发获取，无分页链接时按"下一頁"逐页获取
+                invite_result["invitees"].extend(self._fetch_invitee_pages(
+                    session, site_name, response.text, invite_result["invitees"],
+                    page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                    parse_page=ParseCall(self._parse_butterfly_invite_page, site_name, site_url,
+                                         is_next_page=True, key="invitees"),
+                    has_next_page=self._has_butterfly_next_page
+                ))
             
             # 访问发送邀请页面，这是判断权限的关键
             send_invite_url = urljoin(site_url, f"invite.php?id={user_id}&type=new")
             try:
-                send_response = session.get(send_invite_url, timeout=(10, 30))
-                send_response.raise_for_status()
-                
-                # 解析发送邀请页面
-                send_page_result = self._parse_butterfly_invite_page(site_name, site_url, send_response.text, is_send_page=True)
+                # 解析发送邀请页面，邀请数量、魔力值未变化时复用上次结果
+                send_page_result = {"invite_status": self._get_send_page_status(
+                    session, send_invite_url, invite_result["invite_status"],
+                    ParseCall(self._parse_butterfly_invite_page, site_name, site_url, is_send_page=True))}
                 
                 # 如果发送页面发现了权限问题，更新邀请状态
                 if send_page_result["invite_status"]["reason"]:
@@ -248,6 +191,20 @@ class ButterflyHandler(_ISiteHandler):
             result["invite_status"]["reason"] = f"解析邀请页面失败: {str(e)}"
             return result
     
+    @staticmethod
+    def _has_butterfly_next_page(html_content: str) -> bool:
+        """
+        页面中是否存在下一页链接 - 蝶粉站点特有的繁体翻页标识："下一頁"
+        :param html_content: 页面HTML
+        :return: 是否存在下一页
+        """
+        soup = BeautifulSoup(html_content, 'html.parser')
+        for link in soup.select('a'):
+            link_text = link.get_text().strip()
+            if ("下一頁" in link_text or "下一页" in link_text) and link.get('href'):
+                return True
+        return False
+
     def _parse_butterfly_invite_page(self, site_name: str, site_url: str, html_content: str, is_next_page: bool = False, is_send_page: bool = False) -> Dict[str, Any]:
         """
         解析蝶粉站点邀请页面HTML内容
@@ -472,6 +429,7 @@ class ButterflyHandler(_ISiteHandler):
                 # 清空已有数据，避免重复
                 result["invitees"] = []
                 processed_usernames = set()  # 用于跟踪已处理的用户名，避免重复
+                table_invitees = []
                 
                 for row in data_rows:
                     cells = row.select('td')
@@ -546,10 +504,8 @@ class ButterflyHandler(_ISiteHandler):
                             # 处理特殊分享率表示 - 扩展无限分享率识别
                             if ratio_text.lower() in ['inf.', 'inf', '∞', 'infinite', '无限']:
                                 invitee["ratio"] = "∞"
-                                invitee["ratio_value"] = 1e20
                             elif ratio_text == '---' or not ratio_text:
                                 invitee["ratio"] = "0"
-                                invitee["ratio_value"] = 0
                             else:
                                 # 获取font标签内的文本，如果存在
                                 font_tag = cell.select_one('font')
@@ -557,31 +513,6 @@ class ButterflyHandler(_ISiteHandler):
                                     ratio_text = font_tag.get_text(strip=True)
                                 
                                 invitee["ratio"] = ratio_text
-                                
-                                # 尝试解析为浮点数 - 正确处理千分位逗号
-                                try:
-                                    # 使用更好的方法完全移除千分位逗号
-                                    normalized_ratio = ratio_text
-                                    # 循环处理，直到没有千分位逗号
-                                    while ',' in normalized_ratio:
-                                        # 检查每个逗号是否是千分位分隔符
-                                        comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                        for pos in comma_positions:
-                                            # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                            if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                                normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                                normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                                break
-                                        else:
-                                            # 如果没有找到千分位逗号，退出循环
-                                            break
-                                    
-                                    # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                                    normalized_ratio = normalized_ratio.replace(',', '.')
-                                    invitee["ratio_value"] = float(normalized_ratio)
-                                except (ValueError, TypeError):
-                                    logger.warning(f"无法解析分享率: {ratio_text}")
-                                    invitee["ratio_value"] = 0
                         
                         # 做种数列
                         elif any(kw in header for kw in ['做種數', '做种数', 'seeding', 'seeds']):
@@ -647,38 +578,14 @@ class ButterflyHandler(_ISiteHandler):
                             invitee["data_status"] = "无数据"
                             logger.debug(f"用户 {invitee.get('username')} 被标记为无数据状态")
                         
-                        # 计算分享率健康状态
-                        if "ratio_value" in invitee:
-                            if is_no_data:
-                                invitee["ratio_health"] = "neutral"
-                                invitee["ratio_label"] = ["无数据", "grey"]
-                            elif invitee["ratio_value"] >= 1e20:
-                                invitee["ratio_health"] = "excellent"
-                                invitee["ratio_label"] = ["无限", "green"]
-                            elif invitee["ratio_value"] >= 1.0:
-                                invitee["ratio_health"] = "good"
-                                invitee["ratio_label"] = ["良好", "green"]
-                            elif invitee["ratio_value"] >= 0.5:
-                                invitee["ratio_health"] = "warning"
-                                invitee["ratio_label"] = ["较低", "orange"]
-                            else:
-                                invitee["ratio_health"] = "danger"
-                                invitee["ratio_label"] = ["危险", "red"]
-                        else:
-                            # 处理没有ratio_value的情况
-                            if is_no_data:
-                                invitee["ratio_health"] = "neutral" 
-                                invitee["ratio_label"] = ["无数据", "grey"]
-                            elif "ratio" in invitee and invitee["ratio"] == "∞":
-                                invitee["ratio_health"] = "excellent"
-                                invitee["ratio_label"] = ["无限", "green"]
-                            else:
-                                invitee["ratio_health"] = "unknown"
-                                invitee["ratio_label"] = ["未知", "grey"]
-                        
-                        # 将用户数据添加到结果中
+                        # 将用户数据添加到结果中，分享率与健康状态在整表解析后按列计算
                         if invitee.get("username"):
-                            result["invitees"].append(invitee.copy())
+                            table_invitees.append(invitee.copy())
+
+                self._fill_ratio_values(table_invitees)
+                for invitee in table_invitees:
+                    self._set_ratio_health(invitee, invitee.get("data_status") == "无数据")
+                result["invitees"].extend(table_invitees)
                 
                 # 记录解析结果
                 if result["invitees"]:
@@ -689,6 +596,41 @@ class ButterflyHandler(_ISiteHandler):
 
         return result
 
+    @staticmethod
+    def _set_ratio_health(invitee: Dict[str, Any], is_no_data: bool):
+        """
+        根据分享率数值设置健康状态与标签
+        :param invitee: 后宫成员（已写入ratio_value）
+        :param is_no_data: 是否为无数据用户
+        """
+        if "ratio_value" in invitee:
+            if is_no_data:
+                invitee["ratio_health"] = "neutral"
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif invitee["ratio_value"] >= 1e20:
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            elif invitee["ratio_value"] >= 1.0:
+                invitee["ratio_health"] = "good"
+                invitee["ratio_label"] = ["良好", "green"]
+            elif invitee["ratio_value"] >= 0.5:
+                invitee["ratio_health"] = "warning"
+                invitee["ratio_label"] = ["较低", "orange"]
+            else:
+                invitee["ratio_health"] = "danger"
+                invitee["ratio_label"] = ["危险", "red"]
+        else:
+            # 处理没有ratio_value的情况
+            if is_no_data:
+                invitee["ratio_health"] = "neutral" 
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif "ratio" in invitee and invitee["ratio"] == "∞":
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            else:
+                invitee["ratio_health"] = "unknown"
+                invitee["ratio_label"] = ["未知", "grey"]
+
     def _parse_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
         """
         解析魔力值商店页面
@@ -797,20 +739,4 @@ class ButterflyHandler(_ISiteHandler):
             
         except Exception as e:
             logger.error(f"解析站点 {site_name} 魔力值商店失败: {str(e)}")
-            return result 
-
-    def _get_health_from_ratio_value(self, ratio):
-        """
-        根据分享率数值获取健康状态和标签
-        """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"] 
\ No newline at end of file
+            return result
@@ -1,4 +1,4 @@
-# plugins/nexusinvitee/sites/hdkylin.py
+# plugins/nexusinvitees/sites/hdkylin.py
 """
 麒麟(HDKylin)站点处理器
 """
@@ -11,7 +11,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
 
 
 class HdkylinHandler(_ISiteHandler):
@@ -20,6 +20,8 @@ class HdkylinHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "hdkylin" # 使用小写且唯一的标识符
+    # 麒麟站点的域名特征
+    site_features = ["hdkyl.in"]
 
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -29,7 +31,7 @@ class HdkylinHandler(_ISiteHandler):
         :return: 是否匹配
         """
         # 仅通过域名精确匹配
-        if "hdkyl.in" in site_url.lower():
+        if any(feature in site_url.lower() for feature in cls.site_features):
             logger.info(f"匹配到麒麟站点: {site_url}")
             return True
         return False
@@ -193,80 +195,9 @@ class HdkylinHandler(_ISiteHandler):
 
             # 3. 访问并解析魔力值商店页面 (`mybonus.php`)
             try:
-                bonus_url = urljoin(site_url, "mybonus.php")
-                bonus_response = session.get(bonus_url, timeout=(10, 30))
-                bonus_response.raise_for_status()
-                bonus_soup = BeautifulSoup(bonus_response.text, 'html.parser')
-
-                # --- 解析当前魔力值 ---
-                # 更精确地定位包含魔力值的文本节点
-                bonus_tag = bonus_soup.find(lambda tag: tag.name == "td" and "用你的魔力值" in tag.get_text() and "当前" in tag.get_text())
-
-                if bonus_tag:
-                    bonus_text = bonus_tag.get_text()
-                    bonus_match = re.search(r'当前([\d,\.]+)', bonus_text)
-                    if bonus_match:
-                        bonus_str = bonus_match.group(1).replace(',', '')
-                        try:
-                            result["invite_status"]["bonus"] = float(bonus_str)
-                            logger.info(f"站点 {site_name} 魔力值: {result['invite_status']['bonus']}")
-                        except ValueError:
-                            logger.warning(f"站点 {site_name} 无法解析魔力值: {bonus_match.group(1)}")
-                    else:
-                        logger.warning(f"站点 {site_name} 未在目标单元格找到 '当前X.X' 格式的魔力值文本: {bonus_text[:100]}...") # 记录部分文本
-                else:
-                    # Fallback: 尝试在整个页面查找
-                    page_text = bonus_soup.get_text()
-                    bonus_match_fallback = re.search(r'当前([\d,\.]+)', page_text)
-                    if bonus_match_fallback:
-                         bonus_str = bonus_match_fallback.group(1).replace(',', '')
-                         try:
-                             result["invite_status"]["bonus"] = float(bonus_str)
-                             logger.info(f"站点 {site_name} 通过页面文本回退找到魔力值: {result['invite_status']['bonus']}")
-                         except ValueError:
-                             logger.warning(f"站点 {site_name} 无法解析页面文本中的魔力值: {bonus_match_fallback.group(1)}")
-                    else:
-                        logger.warning(f"站点 {site_name} 未找到包含'当前魔力值'信息的单元格或文本")
-
-
-                # --- 解析邀请价格 ---
-                # 定位包含商店项目的表格行，假设还是table[border="1"]
-                shop_table = bonus_soup.select_one('table[border="1"]')
-                if shop_table:
-                    rows = shop_table.select('tr')
-                    for row in rows:
-                        cells = row.select('td')
-                        # 确保行结构符合预期 (项目名/简介/价格/按钮)
-                        if len(cells) >= 4:
-                            item_text = cells[1].get_text() # 第2个单元格是简介
-                            price_text = cells[2].get_text().strip().replace(',', '') # 第3个单元格是价格
-
-                            # 查找临时邀请
-                            if "临时邀请名额" in item_text:
-                                try:
-                                    price_match = re.search(r'([\d,\.]+)', price_text)
-                                    if price_match:
-                                        result["invite_status"]["temporary_invite_price"] = float(price_match.group(1))
-                                        logger.info(f"站点 {site_name} 临时邀请价格: {result['invite_status']['temporary_invite_price']}")
-                                    else:
-                                        logger.warning(f"站点 {site_name} 临时邀请行未找到价格数字: {price_text}")
-                                except ValueError:
-                                    logger.warning(f"站点 {site_name} 无法解析临时邀请价格: {price_text}")
-
-                            # 查找永久邀请 (假设描述中不含"临时")
-                            elif "邀请名额" in item_text: # 匹配不含"临时"的邀请名额
-                                try:
-                                    price_match = re.search(r'([\d,\.]+)', price_text)
-                                    if price_match:
-                                        result["invite_status"]["permanent_invite_price"] = float(price_match.group(1))
-                                        logger.info(f"站点 {site_name} 永久邀请价格: {result['invite_status']['permanent_invite_price']}")
-                                    else:
-                                        logger.warning(f"站点 {site_name} 永久邀请行未找到价格数字: {price_text}")
-                                except ValueError:
-                                    logger.warning(f"站点 {site_name} 无法解析永久邀请价格: {price_text}")
-                else:
-                    logger.warning(f"站点 {site_name} 未找到魔力值商店表格 (table[border=\"1\"])")
-
+                bonus_data = self._get_bonus_shop(session, site_name, site_url, self._parse_hdkylin_bonus_shop)
+                if bonus_data:
+                    result["invite_status"].update(bonus_data)
             except requests.exceptions.RequestException as req_err_bonus:
                  logger.warning(f"站点 {site_name} 访问魔力商店网络错误: {str(req_err_bonus)}")
                  # 不改变现有 reason，只记录警告
@@ -303,6 +234,92 @@ class HdkylinHandler(_ISiteHandler):
             return result
 
     # 辅助方法：从页面解析邀请状态 (移植自NexusPhpHandler._parse_nexusphp_invite_page)
+
+    def _parse_hdkylin_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
+        """
+        解析魔力值商店页面
+        :param site_name: 站点名称
+        :param html_content: HTML内容
+        :return: 魔力值和邀请价格信息
+        """
+        bonus_data = {
+            "bonus": 0,
+            "permanent_invite_price": 0,
+            "temporary_invite_price": 0
+        }
+        bonus_soup = BeautifulSoup(html_content, 'html.parser')
+
+        # --- 解析当前魔力值 ---
+        # 更精确地定位包含魔力值的文本节点
+        bonus_tag = bonus_soup.find(lambda tag: tag.name == "td" and "用你的魔力值" in tag.get_text() and "当前" in tag.get_text())
+
+        if bonus_tag:
+            bonus_text = bonus_tag.get_text()
+            bonus_match = re.search(r'当前([\d,\.]+)', bonus_text)
+            if bonus_match:
+                bonus_str = bonus_match.group(1).replace(',', '')
+                try:
+                    bonus_data["bonus"] = float(bonus_str)
+                    logger.info(f"站点 {site_name} 魔力值: {bonus_data['bonus']}")
+                except ValueError:
+                    logger.warning(f"站点 {site_name} 无法解析魔力值: {bonus_match.group(1)}")
+            else:
+                logger.warning(f"站点 {site_name} 未在目标单元格找到 '当前X.X' 格式的魔力值文本: {bonus_text[:100]}...") # 记录部分文本
+        else:
+            # Fallback: 尝试在整个页面查找
+            page_text = bonus_soup.get_text()
+            bonus_match_fallback = re.search(r'当前([\d,\.]+)', page_text)
+            if bonus_match_fallback:
+                 bonus_str = bonus_match_fallback.group(1).replace(',', '')
+                 try:
+                     bonus_data["bonus"] = float(bonus_str)
+                     logger.info(f"站点 {site_name} 通过页面文本回退找到魔力值: {bonus_data['bonus']}")
+                 except ValueError:
+                     logger.warning(f"站点 {site_name} 无法解析页面文本中的魔力值: {bonus_match_fallback.group(1)}")
+            else:
+                logger.warning(f"站点 {site_name} 未找到包含'当前魔力值'信息的单元格或文本")
+
+
+        # --- 解析邀请价格 ---
+        # 定位包含商店项目的表格行，假设还是table[border="1"]
+        shop_table = bonus_soup.select_one('table[border="1"]')
+        if shop_table:
+            rows = shop_table.select('tr')
+            for row in rows:
+                cells = row.select('td')
+                # 确保行结构符合预期 (项目名/简介/价格/按钮)
+                if len(cells) >= 4:
+                    item_text = cells[1].get_text() # 第2个单元格是简介
+                    price_text = cells[2].get_text().strip().replace(',', '') # 第3个单元格是价格
+
+                    # 查找临时邀请
+                    if "临时邀请名额" in item_text:
+                        try:
+                            price_match = re.search(r'([\d,\.]+)', price_text)
+                            if price_match:
+                                bonus_data["temporary_invite_price"] = float(price_match.group(1))
+                                logger.info(f"站点 {site_name} 临时邀请价格: {bonus_data['temporary_invite_price']}")
+                            else:
+                                logger.warning(f"站点 {site_name} 临时邀请行未找到价格数字: {price_text}")
+                        except ValueError:
+                            logger.warning(f"站点 {site_name} 无法解析临时邀请价格: {price_text}")
+
+                    # 查找永久邀请 (假设描述中不含"临时")
+                    elif "邀请名额" in item_text: # 匹配不含"临时"的邀请名额
+                        try:
+                            price_match = re.search(r'([\d,\.]+)', price_text)
+                            if price_match:
+                                bonus_data["permanent_invite_price"] = float(price_match.group(1))
+                                logger.info(f"站点 {site_name} 永久邀请价格: {bonus_data['permanent_invite_price']}")
+                            else:
+                                logger.warning(f"站点 {site_name} 永久邀请行未找到价格数字: {price_text}")
+                        except ValueError:
+                            logger.warning(f"站点 {site_name} 无法解析永久邀请价格: {price_text}")
+        else:
+            logger.warning(f"站点 {site_name} 未找到魔力值商店表格 (table[border=\"1\"])")
+
+        return bonus_data
+
     def _parse_invite_status_from_page(self, site_name: str, html_content: str) -> Dict[str, Any]:
         soup = BeautifulSoup(html_content, 'html.parser')
         invite_status = {"can_invite": False, "reason": "", "permanent_count": 0, "temporary_count": 0}
@@ -475,66 +492,55 @@ class HdkylinHandler(_ISiteHandler):
                 if "enabled" not in invitee: invitee["enabled"] = "No" if is_banned else "Yes"
                 if "status" not in invitee: invitee["status"] = "已禁用" if invitee["enabled"] == "No" else "已确认"
 
-                # --- 添加分享率健康度计算 --- (移植自NexusPhpHandler)
-                ratio_value = 0
-                ratio_health = "unknown"
-                ratio_label = ["未知", "text-grey"]
-                is_no_data_invitee = False
-
-                # 检查是否无数据
-                if "uploaded" in invitee and "downloaded" in invitee:
-                    up = invitee["uploaded"]
-                    down = invitee["downloaded"]
-                    if isinstance(up, str) and isinstance(down, str):
-                        is_no_data_invitee = (up=='0' or up=='' or up=='0.0' or up.lower()=='0b') and (down=='0' or down=='' or down=='0.0' or down.lower()=='0b')
-                    elif isinstance(up, (int, float)) and isinstance(down, (int, float)):
-                        is_no_data_invitee = up == 0 and down == 0
-
-                if is_no_data_invitee:
-                    ratio_health = "neutral"
-                    ratio_label = ["无数据", "text-grey"]
-                elif "ratio" in invitee:
-                    ratio_str = invitee["ratio"]
-                    if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                        ratio_health = "excellent"
-                        ratio_label = ["无限", "text-success"]
-                        ratio_value = 1e20
-                    else:
-                        try:
-                            # 标准化处理
-                            normalized_ratio = ratio_str
-                            while ',' in normalized_ratio:
-                                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                for pos in comma_positions:
-                                    if (pos > 0 and pos < len(normalized_ratio) - 1 and
-                                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                        break
-                                else: break
-                            normalized_ratio = normalized_ratio.replace(',', '.')
-                            ratio_value = float(normalized_ratio)
-
-                            # 判断健康度
-                            if ratio_value >= 1.0: ratio_health = "good"; ratio_label = ["良好", "text-success"]
-                            elif ratio_value >= 0.5: ratio_health = "warning"; ratio_label = ["较低", "text-warning"]
-                            else: ratio_health = "danger"; ratio_label = ["危险", "text-error"]
-                        except (ValueError, TypeError):
-                            ratio_health = "unknown"; ratio_label = ["无效", "text-grey"]
-
-                invitee["ratio_value"] = ratio_value
-                invitee["ratio_health"] = ratio_health
-                invitee["ratio_label"] = ratio_label
-                # --- 分享率健康度计算结束 ---
-
                 if invitee.get("username"): # 确保至少解析到用户名
                     invitees.append(invitee)
             # 跳出外层循环，因为我们假定只有一个主要的用户表格
             break
 
+        # 分享率按列一次解析，再计算健康度
+        self._fill_ratio_values(invitees, default=None)
+        for invitee in invitees:
+            self._set_ratio_health(invitee)
+
         if invitees:
             logger.debug(f"站点 {site_name} 从表格解析到 {len(invitees)} 个后宫成员")
         # 仅在确实没有找到表格，或者表格内没有用户且没有"没有被邀者"提示时警告
         elif not invitee_tables or (not invitees and not any("没有被邀者" in t.get_text() for t in soup.select('table[border="1"] td'))):
             logger.warning(f"站点 {site_name} 未能从表格中解析到任何后宫成员")
 
-        return invitees
\ No newline at end of file
+        return invitees
+
+    @staticmethod
+    def _set_ratio_health(invitee: Dict[str, Any]):
+        """
+        分享率健康度计算 (移植自NexusPhpHandler)
+        :param invitee: 后宫成员（ratio_value为None表示分享率无法解析）
+        """
+        ratio_value = invitee.get("ratio_value")
+        ratio_health = "unknown"
+        ratio_label = ["未知", "text-grey"]
+        is_no_data_invitee = False
+
+        # 检查是否无数据
+        if "uploaded" in invitee and "downloaded" in invitee:
+            up = invitee["uploaded"]
+            down = invitee["downloaded"]
+            if isinstance(up, str) and isinstance(down, str):
+                is_no_data_invitee = (up=='0' or up=='' or up=='0.0' or up.lower()=='0b') and (down=='0' or down=='' or down=='0.0' or down.lower()=='0b')
+            elif isinstance(up, (int, float)) and isinstance(down, (int, float)):
+                is_no_data_invitee = up == 0 and down == 0
+
+        if is_no_data_invitee:
+            ratio_health = "neutral"
+            ratio_label = ["无数据", "text-grey"]
+        elif "ratio" in invitee:
+            # 判断健康度
+            if ratio_value is None: ratio_health = "unknown"; ratio_label = ["无效", "text-grey"]
+            elif ratio_value >= 1e20: ratio_health = "excellent"; ratio_label = ["无限", "text-success"]
+            elif ratio_value >= 1.0: ratio_health = "good"; ratio_label = ["良好", "text-success"]
+            elif ratio_value >= 0.5: ratio_health = "warning"; ratio_label = ["较低", "text-warning"]
+            else: ratio_health = "danger"; ratio_label = ["危险", "text-error"]
+
+        invitee["ratio_value"] = ratio_value if ratio_value is not None and not is_no_data_invitee else 0
+        invitee["ratio_health"] = ratio_health
+        invitee["ratio_label"] = ratio_label
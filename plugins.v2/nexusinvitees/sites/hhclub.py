@@ -11,7 +11,8 @@ from bs4 import BeautifulSoup
 
 from app.log import logger
 from app.db.site_oper import SiteOper
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+from plugins.nexusinvitees.parse_pool import ParseCall
 
 
 class HHClubHandler(_ISiteHandler):
@@ -20,6 +21,12 @@ class HHClubHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "hhclub"
+    # 憨憨站点的特征 - 域名中包含 hhanclub 或者 hhclub
+    site_features = [
+        "hhanclub",   # 憨憨官方域名
+        "hhclub",      # 可能的简写域名
+        "hhan"   # 憨憨官方域名
+    ]
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -28,15 +35,8 @@ class HHClubHandler(_ISiteHandler):
         :param site_url: 站点URL
         :return: 是否匹配
         """
-        # 憨憨站点的特征 - 域名中包含 hhanclub 或者 hhclub
-        hhclub_features = [
-            "hhanclub",   # 憨憨官方域名
-            "hhclub",      # 可能的简写域名
-            "hhan"   # 憨憨官方域名
-        ]
-        
         site_url_lower = site_url.lower()
-        for feature in hhclub_features:
+        for feature in cls.site_features:
             if feature in site_url_lower:
                 logger.info(f"匹配到憨憨站点特征: {feature}")
                 return True
@@ -117,60 +117,21 @@ class HHClubHandler(_ISiteHandler):
             first_page_result = self._parse_hhclub_invitee_page(site_name, site_url, first_page_response.text)
             result["invitees"] = first_page_result["invitees"]
 
-            previous_page_invitee_ids = set()
-            if result["invitees"]:
-                first_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in result["invitees"]}
-                previous_page_invitee_ids = first_page_invitee_ids
-                logger.debug(f"站点 {site_name} 首页收集到 {len(previous_page_invitee_ids)} 个后宫ID用于重复检测")
-
-            if len(result["invitees"]) >= 50:
+            if len(result["invitees"]) >= self.invitee_page_size:
                 logger.info(f"站点 {site_name} 首页后宫成员数量达到50人，尝试获取后续页面...")
-                next_page = 1
-                max_pages = 100
-
-                while next_page < max_pages:
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                    logger.info(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        next_page_result = self._parse_hhclub_invitee_page(site_name, site_url, next_response.text)
-
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                            break
-
-                        current_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in next_page_result["invitees"]}
-
-                        if previous_page_invitee_ids and current_page_invitee_ids == previous_page_invitee_ids:
-                            logger.warning(f"站点 {site_name} 检测到第 {next_page+1} 页内容与上一页重复，停止翻页")
-                            break
-
-                        result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-
-                        previous_page_invitee_ids = current_page_invitee_ids
-
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，停止获取")
-                            break
-
-                        next_page += 1
-
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                        break
+                result["invitees"].extend(self._fetch_invitee_pages(
+                    session, site_name, first_page_response.text, result["invitees"],
+                    page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                    parse_page=ParseCall(self._parse_hhclub_invitee_page, site_name, site_url, key="invitees")
+                ))
             else:
                 logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
             # --- 后宫列表解析结束 ---
 
             # --- 获取魔力值和邀请价格 ---
             try:
-                bonus_url = urljoin(site_url, "mybonus.php")
-                bonus_response = session.get(bonus_url, timeout=(10, 30))
-                if bonus_response.status_code == 200:
-                    bonus_data = self._parse_hhclub_bonus_shop(site_name, bonus_response.text)
+                bonus_data = self._get_bonus_shop(session, site_name, site_url, self._parse_hhclub_bonus_shop)
+                if bonus_data:
                     result["invite_status"]["bonus"] = bonus_data["bonus"]
                     result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
                     result["invite_status"]["temporary_invite_price"] = 0
@@ -479,6 +440,7 @@ class HHClubHandler(_ISiteHandler):
         # === 修复结束 ===
 
         # 处理每一个数据行
+        table_invitees = []
         for row in data_rows:
             # 数据行内的单元格也是 div
             cells = row.select(':scope > div')
@@ -540,21 +502,11 @@ class HHClubHandler(_ISiteHandler):
                     # 处理特殊分享率表示
                     if ratio_text.lower() in ['inf.', 'inf', '∞', 'infinite']:
                         invitee["ratio"] = "∞"
-                        invitee["ratio_value"] = 1e20
                     elif ratio_text == '---' or not ratio_text:
                         invitee["ratio"] = "0"
-                        invitee["ratio_value"] = 0
                     else:
                         invitee["ratio"] = ratio_text
 
-                        # 尝试解析为浮点数
-                        try:
-                            normalized_ratio = ratio_text.replace(',', '')
-                            invitee["ratio_value"] = float(normalized_ratio)
-                        except (ValueError, TypeError):
-                            logger.warning(f"无法解析分享率: {ratio_text}")
-                            invitee["ratio_value"] = 0
-
                 # 做种数列
                 elif any(kw in header for kw in ['做种数', 'seeding']):
                     invitee["seeding"] = cell_text
@@ -604,58 +556,68 @@ class HHClubHandler(_ISiteHandler):
                 if "status" not in invitee:
                     invitee["status"] = "已禁用" if is_banned else "已确认"
 
-                # 计算分享率健康状态
-                if "ratio_value" in invitee:
-                    # 检查是否是无数据情况（上传下载都是0）
-                    uploaded = invitee.get("uploaded", "0")
-                    downloaded = invitee.get("downloaded", "0")
-                    is_no_data = False
-
-                    # 检查是否无数据
-                    if isinstance(uploaded, str) and isinstance(downloaded, str):
-                        # 转换为小写进行比较
-                        uploaded_lower = uploaded.lower()
-                        downloaded_lower = downloaded.lower()
-                        # 检查所有可能的0值表示
-                        zero_values = ['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0b', '0.00', '0.0']
-                        is_no_data = any(uploaded_lower == val for val in zero_values) and \
-                                   any(downloaded_lower == val for val in zero_values)
-
-                    # 设置数据状态
-                    if is_no_data:
-                        invitee["data_status"] = "无数据"
-
-                    # 设置分享率健康状态
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral"
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif invitee["ratio_value"] >= 1e20:
-                        invitee["ratio_health"] = "excellent"
-                        invitee["ratio_label"] = ["无限", "green"]
-                    elif invitee["ratio_value"] >= 1.0:
-                        invitee["ratio_health"] = "good"
-                        invitee["ratio_label"] = ["良好", "green"]
-                    elif invitee["ratio_value"] >= 0.5:
-                        invitee["ratio_health"] = "warning"
-                        invitee["ratio_label"] = ["较低", "orange"]
-                    else:
-                        invitee["ratio_health"] = "danger"
-                        invitee["ratio_label"] = ["危险", "red"]
-                else:
-                    # 如果没有ratio_value，基于其它信息判断
-                    if "ratio" in invitee and invitee["ratio"] == "∞":
-                        invitee["ratio_health"] = "excellent"
-                        invitee["ratio_label"] = ["无限", "green"]
-                    else:
-                        invitee["ratio_health"] = "unknown"
-                        invitee["ratio_label"] = ["未知", "grey"]
+                # 添加用户到结果中，分享率与健康状态在整表解析后按列计算
+                table_invitees.append(invitee)
 
-                # 添加用户到结果中
-                result["invitees"].append(invitee)
+        self._fill_ratio_values(table_invitees)
+        for invitee in table_invitees:
+            self._set_ratio_health(invitee)
+        result["invitees"].extend(table_invitees)
 
         logger.info(f"站点 {site_name} 解析到 {len(result['invitees'])} 个后宫成员")
         return result
     
+    @staticmethod
+    def _set_ratio_health(invitee: Dict[str, Any]):
+        """
+        根据分享率数值设置数据状态、健康状态与标签
+        :param invitee: 后宫成员（已写入ratio_value）
+        """
+        if "ratio_value" in invitee:
+            # 检查是否是无数据情况（上传下载都是0）
+            uploaded = invitee.get("uploaded", "0")
+            downloaded = invitee.get("downloaded", "0")
+            is_no_data = False
+
+            # 检查是否无数据
+            if isinstance(uploaded, str) and isinstance(downloaded, str):
+                # 转换为小写进行比较
+                uploaded_lower = uploaded.lower()
+                downloaded_lower = downloaded.lower()
+                # 检查所有可能的0值表示
+                zero_values = ['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0b', '0.00', '0.0']
+                is_no_data = any(uploaded_lower == val for val in zero_values) and \
+                           any(downloaded_lower == val for val in zero_values)
+
+            # 设置数据状态
+            if is_no_data:
+                invitee["data_status"] = "无数据"
+
+            # 设置分享率健康状态
+            if is_no_data:
+                invitee["ratio_health"] = "neutral"
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif invitee["ratio_value"] >= 1e20:
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            elif invitee["ratio_value"] >= 1.0:
+                invitee["ratio_health"] = "good"
+                invitee["ratio_label"] = ["良好", "green"]
+            elif invitee["ratio_value"] >= 0.5:
+                invitee["ratio_health"] = "warning"
+                invitee["ratio_label"] = ["较低", "orange"]
+            else:
+                invitee["ratio_health"] = "danger"
+                invitee["ratio_label"] = ["危险", "red"]
+        else:
+            # 如果没有ratio_value，基于其它信息判断
+            if "ratio" in invitee and invitee["ratio"] == "∞":
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            else:
+                invitee["ratio_health"] = "unknown"
+                invitee["ratio_label"] = ["未知", "grey"]
+
     def _parse_hhclub_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
         """
         解析憨憨站点魔力值商店页面
@@ -1,13 +1,19 @@
 """
 M-Team站点处理
 """
+import asyncio
+import hashlib
+import threading
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import requests
 import re
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+from plugins.nexusinvitees.session import get_fact, isolated_request, send_idempotent, set_fact
+from plugins.nexusinvitees.converters import bytes_to_size
 
 
 class MTeamHandler(_ISiteHandler):
@@ -16,6 +22,48 @@ class MTeamHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "mteam"
+    # M-Team站点的特征
+    site_features = [
+        "m-team",
+        "pt.m-team",
+        "kp.m-team",
+        "zp.m-team",
+        "api.m-team.cc",
+        "api.m-team.io"
+    ]
+    # 实现了异步接口，异步刷新时直接在事件循环中请求API
+    supports_async = True
+    # 用户信息（用户ID、邀请数量）缓存时间（秒），短时间内重复刷新时不再请求 /member/profile
+    profile_cache_ttl = 300
+    # 被邀请人状态显示文本
+    INVITEE_STATUS_TEXT = {
+        "CONFIRMED": "已确认",
+        "PENDING": "待确认"
+    }
+    # 用户信息缓存：认证信息指纹 -> (获取时间, 用户信息)，所有站点处理器实例共享
+    _profile_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    _profile_lock = threading.Lock()
+    # 用户级别字典
+    MTeam_sysRoleList = {
+        "1": "User",
+        "2": "Power User",
+        "3": "Elite User",
+        "4": "Crazy User",
+        "5": "Insane User",
+        "6": "Veteran User",
+        "7": "Extreme User",
+        "8": "Ultimate User",
+        "9": "Nexus Master",
+        "10": "VIP",
+        "11": "Retiree",
+        "12": "Uploader",
+        "13": "Moderator",
+        "14": "Administrator",
+        "15": "Sysop",
+        "16": "Staff",
+        "17": "Offer memberStaff",
+        "18": "Bet memberStaff",
+    }
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -24,18 +72,8 @@ class MTeamHandler(_ISiteHandler):
         :param site_url: 站点URL
         :return: 是否匹配
         """
-        # M-Team站点的特征
-        mteam_features = [
-            "m-team",
-            "pt.m-team",
-            "kp.m-team",
-            "zp.m-team",
-            "api.m-team.cc",
-            "api.m-team.io"
-        ]
-        
         site_url_lower = site_url.lower()
-        for feature in mteam_features:
+        for feature in cls.site_features:
             if feature in site_url_lower:
                 logger.info(f"匹配到M-Team站点特征: {feature}")
                 return True
@@ -57,28 +95,6 @@ class MTeamHandler(_ISiteHandler):
         # 记录站点配置信息（隐藏敏感内容）
         logger.info(f"站点 {site_name} 配置信息: URL={site_url}, API Key设置={bool(api_key)}, Token设置={bool(authorization)}")
         
-        # 用户级别字典
-        MTeam_sysRoleList = {
-            "1": "User",
-            "2": "Power User",
-            "3": "Elite User",
-            "4": "Crazy User",
-            "5": "Insane User",
-            "6": "Veteran User",
-            "7": "Extreme User",
-            "8": "Ultimate User",
-            "9": "Nexus Master",
-            "10": "VIP",
-            "11": "Retiree",
-            "12": "Uploader",
-            "13": "Moderator",
-            "14": "Administrator",
-            "15": "Sysop",
-            "16": "Staff",
-            "17": "Offer memberStaff",
-            "18": "Bet memberStaff",
-        }
-        
         result = {
             "invite_status": {
                 "can_invite": False,
@@ -96,88 +112,46 @@ class MTeamHandler(_ISiteHandler):
                 result["invite_status"]["reason"] = "API认证信息不完整，请在站点设置中配置API Key和Authorization"
                 return result
             
-            # 提取API域名
-            api_domain = self._extract_api_domain(site_url)
-            api_base_url = f"https://api.{api_domain}/api"
-            logger.info(f"站点 {site_name} 使用API基础URL: {api_base_url}")
-            
-            # 配置API请求头 (根据最新参考调整，但恢复 Authorization)
-            headers = {
-                "Content-Type": "application/json",
-                "User-Agent": site_info.get("ua", "Mozilla/5.0"),
-                "Accept": "application/json, text/plain, */*",
-                "Authorization": authorization, # 恢复 Authorization
-                "x-api-key": api_key,
-                # "ts": str(int(time.time())) # 保持移除 ts
-            }
+            api_base_url, headers = self._prepare_api(site_info)
             
             # 重置会话并添加API认证头
             session.headers.clear()
             session.headers.update(headers)
             
-            # 步骤1: 获取用户信息
-            user_data = self._get_user_profile(api_base_url, session, site_name)
+            # 步骤1: 获取用户信息，缓存有效时直接使用
+            # 已知用户ID（缓存的用户信息或插件缓存的用户ID）时，邀请历史不依赖用户信息，两个请求并发发送
+            cache_key = self._profile_cache_key(api_base_url, headers)
+            user_data = self._get_cached_profile(cache_key, site_name)
+            known_user_id = str(user_data.get("id") or "") if user_data else str(get_fact(session, "user_id") or "")
+            invitees = None
+            if user_data:
+                invitees = self._get_invite_history(api_base_url, session, known_user_id, site_name)
+            elif known_user_id:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="nexusinvitees-mteam") as executor:
+                    profile_future = executor.submit(self._get_user_profile, api_base_url, session, site_name)
+                    history_future = executor.submit(self._get_invite_history, api_base_url, session,
+                                                     known_user_id, site_name)
+                    user_data = profile_future.result()
+                    invitees = history_future.result()
+            else:
+                user_data = self._get_user_profile(api_base_url, session, site_name)
             if not user_data:
                 result["invite_status"]["reason"] = "获取用户信息失败"
                 return result
             
-            # 提取用户ID、永久邀请和临时邀请数量
-            user_id = user_data.get("id")
+            user_id = self._apply_user_profile(result, user_data, site_name)
             if not user_id:
-                result["invite_status"]["reason"] = "获取用户ID失败"
+                self._drop_cached_profile(cache_key)
                 return result
-                
-            # 直接从用户信息中获取邀请数量
-            permanent_invites = int(user_data.get("invites", "0"))
-            temporary_invites = int(user_data.get("limitInvites", "0"))
-            
-            # 获取用户等级
-            user_role = user_data.get("role", "1")
-            user_role_name = MTeam_sysRoleList.get(user_role, "未知等级")
-            
-            # 检查用户等级是否有邀请权限 (Elite User及以上)
-            has_invite_permission = int(user_role) >= 3
-            
-            # 获取用户魔力值
-            if user_data.get("memberCount") and isinstance(user_data["memberCount"], dict):
-                user_bonus = float(user_data["memberCount"].get("bonus", "0"))
-            else:
-                user_bonus = 0
-                
-            # 计算可购买的临时邀请数量
-            buyable_invites = int(user_bonus / 80000)
-            
-            logger.info(f"站点 {site_name} 用户ID: {user_id}, 永久邀请: {permanent_invites}, 临时邀请: {temporary_invites}, "
-                       f"用户等级: {user_role_name}({user_role}), 魔力值: {user_bonus}, 可购买邀请: {buyable_invites}")
-            
-            # 更新邀请状态
-            result["invite_status"].update({
-                "permanent_count": permanent_invites,
-                "temporary_count": temporary_invites,
-                "can_invite": has_invite_permission and (permanent_invites > 0 or temporary_invites > 0 or buyable_invites > 0)
-            })
-            
-            if not has_invite_permission:
-                reason = f"当前用户等级不足，需要Elite User及以上才能发送邀请"
-            elif permanent_invites > 0 or temporary_invites > 0:
-                if buyable_invites > 0:
-                    reason = f"用户等级({user_role_name})魔力值({user_bonus})可购买{buyable_invites}个临时邀请"
-                else:
-                    reason = f"用户等级({user_role_name})魔力值({user_bonus})"
-            elif buyable_invites > 0:
-                reason = f"无可用邀请名额，用户等级({user_role_name})魔力值({user_bonus})可购买{buyable_invites}个临时邀请"
-            else:
-                reason = f"没有可用的邀请名额，用户等级({user_role_name})魔力值({user_bonus})不足购买临时邀请(需80000魔力/个)"
-            
-            result["invite_status"]["reason"] = reason
-            logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
+            self._store_profile(cache_key, user_data)
+            set_fact(session, "user_id", str(user_id))
             
-            # 步骤2: 获取被邀请人列表
-            if user_id:
+            # 步骤2: 获取被邀请人列表（用户ID与预先使用的不一致时重新获取）
+            if invitees is None or str(user_id) != known_user_id:
                 invitees = self._get_invite_history(api_base_url, session, user_id, site_name)
-                if invitees:
-                    result["invitees"] = self._process_invitees(invitees)
-                    logger.info(f"站点 {site_name} 获取到 {len(result['invitees'])} 个被邀请人")
+            if invitees:
+                result["invitees"] = self._process_invitees(invitees)
+                logger.info(f"站点 {site_name} 获取到 {len(result['invitees'])} 个被邀请人")
             
             # 更新最后访问时间
             self._update_last_browse(api_base_url, session, site_name)
@@ -188,7 +162,266 @@ class MTeamHandler(_ISiteHandler):
             logger.error(f"解析站点 {site_name} 邀请页面失败: {str(e)}")
             result["invite_status"]["reason"] = f"解析邀请页面失败: {str(e)}"
             return result
+
+    async def parse_invite_page_async(self, site_info: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """
+        异步解析M-Team站点邀请数据，流程与 parse_invite_page 相同
+        :param site_info: 站点信息
+        :param session: 异步请求会话（AsyncSession）
+        :return: 解析结果
+        """
+        site_name = site_info.get("name", "")
+        result = {
+            "invite_status": {
+                "can_invite": False,
+                "reason": "",
+                "permanent_count": 0,
+                "temporary_count": 0
+            },
+            "invitees": []
+        }
+
+        try:
+            if not site_info.get("apikey", "") or not site_info.get("token", ""):
+                logger.error(f"站点 {site_name} API认证信息不完整")
+                result["invite_status"]["reason"] = "API认证信息不完整，请在站点设置中配置API Key和Authorization"
+                return result
+
+            api_base_url, headers = self._prepare_api(site_info)
+            session.headers.clear()
+            session.headers.update(headers)
+
+            async def get_profile() -> Dict[str, Any]:
+                # 不携带会话默认请求头
+                profile_url = f"{api_base_url}/member/profile"
+                logger.info(f"站点 {site_name} 获取用户信息: {profile_url}")
+                try:
+                    response = await session.post(profile_url, headers=self._profile_headers(headers),
+                                                  timeout=(10, 30), isolated=True, idempotent=True)
+                    return self._read_api_response(response, site_name, "获取用户信息") or {}
+                except Exception as e:
+                    logger.error(f"站点 {site_name} 获取用户信息异常: {str(e)}")
+                    return {}
+
+            async def get_history(uid: str) -> List[Dict[str, Any]]:
+                history_url = f"{api_base_url}/invite/getUserInviteHistory"
+                logger.info(f"站点 {site_name} 获取邀请历史: {history_url}?uid={uid}")
+                try:
+                    response = await session.post(history_url, params={"uid": uid},
+                                                  headers={"Content-Type": "application/x-www-form-urlencoded"},
+                                                  timeout=(10, 30), idempotent=True)
+                    return self._read_api_response(response, site_name, "获取邀请历史") or []
+                except Exception as e:
+                    logger.error(f"站点 {site_name} 获取邀请历史异常: {str(e)}")
+                    return []
+
+            # 步骤1: 获取用户信息，已知用户ID时与邀请历史并发请求（与 parse_invite_page 相同）
+            cache_key = self._profile_cache_key(api_base_url, headers)
+            user_data = self._get_cached_profile(cache_key, site_name)
+            known_user_id = str(user_data.get("id") or "") if user_data else str(session.facts.get("user_id") or "")
+            invitees = None
+            if user_data:
+                invitees = await get_history(known_user_id)
+            elif known_user_id:
+                user_data, invitees = await asyncio.gather(get_profile(), get_history(known_user_id))
+            else:
+                user_data = await get_profile()
+            if not user_data:
+                result["invite_status"]["reason"] = "获取用户信息失败"
+                return result
+
+            user_id = self._apply_user_profile(result, user_data, site_name)
+            if not user_id:
+                self._drop_cached_profile(cache_key)
+                return result
+            self._store_profile(cache_key, user_data)
+            session.facts["user_id"] = str(user_id)
+
+            # 步骤2: 获取被邀请人列表（用户ID与预先使用的不一致时重新获取）
+            if invitees is None or str(user_id) != known_user_id:
+                invitees = await get_history(user_id)
+            if invitees:
+                result["invitees"] = await session.parse(self._process_invitees, invitees)
+                logger.info(f"站点 {site_name} 获取到 {len(result['invitees'])} 个被邀请人")
+
+            return result
+
+        except Exception as e:
+            logger.error(f"解析站点 {site_name} 邀请页面失败: {str(e)}")
+            result["invite_status"]["reason"] = f"解析邀请页面失败: {str(e)}"
+            return result
+
+    @staticmethod
+    def _profile_cache_key(api_base_url: str, headers: Dict[str, str]) -> str:
+        """
+        用户信息缓存键：API地址 + 认证信息指纹，令牌变化后缓存自然失效
+        """
+        auth = f"{api_base_url}|{headers.get('x-api-key', '')}|{headers.get('Authorization', '')}"
+        return hashlib.sha256(auth.encode("utf-8")).hexdigest()
+
+    def _get_cached_profile(self, cache_key: str, site_name: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的用户信息
+        :return: 用户信息，缓存不存在或已过期返回None
+        """
+        if self.profile_cache_ttl <= 0:
+            return None
+        with self._profile_lock:
+            cached = self._profile_cache.get(cache_key)
+        if not cached or time.time() - cached[0] >= self.profile_cache_ttl:
+            return None
+        logger.info(f"站点 {site_name} 使用 {int(time.time() - cached[0])} 秒前获取的用户信息")
+        return cached[1]
+
+    def _store_profile(self, cache_key: str, user_data: Dict[str, Any]):
+        """
+        缓存用户信息，已缓存的不刷新获取时间
+        """
+        if self.profile_cache_ttl <= 0:
+            return
+        with self._profile_lock:
+            cached = self._profile_cache.get(cache_key)
+            if not cached or cached[1] is not user_data:
+                self._profile_cache[cache_key] = (time.time(), user_data)
+
+    def _drop_cached_profile(self, cache_key: str):
+        """
+        删除缓存的用户信息
+        """
+        with self._profile_lock:
+            self._profile_cache.pop(cache_key, None)
+
+    def _prepare_api(self, site_info: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+        """
+        获取API基础URL及认证请求头
+        :param site_info: 站点信息
+        :return: (API基础URL, 请求头)
+        """
+        # 提取API域名
+        api_domain = self._extract_api_domain(site_info.get("url", ""))
+        api_base_url = f"https://api.{api_domain}/api"
+        logger.info(f"站点 {site_info.get('name', '')} 使用API基础URL: {api_base_url}")
+
+        # 配置API请求头 (根据最新参考调整，但恢复 Authorization)
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": site_info.get("ua", "Mozilla/5.0"),
+            "Accept": "application/json, text/plain, */*",
+            "Authorization": site_info.get("token", ""),  # 恢复 Authorization
+            "x-api-key": site_info.get("apikey", ""),
+            # "ts": str(int(time.time())) # 保持移除 ts
+        }
+        return api_base_url, headers
+
+    def probe(self, site_info: Dict[str, Any], session: requests.Session) -> Tuple[bool, str]:
+        """
+        熔断探测：前端页面不校验API凭证，改为请求 /member/profile，凭证失效时API返回错误
+        """
+        if not site_info.get("apikey", "") or not site_info.get("token", ""):
+            return False, "API认证信息不完整"
+        api_base_url, headers = self._prepare_api(site_info)
+        response = isolated_request(session, "POST", f"{api_base_url}/member/profile",
+                                    headers=self._profile_headers(headers), timeout=(5, 10))
+        if not self._read_api_response(response, site_info.get("name", ""), "探测用户信息"):
+            return False, f"探测时API认证失败，状态码: {response.status_code}"
+        return True, ""
+
+    @staticmethod
+    def _profile_headers(headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        /member/profile 只携带 UA 和 API Key（与 SiteChain.__mteam_test 一致），不设置 Content-Type 和 Authorization
+        """
+        return {
+            "User-Agent": headers.get("User-Agent", "Mozilla/5.0"),
+            "Accept": "application/json, text/plain, */*",
+            "x-api-key": headers.get("x-api-key")
+        }
+
+    @staticmethod
+    def _read_api_response(response: Any, site_name: str, action: str) -> Any:
+        """
+        读取API响应中的data字段
+        :param response: requests或httpx响应
+        :param site_name: 站点名称
+        :param action: 操作说明，用于日志
+        :return: data字段，失败返回None
+        """
+        if response.status_code != 200:
+            logger.error(f"站点 {site_name} {action}失败，状态码: {response.status_code}")
+            # 尝试解析错误信息
+            try:
+                logger.error(f"API错误信息: {response.json().get('message', '')}")
+            except Exception:
+                logger.error(f"无法解析API错误响应: {response.text[:200]}")
+            return None
+
+        data = response.json()
+        if data.get("code") != "0":
+            error_msg = data.get("message", "未知错误")
+            logger.error(f"站点 {site_name} {action}API返回错误: {error_msg}")
+            return None
+        return data.get("data")
             
+    def _apply_user_profile(self, result: Dict[str, Any], user_data: Dict[str, Any], site_name: str) -> Optional[str]:
+        """
+        根据用户信息填充邀请状态
+        :param result: 解析结果
+        :param user_data: /member/profile 返回的用户信息
+        :param site_name: 站点名称
+        :return: 用户ID，获取失败返回None
+        """
+        # 提取用户ID、永久邀请和临时邀请数量
+        user_id = user_data.get("id")
+        if not user_id:
+            result["invite_status"]["reason"] = "获取用户ID失败"
+            return None
+
+        # 直接从用户信息中获取邀请数量
+        permanent_invites = int(user_data.get("invites", "0"))
+        temporary_invites = int(user_data.get("limitInvites", "0"))
+
+        # 获取用户等级
+        user_role = user_data.get("role", "1")
+        user_role_name = self.MTeam_sysRoleList.get(user_role, "未知等级")
+
+        # 检查用户等级是否有邀请权限 (Elite User及以上)
+        has_invite_permission = int(user_role) >= 3
+
+        # 获取用户魔力值
+        if user_data.get("memberCount") and isinstance(user_data["memberCount"], dict):
+            user_bonus = float(user_data["memberCount"].get("bonus", "0"))
+        else:
+            user_bonus = 0
+
+        # 计算可购买的临时邀请数量
+        buyable_invites = int(user_bonus / 80000)
+
+        logger.info(f"站点 {site_name} 用户ID: {user_id}, 永久邀请: {permanent_invites}, 临时邀请: {temporary_invites}, "
+                   f"用户等级: {user_role_name}({user_role}), 魔力值: {user_bonus}, 可购买邀请: {buyable_invites}")
+
+        # 更新邀请状态
+        result["invite_status"].update({
+            "permanent_count": permanent_invites,
+            "temporary_count": temporary_invites,
+            "can_invite": has_invite_permission and (permanent_invites > 0 or temporary_invites > 0 or buyable_invites > 0)
+        })
+
+        if not has_invite_permission:
+            reason = f"当前用户等级不足，需要Elite User及以上才能发送邀请"
+        elif permanent_invites > 0 or temporary_invites > 0:
+            if buyable_invites > 0:
+                reason = f"用户等级({user_role_name})魔力值({user_bonus})可购买{buyable_invites}个临时邀请"
+            else:
+                reason = f"用户等级({user_role_name})魔力值({user_bonus})"
+        elif buyable_invites > 0:
+            reason = f"无可用邀请名额，用户等级({user_role_name})魔力值({user_bonus})可购买{buyable_invites}个临时邀请"
+        else:
+            reason = f"没有可用的邀请名额，用户等级({user_role_name})魔力值({user_bonus})不足购买临时邀请(需80000魔力/个)"
+
+        result["invite_status"]["reason"] = reason
+        logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
+        return user_id
+
     def _extract_api_domain(self, url: str) -> str:
         """
         从URL提取API域名
@@ -258,8 +491,10 @@ class MTeamHandler(_ISiteHandler):
             # --- 修正结束 ---
 
             # 使用修正后的 headers 发送 POST 请求，不带 uid 参数，不显式设置 Content-Type
-            # 注意：这里直接用 requests.post 而不是 session.post，避免 session 默认 headers 干扰
-            response = requests.post(profile_url, headers=request_headers, timeout=(10, 30), proxies=session.proxies)
+            # 注意：不使用 session.post，避免 session 默认 headers 干扰；仍复用会话的连接池、代理
+            # 查询接口为只读请求，失败时按会话的重试配置重试
+            response = send_idempotent(session, lambda: isolated_request(
+                session, "POST", profile_url, headers=request_headers, timeout=(10, 30)))
             
             if response.status_code != 200:
                 logger.error(f"站点 {site_name} 获取用户信息失败，状态码: {response.status_code}")
@@ -305,7 +540,8 @@ class MTeamHandler(_ISiteHandler):
             # --- 修正结束 ---
 
             # 使用POST方法，uid通过params加到URL，使用修正后的headers
-            response = session.post(history_url, params=params, headers=request_headers, timeout=(10, 30))
+            response = send_idempotent(session, lambda: session.post(
+                history_url, params=params, headers=request_headers, timeout=(10, 30)))
             if response.status_code != 200:
                 logger.error(f"站点 {site_name} 获取邀请历史失败，状态码: {response.status_code}")
                 return []
@@ -324,52 +560,35 @@ class MTeamHandler(_ISiteHandler):
     
     def _process_invitees(self, invitees: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        处理被邀请人信息
+        处理被邀请人信息：先按列转换上传量、下载量、分享率和状态，再一次性组装记录
         :param invitees: 原始被邀请人列表
         :return: 处理后的被邀请人列表
         """
-        result = []
-        
-        for invitee in invitees:
-            if not isinstance(invitee, dict):
-                    continue
-                
-            # 计算分享率
-            uploaded = float(invitee.get("uploaded", 0))
-            downloaded = float(invitee.get("downloaded", 0))
-            ratio = "∞"
-            
-            if downloaded > 0:
-                ratio = round(uploaded / downloaded, 3)
-                ratio = f"{ratio:.3f}"
-            
-            # 获取状态
-            status = invitee.get("status", "")
-            if status == "CONFIRMED":
-                status = "已确认"
-            elif status == "PENDING":
-                status = "待确认"
-                    
-                    # 创建用户记录
-            user = {
-                "username": invitee.get("username", ""),
-                "email": invitee.get("email", ""),
-                "uploaded": self._format_size(uploaded),
-                "downloaded": self._format_size(downloaded),
-                        "ratio": ratio,
-                        "status": status,
-                "enabled": "Yes" if status == "已确认" else "No",
-                "uid": invitee.get("uid", ""),
-                # 由于API返回数据中没有这些字段，设置为默认值
-                        "seed_bonus": "0",
-                        "seeding": "0",
-                        "seeding_size": "0 B",
-                        "seed_magic": "0",
-                "last_seen": ""
-            }
-            result.append(user)
-            
-        return result
+        rows = [invitee for invitee in invitees if isinstance(invitee, dict)]
+        uploaded = [float(row.get("uploaded", 0)) for row in rows]
+        downloaded = [float(row.get("downloaded", 0)) for row in rows]
+        # 体积文本按值缓存，大量的0流量成员只格式化一次
+        uploaded_text = [bytes_to_size(value) for value in uploaded]
+        downloaded_text = [bytes_to_size(value) for value in downloaded]
+        ratios = [f"{round(up / down, 3):.3f}" if down > 0 else "∞" for up, down in zip(uploaded, downloaded)]
+        statuses = [self.INVITEE_STATUS_TEXT.get(row.get("status", ""), row.get("status", "")) for row in rows]
+
+        # API返回数据中没有做种相关字段，设置为默认值
+        return [{
+            "username": row.get("username", ""),
+            "email": row.get("email", ""),
+            "uploaded": up_text,
+            "downloaded": down_text,
+            "ratio": ratio,
+            "status": status,
+            "enabled": "Yes" if status == "已确认" else "No",
+            "uid": row.get("uid", ""),
+            "seed_bonus": "0",
+            "seeding": "0",
+            "seeding_size": "0 B",
+            "seed_magic": "0",
+            "last_seen": ""
+        } for row, up_text, down_text, ratio, status in zip(rows, uploaded_text, downloaded_text, ratios, statuses)]
     
     def _update_last_browse(self, api_base_url: str, session: requests.Session, site_name: str) -> bool:
         """
@@ -398,89 +617,7 @@ class MTeamHandler(_ISiteHandler):
         try:
             if not isinstance(size_bytes, (int, float)):
                 return str(size_bytes)
-                
-            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                if size_bytes < 1024.0:
-                    return f"{size_bytes:.2f} {unit}"
-                size_bytes /= 1024.0
-            return f"{size_bytes:.2f} PB"
+            return bytes_to_size(size_bytes)
         except Exception as e:
             logger.warning(f"格式化大小失败: {str(e)}")
             return "0 B"
-    
-    def _calculate_ratio_health(self, ratio_str, uploaded, downloaded):
-        """
-        计算分享率健康度
-        """
-        try:
-            # 优先使用上传下载直接计算分享率（如果都是数值类型）
-            if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)) and downloaded > 0:
-                ratio = uploaded / downloaded
-                # 使用计算结果生成适当的健康状态和标签
-                return self._get_health_from_ratio_value(ratio)
-                
-            # 检查是否是无数据情况（上传下载都是0）
-            is_no_data = False
-            if isinstance(uploaded, str) and isinstance(downloaded, str):
-                uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                is_no_data = uploaded_zero and downloaded_zero
-            elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                is_no_data = uploaded == 0 and downloaded == 0
-
-            if is_no_data:
-                return "neutral", ["无数据", "text-grey"]
-                
-            # 处理无限分享率情况 - 增强检测逻辑
-            if not ratio_str:
-                return "neutral", ["无效", "text-grey"]
-                
-            # 统一处理所有表示无限的情况，忽略大小写
-            if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                return "excellent", ["分享率无限", "text-success"]
-                
-            # 标准化分享率字符串 - 正确处理千分位逗号
-            try:
-                # 使用更好的方法完全移除千分位逗号
-                normalized_ratio = ratio_str
-                # 循环处理，直到没有千分位逗号
-                while ',' in normalized_ratio:
-                    # 检查每个逗号是否是千分位分隔符
-                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                    for pos in comma_positions:
-                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                            break
-                    else:
-                        # 如果没有找到千分位逗号，退出循环
-                        break
-                
-                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                normalized_ratio = normalized_ratio.replace(',', '.')
-                ratio = float(normalized_ratio)
-                return self._get_health_from_ratio_value(ratio)
-            except (ValueError, TypeError) as e:
-                logger.error(f"分享率转换错误: {ratio_str}, 错误: {str(e)}")
-                return "neutral", ["无效", "text-grey"]
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"分享率计算错误: {str(e)}")
-            return "neutral", ["无效", "text-grey"]
-            
-    def _get_health_from_ratio_value(self, ratio):
-        """
-        根据分享率数值获取健康状态和标签
-        """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"]
\ No newline at end of file
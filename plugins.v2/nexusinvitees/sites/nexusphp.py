@@ -10,7 +10,10 @@ import requests
 from bs4 import BeautifulSoup
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+from plugins.nexusinvitees.session import set_fact
+from plugins.nexusinvitees.converters import parse_ratio, is_infinite_ratio
+from plugins.nexusinvitees.parse_pool import ParseCall
 
 
 class NexusPhpHandler(_ISiteHandler):
@@ -19,6 +22,10 @@ class NexusPhpHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "nexusphp"
+    # 通用处理器，其他处理器都不匹配时使用
+    is_fallback = True
+    # 实现了异步接口
+    supports_async = True
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -82,23 +89,13 @@ class NexusPhpHandler(_ISiteHandler):
         site_url = site_info.get("url", "")
 
         # 初始化默认结果
-        result = {
-            "invite_status": {
-                "can_invite": False,
-                "reason": "初始化失败", # Default reason
-                "permanent_count": 0,
-                "temporary_count": 0,
-                "bonus": 0,
-                "permanent_invite_price": 0,
-                "temporary_invite_price": 0
-            },
-            "invitees": []
-        }
+        result = self._new_result()
 
         # Flag to track if early check failed
         early_check_failed = False
         early_failure_reason = ""
         html_content = "" # Initialize html_content
+        invite_soup = None # Parsed invite page, shared by login check and parsing
         user_id = None # Initialize user_id
 
         # === Stage 1: Early Connection and Authentication Checks ===
@@ -143,16 +140,17 @@ class NexusPhpHandler(_ISiteHandler):
 
                         # Check page content for login prompts
                         html_content = response.text # Store content for later use if check passes
-                        soup_check = BeautifulSoup(html_content, 'html.parser')
-                        login_elements = soup_check.select('form[action*="takelogin.php"], input[name="password"], div.error:-soup-contains("需要登录")')
-                        login_text_match = re.search(r'(需要登录|请登录|login required|please log in)', html_content, re.IGNORECASE)
+                        # 只解析一次，文档树在登录检测和后宫解析之间共享
+                        invite_soup = self._make_soup(html_content)
 
-                        if login_elements or login_text_match:
+                        if self._is_login_page(invite_soup, html_content):
                             early_failure_reason = "访问邀请页面时未登录或Cookie已失效"
                             logger.error(f"站点 {site_name} 检查失败: {early_failure_reason}")
                             early_check_failed = True
+                            set_fact(session, "logged_in", False)
                         else:
                              logger.debug(f"站点 {site_name} 邀请页面访问成功且已登录。")
+                             set_fact(session, "logged_in", True)
 
                 except requests.exceptions.RequestException as req_err_invite:
                     # Handle network errors during invite page fetch
@@ -177,151 +175,38 @@ class NexusPhpHandler(_ISiteHandler):
             try:
                 logger.debug(f"站点 {site_name} 早期检查通过，开始执行页面解析...")
                 # Parse Invite Page (using html_content from Stage 1)
-                invite_result = self._parse_nexusphp_invite_page(site_name, html_content)
+                invite_result = self._parse_nexusphp_invite_page(site_name, html_content, soup=invite_soup)
 
                 # Update result with parsed data
-                result["invite_status"].update({
-                    "can_invite": invite_result["invite_status"].get("can_invite", False),
-                    "reason": invite_result["invite_status"].get("reason", ""), # Use parsed reason
-                    "permanent_count": invite_result["invite_status"].get("permanent_count", 0),
-                    "temporary_count": invite_result["invite_status"].get("temporary_count", 0),
-                })
-                result["invitees"] = invite_result.get("invitees", [])
+                self._apply_invite_result(result, invite_result)
 
                 # --- Original Bonus Shop Parsing Logic --- (kept exactly as before)
                 try:
-                    bonus_url = urljoin(site_url, "mybonus.php")
-                    bonus_response = session.get(bonus_url, timeout=(10, 30))
-                    if bonus_response.status_code == 200:
-                        bonus_data = self._parse_bonus_shop(site_name, bonus_response.text)
-                        result["invite_status"]["bonus"] = bonus_data["bonus"]
-                        result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
-                        result["invite_status"]["temporary_invite_price"] = bonus_data["temporary_invite_price"]
-                        # --- Original logic to update reason based on bonus --- (kept exactly as before)
-                        if bonus_data["bonus"] > 0:
-                            can_buy_permanent = 0
-                            can_buy_temporary = 0
-                            if bonus_data["permanent_invite_price"] > 0:
-                                can_buy_permanent = int(bonus_data["bonus"] / bonus_data["permanent_invite_price"])
-                            if bonus_data["temporary_invite_price"] > 0:
-                                can_buy_temporary = int(bonus_data["bonus"] / bonus_data["temporary_invite_price"])
-
-                            if result["invite_status"]["reason"] and not result["invite_status"]["can_invite"]:
-                                if can_buy_temporary > 0 or can_buy_permanent > 0:
-                                    invite_method = ""
-                                    if can_buy_temporary > 0 and bonus_data["temporary_invite_price"] > 0:
-                                        invite_method += f"临时邀请({can_buy_temporary}个,{bonus_data['temporary_invite_price']}魔力/个)"
-                                    if can_buy_permanent > 0 and bonus_data["permanent_invite_price"] > 0:
-                                        if invite_method: invite_method += ","
-                                        invite_method += f"永久邀请({can_buy_permanent}个,{bonus_data['permanent_invite_price']}魔力/个)"
-                                    if invite_method:
-                                        result["invite_status"]["reason"] += f"，但您的魔力值({bonus_data['bonus']})可购买{invite_method}"
-                                        if result["invite_status"]["permanent_count"] == 0 and result["invite_status"]["temporary_count"] == 0:
-                                            result["invite_status"]["can_invite"] = True
-                            else:
-                                if can_buy_temporary > 0 or can_buy_permanent > 0:
-                                    invite_method = ""
-                                    if can_buy_temporary > 0 and bonus_data["temporary_invite_price"] > 0:
-                                        invite_method += f"临时邀请({can_buy_temporary}个,{bonus_data['temporary_invite_price']}魔力/个)"
-                                    if can_buy_permanent > 0 and bonus_data["permanent_invite_price"] > 0:
-                                        if invite_method: invite_method += ","
-                                        invite_method += f"永久邀请({can_buy_permanent}个,{bonus_data['permanent_invite_price']}魔力/个)"
-                                    if invite_method and result["invite_status"]["reason"]:
-                                        if result["invite_status"]["reason"] == "可以发送邀请":
-                                            result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
-                                        elif result["invite_status"]["reason"] and "邀请数" in result["invite_status"]["reason"]:
-                                             result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
-                                        elif result["invite_status"]["reason"] and "不足" in result["invite_status"]["reason"]: # 如果原因是数量不足，也追加可购买信息
-                                             result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
-                        # --- End of bonus logic ---
+                    bonus_data = self._get_bonus_shop(session, site_name, site_url, self._parse_bonus_shop)
+                    if bonus_data:
+                        self._apply_bonus_data(result, bonus_data)
                 except Exception as e:
                     logger.warning(f"站点 {site_name} 解析魔力值商店失败: {str(e)}")
 
-                # --- Original Pagination Logic --- (kept exactly as before)
-                if len(result["invitees"]) >= 50:
-                    next_page = 1
-                    max_pages = 100
-                    previous_page_invitee_ids = set() # Initialize set to store previous page invitee identifiers
-                    
-                    # 从第一页数据中提取用户ID用于检测重复
-                    if result["invitees"]:
-                        first_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in result["invitees"]}
-                        previous_page_invitee_ids = first_page_invitee_ids
-                        logger.debug(f"站点 {site_name} 首页收集到 {len(previous_page_invitee_ids)} 个用户ID用于重复检测")
-                    
-                    while next_page < max_pages:
-                        # ... (pagination logic unchanged) ...
-                        next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                        logger.debug(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-                        try:
-                            next_response = session.get(next_page_url, timeout=(10, 30))
-                            next_response.raise_for_status()
-                            next_page_result = self._parse_nexusphp_invite_page(site_name, next_response.text, is_next_page=True)
-                            
-                            # --- Repetition Check START ---
-                            if not next_page_result["invitees"]:
-                                logger.debug(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                                break
-                                
-                            # Extract identifiers (e.g., profile URLs or usernames) for comparison
-                            # Using profile_url is generally more reliable
-                            current_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in next_page_result["invitees"]}
-                            
-                            # Check if the current page content is identical to the previous one
-                            if previous_page_invitee_ids and current_page_invitee_ids == previous_page_invitee_ids:
-                                logger.warning(f"站点 {site_name} 检测到第 {next_page+1} 页内容与上一页重复，停止翻页")
-                                break
-                                
-                            # 只有在内容不重复时，才添加到结果中
-                            result["invitees"].extend(next_page_result["invitees"])
-                            logger.debug(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            
-                            # Update previous page identifiers for the next iteration
-                            previous_page_invitee_ids = current_page_invitee_ids
-                            # --- Repetition Check END ---
-                            
-                            if len(next_page_result["invitees"]) < 50:
-                                logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人，停止获取")
-                                break
-                            next_page += 1
-                        except Exception as e:
-                            logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                            break
+                # --- Pagination: 从分页链接识别页数后并发获取，保留重复页检测 ---
+                if len(result["invitees"]) >= self.invitee_page_size:
+                    result["invitees"].extend(self._fetch_invitee_pages(
+                        session, site_name, html_content, result["invitees"],
+                        page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                        parse_page=ParseCall(self._parse_nexusphp_invite_page, site_name,
+                                             is_next_page=True, key="invitees")
+                    ))
                 else:
                      logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
 
                 # --- Original Send Invite Page Check Logic --- (kept exactly as before)
                 send_invite_url = urljoin(site_url, f"invite.php?id={user_id}&type=new")
                 try:
-                    send_response = session.get(send_invite_url, timeout=(10, 30))
-                    send_response.raise_for_status()
-                    send_page_result = self._parse_nexusphp_invite_page(site_name, send_response.text)
-                    send_reason = send_page_result["invite_status"].get("reason")
-                    send_can_invite = send_page_result["invite_status"].get("can_invite")
-                    # (logic to update status based on send_page_result kept exactly as before) ...
-                    if send_reason:
-                        if ("数量不足" in send_reason or "名额不足" in send_reason or
-                                "没有剩余邀请" in send_reason or "没有足够的邀请" in send_reason):
-                            # 特殊处理："数量不足"说明可以发药但当前没有名额
-                            result["invite_status"]["can_invite"] = True
-                            result["invite_status"]["reason"] = send_reason
-                            logger.debug(f"站点 {site_name} 从发送页面确认邀请状态: {send_reason}")
-                        elif send_can_invite:
-                            # 有原因且可邀请的情况（如"存在可用邀请表单"）
-                            result["invite_status"]["can_invite"] = True
-                            result["invite_status"]["reason"] = send_reason
-                            logger.debug(f"站点 {site_name} 从发送页面更新了邀请状态: {send_reason}")
-                        elif not send_can_invite:
-                            # 有原因且不可邀请的情况
-                            result["invite_status"]["can_invite"] = False
-                            result["invite_status"]["reason"] = send_reason
-                            logger.debug(f"站点 {site_name} 从发送页面更新了邀请状态: {send_reason}")
-                    elif send_can_invite:
-                        # 无原因但可邀请的情况
-                        result["invite_status"]["can_invite"] = True
-                        if not result["invite_status"]["reason"]:
-                            result["invite_status"]["reason"] = "可以发送邀请"
-                        logger.debug(f"站点 {site_name} 从发送页面确认可以发送邀请")
+                    # 邀请数量、魔力值未变化时复用上次的发送页面结果
+                    send_status = self._get_send_page_status(
+                        session, send_invite_url, result["invite_status"],
+                        ParseCall(self._parse_nexusphp_invite_page, site_name))
+                    self._apply_send_status(site_name, result, send_status)
                 except requests.exceptions.RequestException as e:
                     logger.warning(f"访问站点发送邀请页面失败: {str(e)}")
 
@@ -330,7 +215,7 @@ class NexusPhpHandler(_ISiteHandler):
 
                 # --- Special Check for 猫站 (pterclub.com) START ---
                 # Check if the site is 猫站 AND we successfully got a user_id earlier
-                if user_id and ("pterclub.com" in site_url or "猫站" in site_name):
+                if user_id and self._is_pterclub(site_name, site_url):
                     logger.info(f"站点 {site_name} 是猫站，执行特殊VIP等级检查 (访问userdetails.php)...")
                     try:
                         # Construct the user details URL
@@ -343,20 +228,7 @@ class NexusPhpHandler(_ISiteHandler):
                         details_html = details_response.text
                         
                         # Parse the user details page content
-                        soup_pter = BeautifulSoup(details_html, 'html.parser')
-                        
-                        # Look for the specific VIP image tag on the userdetails page
-                        vip_indicator = soup_pter.select_one('img[src*="pic/user_class/vip.png"], img[title*="挪威森林猫 VIP"]')
-                        
-                        if not vip_indicator:
-                            # If VIP indicator is NOT found, override can_invite to False
-                            logger.warning(f"站点 {site_name} 在userdetails.php未检测到VIP等级标识，强制设置为无邀请权限")
-                            result["invite_status"]["can_invite"] = False
-                            result["invite_status"]["reason"] = "需要 VIP (挪威森林猫) 等级才能发送邀请"
-                        else:
-                            logger.debug(f"站点 {site_name} 在userdetails.php检测到VIP等级标识，保持原有邀请状态")
-                            # If VIP indicator is found, do nothing, keep the status determined by previous logic
-                            pass
+                        self._apply_pter_vip(site_name, result, self._has_pter_vip(details_html))
                     except requests.exceptions.RequestException as pter_req_err:
                          logger.error(f"站点 {site_name} 访问userdetails.php时网络错误: {str(pter_req_err)}")
                          # Optionally: decide if this error should make can_invite False
@@ -390,12 +262,257 @@ class NexusPhpHandler(_ISiteHandler):
         # If parsing was successful (not early_check_failed and no parsing error)
         return result
     
-    def _parse_nexusphp_invite_page(self, site_name: str, html_content: str, is_next_page: bool = False) -> Dict[str, Any]:
+    async def parse_invite_page_async(self, site_info: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """
+        异步解析NexusPHP站点邀请页面，流程与 parse_invite_page 相同：
+        请求在事件循环中发送，页面解析通过 session.parse 在线程池（开启时为解析进程池）中执行
+        :param site_info: 站点信息
+        :param session: 已配置好的异步请求会话（AsyncSession）
+        :return: 解析结果字典
+        """
+        site_name = site_info.get("name", "")
+        site_url = site_info.get("url", "")
+        result = self._new_result()
+
+        # === Stage 1: 获取用户ID、访问邀请页面并检查登录状态 ===
+        user_id = await self._get_user_id_async(session, site_url)
+        if not user_id:
+            return self._early_check_failed(site_name, result, "无法获取用户ID，请检查Cookie或站点是否可访问")
+        invite_url = urljoin(site_url, f"invite.php?id={user_id}")
+        logger.debug(f"站点 {site_name} 尝试访问邀请页面: {invite_url}")
+        try:
+            response = await session.get(invite_url, timeout=(10, 30))
+        except Exception as e:
+            return self._early_check_failed(site_name, result, f"访问邀请页面网络错误: {str(e)}")
+        if response.status_code >= 400:
+            return self._early_check_failed(site_name, result, f"访问邀请页面失败: {response.status_code} "
+                                                               f"{getattr(response, 'reason_phrase', '')}")
+        html_content = response.text
+        try:
+            invite_result = await session.parse(self._parse_logged_in_invite_page, site_name, html_content)
+        except Exception as e:
+            return self._early_check_failed(site_name, result, f"访问邀请页面时发生错误: {str(e)}")
+        if invite_result is None:
+            set_fact(session, "logged_in", False)
+            return self._early_check_failed(site_name, result, "访问邀请页面时未登录或Cookie已失效")
+        set_fact(session, "logged_in", True)
+
+        # === Stage 2: 魔力值商店、后宫翻页、发送邀请页面 ===
+        try:
+            self._apply_invite_result(result, invite_result)
+
+            try:
+                bonus_data = await self._get_bonus_shop_async(session, site_name, site_url, self._parse_bonus_shop)
+                if bonus_data:
+                    self._apply_bonus_data(result, bonus_data)
+            except Exception as e:
+                logger.warning(f"站点 {site_name} 解析魔力值商店失败: {str(e)}")
+
+            if len(result["invitees"]) >= self.invitee_page_size:
+                result["invitees"].extend(await self._fetch_invitee_pages_async(
+                    session, site_name, html_content, result["invitees"],
+                    page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                    parse_page=ParseCall(self._parse_nexusphp_invite_page, site_name,
+                                         is_next_page=True, key="invitees")
+                ))
+            else:
+                logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
+
+            send_invite_url = urljoin(site_url, f"invite.php?id={user_id}&type=new")
+            try:
+                send_status = await self._get_send_page_status_async(
+                    session, send_invite_url, result["invite_status"],
+                    ParseCall(self._parse_nexusphp_invite_page, site_name))
+                self._apply_send_status(site_name, result, send_status)
+            except Exception as e:
+                logger.warning(f"访问站点发送邀请页面失败: {str(e)}")
+
+            if result["invitees"]:
+                logger.info(f"站点 {site_name} 共解析到 {len(result['invitees'])} 个后宫成员")
+
+            if self._is_pterclub(site_name, site_url):
+                logger.info(f"站点 {site_name} 是猫站，执行特殊VIP等级检查 (访问userdetails.php)...")
+                try:
+                    details_response = await session.get(urljoin(site_url, f"userdetails.php?id={user_id}"),
+                                                         timeout=(10, 30))
+                    details_response.raise_for_status()
+                    has_vip = await session.parse(self._has_pter_vip, details_response.text)
+                    self._apply_pter_vip(site_name, result, has_vip)
+                except Exception as pter_err:
+                    logger.error(f"站点 {site_name} 执行特殊VIP检查(访问userdetails.php)时出错: {str(pter_err)}")
+        except Exception as parse_err:
+            error_info = f"解析站点 {site_name} 邀请页面时发生意外错误: {str(parse_err)}"
+            logger.error(error_info)
+            logger.error(traceback.format_exc())
+            result["invite_status"]["reason"] = error_info
+        return result
+
+    @staticmethod
+    def _new_result() -> Dict[str, Any]:
+        """
+        初始化默认解析结果
+        """
+        return {
+            "invite_status": {
+                "can_invite": False,
+                "reason": "初始化失败", # Default reason
+                "permanent_count": 0,
+                "temporary_count": 0,
+                "bonus": 0,
+                "permanent_invite_price": 0,
+                "temporary_invite_price": 0
+            },
+            "invitees": []
+        }
+
+    @staticmethod
+    def _early_check_failed(site_name: str, result: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        """
+        早期检查失败：记录原因并跳过页面解析
+        """
+        logger.error(f"站点 {site_name} 检查失败: {reason}")
+        logger.warning(f"站点 {site_name} 因早期检查失败，跳过页面解析。失败原因: {reason}")
+        result["invite_status"]["reason"] = reason
+        return result
+
+    def _parse_logged_in_invite_page(self, site_name: str, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        检查邀请页面的登录状态并解析，文档树在两者之间共享
+        :return: 解析结果，未登录时返回None
+        """
+        invite_soup = self._make_soup(html_content)
+        if self._is_login_page(invite_soup, html_content):
+            return None
+        return self._parse_nexusphp_invite_page(site_name, html_content, soup=invite_soup)
+
+    @staticmethod
+    def _apply_invite_result(result: Dict[str, Any], invite_result: Dict[str, Any]):
+        """
+        用邀请页面的解析结果更新邀请状态与后宫成员
+        """
+        result["invite_status"].update({
+            "can_invite": invite_result["invite_status"].get("can_invite", False),
+            "reason": invite_result["invite_status"].get("reason", ""), # Use parsed reason
+            "permanent_count": invite_result["invite_status"].get("permanent_count", 0),
+            "temporary_count": invite_result["invite_status"].get("temporary_count", 0),
+        })
+        result["invitees"] = invite_result.get("invitees", [])
+
+    @staticmethod
+    def _apply_bonus_data(result: Dict[str, Any], bonus_data: Dict[str, Any]):
+        """
+        用魔力值商店的解析结果更新邀请状态：记录魔力值与邀请价格，魔力值足够购买邀请时补充说明
+        """
+        result["invite_status"]["bonus"] = bonus_data["bonus"]
+        result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
+        result["invite_status"]["temporary_invite_price"] = bonus_data["temporary_invite_price"]
+        # --- Original logic to update reason based on bonus --- (kept exactly as before)
+        if bonus_data["bonus"] > 0:
+            can_buy_permanent = 0
+            can_buy_temporary = 0
+            if bonus_data["permanent_invite_price"] > 0:
+                can_buy_permanent = int(bonus_data["bonus"] / bonus_data["permanent_invite_price"])
+            if bonus_data["temporary_invite_price"] > 0:
+                can_buy_temporary = int(bonus_data["bonus"] / bonus_data["temporary_invite_price"])
+
+            if result["invite_status"]["reason"] and not result["invite_status"]["can_invite"]:
+                if can_buy_temporary > 0 or can_buy_permanent > 0:
+                    invite_method = ""
+                    if can_buy_temporary > 0 and bonus_data["temporary_invite_price"] > 0:
+                        invite_method += f"临时邀请({can_buy_temporary}个,{bonus_data['temporary_invite_price']}魔力/个)"
+                    if can_buy_permanent > 0 and bonus_data["permanent_invite_price"] > 0:
+                        if invite_method: invite_method += ","
+                        invite_method += f"永久邀请({can_buy_permanent}个,{bonus_data['permanent_invite_price']}魔力/个)"
+                    if invite_method:
+                        result["invite_status"]["reason"] += f"，但您的魔力值({bonus_data['bonus']})可购买{invite_method}"
+                        if result["invite_status"]["permanent_count"] == 0 and result["invite_status"]["temporary_count"] == 0:
+                            result["invite_status"]["can_invite"] = True
+            else:
+                if can_buy_temporary > 0 or can_buy_permanent > 0:
+                    invite_method = ""
+                    if can_buy_temporary > 0 and bonus_data["temporary_invite_price"] > 0:
+                        invite_method += f"临时邀请({can_buy_temporary}个,{bonus_data['temporary_invite_price']}魔力/个)"
+                    if can_buy_permanent > 0 and bonus_data["permanent_invite_price"] > 0:
+                        if invite_method: invite_method += ","
+                        invite_method += f"永久邀请({can_buy_permanent}个,{bonus_data['permanent_invite_price']}魔力/个)"
+                    if invite_method and result["invite_status"]["reason"]:
+                        if result["invite_status"]["reason"] == "可以发送邀请":
+                            result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
+                        elif result["invite_status"]["reason"] and "邀请数" in result["invite_status"]["reason"]:
+                             result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
+                        elif result["invite_status"]["reason"] and "不足" in result["invite_status"]["reason"]: # 如果原因是数量不足，也追加可购买信息
+                             result["invite_status"]["reason"] += f"，魔力值({bonus_data['bonus']})还可购买{invite_method}"
+        # --- End of bonus logic ---
+
+    @staticmethod
+    def _apply_send_status(site_name: str, result: Dict[str, Any], send_status: Dict[str, Any]):
+        """
+        用发送邀请页面的状态更新邀请状态
+        """
+        send_reason = send_status.get("reason")
+        send_can_invite = send_status.get("can_invite")
+        # (logic to update status based on send_page_result kept exactly as before) ...
+        if send_reason:
+            if ("数量不足" in send_reason or "名额不足" in send_reason or
+                    "没有剩余邀请" in send_reason or "没有足够的邀请" in send_reason):
+                # 特殊处理："数量不足"说明可以发药但当前没有名额
+                result["invite_status"]["can_invite"] = True
+                result["invite_status"]["reason"] = send_reason
+                logger.debug(f"站点 {site_name} 从发送页面确认邀请状态: {send_reason}")
+            elif send_can_invite:
+                # 有原因且可邀请的情况（如"存在可用邀请表单"）
+                result["invite_status"]["can_invite"] = True
+                result["invite_status"]["reason"] = send_reason
+                logger.debug(f"站点 {site_name} 从发送页面更新了邀请状态: {send_reason}")
+            elif not send_can_invite:
+                # 有原因且不可邀请的情况
+                result["invite_status"]["can_invite"] = False
+                result["invite_status"]["reason"] = send_reason
+                logger.debug(f"站点 {site_name} 从发送页面更新了邀请状态: {send_reason}")
+        elif send_can_invite:
+            # 无原因但可邀请的情况
+            result["invite_status"]["can_invite"] = True
+            if not result["invite_status"]["reason"]:
+                result["invite_status"]["reason"] = "可以发送邀请"
+            logger.debug(f"站点 {site_name} 从发送页面确认可以发送邀请")
+
+    @staticmethod
+    def _is_pterclub(site_name: str, site_url: str) -> bool:
+        """
+        是否为猫站（发送邀请需要VIP等级）
+        """
+        return "pterclub.com" in site_url or "猫站" in site_name
+
+    def _has_pter_vip(self, details_html: str) -> bool:
+        """
+        猫站用户详情页面是否有VIP等级标识
+        """
+        soup_pter = self._make_soup(details_html)
+        # Look for the specific VIP image tag on the userdetails page
+        vip_indicator = soup_pter.select_one('img[src*="pic/user_class/vip.png"], img[title*="挪威森林猫 VIP"]')
+        return bool(vip_indicator)
+
+    @staticmethod
+    def _apply_pter_vip(site_name: str, result: Dict[str, Any], has_vip: bool):
+        """
+        猫站没有VIP等级时强制设置为无邀请权限
+        """
+        if not has_vip:
+            # If VIP indicator is NOT found, override can_invite to False
+            logger.warning(f"站点 {site_name} 在userdetails.php未检测到VIP等级标识，强制设置为无邀请权限")
+            result["invite_status"]["can_invite"] = False
+            result["invite_status"]["reason"] = "需要 VIP (挪威森林猫) 等级才能发送邀请"
+        else:
+            logger.debug(f"站点 {site_name} 在userdetails.php检测到VIP等级标识，保持原有邀请状态")
+
+    def _parse_nexusphp_invite_page(self, site_name: str, html_content: str, is_next_page: bool = False,
+                                    soup: Optional[BeautifulSoup] = None) -> Dict[str, Any]:
         """
         解析NexusPHP邀请页面HTML内容
         :param site_name: 站点名称
         :param html_content: HTML内容
         :param is_next_page: 是否是翻页内容，如果是则只提取后宫成员数据
+        :param soup: 已解析的文档树，传入时不再重复解析
         :return: 解析结果
         """
         result = {
@@ -409,7 +526,8 @@ class NexusPhpHandler(_ISiteHandler):
         }
         
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if soup is None:
+            soup = self._make_soup(html_content)
         
         # 检查是否有特殊标题，如"我的后宫"或"邀請系統"等
         special_title = False
@@ -819,6 +937,7 @@ class NexusPhpHandler(_ISiteHandler):
             
             # 解析表格行
             rows = table.select('tr:not(:first-child)')
+            table_invitees = []
             for row in rows:
                 cells = row.select('td')
                 if not cells or len(cells) < 3:  # 至少需要3列才可能是有效数据
@@ -886,35 +1005,6 @@ class NexusPhpHandler(_ISiteHandler):
                             ratio_text = '∞'
                             
                         invitee["ratio"] = ratio_text
-                        
-                        # 计算分享率数值
-                        try:
-                            if ratio_text == '∞':
-                                invitee["ratio_value"] = 1e20  # 用一个非常大的数代表无限
-                            else:
-                                # 正确处理千分位逗号 - 使用更好的方法完全移除千分位逗号
-                                # 先将所有千分位逗号去掉，然后再处理小数点
-                                normalized_ratio = ratio_text
-                                # 循环处理，直到没有千分位逗号
-                                while ',' in normalized_ratio:
-                                    # 检查每个逗号是否是千分位分隔符
-                                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                    for pos in comma_positions:
-                                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                            break
-                                    else:
-                                        # 如果没有找到千分位逗号，退出循环
-                                        break
-                                
-                                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                                normalized_ratio = normalized_ratio.replace(',', '.')
-                                invitee["ratio_value"] = float(normalized_ratio)
-                        except (ValueError, TypeError):
-                            invitee["ratio_value"] = 0
-                            logger.warning(f"无法解析分享率: {ratio_text}")
                     
                     # 做种数
                     elif any(keyword in header for keyword in ['做种数', '做種數', 'seeding', 'seed']):
@@ -988,48 +1078,14 @@ class NexusPhpHandler(_ISiteHandler):
                 if is_no_data:
                     invitee["data_status"] = "无数据"
                 
-                # 计算分享率健康状态
-                if "ratio_value" in invitee:
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral"
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif invitee["ratio_value"] >= 1e20:
-                        invitee["ratio_health"] = "excellent"
-                    elif invitee["ratio_value"] >= 1.0:
-                        invitee["ratio_health"] = "good"
-                    elif invitee["ratio_value"] >= 0.5:
-                        invitee["ratio_health"] = "warning"
-                    else:
-                        invitee["ratio_health"] = "danger"
-                else:
-                    # 处理没有ratio_value的情况
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral" 
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif "ratio" in invitee and invitee["ratio"] == "∞":
-                        invitee["ratio_health"] = "excellent"
-                    else:
-                        invitee["ratio_health"] = "unknown"
-                
-                # 设置分享率标签
-                if "ratio_label" not in invitee:
-                    if "ratio_health" in invitee:
-                        if invitee["ratio_health"] == "excellent":
-                            invitee["ratio_label"] = ["无限", "green"]
-                        elif invitee["ratio_health"] == "good":
-                            invitee["ratio_label"] = ["良好", "green"]
-                        elif invitee["ratio_health"] == "warning":
-                            invitee["ratio_label"] = ["较低", "orange"]
-                        elif invitee["ratio_health"] == "danger":
-                            invitee["ratio_label"] = ["危险", "red"]
-                        elif invitee["ratio_health"] == "neutral":
-                            invitee["ratio_label"] = ["无数据", "grey"]
-                        else:
-                            invitee["ratio_label"] = ["未知", "grey"]
-                
-                # 将解析到的用户添加到列表中
+                # 将解析到的用户添加到列表中，分享率与健康状态在整表解析后按列计算
                 if invitee.get("username"):
-                    result["invitees"].append(invitee)
+                    table_invitees.append(invitee)
+
+            self._fill_ratio_values(table_invitees)
+            for invitee in table_invitees:
+                self._set_ratio_health(invitee, invitee.get("data_status") == "无数据")
+            result["invitees"].extend(table_invitees)
             
             # 如果已找到用户数据，跳出循环
             if result["invitees"]:
@@ -1041,6 +1097,51 @@ class NexusPhpHandler(_ISiteHandler):
         
         return result
 
+    @staticmethod
+    def _set_ratio_health(invitee: Dict[str, Any], is_no_data: bool):
+        """
+        根据分享率数值设置健康状态与标签
+        :param invitee: 后宫成员（已写入ratio_value）
+        :param is_no_data: 是否为无数据用户
+        """
+        if "ratio_value" in invitee:
+            if is_no_data:
+                invitee["ratio_health"] = "neutral"
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif invitee["ratio_value"] >= 1e20:
+                invitee["ratio_health"] = "excellent"
+            elif invitee["ratio_value"] >= 1.0:
+                invitee["ratio_health"] = "good"
+            elif invitee["ratio_value"] >= 0.5:
+                invitee["ratio_health"] = "warning"
+            else:
+                invitee["ratio_health"] = "danger"
+        else:
+            # 处理没有ratio_value的情况
+            if is_no_data:
+                invitee["ratio_health"] = "neutral" 
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif "ratio" in invitee and invitee["ratio"] == "∞":
+                invitee["ratio_health"] = "excellent"
+            else:
+                invitee["ratio_health"] = "unknown"
+
+        # 设置分享率标签
+        if "ratio_label" not in invitee:
+            if "ratio_health" in invitee:
+                if invitee["ratio_health"] == "excellent":
+                    invitee["ratio_label"] = ["无限", "green"]
+                elif invitee["ratio_health"] == "good":
+                    invitee["ratio_label"] = ["良好", "green"]
+                elif invitee["ratio_health"] == "warning":
+                    invitee["ratio_label"] = ["较低", "orange"]
+                elif invitee["ratio_health"] == "danger":
+                    invitee["ratio_label"] = ["危险", "red"]
+                elif invitee["ratio_health"] == "neutral":
+                    invitee["ratio_label"] = ["无数据", "grey"]
+                else:
+                    invitee["ratio_label"] = ["未知", "grey"]
+
     def _parse_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
         """
         解析魔力值商店页面
@@ -1056,7 +1157,7 @@ class NexusPhpHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self._make_soup(html_content)
             
             # 1. 查找当前魔力值
             # 先尝试从特定HTML元素中提取魔力值
@@ -1453,83 +1554,6 @@ class NexusPhpHandler(_ISiteHandler):
             logger.error(f"解析站点 {site_name} 魔力值商店失败: {str(e)}")
             return result 
 
-    def _calculate_ratio_health(self, ratio_str, uploaded, downloaded):
-        """
-        计算分享率健康度
-        """
-        try:
-            # 优先使用上传下载直接计算分享率（如果都是数值类型）
-            if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)) and downloaded > 0:
-                ratio = uploaded / downloaded
-                # 使用计算结果生成适当的健康状态和标签
-                return self._get_health_from_ratio_value(ratio)
-                
-            # 检查是否是无数据情况（上传下载都是0）
-            is_no_data = False
-            if isinstance(uploaded, str) and isinstance(downloaded, str):
-                uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                is_no_data = uploaded_zero and downloaded_zero
-            elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                is_no_data = uploaded == 0 and downloaded == 0
-
-            if is_no_data:
-                return "neutral", ["无数据", "text-grey"]
-                
-            # 处理无限分享率情况 - 增强检测逻辑
-            if not ratio_str:
-                return "neutral", ["无效", "text-grey"]
-                
-            # 统一处理所有表示无限的情况，忽略大小写
-            if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                return "excellent", ["分享率无限", "text-success"]
-
-            # 标准化分享率字符串 - 正确处理千分位逗号
-            try:
-                # 使用更好的方法完全移除千分位逗号
-                normalized_ratio = ratio_str
-                # 循环处理，直到没有千分位逗号
-                while ',' in normalized_ratio:
-                    # 检查每个逗号是否是千分位分隔符
-                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                    for pos in comma_positions:
-                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                            break
-                    else:
-                        # 如果没有找到千分位逗号，退出循环
-                        break
-                
-                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                normalized_ratio = normalized_ratio.replace(',', '.')
-                ratio = float(normalized_ratio)
-                return self._get_health_from_ratio_value(ratio)
-            except (ValueError, TypeError) as e:
-                logger.error(f"分享率转换错误: {ratio_str}, 错误: {str(e)}")
-                return "neutral", ["无效", "text-grey"]
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"分享率计算错误: {str(e)}")
-            return "neutral", ["无效", "text-grey"]
-            
-    def _get_health_from_ratio_value(self, ratio):
-        """
-        根据分享率数值获取健康状态和标签
-        """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"]
-
     def _check_ratio(self, row_data, row_html):
         """
         检查分享率是否满足条件
@@ -1537,31 +1561,11 @@ class NexusPhpHandler(_ISiteHandler):
         ratio_str = row_data.get("ratio") or ""
         
         # 处理无限分享率情况
-        if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
+        if is_infinite_ratio(ratio_str):
             return True
 
         try:
-            # 标准化字符串 - 正确处理千分位逗号
-            # 使用更好的方法完全移除千分位逗号
-            normalized_ratio = ratio_str
-            # 循环处理，直到没有千分位逗号
-            while ',' in normalized_ratio:
-                # 检查每个逗号是否是千分位分隔符
-                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                for pos in comma_positions:
-                    # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                    if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                        break
-                else:
-                    # 如果没有找到千分位逗号，退出循环
-                    break
-            
-            # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-            normalized_ratio = normalized_ratio.replace(',', '.')
-            
-            ratio = float(normalized_ratio) if normalized_ratio else 0
+            ratio = parse_ratio(ratio_str) if ratio_str else 0
             min_ratio = self.config.get("min_ratio", 0.5)
             if ratio < min_ratio:
                 return False
@@ -9,7 +9,8 @@ import requests
 from bs4 import BeautifulSoup
 
 from app.log import logger
-from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitees.sites import _ISiteHandler
+from plugins.nexusinvitees.parse_pool import ParseCall
 
 
 class XiangdaoHandler(_ISiteHandler):
@@ -18,6 +19,11 @@ class XiangdaoHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "xiangdao"
+    # 象岛站点的特征 - 域名中包含ptvicomo或者站点名称为象岛
+    site_features = [
+        "ptvicomo",   # 象岛官方域名
+        "xiangdao"    # 象岛可能的域名特征
+    ]
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -26,14 +32,8 @@ class XiangdaoHandler(_ISiteHandler):
         :param site_url: 站点URL
         :return: 是否匹配
         """
-        # 象岛站点的特征 - 域名中包含ptvicomo或者站点名称为象岛
-        xiangdao_features = [
-            "ptvicomo",   # 象岛官方域名
-            "xiangdao"    # 象岛可能的域名特征
-        ]
-        
         site_url_lower = site_url.lower()
-        for feature in xiangdao_features:
+        for feature in cls.site_features:
             if feature in site_url_lower:
                 logger.info(f"匹配到象岛站点特征: {feature}")
                 return True
@@ -125,53 +125,18 @@ class XiangdaoHandler(_ISiteHandler):
                 if result["invitees"]:
                     logger.info(f"站点 {site_name} 共解析到 {len(result['invitees'])} 个后宫成员")
             else:
-                # 尝试获取更多页面的后宫成员
-                next_page = 1  # 从第二页开始，因为第一页已经解析过了
-                max_pages = 100  # 防止无限循环
-                
-                # 继续获取后续页面，直到没有更多数据或达到最大页数
-                while next_page < max_pages:
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                    logger.info(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-                    
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        
-                        # 解析下一页数据
-                        next_page_result = self._parse_xiangdao_invitee_page(site_name, site_url, next_response.text)
-                        
-                        # 如果没有找到任何后宫成员，说明已到达最后一页
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                            break
-                        
-                        # 如果当前页面后宫成员少于50人，默认认为没有下一页，避免错误进入下一页
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，默认没有下一页")
-                            # 将当前页数据合并到结果中后退出循环
-                            result["invitees"].extend(next_page_result["invitees"])
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            break
-                        
-                        # 将下一页的后宫成员添加到结果中
-                        result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                        
-                        # 继续下一页
-                        next_page += 1
-                        
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                        break
+                # 获取后续页面的后宫成员：识别页数后并发获取
+                result["invitees"].extend(self._fetch_invitee_pages(
+                    session, site_name, invitee_response.text, result["invitees"],
+                    page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                    parse_page=ParseCall(self._parse_xiangdao_invitee_page, site_name, site_url, key="invitees")
+                ))
             
             # 获取魔力值商店页面，解析魔力值和邀请价格
             try:
-                bonus_url = urljoin(site_url, "mybonus.php")
-                bonus_response = session.get(bonus_url, timeout=(10, 30))
-                if bonus_response.status_code == 200:
-                    # 解析魔力值和邀请价格
-                    bonus_data = self._parse_xiangdao_bonus_shop(site_name, bonus_response.text)
+                # 解析魔力值和邀请价格（缓存期内复用）
+                bonus_data = self._get_bonus_shop(session, site_name, site_url, self._parse_xiangdao_bonus_shop)
+                if bonus_data:
                     # 更新邀请状态
                     result["invite_status"]["bonus"] = bonus_data["bonus"]
                     result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
@@ -365,6 +330,7 @@ class XiangdaoHandler(_ISiteHandler):
         # 找到所有数据行（跳过表头行）
         data_rows = invitee_table.select('tr.rowfollow')
         
+        table_invitees = []
         for row in data_rows:
             cells = row.select('td')
             if len(cells) < len(headers):
@@ -424,20 +390,10 @@ class XiangdaoHandler(_ISiteHandler):
                     # 处理特殊分享率表示
                     if ratio_text.lower() in ['inf.', 'inf', '∞', 'infinite']:
                         invitee["ratio"] = "∞"
-                        invitee["ratio_value"] = 1e20
                     elif ratio_text == '---' or not ratio_text:
                         invitee["ratio"] = "0"
-                        invitee["ratio_value"] = 0
                     else:
                         invitee["ratio"] = ratio_text
-                        
-                        # 尝试解析为浮点数
-                        try:
-                            normalized_ratio = ratio_text.replace(',', '')
-                            invitee["ratio_value"] = float(normalized_ratio)
-                        except (ValueError, TypeError):
-                            logger.warning(f"无法解析分享率: {ratio_text}")
-                            invitee["ratio_value"] = 0
                 
                 # 做种数列
                 elif any(kw in header for kw in ['做种数', 'seeding']):
@@ -488,58 +444,68 @@ class XiangdaoHandler(_ISiteHandler):
                 if "status" not in invitee:
                     invitee["status"] = "已禁用" if is_banned else "已确认"
                 
-                # 计算分享率健康状态
-                if "ratio_value" in invitee:
-                    # 检查是否是无数据情况（上传下载都是0）
-                    uploaded = invitee.get("uploaded", "0")
-                    downloaded = invitee.get("downloaded", "0")
-                    is_no_data = False
-                    
-                    # 检查是否无数据
-                    if isinstance(uploaded, str) and isinstance(downloaded, str):
-                        # 转换为小写进行比较
-                        uploaded_lower = uploaded.lower()
-                        downloaded_lower = downloaded.lower()
-                        # 检查所有可能的0值表示
-                        zero_values = ['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0b', '0.00', '0.0']
-                        is_no_data = any(uploaded_lower == val for val in zero_values) and \
-                                   any(downloaded_lower == val for val in zero_values)
-                    
-                    # 设置数据状态
-                    if is_no_data:
-                        invitee["data_status"] = "无数据"
-                    
-                    # 设置分享率健康状态
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral"
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif invitee["ratio_value"] >= 1e20:
-                        invitee["ratio_health"] = "excellent"
-                        invitee["ratio_label"] = ["无限", "green"]
-                    elif invitee["ratio_value"] >= 1.0:
-                        invitee["ratio_health"] = "good"
-                        invitee["ratio_label"] = ["良好", "green"]
-                    elif invitee["ratio_value"] >= 0.5:
-                        invitee["ratio_health"] = "warning"
-                        invitee["ratio_label"] = ["较低", "orange"]
-                    else:
-                        invitee["ratio_health"] = "danger"
-                        invitee["ratio_label"] = ["危险", "red"]
-                else:
-                    # 如果没有ratio_value，基于其它信息判断
-                    if "ratio" in invitee and invitee["ratio"] == "∞":
-                        invitee["ratio_health"] = "excellent"
-                        invitee["ratio_label"] = ["无限", "green"]
-                    else:
-                        invitee["ratio_health"] = "unknown"
-                        invitee["ratio_label"] = ["未知", "grey"]
-                
-                # 添加用户到结果中
-                result["invitees"].append(invitee)
+                # 添加用户到结果中，分享率与健康状态在整表解析后按列计算
+                table_invitees.append(invitee)
         
+        self._fill_ratio_values(table_invitees)
+        for invitee in table_invitees:
+            self._set_ratio_health(invitee)
+        result["invitees"].extend(table_invitees)
+
         logger.info(f"站点 {site_name} 解析到 {len(result['invitees'])} 个后宫成员")
         return result
     
+    @staticmethod
+    def _set_ratio_health(invitee: Dict[str, Any]):
+        """
+        根据分享率数值设置数据状态、健康状态与标签
+        :param invitee: 后宫成员（已写入ratio_value）
+        """
+        if "ratio_value" in invitee:
+            # 检查是否是无数据情况（上传下载都是0）
+            uploaded = invitee.get("uploaded", "0")
+            downloaded = invitee.get("downloaded", "0")
+            is_no_data = False
+
+            # 检查是否无数据
+            if isinstance(uploaded, str) and isinstance(downloaded, str):
+                # 转换为小写进行比较
+                uploaded_lower = uploaded.lower()
+                downloaded_lower = downloaded.lower()
+                # 检查所有可能的0值表示
+                zero_values = ['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0b', '0.00', '0.0']
+                is_no_data = any(uploaded_lower == val for val in zero_values) and \
+                           any(downloaded_lower == val for val in zero_values)
+
+            # 设置数据状态
+            if is_no_data:
+                invitee["data_status"] = "无数据"
+
+            # 设置分享率健康状态
+            if is_no_data:
+                invitee["ratio_health"] = "neutral"
+                invitee["ratio_label"] = ["无数据", "grey"]
+            elif invitee["ratio_value"] >= 1e20:
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            elif invitee["ratio_value"] >= 1.0:
+                invitee["ratio_health"] = "good"
+                invitee["ratio_label"] = ["良好", "green"]
+            elif invitee["ratio_value"] >= 0.5:
+                invitee["ratio_health"] = "warning"
+                invitee["ratio_label"] = ["较低", "orange"]
+            else:
+                invitee["ratio_health"] = "danger"
+                invitee["ratio_label"] = ["危险", "red"]
+        else:
+            # 如果没有ratio_value，基于其它信息判断
+            if "ratio" in invitee and invitee["ratio"] == "∞":
+                invitee["ratio_health"] = "excellent"
+                invitee["ratio_label"] = ["无限", "green"]
+            else:
+                invitee["ratio_health"] = "unknown"
+                invitee["ratio_label"] = ["未知", "grey"]
+
     def _parse_xiangdao_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
         """
         解析象岛站点魔力值商店页面
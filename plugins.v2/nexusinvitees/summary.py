@@ -0,0 +1,193 @@
+"""
+统计摘要模块：刷新时预先计算站点与全局统计，仪表盘和详情页直接读取
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+from plugins.nexusinvitees.converters import is_infinite_ratio, is_zero_traffic, ratio_to_value
+from plugins.nexusinvitees.records import is_invitee
+
+# 站点数据中被邀请人列表与邀请状态可能所在的路径
+INVITEES_PATHS = (("invitees",), ("data", "invitees"), ("data", "data", "invitees"))
+INVITE_STATUS_PATHS = (("invite_status",), ("data", "invite_status"), ("data", "data", "invite_status"))
+
+# M-Team不可邀请原因中的用户等级、魔力值
+_MT_ROLE_RE = re.compile(r'用户等级\(([^)]+)\)')
+_MT_BONUS_RE = re.compile(r'魔力值\(([0-9.]+)\)')
+# M-Team每个邀请所需魔力
+MT_INVITE_BONUS = 80000
+
+
+def _get_path(data: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """
+    按路径读取嵌套字典
+    """
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def get_site_payload(site_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    从站点数据中取出被邀请人列表和邀请状态（兼容旧版嵌套结构）
+    :param site_data: 站点数据
+    :return: (被邀请人列表, 邀请状态)
+    """
+    invitees = []
+    for path in INVITEES_PATHS:
+        result = _get_path(site_data, path)
+        if result:
+            invitees = result
+            break
+
+    invite_status = {}
+    for path in INVITE_STATUS_PATHS:
+        result = _get_path(site_data, path)
+        if result and isinstance(result, dict):
+            invite_status = result
+            break
+    return invitees, invite_status
+
+
+def get_site_data_error(site_data: Dict[str, Any]) -> str:
+    """
+    提取站点数据中的刷新失败信息
+    """
+    candidates = [site_data, _get_path(site_data, ("data",)), _get_path(site_data, ("data", "data"))]
+    for candidate in candidates:
+        if not isinstance(candidate, dict):
+            continue
+        for key in ("error", "fetch_error"):
+            if candidate.get(key):
+                return str(candidate.get(key))
+    return ""
+
+
+def _count_card_low_ratio(invitees: List[Dict[str, Any]]) -> int:
+    """
+    站点卡片中额外计入的低分享率人数：有流量、非无限且分享率在(0, 1)之间
+    """
+    count = 0
+    for invitee in invitees:
+        if is_zero_traffic(invitee.get('uploaded', '0'), invitee.get('downloaded', '0')):
+            continue
+        ratio_str = invitee.get('ratio', '')
+        if not isinstance(ratio_str, str) or is_infinite_ratio(ratio_str):
+            continue
+        ratio_val = ratio_to_value(ratio_str)
+        if ratio_val is not None and 0 < ratio_val < 1:
+            count += 1
+    return count
+
+
+def _build_prescription(site_data: Dict[str, Any], invite_status: Dict[str, Any],
+                        invitee_count: int, banned: int) -> Dict[str, Any]:
+    """
+    药单行数据
+    """
+    row = {
+        "user_id": site_data.get("user_id", "") or _get_path(site_data, ("data", "user_id")) or "",
+        "invitees": invitee_count,
+        "dead": banned,
+        "can_invite": invite_status.get("can_invite", False),
+        "invite_reason": invite_status.get("reason", "")
+    }
+    error = get_site_data_error(site_data)
+    if error:
+        row["error"] = error
+        return row
+
+    row["p"] = invite_status.get("permanent_count", 0)
+    row["t"] = invite_status.get("temporary_count", 0)
+
+    reason = row["invite_reason"] or ""
+    role_match = _MT_ROLE_RE.search(reason)
+    bonus_match = _MT_BONUS_RE.search(reason)
+    if role_match and bonus_match:
+        # M-Team按魔力值计算可买数量
+        try:
+            row["mt_buyable"] = int(float(bonus_match.group(1)) / MT_INVITE_BONUS)
+        except (ValueError, TypeError):
+            pass
+        return row
+
+    bonus = invite_status.get("bonus", 0) or 0
+    permanent_price = invite_status.get("permanent_invite_price", 0) or 0
+    temporary_price = invite_status.get("temporary_invite_price", 0) or 0
+    if bonus > 0 and (permanent_price > 0 or temporary_price > 0):
+        row["cbp"] = int(bonus / permanent_price) if permanent_price > 0 else 0
+        row["cbt"] = int(bonus / temporary_price) if temporary_price > 0 else 0
+    return row
+
+
+def build_site_summary(site_data: Dict[str, Any], last_update: int = 0) -> Dict[str, Any]:
+    """
+    计算单个站点的统计摘要
+    :param site_data: 站点数据
+    :param last_update: 更新时间
+    :return: 摘要
+    """
+    site_data = site_data if isinstance(site_data, dict) else {}
+    invitees, invite_status = get_site_payload(site_data)
+    invitees = [invitee for invitee in invitees if is_invitee(invitee)]
+
+    banned = 0
+    low_ratio = 0
+    no_data = 0
+    health: Dict[str, int] = {}
+    for invitee in invitees:
+        if str(invitee.get('enabled', '')).lower() == 'no':
+            banned += 1
+        ratio_health = invitee.get('ratio_health')
+        if ratio_health in ('warning', 'danger'):
+            low_ratio += 1
+        elif ratio_health == 'neutral':
+            no_data += 1
+        if ratio_health:
+            health[ratio_health] = health.get(ratio_health, 0) + 1
+
+    return {
+        "last_update": last_update,
+        "invitee_count": len(invitees),
+        "banned": banned,
+        "low_ratio": low_ratio,
+        "card_low_ratio": low_ratio + _count_card_low_ratio(invitees),
+        "no_data": no_data,
+        "health": health,
+        "permanent_count": invite_status.get("permanent_count", 0) or 0,
+        "temporary_count": invite_status.get("temporary_count", 0) or 0,
+        "error": get_site_data_error(site_data),
+        "prescription": _build_prescription(site_data, invite_status, len(invitees), banned)
+    }
+
+
+def build_global_summary(site_summaries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总全部站点摘要
+    :param site_summaries: 站点名称 -> 站点摘要
+    :return: 全局摘要
+    """
+    total = {
+        "sites": len(site_summaries),
+        "invitees": 0,
+        "banned": 0,
+        "low_ratio": 0,
+        "no_data": 0,
+        "permanent_count": 0,
+        "temporary_count": 0,
+        "failed": 0,
+        "last_update": 0
+    }
+    for summary in site_summaries.values():
+        total["invitees"] += summary.get("invitee_count", 0)
+        total["banned"] += summary.get("banned", 0)
+        total["low_ratio"] += summary.get("low_ratio", 0)
+        total["no_data"] += summary.get("no_data", 0)
+        total["permanent_count"] += summary.get("permanent_count", 0)
+        total["temporary_count"] += summary.get("temporary_count", 0)
+        if summary.get("error"):
+            total["failed"] += 1
+        total["last_update"] = max(total["last_update"], summary.get("last_update", 0) or 0)
+    return total
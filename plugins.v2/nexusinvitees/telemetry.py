@@ -0,0 +1,195 @@
+"""
+刷新耗时统计模块：按站点、按阶段记录每次刷新的网络耗时、解析耗时、页面数和下载量
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+from urllib.parse import urlparse
+
+# 请求阶段
+PHASE_LOGIN = "login"
+PHASE_USERCP = "usercp"
+PHASE_INVITE = "invite"
+PHASE_PAGINATION = "pagination"
+PHASE_SEND_INVITE = "send_invite"
+PHASE_BONUS_SHOP = "bonus_shop"
+PHASE_OTHER = "other"
+
+PHASE_NAMES = {
+    PHASE_LOGIN: "首页",
+    PHASE_USERCP: "用户信息",
+    PHASE_INVITE: "邀请页",
+    PHASE_PAGINATION: "后宫翻页",
+    PHASE_SEND_INVITE: "发送邀请页",
+    PHASE_BONUS_SHOP: "魔力商店",
+    PHASE_OTHER: "其他"
+}
+
+# 保留最近的刷新次数
+DEFAULT_KEEP_RUNS = 20
+
+
+def classify_phase(url: str) -> str:
+    """
+    按请求地址判断所属阶段
+    :param url: 请求地址
+    :return: 阶段
+    """
+    parsed = urlparse(str(url or ""))
+    path = parsed.path.lower()
+    query = parsed.query.lower()
+    if "mybonus" in path:
+        return PHASE_BONUS_SHOP
+    if "invite" in path:
+        if "type=new" in query:
+            return PHASE_SEND_INVITE
+        if "page=" in query:
+            return PHASE_PAGINATION
+        return PHASE_INVITE
+    if "usercp" in path or "userdetails" in path or "/member/" in path:
+        return PHASE_USERCP
+    if path in ("", "/") or path.endswith("index.php"):
+        return PHASE_LOGIN
+    return PHASE_OTHER
+
+
+class SiteTelemetry:
+    """
+    单个站点单次刷新的耗时统计，请求可能来自翻页线程，写入加锁
+    - 网络耗时：请求发出到响应读取完成，按阶段累计
+    - 解析耗时：处理器线程消耗的CPU时间（网络等待不占CPU，不计入）
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.parse_time = 0.0
+        self._lock = threading.Lock()
+        # 嵌套统计时只计最外层
+        self._local = threading.local()
+
+    def add_request(self, url: str, elapsed: float, size: int):
+        """
+        记录一次实际发出的请求
+        :param url: 请求地址
+        :param elapsed: 耗时（秒）
+        :param size: 响应体字节数
+        """
+        phase = classify_phase(url)
+        with self._lock:
+            stats = self.phases.setdefault(phase, {"time": 0.0, "requests": 0, "bytes": 0})
+            stats["time"] += elapsed
+            stats["requests"] += 1
+            stats["bytes"] += size
+
+    def add_parse(self, seconds: float):
+        """
+        累计解析耗时
+        """
+        with self._lock:
+            self.parse_time += max(seconds, 0.0)
+
+    @contextmanager
+    def measure_parse(self) -> Iterator[None]:
+        """
+        统计代码块在当前线程消耗的CPU时间
+        """
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if not depth:
+                self.add_parse(time.thread_time() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出统计结果
+        """
+        with self._lock:
+            phases = {phase: {"time": round(stats["time"], 3), "requests": stats["requests"],
+                              "bytes": stats["bytes"]}
+                      for phase, stats in self.phases.items()}
+            return {
+                "network": round(sum(stats["time"] for stats in self.phases.values()), 3),
+                "parse": round(self.parse_time, 3),
+                "pages": sum(stats["requests"] for stats in self.phases.values()),
+                "bytes": sum(stats["bytes"] for stats in self.phases.values()),
+                "phases": phases
+            }
+
+
+def response_size(response: Any) -> int:
+    """
+    获取响应大小，优先使用Content-Length（压缩后的传输大小）
+    """
+    try:
+        length = response.headers.get("Content-Length")
+        if length:
+            return int(length)
+        return len(response.content or b"")
+    except Exception:
+        return 0
+
+
+def measure_parse(session: Any):
+    """
+    统计会话所属站点的解析耗时，会话不带统计时不做任何事
+    :param session: 请求会话
+    """
+    telemetry = getattr(session, "telemetry", None)
+    if isinstance(telemetry, SiteTelemetry):
+        return telemetry.measure_parse()
+    return _noop()
+
+
+@contextmanager
+def _noop() -> Iterator[None]:
+    yield
+
+
+def build_site_record(request_stats: Dict[str, Any], elapsed: float, invitees: int, success: bool) -> Dict[str, Any]:
+    """
+    组装单个站点一次刷新的统计记录
+    :param request_stats: 会话请求统计（含telemetry）
+    :param elapsed: 站点总耗时
+    :param invitees: 后宫成员数
+    :param success: 是否成功
+    """
+    telemetry = dict((request_stats or {}).get("telemetry") or {})
+    return {
+        "elapsed": round(elapsed, 3),
+        "network": telemetry.get("network", 0.0),
+        "parse": telemetry.get("parse", 0.0),
+        "pages": telemetry.get("pages", 0),
+        "bytes": telemetry.get("bytes", 0),
+        "cache_hits": (request_stats or {}).get("cache_hits", 0),
+        "page_cache_hits": (request_stats or {}).get("page_cache_hits", 0),
+        "invitee_page_hits": (request_stats or {}).get("invitee_page_hits", 0),
+        "invitee_page_misses": (request_stats or {}).get("invitee_page_misses", 0),
+        "invitees": invitees,
+        "success": success,
+        "phases": telemetry.get("phases", {})
+    }
+
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    汇总最近几次刷新中每个站点的最新耗时与平均耗时
+    :param runs: 刷新记录，按时间倒序
+    :return: 站点名称 -> {"last": 最近一次记录, "avg_elapsed": 平均耗时, "max_elapsed": 最大耗时, "runs": 次数}
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for run in runs:
+        for site_name, record in (run.get("sites") or {}).items():
+            item = summary.setdefault(site_name, {"last": dict(record, time=run.get("time")),
+                                                  "elapsed": []})
+            item["elapsed"].append(record.get("elapsed", 0.0))
+    for item in summary.values():
+        elapsed = item.pop("elapsed")
+        item["runs"] = len(elapsed)
+        item["avg_elapsed"] = round(sum(elapsed) / len(elapsed), 3)
+        item["max_elapsed"] = round(max(elapsed), 3)
+    return summary